@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import tempfile
+import time
+
+# --- Almacén de resultados de la sesión ---
+# Cada línea de resultado es una fila (id, hora, proveedor, entidad, estado, texto, url).
+# Todas las filas se escriben en un SQLite temporal en disco, por lotes; en memoria solo
+# se mantiene una ventana con las más recientes, que es lo que se pinta casi siempre
+# (la vista siguiendo el final). Los filtros y ordenaciones se resuelven en SQLite.
+
+VENTANA_MEMORIA = 5000
+COLUMNAS = ("id", "hora", "proveedor", "entidad", "estado", "texto", "url")
+COLUMNAS_FILTRABLES = ("proveedor", "entidad", "estado")
+
+
+class AlmacenResultados:
+    def __init__(self, ruta=None, ventana=VENTANA_MEMORIA):
+        self.ventana = ventana
+        self._temporal = ruta is None
+        if ruta is None:
+            fd, ruta = tempfile.mkstemp(prefix="wicosintx_resultados_", suffix=".sqlite")
+            os.close(fd)
+        self.ruta = ruta
+        self._con = sqlite3.connect(ruta)
+        self._con.execute("PRAGMA journal_mode=OFF")
+        self._con.execute("PRAGMA synchronous=OFF")
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS resultados ("
+            " id INTEGER PRIMARY KEY, hora REAL, proveedor TEXT, entidad TEXT,"
+            " estado TEXT, texto TEXT, url TEXT)"
+        )
+        for columna in COLUMNAS_FILTRABLES:
+            self._con.execute(f"CREATE INDEX IF NOT EXISTS idx_resultados_{columna} ON resultados ({columna})")
+        self._recientes = []  # filas más nuevas, en orden de id
+        self.total = self._con.execute("SELECT COUNT(*) FROM resultados").fetchone()[0]
+
+    def agregar_lote(self, filas):
+        """Añade [(proveedor, entidad, estado, texto, url), ...] y devuelve el id de la primera."""
+        ahora = time.time()
+        primer_id = self.total + 1
+        completas = [(primer_id + i, ahora) + tuple(fila) for i, fila in enumerate(filas)]
+        with self._con:
+            self._con.executemany("INSERT INTO resultados VALUES (?, ?, ?, ?, ?, ?, ?)", completas)
+        self.total += len(completas)
+        self._recientes.extend(completas)
+        # Se recorta por bloques para no mover la lista en cada inserción
+        if len(self._recientes) > 2 * self.ventana:
+            del self._recientes[:-self.ventana]
+        return primer_id
+
+    def _where(self, filtro):
+        condiciones, parametros = [], []
+        for columna in COLUMNAS_FILTRABLES:
+            if filtro.get(columna):
+                condiciones.append(f"{columna} = ?")
+                parametros.append(filtro[columna])
+        if filtro.get("texto"):
+            condiciones.append("texto LIKE ?")
+            parametros.append(f"%{filtro['texto']}%")
+        return (" WHERE " + " AND ".join(condiciones)) if condiciones else "", parametros
+
+    def contar(self, filtro=None):
+        if not filtro or not any(filtro.values()):
+            return self.total
+        where, parametros = self._where(filtro)
+        return self._con.execute(f"SELECT COUNT(*) FROM resultados{where}", parametros).fetchone()[0]
+
+    def pagina(self, desde, cantidad, filtro=None, orden="id", descendente=False):
+        """Filas [desde, desde + cantidad) de la vista filtrada y ordenada."""
+        if orden not in COLUMNAS:
+            raise ValueError(f"Columna de orden no válida: {orden}")
+        sin_filtro = not filtro or not any(filtro.values())
+        if sin_filtro and orden == "id" and not descendente and self._recientes:
+            # Camino rápido: los ids son consecutivos, así que la posición da el id
+            primer_id_memoria = self._recientes[0][0]
+            if desde + 1 >= primer_id_memoria:
+                inicio = desde + 1 - primer_id_memoria
+                return self._recientes[inicio:inicio + cantidad]
+        where, parametros = self._where(filtro or {})
+        sentido = "DESC" if descendente else "ASC"
+        return self._con.execute(
+            f"SELECT {', '.join(COLUMNAS)} FROM resultados{where} ORDER BY {orden} {sentido}, id LIMIT ? OFFSET ?",
+            parametros + [cantidad, desde],
+        ).fetchall()
+
+    def fila(self, id_fila):
+        if not 1 <= id_fila <= self.total:
+            return None
+        if self._recientes and id_fila >= self._recientes[0][0]:
+            return self._recientes[id_fila - self._recientes[0][0]]
+        return self._con.execute(f"SELECT {', '.join(COLUMNAS)} FROM resultados WHERE id = ?", (id_fila,)).fetchone()
+
+    def url(self, id_fila):
+        fila = self.fila(id_fila)
+        return fila[6] if fila else None
+
+    def distintos(self, columna):
+        """Valores distintos de una columna filtrable, para poblar los desplegables."""
+        if columna not in COLUMNAS_FILTRABLES:
+            raise ValueError(f"Columna no filtrable: {columna}")
+        filas = self._con.execute(f"SELECT DISTINCT {columna} FROM resultados WHERE {columna} IS NOT NULL ORDER BY 1")
+        return [valor for (valor,) in filas]
+
+    def limpiar(self):
+        with self._con:
+            self._con.execute("DELETE FROM resultados")
+        self._recientes.clear()
+        self.total = 0
+
+    def cerrar(self):
+        self._con.close()
+        if self._temporal:
+            try:
+                os.remove(self.ruta)
+            except OSError:
+                pass
@@ -0,0 +1,398 @@
+import argparse
+import csv
+import ipaddress
+import json
+import mmap
+import os
+import socket
+import struct
+import sys
+import time
+from array import array
+from itertools import islice
+
+from configuracion import crear_directorio, ruta_datos
+
+# --- Base local de IPs (país, ASN, organización...) ---
+# Se construye una vez a partir de ficheros CSV de rangos (los gratuitos de ipinfo,
+# GeoLite2 en CSV, IP2Location, db-ip...) y se guarda como un árbol binario de prefijos
+# al estilo de MMDB: cada nodo son dos registros de 32 bits (bit 0 / bit 1) que apuntan
+# a otro nodo, a "sin datos" o a un registro de la sección de datos. El fichero se abre
+# con mmap, así que no hay que cargarlo entero y abrirlo es inmediato; una búsqueda son
+# como mucho 32 saltos (128 en IPv6) y responde en microsegundos sin salir a la red.
+# IPv4 va dentro del árbol de IPv6, bajo ::ffff:0:0/96.
+#
+#   python base_ip.py importar ip_country_asn.csv GeoLite2-ASN-Blocks-IPv4.csv
+#   python base_ip.py buscar ips.txt -o ips.jsonl
+
+BASE_IP_FILE = "base_ip.bin"
+MAGIA = b"WXIPDB1\0"
+CABECERA = struct.Struct("<8sIIQI")  # magia, nodos, bytes de datos, fecha, bytes de metadatos
+LONGITUD_DATO = struct.Struct("<I")
+TAMANO_BLOQUE_LOTE = 65536
+PREFIJO_IPV4 = 0xFFFF << 32  # ::ffff:0:0/96
+
+# Nombre normalizado de cada campo y las columnas que se aceptan para él
+ALIAS_COLUMNAS = {
+    "codigo_pais": ("country", "country_code", "country_iso_code", "cc", "country_code2"),
+    "pais": ("country_name",),
+    "continente": ("continent", "continent_code", "continent_name"),
+    "asn": ("asn", "autonomous_system_number", "as_number"),
+    "organizacion": ("as_name", "org", "organization", "organisation", "autonomous_system_organization", "isp", "as_organization"),
+    "dominio_as": ("as_domain",),
+    "region": ("region", "region_name", "subdivision_1_name", "state"),
+    "ciudad": ("city", "city_name"),
+    "latitud": ("latitude", "lat"),
+    "longitud": ("longitude", "lon", "lng"),
+}
+COLUMNAS_RED = ("network", "cidr", "prefix", "red")
+COLUMNAS_INICIO = ("start_ip", "ip_from", "range_start", "first_ip", "ip_start", "inicio")
+COLUMNAS_FIN = ("end_ip", "ip_to", "range_end", "last_ip", "ip_end", "fin")
+CAMPOS_NUMERICOS = ("latitud", "longitud")
+
+
+class ErrorBaseIP(Exception):
+    """No hay base local o el fichero no es válido."""
+
+
+def ip_a_entero(texto):
+    """Dirección como entero en el espacio de IPv6 (IPv4 mapeada en ::ffff:0:0/96)."""
+    texto = texto.strip()
+    try:
+        if ":" in texto:
+            return int.from_bytes(socket.inet_pton(socket.AF_INET6, texto), "big")
+        return PREFIJO_IPV4 | int.from_bytes(socket.inet_pton(socket.AF_INET, texto), "big")
+    except OSError:
+        raise ValueError(f"Dirección IP no válida: {texto!r}")
+
+
+def _limite_rango(texto):
+    # IP2Location y algunos volcados usan enteros en lugar de direcciones
+    texto = texto.strip()
+    if texto.isdigit():
+        entero = int(texto)
+        return PREFIJO_IPV4 | entero if entero <= 0xFFFFFFFF else entero
+    return ip_a_entero(texto)
+
+
+def _prefijos(inicio, fin):
+    """Descompone [inicio, fin] en prefijos (valor, longitud) del espacio de 128 bits."""
+    while inicio <= fin:
+        # El bloque más grande alineado en 'inicio' que no se pasa de 'fin'
+        tamano = (inicio & -inicio).bit_length() - 1 if inicio else 128
+        while inicio + (1 << tamano) - 1 > fin:
+            tamano -= 1
+        yield inicio, 128 - tamano
+        inicio += 1 << tamano
+
+
+def _normalizar_fila(fila, columnas):
+    dato = {}
+    for campo, columna in columnas.items():
+        valor = (fila.get(columna) or "").strip()
+        if not valor:
+            continue
+        if campo == "asn":
+            valor = "AS" + valor.upper().removeprefix("AS")
+        elif campo in CAMPOS_NUMERICOS:
+            try:
+                valor = float(valor)
+            except ValueError:
+                continue
+        dato[campo] = valor
+    return dato
+
+
+def leer_rangos_csv(ruta):
+    """Genera (inicio, fin, dato) de un CSV de rangos con cabecera (ver ALIAS_COLUMNAS)."""
+    with open(ruta, "r", encoding="utf-8", newline="") as f:
+        lector = csv.DictReader(f)
+        cabecera = {c.strip().lower(): c for c in lector.fieldnames or ()}
+        columnas = {}
+        for campo, alias in ALIAS_COLUMNAS.items():
+            columna = next((cabecera[a] for a in alias if a in cabecera), None)
+            if columna:
+                columnas[campo] = columna
+        red = next((cabecera[c] for c in COLUMNAS_RED if c in cabecera), None)
+        inicio = next((cabecera[c] for c in COLUMNAS_INICIO if c in cabecera), None)
+        fin = next((cabecera[c] for c in COLUMNAS_FIN if c in cabecera), None)
+        if not red and not (inicio and fin):
+            raise ErrorBaseIP(f"{ruta}: no hay columna 'network' ni 'start_ip'/'end_ip'")
+        if not columnas:
+            raise ErrorBaseIP(f"{ruta}: ninguna columna reconocida ({', '.join(ALIAS_COLUMNAS)})")
+
+        for fila in lector:
+            dato = _normalizar_fila(fila, columnas)
+            if not dato:
+                continue
+            try:
+                if red:
+                    bloque = ipaddress.ip_network(fila[red].strip(), strict=False)
+                    desplazamiento = PREFIJO_IPV4 if bloque.version == 4 else 0
+                    yield (desplazamiento | int(bloque.network_address),
+                           desplazamiento | int(bloque.broadcast_address), dato)
+                else:
+                    yield _limite_rango(fila[inicio]), _limite_rango(fila[fin]), dato
+            except ValueError:
+                continue  # filas de comentario o direcciones mal formadas
+
+
+class _Constructor:
+    """Árbol de prefijos en memoria: dos listas de registros (hijo 0 / hijo 1) por nodo."""
+
+    VACIO = -1
+
+    def __init__(self):
+        self.izquierda = [self.VACIO]
+        self.derecha = [self.VACIO]
+        self.datos = []        # índice de dato -> dict
+        self._indices = {}     # json del dato -> índice (se guarda una vez cada dato distinto)
+        self._raiz_v4 = None   # nodo de ::ffff:0:0/96
+        self._combinados = {}  # (registro heredado, id del dato) -> índice
+
+    def _dato(self, dato):
+        clave = json.dumps(dato, sort_keys=True, ensure_ascii=False)
+        indice = self._indices.get(clave)
+        if indice is None:
+            indice = self._indices[clave] = len(self.datos)
+            self.datos.append(dato)
+        return indice
+
+    def _nuevo_nodo(self, izquierda, derecha):
+        self.izquierda.append(izquierda)
+        self.derecha.append(derecha)
+        return len(self.izquierda) - 1
+
+    def insertar(self, valor, longitud, dato):
+        """
+        Los prefijos deben llegar de menos a más específicos: al bajar por un registro
+        con datos se parte en un nodo cuyos dos hijos heredan esos datos, y el prefijo
+        más específico combina lo heredado con lo suyo (gana lo suyo).
+        """
+        nodo, desde = 0, 0
+        if longitud > 96 and valor >> 32 == 0xFFFF:
+            # IPv4: los 96 primeros niveles son siempre los mismos
+            if self._raiz_v4 is None:
+                self._raiz_v4 = self._bajar_creando(PREFIJO_IPV4, 0, 96)
+            nodo, desde = self._raiz_v4, 96
+        nodo = self._bajar_creando(valor, nodo, longitud - 1, desde)
+        hijos = self.derecha if (valor >> (128 - longitud)) & 1 else self.izquierda
+        registro = hijos[nodo]
+        # Todos los prefijos de una fila comparten el mismo dict: se serializa una vez por combinación
+        clave = (registro if registro < self.VACIO else self.VACIO, id(dato))
+        indice = self._combinados.get(clave)
+        if indice is None:
+            heredado = self.datos[-registro - 2] if registro < self.VACIO else {}
+            indice = self._combinados[clave] = self._dato({**heredado, **dato})
+        hijos[nodo] = -indice - 2
+
+    def _bajar_creando(self, valor, nodo, hasta, desde=0):
+        for i in range(desde, hasta):
+            hijos = self.derecha if (valor >> (127 - i)) & 1 else self.izquierda
+            registro = hijos[nodo]
+            if registro < 0:
+                # Vacío o con datos: se parte y los dos hijos heredan lo que hubiera
+                registro = hijos[nodo] = self._nuevo_nodo(registro, registro)
+            nodo = registro
+        return nodo
+
+    def escribir(self, ruta, metadatos):
+        """Serializa el árbol: registros < nodos son nodos, == nodos vacío, > nodos datos."""
+        nodos = len(self.izquierda)
+        datos, desplazamientos = bytearray(), []
+        for dato in self.datos:
+            desplazamientos.append(len(datos))
+            codificado = json.dumps(dato, ensure_ascii=False).encode("utf-8")
+            datos += LONGITUD_DATO.pack(len(codificado)) + codificado
+        if nodos + 1 + len(datos) > 0xFFFFFFFF:
+            raise ErrorBaseIP("La base no cabe en registros de 32 bits")
+
+        registro = lambda r: r if r >= 0 else (nodos if r == self.VACIO else nodos + 1 + desplazamientos[-r - 2])
+        registros = array("I", (0,)) * (2 * nodos)
+        for n in range(nodos):
+            registros[2 * n] = registro(self.izquierda[n])
+            registros[2 * n + 1] = registro(self.derecha[n])
+        if sys.byteorder != "little":
+            registros.byteswap()
+
+        meta = json.dumps(metadatos, ensure_ascii=False).encode("utf-8")
+        temporal = ruta + ".tmp"
+        with open(temporal, "wb") as f:
+            f.write(CABECERA.pack(MAGIA, nodos, len(datos), int(time.time()), len(meta)))
+            f.write(meta)
+            f.write(registros.tobytes())
+            f.write(datos)
+        os.replace(temporal, ruta)
+        return nodos
+
+
+def importar(rutas, destino=None):
+    """Construye la base a partir de uno o varios CSV; los campos de todos se combinan. Devuelve metadatos."""
+    prefijos = []
+    for ruta in rutas:
+        for inicio, fin, dato in leer_rangos_csv(ruta):
+            prefijos.extend((valor, longitud, dato) for valor, longitud in _prefijos(inicio, fin))
+    if not prefijos:
+        raise ErrorBaseIP("Los ficheros no contienen rangos utilizables")
+    # De menos a más específicos (y en el orden de los ficheros si empatan): manda el más específico
+    prefijos.sort(key=lambda p: p[1])
+    constructor = _Constructor()
+    for valor, longitud, dato in prefijos:
+        constructor.insertar(valor, longitud, dato)
+    campos = sorted({c for dato in constructor.datos for c in dato})
+    metadatos = {"origen": [os.path.basename(r) for r in rutas], "prefijos": len(prefijos),
+                 "datos_distintos": len(constructor.datos), "campos": campos}
+    metadatos["nodos"] = constructor.escribir(crear_directorio(destino or ruta_datos(BASE_IP_FILE)), metadatos)
+    return metadatos
+
+
+class BaseIP:
+    def __init__(self, ruta=None):
+        ruta = ruta or ruta_datos(BASE_IP_FILE)
+        try:
+            self._fichero = open(ruta, "rb")
+        except FileNotFoundError:
+            raise ErrorBaseIP(f"No hay base local de IPs ({ruta}). Impórtala desde un CSV de rangos.")
+        try:
+            self._mm = mmap.mmap(self._fichero.fileno(), 0, access=mmap.ACCESS_READ)
+            magia, self.nodos, tamano_datos, self.fecha, tamano_meta = CABECERA.unpack_from(self._mm, 0)
+            if magia != MAGIA:
+                raise ErrorBaseIP(f"{ruta} no es una base de IPs de WicOsintX")
+            inicio = CABECERA.size
+            self.metadatos = json.loads(self._mm[inicio:inicio + tamano_meta])
+            inicio += tamano_meta
+            fin = inicio + 8 * self.nodos
+            vista = memoryview(self._mm)[inicio:fin]
+            if sys.byteorder == "little":
+                self._registros = vista.cast("I")
+            else:
+                self._registros = array("I")
+                self._registros.frombytes(vista)
+                self._registros.byteswap()
+            self._inicio_datos = fin
+        except (ValueError, struct.error) as e:
+            self.cerrar()
+            raise ErrorBaseIP(f"{ruta} está dañado: {e}")
+        self._datos = {}  # registro -> dict ya decodificado
+        self._raiz_v4 = self._bajar(PREFIJO_IPV4, 96)[0]
+
+    @property
+    def campos(self):
+        return self.metadatos.get("campos", [])
+
+    def _bajar(self, entero, bits, nodo=0, desde=127):
+        """Baja 'bits' niveles desde 'nodo'; devuelve (registro alcanzado, bits recorridos)."""
+        registros, nodos = self._registros, self.nodos
+        for i in range(bits):
+            nodo = registros[2 * nodo + ((entero >> (desde - i)) & 1)]
+            if nodo >= nodos:
+                return nodo, i + 1
+        return nodo, bits
+
+    def _dato(self, registro):
+        if registro <= self.nodos:
+            return None
+        dato = self._datos.get(registro)
+        if dato is None:
+            inicio = self._inicio_datos + registro - self.nodos - 1
+            longitud, = LONGITUD_DATO.unpack_from(self._mm, inicio)
+            dato = self._datos[registro] = json.loads(self._mm[inicio + 4:inicio + 4 + longitud])
+        return dato
+
+    def _buscar_entero(self, entero):
+        """(dato o None, longitud del prefijo que ha respondido)."""
+        if entero >> 32 == 0xFFFF and self._raiz_v4 < self.nodos:
+            registro, bits = self._bajar(entero, 32, self._raiz_v4, 31)
+            return self._dato(registro), 96 + bits
+        registro, bits = self._bajar(entero, 128)
+        return self._dato(registro), bits
+
+    def buscar(self, ip):
+        """Datos de la IP ({codigo_pais, asn, organizacion, ...}) o None si no está en la base."""
+        return self._buscar_entero(ip_a_entero(ip))[0]
+
+    def buscar_lote(self, ips):
+        """
+        Genera (ip, dato) para cada IP de 'ips' (cualquier iterable, en el mismo orden).
+        Cada bloque se recorre ordenado, y las IPs que caen en el mismo prefijo que la
+        anterior no vuelven a bajar por el árbol: en listas sacadas de logs, casi ninguna.
+        Las IPs mal formadas dan dato None.
+        """
+        ips = iter(ips)
+        while True:
+            bloque = list(islice(ips, TAMANO_BLOQUE_LOTE))
+            if not bloque:
+                return
+            enteros = []
+            for ip in bloque:
+                try:
+                    enteros.append(ip_a_entero(ip))
+                except ValueError:
+                    enteros.append(-1)
+            resultados = [None] * len(bloque)
+            base = mascara = -2
+            dato = None
+            for i in sorted(range(len(bloque)), key=enteros.__getitem__):
+                entero = enteros[i]
+                if entero < 0:
+                    continue
+                if entero & mascara != base:
+                    dato, bits = self._buscar_entero(entero)
+                    mascara = ((1 << 128) - 1) ^ ((1 << (128 - bits)) - 1)
+                    base = entero & mascara
+                resultados[i] = dato
+            yield from zip(bloque, resultados)
+
+    def cerrar(self):
+        registros = getattr(self, "_registros", None)
+        if isinstance(registros, memoryview):
+            registros.release()
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+        self._fichero.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Base local de IPs: importa CSV de rangos y resuelve IPs sin salir a la red.")
+    parser.add_argument("--base", help=f"fichero de la base (por defecto {BASE_IP_FILE} en el directorio de datos)")
+    sub = parser.add_subparsers(dest="orden", required=True)
+    p_importar = sub.add_parser("importar", help="construye la base desde uno o varios CSV")
+    p_importar.add_argument("csv", nargs="+")
+    p_buscar = sub.add_parser("buscar", help="resuelve una IP por línea (fichero o stdin) y escribe JSONL")
+    p_buscar.add_argument("entrada", nargs="?", default="-")
+    p_buscar.add_argument("-o", "--salida", default="-")
+    args = parser.parse_args(argv)
+
+    inicio = time.monotonic()
+    try:
+        if args.orden == "importar":
+            metadatos = importar(args.csv, args.base)
+            print(f"{metadatos['prefijos']} prefijos, {metadatos['nodos']} nodos, campos: {', '.join(metadatos['campos'])} "
+                  f"({time.monotonic() - inicio:.1f}s)", file=sys.stderr)
+            return 0
+
+        base = BaseIP(args.base)
+        origen = sys.stdin if args.entrada == "-" else open(args.entrada, "r", encoding="utf-8")
+        salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8")
+        total = encontradas = 0
+        try:
+            lineas = (l.strip() for l in origen)
+            for ip, dato in base.buscar_lote(l for l in lineas if l and not l.startswith("#")):
+                total += 1
+                encontradas += dato is not None
+                salida.write(json.dumps({"ip": ip, **(dato or {})}, ensure_ascii=False) + "\n")
+        finally:
+            if origen is not sys.stdin:
+                origen.close()
+            if salida is not sys.stdout:
+                salida.close()
+            base.cerrar()
+        print(f"{total} IPs ({encontradas} en la base) en {time.monotonic() - inicio:.1f}s", file=sys.stderr)
+        return 0
+    except (ErrorBaseIP, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
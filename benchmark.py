@@ -0,0 +1,524 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+from cache_respuestas import CacheRespuestas
+from consultas import Consultor, PROVEEDORES_POR_TIPO, PROVEEDORES_LOCALES, buscadores_persona
+from correo import CribaCorreo, TIPO_MX
+from entidades import consultar_entidad
+from filtraciones import AlmacenFiltraciones
+from limitador import LIMITES_POR_PROVEEDOR
+from lote import ejecutar_lote
+from metricas import obtener_metricas
+from motor_http import MotorHTTP, AdaptadorMedido, MAX_CONEXIONES_GLOBAL, MAX_CONEXIONES_POR_HOST
+
+# --- Benchmark con proveedores simulados ---
+# Levanta un servidor HTTP local que imita a ipinfo, Shodan, AbstractAPI, Dehashed,
+# Veriphone y a los buscadores y sitios de perfiles, con latencia, tasa de errores y
+# límite de ritmo configurables. Un adaptador de transporte montado en el motor desvía
+# ahí todas las peticiones, así que se mide el código real (motor, limitador, consultor,
+# comprobador de usuarios, modo por lotes) sin depender de servicios externos.
+#
+#   python benchmark.py                                   # todos los escenarios
+#   python benchmark.py apis usuario -n 50 --latencia 80 --errores 0.02
+#   python benchmark.py --guardar base.json
+#   python benchmark.py --comparar base.json --tolerancia 0.2
+#   python benchmark.py arranque -n 30                    # solo el tiempo de arranque en frío
+
+ESCENARIOS = ("apis", "ficha", "persona", "usuario", "lote", "arranque")
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+# Cada caso se lanza en un proceso nuevo (arranque en frío del intérprete y de los imports)
+CASOS_ARRANQUE = {
+    "python": ["-c", "pass"],
+    "script": ["-c", "from configuracion import cargar_apis; from consultas import Consultor; Consultor(cargar_apis())"],
+    "lote_ayuda": [os.path.join(DIRECTORIO, "lote.py"), "--help"],
+    "gui_import": ["-c", "import wicosintxx"],
+    "gui_ventana": ["-c", "import tkinter as tk, wicosintxx; r = tk.Tk(); a = wicosintxx.WicOsintXApp(r); r.update(); a._al_cerrar()"],
+}
+# Solo los que salen a la red (los locales no tienen nada que medir aquí)
+PROVEEDORES_API = tuple(p for tipo in ("ip", "email", "telefono") for p in PROVEEDORES_POR_TIPO[tipo] if p not in PROVEEDORES_LOCALES)
+CLAVES_FALSAS = {
+    "veriphone": "bench", "abstractapi": "bench", "shodan": "bench", "dehashed_user": "bench",
+    "dehashed_pass": "bench", "abstractapi_email": "bench", "abstractapi_ip": "bench",
+}
+TAMANO_PAGINA_HTML = 16 * 1024
+INTERVALO_MUESTREO = 0.01
+
+
+# --- Servidor simulado ---
+class ConfigSimulacion:
+    def __init__(self, latencia=0.05, jitter=0.5, tasa_error=0.0, limite_rps=0.0, dehashed_total=1500, semilla=1):
+        self.latencia = latencia      # segundos de media por respuesta
+        self.jitter = jitter          # variación relativa: latencia × [1 - jitter, 1 + jitter]
+        self.tasa_error = tasa_error  # fracción de respuestas 503
+        self.limite_rps = limite_rps  # por host; 0 = sin límite, si no 429 con Retry-After
+        self.dehashed_total = dehashed_total
+        self._azar = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._ventanas = {}  # host -> (segundo, peticiones en ese segundo)
+
+    def sortear(self):
+        """Devuelve (espera, error) para una respuesta."""
+        with self._lock:
+            espera = self.latencia * self._azar.uniform(1 - self.jitter, 1 + self.jitter)
+            return max(0.0, espera), self._azar.random() < self.tasa_error
+
+    def limitado(self, host):
+        if not self.limite_rps:
+            return False
+        segundo = int(time.monotonic())
+        with self._lock:
+            inicio, cuenta = self._ventanas.get(host, (segundo, 0))
+            if inicio != segundo:
+                inicio, cuenta = segundo, 0
+            self._ventanas[host] = (inicio, cuenta + 1)
+            return cuenta >= self.limite_rps
+
+
+def _respuesta_api(host, ruta, parametros, config):
+    """Cuerpo JSON que devolvería cada proveedor real (solo los campos que se usan)."""
+    if host == "ipinfo.io":
+        ip = ruta.strip("/").split("/")[0]
+        return {"ip": ip, "city": "Madrid", "region": "Madrid", "country": "ES", "org": "AS3352 Telefonica"}
+    if host == "ipgeolocation.abstractapi.com":
+        return {"ip_address": parametros.get("ip_address"), "city": "Madrid", "country": "Spain",
+                "latitude": 40.4, "longitude": -3.7, "connection": {"isp_name": "Telefonica"}}
+    if host == "api.shodan.io":
+        return {"ip_str": ruta.rsplit("/", 1)[-1], "org": "Telefonica", "os": None,
+                "ports": [22, 80, 443], "hostnames": ["bench.example"]}
+    if host == "api.dehashed.com":
+        pagina, tamano = int(parametros.get("page", 1)), int(parametros.get("size", 100))
+        desde = (pagina - 1) * tamano
+        consulta = parametros.get("query", "")
+        entradas = [
+            {"id": f"{consulta}-{i}", "email": f"user{i % 50}@bench.example", "username": f"user{i % 30}",
+             "hashed_password": f"{i % 20:040x}", "database_name": "BenchLeak"}
+            for i in range(desde, min(desde + tamano, config.dehashed_total))
+        ]
+        return {"total": config.dehashed_total, "entries": entradas, "success": True}
+    if host == "emailvalidation.abstractapi.com":
+        return {"email": parametros.get("email"), "deliverability": "DELIVERABLE",
+                "is_valid_format": {"value": True}, "is_disposable_email": {"value": False}}
+    if host == "api.veriphone.io":
+        return {"status": "success", "phone_valid": True, "international_number": parametros.get("phone"),
+                "country": "Spain", "carrier": "Movistar", "phone_type": "mobile"}
+    if host == "phonevalidation.abstractapi.com":
+        return {"valid": True, "international_format": parametros.get("phone"),
+                "country": {"name": "Spain"}, "carrier": "Movistar"}
+    return None
+
+
+class ManejadorSimulado(BaseHTTPRequestHandler):
+    # HTTP/1.1 para que el motor pueda reutilizar las conexiones como con los reales
+    protocol_version = "HTTP/1.1"
+    # Cabeceras y cuerpo van en escrituras separadas: con Nagle, las respuestas pequeñas
+    # esperarían al ACK retardado del cliente (~40 ms) y falsearían la fase de descarga
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        config = self.server.config
+        host, _, resto = self.path.lstrip("/").partition("/")
+        partes = urlsplit("/" + resto)
+        parametros = {k: v[0] for k, v in parse_qs(partes.query).items()}
+        espera, error = config.sortear()
+        time.sleep(espera)
+        if config.limitado(host):
+            return self._responder(429, b'{"error": "rate limited"}', "application/json", {"Retry-After": "1"})
+        if error:
+            return self._responder(503, b'{"error": "unavailable"}', "application/json")
+        datos = _respuesta_api(host, partes.path, parametros, config)
+        if datos is not None:
+            return self._responder(200, json.dumps(datos).encode(), "application/json",
+                                   {"X-RateLimit-Remaining": "1000", "X-RateLimit-Limit": "1000"})
+        # Buscadores y sitios de perfiles: los usuarios que empiezan por "no" no existen
+        if partes.path.rstrip("/").rsplit("/", 1)[-1].startswith("no"):
+            return self._responder(404, b"<html><body>Not found</body></html>", "text/html")
+        cuerpo = (b"<html><body>" + b"x" * TAMANO_PAGINA_HTML + b"</body></html>")
+        self._responder(200, cuerpo, "text/html")
+
+    def _responder(self, status, cuerpo, tipo, cabeceras=None):
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        for nombre, valor in (cabeceras or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+class ServidorSimulado(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, config):
+        super().__init__(("127.0.0.1", 0), ManejadorSimulado)
+        self.config = config
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self._hilo = threading.Thread(target=self.serve_forever, name="servidor-simulado", daemon=True)
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+    def handle_error(self, request, client_address):
+        # El comprobador de usuarios corta la lectura en cuanto decide: no es un error
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+class AdaptadorSimulado(AdaptadorMedido):
+    """Reescribe https://host/ruta como <servidor simulado>/host/ruta antes de enviarla."""
+
+    def __init__(self, base, **kwargs):
+        super().__init__(pool_maxsize=MAX_CONEXIONES_GLOBAL * 2, **kwargs)
+        self.base = base
+
+    def send(self, request, **kwargs):
+        partes = urlsplit(request.url)
+        request.url = f"{self.base}/{partes.netloc}{partes.path}" + (f"?{partes.query}" if partes.query else "")
+        return super().send(request, **kwargs)
+
+
+# --- Medición ---
+def _memoria_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        # ru_maxrss es el pico (KB en Linux, bytes en macOS)
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maximo / 2 ** 20 if sys.platform == "darwin" else maximo / 1024
+
+
+class Muestreador:
+    """Hilo que anota el máximo de hilos vivos y de memoria residente mientras dura el escenario."""
+
+    def __init__(self):
+        self.hilos_pico = 0
+        self.memoria_pico = 0.0
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, name="muestreador", daemon=True)
+
+    def _muestrear(self):
+        while not self._parar.is_set():
+            self.hilos_pico = max(self.hilos_pico, threading.active_count())
+            self.memoria_pico = max(self.memoria_pico, _memoria_mb())
+            self._parar.wait(INTERVALO_MUESTREO)
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._hilo.join()
+
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+class Medicion:
+    def __init__(self):
+        self.latencias = []
+        self.errores = 0
+        self._lock = threading.Lock()
+
+    def anotar(self, segundos, fallo=False):
+        with self._lock:
+            self.latencias.append(segundos)
+            self.errores += fallo
+
+    def medir(self, funcion, *args):
+        inicio = time.perf_counter()
+        try:
+            funcion(*args)
+        except Exception:
+            self.anotar(time.perf_counter() - inicio, True)
+        else:
+            self.anotar(time.perf_counter() - inicio)
+
+
+class ResolutorSimulado:
+    """Sustituye al DNS real: todo dominio tiene un MX, así la criba deja pasar los de bench.example."""
+
+    def consultar(self, dominio, tipo):
+        if tipo == TIPO_MX:
+            return 0, [((10, f"mx.{dominio}"), 3600)], None
+        return 0, [], None
+
+
+# --- Escenarios ---
+def _consultor(motor, limites_reales):
+    apis = dict(CLAVES_FALSAS, sin_cache=True)
+    if not limites_reales:
+        # Sin límites de ritmo se mide el motor, no la espera del limitador
+        apis["limites"] = {p: (10000, 10000) for p in list(LIMITES_POR_PROVEEDOR) + list(PROVEEDORES_API)}
+    consultor = Consultor(apis, motor, CacheRespuestas(":memory:"), AlmacenFiltraciones(":memory:"))
+    # Los correos de prueba no existen: sin esto la criba previa los descartaría por DNS
+    consultor._criba_correo = CribaCorreo(resolutor=ResolutorSimulado())
+    if not limites_reales:
+        comprobador = consultor.comprobador_usuarios
+        motor.limitador.configurar({comprobador._proveedor(s): (10000, 10000) for s in comprobador.catalogo})
+    return consultor
+
+
+def _en_paralelo(tareas, concurrencia, medicion):
+    with ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix="bench") as ejecutor:
+        wait([ejecutor.submit(medicion.medir, funcion, *args) for funcion, *args in tareas])
+
+
+def _dato(proveedor, i):
+    if proveedor in PROVEEDORES_POR_TIPO["ip"]:
+        return f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"
+    if proveedor in PROVEEDORES_POR_TIPO["email"]:
+        return f"persona{i}@bench.example"
+    return f"+34600{i:06d}"
+
+
+def escenario_apis(consultor, n, concurrencia, medicion):
+    """n consultas a cada proveedor de API, como los botones de la ventana."""
+    tareas = [(consultor.consultar, p, _dato(p, i)) for i in range(n) for p in PROVEEDORES_API]
+    _en_paralelo(tareas, concurrencia, medicion)
+
+
+def escenario_ficha(consultor, n, concurrencia, medicion):
+    """n fichas por tipo (IP, email, teléfono) con todos sus proveedores en paralelo."""
+    tareas = [(consultar_entidad, consultor, tipo, _dato(PROVEEDORES_POR_TIPO[tipo][0], i))
+              for i in range(n) for tipo in ("ip", "email", "telefono")]
+    _en_paralelo(tareas, concurrencia, medicion)
+
+
+def _busqueda_persona(motor, consulta):
+    futuros = [motor.solicitar("GET", b["url"], timeout=10) for b in buscadores_persona(consulta)]
+    for futuro in futuros:
+        futuro.result()
+
+
+def escenario_persona(consultor, n, concurrencia, medicion):
+    """n búsquedas de persona completas (abanico de buscadores y dorks)."""
+    tareas = [(_busqueda_persona, consultor.motor, f"Persona Bench {i}") for i in range(n)]
+    _en_paralelo(tareas, concurrencia, medicion)
+
+
+def escenario_usuario(consultor, n, concurrencia, medicion):
+    """n comprobaciones de usuario contra todo el catálogo (la mitad no existen)."""
+    tareas = [(lambda u: list(consultor.usuario(u)), f"{'no' if i % 2 else ''}usuario{i}") for i in range(n)]
+    _en_paralelo(tareas, concurrencia, medicion)
+
+
+def escenario_lote(consultor, n, concurrencia, medicion):
+    """Modo por lotes: n IPs contra todos los proveedores de IP, con la latencia de cada consulta."""
+    consultar = consultor.consultar
+
+    def consultar_medido(proveedor, dato):
+        inicio = time.perf_counter()
+        try:
+            return consultar(proveedor, dato)
+        finally:
+            medicion.anotar(time.perf_counter() - inicio)
+
+    consultor.consultar = consultar_medido
+    entradas = ((i + 1, _dato("ipinfo", i)) for i in range(n))
+    with open(os.devnull, "w", encoding="utf-8") as salida:
+        proveedores = [p for p in PROVEEDORES_POR_TIPO["ip"] if p in PROVEEDORES_API]
+        _, errores = ejecutar_lote(entradas, salida, consultor, "ip", proveedores, concurrencia)
+    medicion.errores += errores
+
+
+FUNCIONES_ESCENARIO = {
+    "apis": escenario_apis,
+    "ficha": escenario_ficha,
+    "persona": escenario_persona,
+    "usuario": escenario_usuario,
+    "lote": escenario_lote,
+}
+
+
+def ejecutar_escenario(nombre, servidor, n, concurrencia, max_global, max_por_host, limites_reales=False):
+    """Ejecuta un escenario con un motor nuevo y devuelve sus métricas."""
+    motor = MotorHTTP(max_global, max_por_host)
+    adaptador = AdaptadorSimulado(servidor.url)
+    motor.montar_adaptador("https://", adaptador)
+    motor.montar_adaptador("http://", adaptador)
+    consultor = _consultor(motor, limites_reales)
+    medicion = Medicion()
+    try:
+        with Muestreador() as muestreador:
+            inicio = time.perf_counter()
+            FUNCIONES_ESCENARIO[nombre](consultor, n, concurrencia, medicion)
+            segundos = time.perf_counter() - inicio
+    finally:
+        motor.cerrar()
+        consultor.cache.cerrar()
+        consultor.filtraciones.cerrar()
+    operaciones = len(medicion.latencias)
+    en_ms = lambda s: round(s * 1000, 1) if s is not None else None
+    return {
+        "escenario": nombre,
+        "operaciones": operaciones,
+        "errores": medicion.errores,
+        "segundos": round(segundos, 3),
+        "ops_por_segundo": round(operaciones / segundos, 2) if segundos else None,
+        "p50_ms": en_ms(percentil(medicion.latencias, 50)),
+        "p95_ms": en_ms(percentil(medicion.latencias, 95)),
+        "p99_ms": en_ms(percentil(medicion.latencias, 99)),
+        "hilos_pico": muestreador.hilos_pico,
+        "memoria_pico_mb": round(muestreador.memoria_pico, 1),
+    }
+
+
+def _hay_pantalla():
+    return sys.platform in ("win32", "darwin") or bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def medir_arranque(n):
+    """
+    Tiempo de pared de cada caso de CASOS_ARRANQUE lanzado 'n' veces en un proceso nuevo,
+    desde un directorio temporal y con una configuración inexistente, para no depender
+    del estado de la máquina. 'python' es la referencia: el coste del propio intérprete.
+    """
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        entorno = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+        entorno.update(PYTHONPATH=DIRECTORIO,
+                       WICOSINTX_CONFIG=os.path.join(directorio, "apis.json"))
+        for nombre, argumentos in CASOS_ARRANQUE.items():
+            if nombre == "gui_ventana" and not _hay_pantalla():
+                print(f"   (sin pantalla: se omite arranque_{nombre})", file=sys.stderr)
+                continue
+            # Una pasada previa compila los .pyc: se mide el arranque habitual, no el primero tras instalar
+            subprocess.run([sys.executable] + argumentos, cwd=directorio, env=entorno, capture_output=True)
+            tiempos, errores = [], 0
+            for _ in range(n):
+                inicio = time.perf_counter()
+                proceso = subprocess.run([sys.executable] + argumentos, cwd=directorio, env=entorno, capture_output=True)
+                tiempos.append(time.perf_counter() - inicio)
+                errores += proceso.returncode != 0
+            en_ms = lambda s: round(s * 1000, 1)
+            resultados.append({
+                "escenario": f"arranque_{nombre}",
+                "ejecuciones": n,
+                "errores": errores,
+                "min_ms": en_ms(min(tiempos)),
+                "p50_ms": en_ms(percentil(tiempos, 50)),
+                "p95_ms": en_ms(percentil(tiempos, 95)),
+                "p99_ms": en_ms(percentil(tiempos, 99)),
+            })
+    return resultados
+
+
+def comparar(resultados, referencia, tolerancia):
+    """Líneas con las regresiones respecto a la referencia (más lento o menos ops/s que la tolerancia)."""
+    anteriores = {r["escenario"]: r for r in referencia}
+    regresiones = []
+    for actual in resultados:
+        anterior = anteriores.get(actual["escenario"])
+        if not anterior:
+            continue
+        if anterior.get("ops_por_segundo") and actual["ops_por_segundo"] < anterior["ops_por_segundo"] * (1 - tolerancia):
+            regresiones.append(f"{actual['escenario']}: {actual['ops_por_segundo']} ops/s (antes {anterior['ops_por_segundo']})")
+        for clave in ("p95_ms", "p99_ms"):
+            if not anterior.get(clave):
+                continue
+            if actual[clave] is None:
+                # Sin ninguna operación correcta no hay percentil: cuenta como regresión
+                regresiones.append(f"{actual['escenario']}: sin {clave} (antes {anterior[clave]})")
+            elif actual[clave] > anterior[clave] * (1 + tolerancia):
+                regresiones.append(f"{actual['escenario']}: {clave} {actual[clave]} (antes {anterior[clave]})")
+    return regresiones
+
+
+COLUMNAS_TABLA = ("escenario", "operaciones", "errores", "segundos", "ops_por_segundo",
+                  "p50_ms", "p95_ms", "p99_ms", "hilos_pico", "memoria_pico_mb")
+COLUMNAS_ARRANQUE = ("escenario", "ejecuciones", "errores", "min_ms", "p50_ms", "p95_ms", "p99_ms")
+
+
+def imprimir_tabla(resultados, salida=sys.stdout, columnas=COLUMNAS_TABLA):
+    if not resultados:
+        return
+    anchos = [max(len(c), *(len(str(r[c])) for r in resultados)) for c in columnas]
+    print("  ".join(c.ljust(a) for c, a in zip(columnas, anchos)), file=salida)
+    for r in resultados:
+        print("  ".join(str(r[c]).ljust(a) for c, a in zip(columnas, anchos)), file=salida)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de WicOsintX contra proveedores simulados en local.")
+    parser.add_argument("escenarios", nargs="*",
+                        help=f"escenarios a ejecutar (por defecto todos: {', '.join(ESCENARIOS)})")
+    parser.add_argument("-n", type=int, default=20, help="repeticiones por escenario (por defecto 20)")
+    parser.add_argument("-c", "--concurrencia", type=int, default=8, help="consultas simultáneas del lado cliente")
+    parser.add_argument("--latencia", type=float, default=50, help="latencia media del servidor en ms")
+    parser.add_argument("--jitter", type=float, default=0.5, help="variación relativa de la latencia (0-1)")
+    parser.add_argument("--errores", type=float, default=0.0, help="fracción de respuestas 503")
+    parser.add_argument("--limite-rps", type=float, default=0, help="peticiones por segundo por host antes de responder 429")
+    parser.add_argument("--dehashed-total", type=int, default=1500, help="registros de Dehashed por consulta (paginados)")
+    parser.add_argument("--max-global", type=int, default=MAX_CONEXIONES_GLOBAL)
+    parser.add_argument("--max-por-host", type=int, default=MAX_CONEXIONES_POR_HOST)
+    parser.add_argument("--limites-reales", action="store_true", help="aplica los límites de ritmo reales de cada proveedor")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--metricas", help="exporta las métricas del motor al terminar (.json o texto de Prometheus)")
+    parser.add_argument("--guardar", help="guarda los resultados en JSON para compararlos más adelante")
+    parser.add_argument("--comparar", help="JSON de referencia: sale con código 1 si hay regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="margen admitido al comparar (por defecto 20%%)")
+    args = parser.parse_args(argv)
+    desconocidos = [e for e in args.escenarios if e not in ESCENARIOS]
+    if desconocidos:
+        parser.error(f"escenarios no válidos: {', '.join(desconocidos)} (disponibles: {', '.join(ESCENARIOS)})")
+
+    config = ConfigSimulacion(args.latencia / 1000, args.jitter, args.errores, args.limite_rps,
+                              args.dehashed_total, args.semilla)
+    escenarios = args.escenarios or ESCENARIOS
+    resultados = []
+    if any(nombre != "arranque" for nombre in escenarios):
+        with ServidorSimulado(config) as servidor:
+            for nombre in escenarios:
+                if nombre == "arranque":
+                    continue
+                print(f"-> {nombre}...", file=sys.stderr)
+                resultados.append(ejecutar_escenario(nombre, servidor, args.n, args.concurrencia,
+                                                     args.max_global, args.max_por_host, args.limites_reales))
+        imprimir_tabla(resultados)
+    if "arranque" in escenarios:
+        print("-> arranque...", file=sys.stderr)
+        arranque = medir_arranque(args.n)
+        imprimir_tabla(arranque, columnas=COLUMNAS_ARRANQUE)
+        resultados += arranque
+    if args.metricas:
+        obtener_metricas().exportar(args.metricas)
+
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=4)
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            regresiones = comparar(resultados, json.load(f), args.tolerancia)
+        for regresion in regresiones:
+            print(f"⚠️ Regresión: {regresion}", file=sys.stderr)
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
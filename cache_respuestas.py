@@ -0,0 +1,249 @@
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from configuracion import crear_directorio, ruta_datos
+from metricas import obtener_metricas
+
+# --- Caché persistente de respuestas de APIs ---
+# Guarda en SQLite las respuestas JSON correctas de cada proveedor, indexadas por
+# (proveedor, consulta normalizada). Cada proveedor tiene su propio TTL; pasado ese
+# tiempo la entrada aún se sirve como "obsoleta" (mientras se refresca en segundo
+# plano) hasta FACTOR_OBSOLETO veces el TTL. El tamaño se limita expulsando las
+# entradas usadas hace más tiempo (LRU).
+# Con cada respuesta se guardan también su ETag y Last-Modified: al revalidar (modo
+# vigilancia, ver investigaciones.py) se pide con If-None-Match / If-Modified-Since y
+# un 304 se resuelve con los datos guardados, sin descargar ni procesar nada.
+
+CACHE_FILE = "cache_respuestas.sqlite"
+MAX_ENTRADAS = 20000
+FACTOR_OBSOLETO = 3
+
+HORA = 3600
+DIA = 24 * HORA
+TTL_POR_DEFECTO = DIA
+TTL_POR_PROVEEDOR = {
+    "ipinfo": DIA,
+    "abstractapi_ip": DIA,
+    "shodan": 6 * HORA,
+    "dehashed": 7 * DIA,
+    "abstractapi_email": 7 * DIA,
+    "veriphone": 30 * DIA,
+    "abstractapi_telefono": 30 * DIA,
+}
+
+
+def normalizar_consulta(proveedor, consulta):
+    """Normaliza la consulta para que variantes triviales compartan entrada en la caché."""
+    consulta = consulta.strip()
+    if "telefono" in proveedor or proveedor == "veriphone":
+        # Los teléfonos se comparan solo por sus dígitos (y el '+' inicial)
+        return ("+" if consulta.startswith("+") else "") + "".join(c for c in consulta if c.isdigit())
+    return consulta.lower()
+
+
+class RespuestaCacheada:
+    """Imita lo que usan los métodos de análisis de un requests.Response."""
+
+    def __init__(self, status_code, datos, desde_cache=True, no_modificada=False):
+        self.status_code = status_code
+        self.datos = datos
+        self.desde_cache = desde_cache
+        self.no_modificada = no_modificada  # el servidor respondió 304 a una revalidación
+
+    @property
+    def ok(self):
+        return 200 <= self.status_code < 400
+
+    @property
+    def text(self):
+        return json.dumps(self.datos, ensure_ascii=False)
+
+    def json(self):
+        return self.datos
+
+
+class CacheRespuestas:
+    def __init__(self, ruta=None, max_entradas=MAX_ENTRADAS, ttl_por_proveedor=None):
+        self.max_entradas = max_entradas
+        self.ttl_por_proveedor = dict(TTL_POR_PROVEEDOR, **(ttl_por_proveedor or {}))
+        self._lock = threading.Lock()
+        self._refrescando = set()
+        self._escritor = None  # hilo que guarda los refrescos en segundo plano
+        self._con = sqlite3.connect(crear_directorio(ruta or ruta_datos(CACHE_FILE)), check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS respuestas ("
+            " proveedor TEXT NOT NULL, consulta TEXT NOT NULL, status INTEGER NOT NULL,"
+            " datos TEXT NOT NULL, creado REAL NOT NULL, ultimo_acceso REAL NOT NULL,"
+            " PRIMARY KEY (proveedor, consulta))"
+        )
+        self._con.execute("CREATE INDEX IF NOT EXISTS idx_respuestas_acceso ON respuestas (ultimo_acceso)")
+        # Cachés creadas antes de guardar los validadores HTTP
+        columnas = {fila[1] for fila in self._con.execute("PRAGMA table_info(respuestas)")}
+        for columna in ("etag", "modificado"):
+            if columna not in columnas:
+                self._con.execute(f"ALTER TABLE respuestas ADD COLUMN {columna} TEXT")
+        self._con.commit()
+
+    def _ttl(self, proveedor):
+        return self.ttl_por_proveedor.get(proveedor, TTL_POR_DEFECTO)
+
+    def obtener(self, proveedor, consulta):
+        """Devuelve (RespuestaCacheada, estado) con estado 'fresca' u 'obsoleta', o (None, None)."""
+        clave = normalizar_consulta(proveedor, consulta)
+        ahora = time.time()
+        with self._lock:
+            fila = self._con.execute(
+                "SELECT status, datos, creado FROM respuestas WHERE proveedor = ? AND consulta = ?",
+                (proveedor, clave),
+            ).fetchone()
+            if fila is None:
+                return None, None
+            status, datos, creado = fila
+            edad = ahora - creado
+            ttl = self._ttl(proveedor)
+            if edad > ttl * FACTOR_OBSOLETO:
+                self._con.execute("DELETE FROM respuestas WHERE proveedor = ? AND consulta = ?", (proveedor, clave))
+                self._con.commit()
+                return None, None
+            self._con.execute(
+                "UPDATE respuestas SET ultimo_acceso = ? WHERE proveedor = ? AND consulta = ?",
+                (ahora, proveedor, clave),
+            )
+            self._con.commit()
+        estado = "fresca" if edad <= ttl else "obsoleta"
+        return RespuestaCacheada(status, json.loads(datos)), estado
+
+    def guardar(self, proveedor, consulta, status, datos, etag=None, modificado=None):
+        self.guardar_varias(proveedor, [(consulta, status, datos, etag, modificado)])
+
+    def guardar_varias(self, proveedor, respuestas):
+        """
+        Guarda [(consulta, status, datos), ...] en una sola transacción (respuestas de un lote).
+        Cada tupla puede llevar además el ETag y el Last-Modified de la respuesta.
+        """
+        ahora = time.time()
+        filas = []
+        for consulta, status, datos, *validadores in respuestas:
+            etag, modificado = (validadores + [None, None])[:2]
+            filas.append((proveedor, normalizar_consulta(proveedor, consulta), status, json.dumps(datos, ensure_ascii=False),
+                          ahora, ahora, etag, modificado))
+        with self._lock:
+            self._con.executemany(
+                "INSERT OR REPLACE INTO respuestas (proveedor, consulta, status, datos, creado, ultimo_acceso, etag, modificado)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                filas,
+            )
+            # Expulsión LRU: se borran las entradas con el acceso más antiguo que sobren
+            sobrantes = self._con.execute("SELECT COUNT(*) FROM respuestas").fetchone()[0] - self.max_entradas
+            if sobrantes > 0:
+                self._con.execute(
+                    "DELETE FROM respuestas WHERE rowid IN"
+                    " (SELECT rowid FROM respuestas ORDER BY ultimo_acceso LIMIT ?)",
+                    (sobrantes,),
+                )
+            self._con.commit()
+
+    def consultar(self, proveedor, consulta, lanzar_peticion, forzar=False, revalidar=False):
+        """
+        Devuelve la respuesta de la caché si existe o la pide con lanzar_peticion(cabeceras=None),
+        que debe devolver un Future con un requests.Response. Solo se guardan las
+        respuestas 2xx con cuerpo JSON. Con forzar=True se ignora la caché; con
+        revalidar=True siempre se pregunta al servidor, pero de forma condicional.
+        """
+        if revalidar:
+            return self._revalidar(proveedor, consulta, lanzar_peticion)
+        if not forzar:
+            respuesta, estado = self.obtener(proveedor, consulta)
+            obtener_metricas().incrementar("cache", proveedor=proveedor, resultado=estado or "fallo")
+            if estado == "fresca":
+                return respuesta
+            if estado == "obsoleta":
+                self._refrescar_en_segundo_plano(proveedor, consulta, lanzar_peticion)
+                return respuesta
+        resp = lanzar_peticion().result()
+        self._guardar_si_valida(proveedor, consulta, resp)
+        return resp
+
+    def _revalidar(self, proveedor, consulta, lanzar_peticion):
+        clave = normalizar_consulta(proveedor, consulta)
+        with self._lock:
+            fila = self._con.execute(
+                "SELECT status, datos, etag, modificado FROM respuestas WHERE proveedor = ? AND consulta = ?",
+                (proveedor, clave),
+            ).fetchone()
+        cabeceras = {}
+        if fila and fila[2]:
+            cabeceras["If-None-Match"] = fila[2]
+        if fila and fila[3]:
+            cabeceras["If-Modified-Since"] = fila[3]
+        resp = lanzar_peticion(cabeceras or None).result()
+        if resp.status_code == 304 and cabeceras:
+            obtener_metricas().incrementar("cache", proveedor=proveedor, resultado="no_modificada")
+            ahora = time.time()
+            with self._lock:
+                self._con.execute(
+                    "UPDATE respuestas SET creado = ?, ultimo_acceso = ? WHERE proveedor = ? AND consulta = ?",
+                    (ahora, ahora, proveedor, clave),
+                )
+                self._con.commit()
+            return RespuestaCacheada(fila[0], json.loads(fila[1]), desde_cache=False, no_modificada=True)
+        self._guardar_si_valida(proveedor, consulta, resp)
+        return resp
+
+    def _refrescar_en_segundo_plano(self, proveedor, consulta, lanzar_peticion):
+        clave = (proveedor, normalizar_consulta(proveedor, consulta))
+        with self._lock:
+            if clave in self._refrescando:
+                return
+            self._refrescando.add(clave)
+
+        def guardar(futuro):
+            try:
+                if futuro.exception() is None:
+                    self._guardar_si_valida(proveedor, consulta, futuro.result())
+            finally:
+                with self._lock:
+                    self._refrescando.discard(clave)
+
+        def al_terminar(futuro):
+            # Corre en el hilo del bucle del motor: la escritura en SQLite se hace en otro
+            # hilo para no frenar las demás peticiones en vuelo
+            try:
+                self._hilo_escritor().submit(guardar, futuro)
+            except RuntimeError:  # caché cerrada
+                with self._lock:
+                    self._refrescando.discard(clave)
+
+        lanzar_peticion().add_done_callback(al_terminar)
+
+    def _hilo_escritor(self):
+        with self._lock:
+            if self._escritor is None:
+                self._escritor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache")
+            return self._escritor
+
+    def _guardar_si_valida(self, proveedor, consulta, resp):
+        if not 200 <= resp.status_code < 300:
+            return
+        try:
+            datos = resp.json()
+        except ValueError:
+            return
+        cabeceras = getattr(resp, "headers", None) or {}
+        self.guardar(proveedor, consulta, resp.status_code, datos, cabeceras.get("ETag"), cabeceras.get("Last-Modified"))
+
+    def limpiar(self):
+        with self._lock:
+            self._con.execute("DELETE FROM respuestas")
+            self._con.commit()
+
+    def cerrar(self):
+        if self._escritor is not None:
+            self._escritor.shutdown(wait=True)
+        with self._lock:
+            self._con.close()
@@ -0,0 +1,95 @@
+import json
+import os
+import re
+import sys
+import threading
+
+# --- Configuración y Utilidades ---
+# Las claves se leen una sola vez por proceso y se guardan en una ubicación fija por
+# usuario, independiente del directorio desde el que se lance la aplicación:
+#   1. la ruta de la variable de entorno WICOSINTX_CONFIG, si está definida;
+#   2. ./apis.json, si existe (ubicación de versiones anteriores);
+#   3. %APPDATA%\wicosintx\apis.json en Windows, o $XDG_CONFIG_HOME/wicosintx/apis.json
+#      (~/.config/wicosintx/apis.json) en el resto.
+# Leer no crea ningún fichero: solo se escribe al guardar.
+# Los ficheros de datos (cachés y bases SQLite, base de IPs, mapa de servidores WHOIS)
+# siguen el mismo criterio con ruta_datos(): el del directorio actual si ya existe y, si
+# no, el de ese mismo directorio por usuario. Así la ventana y lote.py comparten cachés
+# e histórico aunque se lancen desde sitios distintos.
+# Cada clave API puede ser un pool de varias: una lista JSON o un texto con las claves
+# separadas por comas (así se escriben en la ventana de Claves API).
+CONFIG_FILE = "apis.json"
+VARIABLE_ENTORNO = "WICOSINTX_CONFIG"
+
+_apis = None
+_ruta = None
+_lock = threading.Lock()
+
+
+def directorio_usuario():
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "wicosintx")
+
+
+def ruta_config():
+    """Ruta del fichero de claves (ver el orden de búsqueda arriba)."""
+    if os.environ.get(VARIABLE_ENTORNO):
+        return os.environ[VARIABLE_ENTORNO]
+    if os.path.exists(CONFIG_FILE):
+        return os.path.abspath(CONFIG_FILE)
+    return os.path.join(directorio_usuario(), CONFIG_FILE)
+
+
+def ruta_datos(nombre):
+    """Ruta por defecto de un fichero de datos: ./nombre si existe (versiones anteriores) o el del directorio por usuario."""
+    if os.path.exists(nombre):
+        return os.path.abspath(nombre)
+    return os.path.join(directorio_usuario(), nombre)
+
+
+def crear_directorio(ruta):
+    """Crea el directorio que contiene 'ruta' (si hace falta) y devuelve la ruta tal cual."""
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    return ruta
+
+
+def cargar_apis():
+    """Devuelve las claves; el fichero se lee la primera vez y luego se sirve de memoria."""
+    global _apis, _ruta
+    with _lock:
+        if _apis is None:
+            _ruta = ruta_config()
+            try:
+                with open(_ruta, "r", encoding="utf-8") as f:
+                    _apis = json.load(f)
+            except FileNotFoundError:
+                _apis = {}
+        return _apis
+
+
+def guardar_apis(apis):
+    global _apis, _ruta
+    with _lock:
+        ruta = crear_directorio(_ruta or ruta_config())
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(apis, f, indent=4)
+        if os.name == "posix":
+            # Contiene claves de APIs de pago: solo legible por el usuario
+            os.chmod(temporal, 0o600)
+        os.replace(temporal, ruta)
+        _apis, _ruta = apis, ruta
+
+
+def lista_claves(valor):
+    """Las claves de un valor de configuración (una sola, texto separado por comas o lista)."""
+    if not valor:
+        return []
+    if isinstance(valor, (list, tuple)):
+        return [str(v).strip() for v in valor if str(v).strip()]
+    return [c for c in re.split(r"[\s,;]+", str(valor)) if c]
@@ -0,0 +1,523 @@
+import re
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote, quote_plus
+
+from cache_respuestas import CacheRespuestas
+from configuracion import lista_claves
+from usuarios import ComprobadorUsuarios
+from whois_cliente import ClienteWhois, ErrorWhois
+from filtraciones import AlmacenFiltraciones, id_entrada
+from metricas import obtener_metricas
+from rangos_ip import trocear
+
+# --- Lógica de consulta sin interfaz ---
+# Cada método de Consultor hace la petición a su proveedor y devuelve los datos tal
+# cual los entrega la API (dict), o lanza ErrorConsulta. La presentación queda en
+# manos de quien llama: la ventana de WicOsintX o el modo por lotes (lote.py).
+# Este módulo no importa Tk, y lo pesado (requests, el motor HTTP, las bases SQLite)
+# se crea la primera vez que hace falta, así que importarlo y crear un Consultor es inmediato.
+
+PROVEEDORES_POR_TIPO = {
+    "ip": ("ipinfo", "abstractapi_ip", "shodan", "ip_local"),
+    "email": ("dehashed", "abstractapi_email", "email_local"),
+    "telefono": ("veriphone", "abstractapi_telefono", "telefono_local"),
+    "usuario": ("usuario",),
+    "dominio": ("whois",),
+}
+
+# Los que responden sin salir a la red
+PROVEEDORES_LOCALES = ("ip_local", "telefono_local", "email_local")
+
+# Proveedores con endpoint por lotes: cuántos datos caben en una petición
+TAMANO_LOTE = {
+    "ipinfo": 1000,      # https://ipinfo.io/batch (necesita token)
+    "ip_local": 65536,   # base_ip.py, sin red
+    "telefono_local": 65536,  # telefonos.py, sin red
+    "email_local": 1000,      # correo.py: sintaxis y desechables sin red, MX por DNS con caché
+}
+
+DEHASHED_TAMANO_PAGINA = 1000
+DEHASHED_MAX_PAGINAS = 50  # tope de seguridad por búsqueda
+
+
+def buscadores_persona(consulta):
+    """Buscadores y dorks de la búsqueda de personas: [{"nombre", "url", "tipo"}, ...]."""
+    query_encoded = quote_plus(f'"{consulta}"') # Codifica la consulta para URL, con comillas para búsqueda exacta
+
+    # Definimos los "buscadores" con sus dorks o URLs de búsqueda directa
+    # Hemos cambiado algunos para usar dorks de Google que son más efectivos para "buscar en 50 páginas"
+    # y hemos añadido comentarios sobre la expectativa de "encontrado/no encontrado"
+    return [
+        # Buscadores generales (la "presencia" se basa en si el buscador devuelve una página de resultados)
+        {"nombre": "Google (General)", "url": f"https://www.google.com/search?q={query_encoded}", "tipo": "general"},
+        {"nombre": "Google (PDFs/Docs)", "url": f"https://www.google.com/search?q=filetype:pdf+OR+filetype:doc+OR+filetype:docx+OR+filetype:xls+OR+filetype:xlsx+{query_encoded}", "tipo": "general"},
+        {"nombre": "DuckDuckGo", "url": f"https://duckduckgo.com/?q={query_encoded}", "tipo": "general"},
+        {"nombre": "Bing", "url": f"https://www.bing.com/search?q={query_encoded}", "tipo": "general"},
+
+        # Redes Sociales (búsqueda directa o dorks específicos)
+        {"nombre": "LinkedIn", "url": f"https://www.linkedin.com/search/results/all/?keywords={query_encoded}", "tipo": "social"},
+        {"nombre": "Facebook", "url": f"https://www.facebook.com/search/top/?q={query_encoded}", "tipo": "social"},
+        {"nombre": "Twitter / X", "url": f"https://twitter.com/search?q={query_encoded}&src=typed_query", "tipo": "social"},
+        {"nombre": "Instagram (Google Dork)", "url": f"https://www.google.com/search?q=site:instagram.com+{query_encoded}", "tipo": "social"},
+        {"nombre": "Reddit (Google Dork)", "url": f"https://www.google.com/search?q=site:reddit.com+{query_encoded}", "tipo": "social"},
+        {"nombre": "TikTok (Google Dork)", "url": f"https://www.google.com/search?q=site:tiktok.com+{query_encoded}", "tipo": "social"},
+        {"nombre": "YouTube (Google Dork)", "url": f"https://www.google.com/search?q=site:youtube.com+{query_encoded}", "tipo": "social"},
+
+        # Registros Oficiales / Públicos (España)
+        {"nombre": "BOE (Boletín Oficial)", "url": f"https://www.boe.es/buscar/boe.php?campo%5B1%5D=DOC&operador%5B1%5D=and&texto%5B1%5D={query_encoded}", "tipo": "official"},
+        {"nombre": "Noticias (Google News)", "url": f"https://news.google.com/search?q={query_encoded}&hl=es&gl=ES&ceid=ES:es", "tipo": "news"},
+        
+        # Otros recursos útiles (más genéricos o especializados)
+        {"nombre": "Pastebin (Google Dork)", "url": f"https://www.google.com/search?q=site:pastebin.com+{query_encoded}", "tipo": "other"},
+        {"nombre": "GitHub (Google Dork)", "url": f"https://www.google.com/search?q=site:github.com+{query_encoded}", "tipo": "other"},
+        {"nombre": "Stack Overflow (Google Dork)", "url": f"https://www.google.com/search?q=site:stackoverflow.com+{query_encoded}", "tipo": "other"},
+        {"nombre": "Foros España (Google Dork)", "url": f"https://www.google.com/search?q=site:.es+foro+{query_encoded}", "tipo": "other"},
+        {"nombre": "Blogs Personales (Google Dork)", "url": f"https://www.google.com/search?q=blog+personal+{query_encoded}", "tipo": "other"},
+    ]
+
+
+class ErrorConsulta(Exception):
+    """El proveedor respondió con un error o la respuesta no es utilizable."""
+
+
+class ErrorClaveAPI(ErrorConsulta):
+    """Falta la clave API necesaria para el proveedor."""
+
+
+class ErrorRed(ErrorConsulta):
+    """No se pudo hablar con el proveedor (timeout, conexión rechazada, DNS...)."""
+
+
+PARAMETROS_CLAVE = ("key", "api_key", "token")  # parámetros de la URL que llevan la clave
+
+
+def _sustituir_clave(url, kwargs, vieja, nueva, pareja=None):
+    """
+    Copia de (url, kwargs) con la clave vieja cambiada por la nueva solo donde va la
+    clave: su parámetro en la URL, la cabecera Authorization y el auth (usuario,
+    contraseña), cuya contraseña cambia según 'pareja' = (vieja, nueva). El resto de la
+    petición no se toca aunque contenga el mismo texto (p. ej. buscar la propia cuenta).
+    """
+    patron = r"([?&](?:%s)=)%s(?=[&#]|$)" % ("|".join(PARAMETROS_CLAVE), re.escape(vieja))
+    url = re.sub(patron, lambda m: m.group(1) + nueva, url)
+    kwargs = dict(kwargs)
+    cabeceras = kwargs.get("headers")
+    if cabeceras and cabeceras.get("Authorization") == f"Bearer {vieja}":
+        kwargs["headers"] = dict(cabeceras, Authorization=f"Bearer {nueva}")
+    auth = kwargs.get("auth")
+    if auth and pareja and tuple(auth) == (vieja, pareja[0]):
+        kwargs["auth"] = (nueva, pareja[1])
+    return url, kwargs
+
+
+class Consultor:
+    def __init__(self, apis, motor=None, cache=None, filtraciones=None):
+        self.apis = apis
+        self._motor = motor
+        self._cache = cache
+        self._filtraciones = filtraciones
+        self._cliente_whois = None
+        self._criba_correo = None
+        self._base_ip = None
+        self._lock_base_ip = threading.Lock()  # aparte: importar tarda y no debe frenar al resto
+        self._comprobador_usuarios = None
+        self._limites_aplicados = False
+        # Reentrante: el comprobador de usuarios se crea con el lock tomado y necesita el motor
+        self._lock = threading.RLock()
+        # Opcional: se llama con (proveedor, consulta) cuando la respuesta sale de la caché
+        self.al_servir_cache = None
+        self._local = threading.local()
+        self._pools = {}         # proveedor -> claves, si tiene más de una
+        self._acompanantes = {}  # clave -> secreto que va con ella (contraseñas de Dehashed)
+        self._lock_pools = threading.Lock()  # los dos de arriba se tocan desde los hilos del lote
+
+    @property
+    def motor(self):
+        with self._lock:
+            if self._motor is None:
+                from motor_http import obtener_motor
+                self._motor = obtener_motor()
+            if self.apis.get("limites") and not self._limites_aplicados:
+                self._motor.limitador.configurar(self.apis["limites"])
+                self._limites_aplicados = True
+            return self._motor
+
+    @property
+    def cache(self):
+        with self._lock:
+            if self._cache is None:
+                self._cache = CacheRespuestas()
+            return self._cache
+
+    @property
+    def filtraciones(self):
+        with self._lock:
+            if self._filtraciones is None:
+                self._filtraciones = AlmacenFiltraciones()
+            return self._filtraciones
+
+    def cerrar(self):
+        """Cierra las bases y los hilos que se hayan llegado a crear (caché, filtraciones, criba de correo)."""
+        with self._lock:
+            for recurso in (self._cache, self._filtraciones, self._criba_correo):
+                if recurso is not None:
+                    recurso.cerrar()
+
+    @property
+    def cliente_whois(self):
+        with self._lock:
+            if self._cliente_whois is None:
+                self._cliente_whois = ClienteWhois()
+            return self._cliente_whois
+
+    @property
+    def criba_correo(self):
+        with self._lock:
+            if self._criba_correo is None:
+                from correo import CribaCorreo
+                self._criba_correo = CribaCorreo()
+            return self._criba_correo
+
+    @property
+    def base_ip(self):
+        """Base local de IPs (base_ip.py); ErrorConsulta si todavía no se ha importado ninguna."""
+        with self._lock_base_ip:
+            if self._base_ip is None:
+                from base_ip import BaseIP, ErrorBaseIP
+                try:
+                    self._base_ip = BaseIP()
+                except ErrorBaseIP as e:
+                    raise ErrorConsulta(str(e))
+            return self._base_ip
+
+    def importar_base_ip(self, rutas):
+        """Reconstruye la base local de IPs desde CSV de rangos; devuelve sus metadatos."""
+        from base_ip import importar, ErrorBaseIP
+        with self._lock_base_ip:
+            # En Windows no se puede sustituir un fichero abierto con mmap
+            if self._base_ip is not None:
+                self._base_ip.cerrar()
+                self._base_ip = None
+            try:
+                return importar(rutas)
+            except (ErrorBaseIP, OSError) as e:
+                raise ErrorConsulta(f"No se pudo importar la base de IPs: {e}")
+
+    def _clave(self, clave, nombre_api, proveedor=None):
+        """
+        La clave a usar para la siguiente petición. Si hay varias (un pool), la elige el
+        limitador según la cuota que les queda y sus errores recientes.
+        """
+        proveedor = proveedor or clave
+        claves = lista_claves(self.apis.get(clave))
+        if not claves:
+            raise ErrorClaveAPI(f"No hay clave API de {nombre_api} configurada.")
+        with self._lock_pools:
+            if len(claves) == 1:
+                self._pools.pop(proveedor, None)
+                return claves[0]
+            self._pools[proveedor] = claves
+        return self.motor.limitador.elegir_clave(proveedor, claves)
+
+    def _credenciales_dehashed(self):
+        """(usuario, contraseña); con varias cuentas se emparejan por posición."""
+        nombre = "Dehashed (usuario/contraseña)"
+        usuarios, contrasenas = lista_claves(self.apis.get("dehashed_user")), lista_claves(self.apis.get("dehashed_pass"))
+        if not usuarios or not contrasenas:
+            raise ErrorClaveAPI(f"No hay clave API de {nombre} configurada.")
+        if len(usuarios) != len(contrasenas):
+            raise ErrorClaveAPI(f"{nombre}: hay {len(usuarios)} usuarios y {len(contrasenas)} contraseñas.")
+        cuentas = dict(zip(usuarios, contrasenas))
+        with self._lock_pools:
+            if len(usuarios) == 1:
+                self._pools.pop("dehashed", None)
+                return usuarios[0], contrasenas[0]
+            self._pools["dehashed"] = usuarios
+            self._acompanantes.update(cuentas)
+        usuario = self.motor.limitador.elegir_clave("dehashed", usuarios)
+        return usuario, cuentas[usuario]
+
+    def _rotador(self, proveedor, url, kwargs):
+        """rotar() para el motor: la misma petición con otra clave del pool (ver _sustituir_clave)."""
+        def rotar(vieja):
+            nueva = self.motor.limitador.alternativa(proveedor, vieja)
+            if nueva is None:
+                return None
+            pareja = None
+            with self._lock_pools:
+                if vieja in self._acompanantes and nueva in self._acompanantes:
+                    pareja = (self._acompanantes[vieja], self._acompanantes[nueva])
+            # Se parte de la última petición enviada: puede rotar varias veces seguidas
+            actual[:] = _sustituir_clave(*actual, vieja, nueva, pareja)
+            return actual[0], actual[1], nueva
+        actual = [url, kwargs]
+        return rotar
+
+    def _en_pool(self, proveedor):
+        """Si el proveedor tiene ahora mismo más de una clave entre las que rotar."""
+        with self._lock_pools:
+            return len(self._pools.get(proveedor, ())) > 1
+
+    def _get_api(self, proveedor, consulta, url, clave=None, **kwargs):
+        """
+        GET a una API de pago pasando por la caché persistente (salvo que esté desactivada)
+        y, si hay que salir a la red, por el límite de ritmo del proveedor.
+        """
+        import requests  # ya cargado por el motor; así quien llama no necesita importarlo
+
+        def lanzar(cabeceras=None):
+            opciones = dict(kwargs, headers={**(kwargs.get("headers") or {}), **cabeceras}) if cabeceras else kwargs
+            rotar = self._rotador(proveedor, url, opciones) if clave and self._en_pool(proveedor) else None
+            return self.motor.solicitar("GET", url, proveedor=proveedor, clave_api=clave, rotar=rotar, **opciones)
+
+        revalidacion = getattr(self._local, "revalidacion", None)
+        try:
+            resp = self.cache.consultar(proveedor, consulta, lanzar, forzar=bool(self.apis.get("sin_cache")),
+                                        revalidar=revalidacion is not None)
+        except requests.exceptions.RequestException as e:
+            raise ErrorRed(f"Error de conexión: {e}") from e
+        if revalidacion is not None:
+            revalidacion["peticiones"] += 1
+            revalidacion["no_modificadas"] += getattr(resp, "no_modificada", False)
+        if getattr(resp, "desde_cache", False) and self.al_servir_cache:
+            self.al_servir_cache(proveedor, consulta)
+        return resp
+
+    @contextmanager
+    def revalidando(self):
+        """
+        Dentro del bloque (y solo en este hilo) las APIs no se sirven de la caché: se
+        preguntan con If-None-Match / If-Modified-Since. Devuelve un dict que cuenta las
+        peticiones hechas y cuántas respondieron 304 (ver investigaciones.py).
+        """
+        anterior = getattr(self._local, "revalidacion", None)
+        self._local.revalidacion = revalidacion = {"peticiones": 0, "no_modificadas": 0}
+        try:
+            yield revalidacion
+        finally:
+            self._local.revalidacion = anterior
+
+    def consultar(self, proveedor, dato):
+        """Despacha por nombre de proveedor (ver PROVEEDORES_POR_TIPO)."""
+        return getattr(self, proveedor)(dato)
+
+    def tamano_lote(self, proveedor):
+        """Datos por petición de consultar_lote() para el proveedor; 0 si no se puede por lotes."""
+        if proveedor == "ipinfo" and not self.apis.get("ipinfo"):
+            return 0
+        return TAMANO_LOTE.get(proveedor, 0)
+
+    def consultar_lote(self, proveedor, datos):
+        """
+        Como consultar() para muchos datos a la vez: {dato: respuesta o ErrorConsulta}.
+        Un fallo de toda la petición (red, HTTP, clave) se lanza como ErrorConsulta.
+        """
+        return getattr(self, proveedor + "_lote")(datos)
+
+    # --- IP ---
+    def ipinfo(self, ip):
+        # Sin token también responde, con un límite diario más bajo
+        token = self._clave("ipinfo", "ipinfo") if self.apis.get("ipinfo") else None
+        cabeceras = {"Authorization": f"Bearer {token}"} if token else None
+        resp = self._get_api("ipinfo", ip, f"https://ipinfo.io/{ip}/json", clave=token, headers=cabeceras, timeout=10)
+        if resp.status_code != 200:
+            raise ErrorConsulta(f"Error HTTP {resp.status_code}: {resp.text}")
+        return resp.json()
+
+    def ipinfo_lote(self, ips):
+        """Hasta TAMANO_LOTE["ipinfo"] IPs por petición; las que están en la caché no se piden."""
+        import requests
+        resultados = {}
+        pendientes = []
+        forzar = bool(self.apis.get("sin_cache"))
+        for ip in ips:
+            if not forzar:
+                respuesta, estado = self.cache.obtener("ipinfo", ip)
+                obtener_metricas().incrementar("cache", proveedor="ipinfo", resultado=estado or "fallo")
+                # Las obsoletas se vuelven a pedir: en el mismo paquete no cuestan otra petición
+                if estado == "fresca":
+                    resultados[ip] = respuesta.json()
+                    continue
+            pendientes.append(ip)
+        if not pendientes:
+            return resultados
+        for paquete in trocear(pendientes, TAMANO_LOTE["ipinfo"]):
+            token = self._clave("ipinfo", "ipinfo (lotes)")
+            opciones = {"headers": {"Authorization": f"Bearer {token}"}, "json": paquete, "timeout": 60}
+            rotar = self._rotador("ipinfo", "https://ipinfo.io/batch", opciones) if self._en_pool("ipinfo") else None
+            try:
+                resp = self.motor.solicitar(
+                    "POST", "https://ipinfo.io/batch", proveedor="ipinfo", clave_api=token, rotar=rotar, **opciones,
+                ).result()
+            except requests.exceptions.RequestException as e:
+                raise ErrorRed(f"Error de conexión: {e}") from e
+            if resp.status_code != 200:
+                raise ErrorConsulta(f"Error HTTP {resp.status_code}: {resp.text}")
+            datos = resp.json()
+            validas = []
+            for ip in paquete:
+                dato = datos.get(ip)
+                if isinstance(dato, dict) and "error" not in dato:
+                    validas.append((ip, 200, dato))
+                    resultados[ip] = dato
+                else:
+                    resultados[ip] = ErrorConsulta(f"ipinfo no devolvió datos para {ip}")
+            self.cache.guardar_varias("ipinfo", validas)
+        return resultados
+
+    def abstractapi_ip(self, ip):
+        api_key = self._clave("abstractapi_ip", "AbstractAPI (IP)")
+        resp = self._get_api("abstractapi_ip", ip, f"https://ipgeolocation.abstractapi.com/v1/?api_key={api_key}&ip_address={ip}", clave=api_key, timeout=10)
+        if resp.status_code != 200:
+            raise ErrorConsulta(f"Error HTTP {resp.status_code}: {resp.text}")
+        return resp.json()
+
+    def shodan(self, ip):
+        api_key = self._clave("shodan", "Shodan")
+        resp = self._get_api("shodan", ip, f"https://api.shodan.io/shodan/host/{ip}?key={api_key}", clave=api_key, timeout=15)
+        if resp.status_code != 200:
+            raise ErrorConsulta(f"Error Shodan HTTP {resp.status_code}: {resp.json().get('error', resp.text)}")
+        return resp.json()
+
+    def ip_local(self, ip):
+        """País, ASN, organización... de la base local, sin salir a la red."""
+        try:
+            dato = self.base_ip.buscar(ip)
+        except ValueError as e:
+            raise ErrorConsulta(str(e))
+        if dato is None:
+            raise ErrorConsulta(f"{ip} no está en la base local de IPs")
+        return dict(dato, ip=ip)
+
+    def ip_local_lote(self, ips):
+        base = self.base_ip
+        return {ip: dict(dato, ip=ip) if dato is not None else ErrorConsulta(f"{ip} no está en la base local de IPs o no es válida")
+                for ip, dato in base.buscar_lote(ips)}
+
+    # --- Email ---
+    def email_local(self, email):
+        """Criba sin APIs de pago (correo.py): formato_valido, desechable, acepta_correo, mx..."""
+        return self.criba_correo.cribar(email)
+
+    def email_local_lote(self, emails):
+        return {r["email"]: r for r in self.criba_correo.cribar_lote(emails)}
+
+    def _criba_para_api(self, proveedor, email, completa):
+        """
+        ErrorConsulta, sin gastar consulta, si la criba local ya descarta el correo. Con
+        completa=False solo cuenta la sintaxis: un dominio caducado o desechable puede
+        seguir apareciendo en filtraciones antiguas.
+        """
+        criba = self.criba_correo.cribar(email, dns=completa)
+        if not criba["formato_valido"]:
+            motivo = criba["motivo"]
+        elif completa and criba["desechable"]:
+            motivo = "dominio de correo desechable"
+        elif completa and criba["valido"] is False:
+            motivo = criba["motivo"]
+        else:
+            return
+        obtener_metricas().incrementar("descartados_local", proveedor=proveedor)
+        raise ErrorConsulta(f"Correo descartado sin consultar la API: {motivo}")
+
+    def dehashed_paginas(self, valor, campo="email", tamano=DEHASHED_TAMANO_PAGINA):
+        """
+        Recorre perezosamente todas las páginas de Dehashed para campo:valor y devuelve
+        (total, entradas nuevas) por página. Las entradas repetidas se descartan y las
+        nuevas se guardan en el almacén local de filtraciones según llegan.
+        """
+        if campo == "email":
+            self._criba_para_api("dehashed", valor, completa=False)
+        consulta = f"{campo}:{valor}"
+        vistos = set()
+        for pagina in range(1, DEHASHED_MAX_PAGINAS + 1):
+            api_user, api_pass = self._credenciales_dehashed()
+            url = f"https://api.dehashed.com/search?query={quote(consulta, safe=':@')}&size={tamano}&page={pagina}"
+            resp = self._get_api("dehashed", f"{consulta}#{pagina}", url, auth=(api_user, api_pass), clave=api_user, timeout=10)
+            if resp.status_code != 200:
+                raise ErrorConsulta(f"Error HTTP {resp.status_code}: {resp.text}")
+            datos = resp.json()
+            entradas = datos.get("entries") or []
+            nuevas = []
+            for entrada in entradas:
+                identificador = id_entrada(entrada)
+                if identificador not in vistos:
+                    vistos.add(identificador)
+                    nuevas.append(entrada)
+            if nuevas:
+                self.filtraciones.guardar_lote(nuevas, consulta)
+            total = datos.get("total") or 0
+            yield total, nuevas
+            if len(entradas) < tamano or len(vistos) >= total:
+                break
+
+    def dehashed(self, email):
+        """Todas las entradas de Dehashed para el email: {"total", "entries"}."""
+        total, entradas = 0, []
+        for total, nuevas in self.dehashed_paginas(email):
+            entradas.extend(nuevas)
+        return {"total": total, "entries": entradas}
+
+    def abstractapi_email(self, email):
+        api_key = self._clave("abstractapi_email", "AbstractAPI (Email)")
+        self._criba_para_api("abstractapi_email", email, completa=True)
+        resp = self._get_api("abstractapi_email", email, f"https://emailvalidation.abstractapi.com/v1/?api_key={api_key}&email={email}", clave=api_key, timeout=10)
+        if not resp.ok:
+            raise ErrorConsulta(f"Error AbstractAPI (Email) HTTP {resp.status_code}: {resp.json().get('error', {}).get('message', 'Error')}")
+        return resp.json()
+
+    # --- Teléfono ---
+    def telefono_local(self, telefono):
+        """Validación y clasificación sin red (telefonos.py): valido, tipo_linea, codigo_pais..."""
+        from telefonos import clasificar
+        return clasificar(telefono, self.apis.get("pais_telefono"))
+
+    def telefono_local_lote(self, telefonos):
+        from telefonos import clasificar
+        pais = self.apis.get("pais_telefono")
+        return {telefono: clasificar(telefono, pais) for telefono in telefonos}
+
+    def _telefono_para_api(self, proveedor, telefono):
+        """
+        Número en E.164 para las APIs de pago (así la caché no distingue formatos), o
+        ErrorConsulta sin gastar consulta si ya se sabe sin red que no es válido.
+        """
+        local = self.telefono_local(telefono)
+        if local["valido"] is False:
+            obtener_metricas().incrementar("descartados_local", proveedor=proveedor)
+            raise ErrorConsulta(f"Número no válido ({local['motivo']}); no se consulta la API")
+        return local["numero_internacional"] or telefono
+
+    def veriphone(self, telefono):
+        api_key = self._clave("veriphone", "Veriphone")
+        telefono = self._telefono_para_api("veriphone", telefono)
+        resp = self._get_api("veriphone", telefono, f"https://api.veriphone.io/v2/verify?phone={quote(telefono)}&key={api_key}", clave=api_key, timeout=10)
+        return resp.json()
+
+    def abstractapi_telefono(self, telefono):
+        api_key = self._clave("abstractapi", "AbstractAPI (Teléfono)", "abstractapi_telefono")
+        telefono = self._telefono_para_api("abstractapi_telefono", telefono)
+        resp = self._get_api("abstractapi_telefono", telefono, f"https://phonevalidation.abstractapi.com/v1/?api_key={api_key}&phone={quote(telefono)}", clave=api_key, timeout=10)
+        return resp.json()
+
+    # --- Dominio ---
+    def whois(self, dominio):
+        """WHOIS nativo: {"dominio", "servidores", "texto", "campos"} (ver whois_cliente)."""
+        try:
+            return self.cliente_whois.consultar(dominio)
+        except (ErrorWhois, OSError) as e:
+            raise ErrorConsulta(str(e))
+
+    # --- Usuario ---
+    @property
+    def comprobador_usuarios(self):
+        # El catálogo de sitios se carga la primera vez que se usa
+        with self._lock:
+            if self._comprobador_usuarios is None:
+                self._comprobador_usuarios = ComprobadorUsuarios(self.motor)
+            return self._comprobador_usuarios
+
+    def usuario(self, usuario):
+        """Comprueba el usuario en todo el catálogo; devuelve un dict por sitio según terminan."""
+        return self.comprobador_usuarios.comprobar(usuario)
@@ -0,0 +1,464 @@
+import argparse
+import json
+import os
+import random
+import re
+import socket
+import struct
+import sys
+import threading
+import time
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+
+from configuracion import ruta_datos
+from metricas import obtener_metricas
+from whois_cliente import normalizar_dominio, ErrorWhois
+
+# --- Criba local de correos ---
+# Antes de pagar una validación de AbstractAPI o una búsqueda en Dehashed se mira lo
+# que se puede saber sin ellas: si la dirección es sintácticamente válida (RFC 5321/
+# 5322, con parte local entrecomillada y dominios internacionalizados), si el dominio
+# es de correo desechable y si el dominio existe y acepta correo (MX, o A/AAAA como
+# MX implícito; un MX nulo "." dice que no). La resolución DNS usa un cliente UDP
+# mínimo contra el resolutor del sistema y guarda cada dominio el tiempo que dice su
+# TTL: en las listas grandes unos pocos dominios (gmail.com, hotmail.com...) se
+# repiten miles de veces y solo se resuelven una.
+#
+#   python correo.py correos.txt -o correos.jsonl
+
+DESECHABLES_FILE = "dominios_desechables.txt"  # opcional, no viene con el programa (ver cargar_desechables)
+RESOLV_CONF = "/etc/resolv.conf"
+SERVIDORES_RESPALDO = ("1.1.1.1", "8.8.8.8")
+PUERTO_DNS = 53
+TIMEOUT_DNS = 2.0
+INTENTOS_DNS = 2
+TTL_MINIMO = 60
+TTL_MAXIMO = 24 * 3600
+TTL_NEGATIVO = 300  # NXDOMAIN sin SOA
+TTL_ERROR = 30      # timeouts y SERVFAIL: se reintenta pronto
+MAX_DOMINIOS_CACHE = 50000
+CONCURRENCIA_DNS = 16
+TAMANO_BLOQUE = 1000
+
+TIPO_A, TIPO_MX, TIPO_AAAA, TIPO_SOA = 1, 15, 28, 6
+NXDOMAIN = 3
+
+# Caracteres de un "atom" de la parte local (RFC 5322 + UTF-8 de RFC 6531)
+RE_LOCAL_ATOM = re.compile(r"^[^\x00-\x20\x7f\"(),.:;<>@\[\]\\]+(?:\.[^\x00-\x20\x7f\"(),.:;<>@\[\]\\]+)*$")
+RE_LOCAL_ENTRECOMILLADA = re.compile(r'^"(?:[\x20\x21\x23-\x5b\x5d-\x7e]|\\[\x20-\x7e])*"$')
+RE_LITERAL_IP = re.compile(r"^\[(?:IPv6:[0-9a-fA-F:.]+|\d{1,3}(?:\.\d{1,3}){3})\]$")
+
+# Semilla de unos 150 dominios desechables de los más vistos; la lista grande va aparte
+DESECHABLES = """
+0-mail.com 10minutemail.com 10minutemail.net 20minutemail.com 33mail.com anonbox.net anonymbox.com
+burnermail.io discard.email discardmail.com disposableemailaddresses.com dispostable.com dropmail.me
+emailondeck.com fakeinbox.com fakemail.net getairmail.com getnada.com guerrillamail.biz guerrillamail.com
+guerrillamail.de guerrillamail.info guerrillamail.net guerrillamail.org guerrillamailblock.com harakirimail.com
+incognitomail.org inboxbear.com inboxkitten.com jetable.org mail-temp.com mailcatch.com maildrop.cc
+mailinator.com mailinator.net mailinator2.com mailnesia.com mailnull.com mailpoof.com mailsac.com mailtemp.info
+mintemail.com mohmal.com moakt.com mytemp.email mytrashmail.com nada.email nwytg.net one-time.email
+owlymail.com sharklasers.com spam4.me spambox.us spamgourmet.com spamex.com tempail.com tempinbox.com
+temp-mail.io temp-mail.org tempmail.dev tempmail.net tempmailo.com tempr.email temporary-mail.net
+throwawaymail.com trash-mail.com trashmail.com trashmail.de trashmail.me trashmail.net trbvm.com
+yopmail.com yopmail.fr yopmail.net emailfake.com emailtemporanea.com correotemporal.org tmpmail.org
+tmpmail.net tmail.ws 1secmail.com 1secmail.net 1secmail.org byom.de cuvox.de dayrep.com einrot.com
+fleckens.hu gustr.com jourrapide.com rhyta.com superrito.com teleworm.us armyspy.com grr.la pokemail.net
+spamherelots.com binkmail.com bobmail.info chammy.info devnullmail.com letthemeatspam.com mailin8r.com
+safetymail.info sogetthis.com spamhereplease.com streetwisemail.com suremail.info thisisnotmyrealemail.com
+tradermail.info veryrealemail.com zippymail.info mvrht.net mailforspam.com spamfree24.org wegwerfmail.de
+wegwerfmail.net wegwerfemail.de kurzepost.de objectmail.com proxymail.eu rcpt.at trash-me.com
+"""
+
+
+class ConjuntoDominios:
+    """
+    Conjunto grande de dominios en poca memoria: todos ordenados y concatenados en un
+    solo bloque de bytes, con un array de desplazamientos y búsqueda binaria. Cien mil
+    dominios ocupan ~2 MB en vez de los ~10 MB de un set de cadenas.
+    """
+
+    def __init__(self, dominios):
+        ordenados = sorted({d.strip().lower().rstrip(".") for d in dominios if d.strip()})
+        self._bloque = "\n".join(ordenados).encode("ascii", "ignore")
+        self._inicios = array("I")
+        posicion = 0
+        for dominio in ordenados:
+            self._inicios.append(posicion)
+            posicion += len(dominio.encode("ascii", "ignore")) + 1
+
+    def __len__(self):
+        return len(self._inicios)
+
+    def _elemento(self, i):
+        inicio = self._inicios[i]
+        fin = self._inicios[i + 1] - 1 if i + 1 < len(self._inicios) else len(self._bloque)
+        return self._bloque[inicio:fin]
+
+    def __contains__(self, dominio):
+        buscado = dominio.encode("ascii", "ignore")
+        bajo, alto = 0, len(self._inicios)
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if self._elemento(medio) < buscado:
+                bajo = medio + 1
+            else:
+                alto = medio
+        return bajo < len(self._inicios) and self._elemento(bajo) == buscado
+
+    def contiene_o_padre(self, dominio):
+        """True si el dominio o alguno de sus padres (sub.mailinator.com) está en el conjunto."""
+        partes = dominio.split(".")
+        return any(".".join(partes[i:]) in self for i in range(len(partes) - 1))
+
+
+def cargar_desechables(ruta=None):
+    """
+    Los dominios de DESECHABLES más, si existe, los de DESECHABLES_FILE (uno por línea,
+    '#' para comentarios; por defecto en el directorio de datos, ver configuracion).
+    Ese fichero no se distribuye con WicOsintX: para cubrir decenas de miles de dominios
+    hay que descargar una lista pública (p. ej. disposable-email-domains) y dejarla ahí.
+    """
+    dominios = DESECHABLES.split()
+    ruta = ruta or ruta_datos(DESECHABLES_FILE)
+    if os.path.exists(ruta):
+        with open(ruta, "r", encoding="utf-8") as f:
+            dominios.extend(l.strip() for l in f if l.strip() and not l.startswith("#"))
+    return ConjuntoDominios(dominios)
+
+
+def analizar_sintaxis(email):
+    """(parte local, dominio ASCII) de una dirección válida, o ValueError con el motivo."""
+    email = email.strip()
+    local, arroba, dominio = email.rpartition("@")
+    if not arroba or not local or not dominio:
+        raise ValueError("falta la @ o una de sus partes")
+    if len(local.encode("utf-8")) > 64:
+        raise ValueError("parte local de más de 64 caracteres")
+    if not (RE_LOCAL_ATOM.match(local) or RE_LOCAL_ENTRECOMILLADA.match(local)):
+        raise ValueError("parte local no válida")
+    if RE_LITERAL_IP.match(dominio):
+        return local, dominio
+    try:
+        dominio = normalizar_dominio(dominio)
+    except ErrorWhois:
+        raise ValueError("dominio no válido")
+    if dominio.rsplit(".", 1)[-1].isdigit():
+        raise ValueError("dominio no válido")
+    if len(local.encode("utf-8")) + 1 + len(dominio) > 254:
+        raise ValueError("dirección de más de 254 caracteres")
+    return local, dominio
+
+
+# --- Cliente DNS mínimo (RFC 1035) ---
+
+class ErrorDNS(Exception):
+    pass
+
+
+def servidores_sistema(ruta=RESOLV_CONF):
+    """Resolutores de /etc/resolv.conf; los de respaldo si no hay (Windows, contenedores)."""
+    servidores = []
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            for linea in f:
+                partes = linea.split()
+                if len(partes) >= 2 and partes[0] == "nameserver":
+                    servidores.append(partes[1])
+    except OSError:
+        pass
+    return tuple(servidores) or SERVIDORES_RESPALDO
+
+
+def _pregunta(identificador, nombre, tipo):
+    cabecera = struct.pack(">HHHHHH", identificador, 0x0100, 1, 0, 0, 0)  # RD: recursión deseada
+    etiquetas = b"".join(bytes([len(e)]) + e for e in nombre.encode("ascii").split(b".") if e)
+    return cabecera + etiquetas + b"\0" + struct.pack(">HH", tipo, 1)
+
+
+def _leer_nombre(mensaje, posicion):
+    """(nombre, posición tras él) siguiendo los punteros de compresión."""
+    etiquetas, saltos, fin = [], 0, None
+    while True:
+        longitud = mensaje[posicion]
+        if longitud & 0xC0 == 0xC0:
+            if fin is None:
+                fin = posicion + 2
+            posicion = ((longitud & 0x3F) << 8) | mensaje[posicion + 1]
+            saltos += 1
+            if saltos > 32:
+                raise ErrorDNS("respuesta DNS con punteros en bucle")
+            continue
+        if longitud == 0:
+            return ".".join(etiquetas), (fin if fin is not None else posicion + 1)
+        etiquetas.append(mensaje[posicion + 1:posicion + 1 + longitud].decode("ascii", "replace"))
+        posicion += 1 + longitud
+
+
+def _parsear_respuesta(mensaje, identificador, tipo):
+    """(rcode, [(valor, ttl)] del tipo pedido, ttl negativo del SOA o None, truncada)."""
+    if len(mensaje) < 12:
+        raise ErrorDNS("respuesta DNS demasiado corta")
+    ident, flags, preguntas, respuestas, autoridad, _ = struct.unpack(">HHHHHH", mensaje[:12])
+    if ident != identificador:
+        raise ErrorDNS("respuesta DNS de otra consulta")
+    posicion = 12
+    for _ in range(preguntas):
+        _, posicion = _leer_nombre(mensaje, posicion)
+        posicion += 4
+    registros, ttl_negativo = [], None
+    for i in range(respuestas + autoridad):
+        _, posicion = _leer_nombre(mensaje, posicion)
+        tipo_rr, _, ttl, longitud = struct.unpack(">HHIH", mensaje[posicion:posicion + 10])
+        posicion += 10
+        datos = posicion
+        posicion += longitud
+        if i < respuestas and tipo_rr == tipo:
+            if tipo == TIPO_MX:
+                preferencia = struct.unpack(">H", mensaje[datos:datos + 2])[0]
+                registros.append(((preferencia, _leer_nombre(mensaje, datos + 2)[0]), ttl))
+            elif tipo in (TIPO_A, TIPO_AAAA):
+                if longitud != (4 if tipo == TIPO_A else 16) or posicion > len(mensaje):
+                    raise ErrorDNS(f"registro {'A' if tipo == TIPO_A else 'AAAA'} con {longitud} bytes de datos")
+                familia = socket.AF_INET if tipo == TIPO_A else socket.AF_INET6
+                registros.append((socket.inet_ntop(familia, mensaje[datos:posicion]), ttl))
+        elif i >= respuestas and tipo_rr == TIPO_SOA:
+            _, p = _leer_nombre(mensaje, datos)
+            _, p = _leer_nombre(mensaje, p)
+            minimo = struct.unpack(">I", mensaje[p + 16:p + 20])[0]
+            ttl_negativo = min(ttl, minimo)
+    return flags & 0x000F, registros, ttl_negativo, bool(flags & 0x0200)
+
+
+class ResolutorDNS:
+    """Consultas A/AAAA/MX por UDP (y TCP si la respuesta llega truncada) sin dependencias."""
+
+    def __init__(self, servidores=None, puerto=PUERTO_DNS, timeout=TIMEOUT_DNS, intentos=INTENTOS_DNS):
+        self.servidores = tuple(servidores) if servidores else servidores_sistema()
+        self.puerto = puerto
+        self.timeout = timeout
+        self.intentos = intentos
+
+    def _intercambiar(self, servidor, pregunta, tcp):
+        familia = socket.AF_INET6 if ":" in servidor else socket.AF_INET
+        if tcp:
+            with socket.create_connection((servidor, self.puerto), timeout=self.timeout) as s:
+                s.sendall(struct.pack(">H", len(pregunta)) + pregunta)
+                cabecera = s.recv(2, socket.MSG_WAITALL)
+                longitud = struct.unpack(">H", cabecera)[0]
+                partes, total = [], 0
+                while total < longitud:
+                    datos = s.recv(longitud - total)
+                    if not datos:
+                        break
+                    partes.append(datos)
+                    total += len(datos)
+                return b"".join(partes)
+        with socket.socket(familia, socket.SOCK_DGRAM) as s:
+            s.settimeout(self.timeout)
+            s.sendto(pregunta, (servidor, self.puerto))
+            return s.recv(4096)
+
+    def consultar(self, nombre, tipo):
+        """(rcode, [(valor, ttl)], ttl negativo). ErrorDNS si ningún servidor contesta."""
+        metricas = obtener_metricas()
+        ultimo_error = None
+        for intento in range(self.intentos):
+            servidor = self.servidores[intento % len(self.servidores)]
+            identificador = random.getrandbits(16)
+            pregunta = _pregunta(identificador, nombre, tipo)
+            inicio = time.perf_counter()
+            resultado = "error"
+            try:
+                tcp = False
+                while True:
+                    rcode, registros, ttl_negativo, truncada = _parsear_respuesta(
+                        self._intercambiar(servidor, pregunta, tcp), identificador, tipo)
+                    if not truncada or tcp:
+                        break
+                    tcp = True
+                resultado = "ok" if rcode in (0, NXDOMAIN) else f"rcode_{rcode}"
+                if rcode in (0, NXDOMAIN):
+                    return rcode, registros, ttl_negativo
+                ultimo_error = ErrorDNS(f"{servidor} respondió con código {rcode}")
+            except socket.timeout:
+                resultado = "timeout"
+                ultimo_error = ErrorDNS(f"{servidor} no responde")
+            except (OSError, ErrorDNS, struct.error, IndexError, ValueError) as e:
+                ultimo_error = e if isinstance(e, ErrorDNS) else ErrorDNS(f"{servidor}: {e}")
+            finally:
+                metricas.incrementar("peticiones", proveedor="dns", resultado=resultado)
+                metricas.observar("duracion_segundos", time.perf_counter() - inicio, proveedor="dns", fase="total")
+        raise ultimo_error
+
+
+def _limitar_ttl(ttl):
+    return max(TTL_MINIMO, min(TTL_MAXIMO, ttl))
+
+
+class CribaCorreo:
+    """
+    Sintaxis, desechables y MX de direcciones de correo, sin APIs de pago. Los dominios
+    resueltos se guardan según su TTL; si varias direcciones del mismo dominio llegan
+    a la vez, solo una sale a la red y las demás esperan su resultado.
+    """
+
+    def __init__(self, resolutor=None, desechables=None, concurrencia=CONCURRENCIA_DNS):
+        self.resolutor = resolutor or ResolutorDNS()
+        self._desechables = desechables
+        self.concurrencia = concurrencia
+        self._lock = threading.Lock()
+        self._cache = {}     # dominio -> (caduca, resultado)
+        self._en_vuelo = {}  # dominio -> Future
+        self._ejecutor = None
+
+    @property
+    def desechables(self):
+        with self._lock:
+            if self._desechables is None:
+                self._desechables = cargar_desechables()
+            return self._desechables
+
+    def _resolver_dominio(self, dominio):
+        """{"acepta_correo": True/False/None, "mx": [...], "motivo"} y su TTL."""
+        try:
+            rcode, registros, ttl_negativo = self.resolutor.consultar(dominio, TIPO_MX)
+            if rcode == NXDOMAIN:
+                return {"acepta_correo": False, "mx": [], "motivo": "el dominio no existe"}, ttl_negativo or TTL_NEGATIVO
+            if registros:
+                ttl = min(t for _, t in registros)
+                mx = [host.lower() for (_, host) in sorted(v for v, _ in registros)]
+                if mx == [""]:
+                    return {"acepta_correo": False, "mx": [], "motivo": "el dominio no acepta correo (MX nulo)"}, ttl
+                return {"acepta_correo": True, "mx": mx, "motivo": None}, ttl
+            # Sin MX: el propio dominio hace de servidor de correo si tiene dirección (RFC 5321 §5.1)
+            for tipo in (TIPO_A, TIPO_AAAA):
+                rcode, registros, ttl_negativo = self.resolutor.consultar(dominio, tipo)
+                if registros:
+                    return {"acepta_correo": True, "mx": [dominio], "motivo": None}, min(t for _, t in registros)
+            return {"acepta_correo": False, "mx": [], "motivo": "el dominio no tiene MX ni dirección"}, ttl_negativo or TTL_NEGATIVO
+        except ErrorDNS as e:
+            return {"acepta_correo": None, "mx": [], "motivo": f"DNS sin respuesta: {e}"}, TTL_ERROR
+
+    def dominio(self, dominio):
+        """Estado de correo del dominio, desde la caché o resolviéndolo (una vez por dominio)."""
+        ahora = time.monotonic()
+        with self._lock:
+            guardado = self._cache.get(dominio)
+            if guardado is not None and guardado[0] > ahora:
+                obtener_metricas().incrementar("cache", proveedor="dns", resultado="fresca")
+                return guardado[1]
+            futuro = self._en_vuelo.get(dominio)
+            propio = futuro is None
+            if propio:
+                futuro = self._en_vuelo[dominio] = Future()
+        if not propio:
+            obtener_metricas().incrementar("agrupadas", proveedor="dns", resultado="compartida")
+            return futuro.result()
+        obtener_metricas().incrementar("cache", proveedor="dns", resultado="fallo")
+        try:
+            resultado, ttl = self._resolver_dominio(dominio)
+            with self._lock:
+                if len(self._cache) >= MAX_DOMINIOS_CACHE:
+                    # Los dict conservan el orden de inserción: fuera el más antiguo
+                    del self._cache[next(iter(self._cache))]
+                # Los errores se reintentan antes del mínimo que se aplica a los TTL del DNS
+                ttl = ttl if resultado["acepta_correo"] is None else _limitar_ttl(ttl)
+                self._cache[dominio] = (time.monotonic() + ttl, resultado)
+            futuro.set_result(resultado)
+            return resultado
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._en_vuelo.pop(dominio, None)
+
+    def cribar(self, email, dns=True):
+        """
+        {email, valido, motivo, dominio, formato_valido, desechable, acepta_correo, mx}.
+        valido es False si la dirección no puede recibir correo y None si el DNS no contestó.
+        """
+        resultado = {"email": email.strip(), "valido": False, "motivo": None, "dominio": None, "formato_valido": False,
+                     "desechable": None, "acepta_correo": None, "mx": []}
+        try:
+            _, dominio = analizar_sintaxis(email)
+        except ValueError as e:
+            resultado["motivo"] = str(e)
+            return resultado
+        resultado.update(dominio=dominio, formato_valido=True)
+        if dominio.startswith("["):
+            # Literal de IP: no hay dominio que resolver ni que buscar en la lista
+            resultado.update(valido=True, desechable=False, acepta_correo=True)
+            return resultado
+        resultado["desechable"] = self.desechables.contiene_o_padre(dominio)
+        if not dns:
+            resultado["valido"] = True
+            return resultado
+        estado = self.dominio(dominio)
+        resultado.update(acepta_correo=estado["acepta_correo"], mx=estado["mx"], motivo=estado["motivo"],
+                         valido=estado["acepta_correo"])
+        return resultado
+
+    def cribar_lote(self, emails):
+        """
+        Genera cribar(email) en el orden de entrada. Se trabaja por bloques: los dominios
+        distintos de cada bloque se resuelven en paralelo y el resto sale de la caché.
+        """
+        with self._lock:
+            if self._ejecutor is None:
+                self._ejecutor = ThreadPoolExecutor(max_workers=self.concurrencia, thread_name_prefix="dns")
+        emails = iter(emails)
+        while True:
+            bloque = list(islice(emails, TAMANO_BLOQUE))
+            if not bloque:
+                return
+            previos = [self.cribar(e, dns=False) for e in bloque]
+            dominios = {r["dominio"] for r in previos if r["formato_valido"] and not r["dominio"].startswith("[")}
+            estados = dict(zip(dominios, self._ejecutor.map(self.dominio, dominios)))
+            for resultado in previos:
+                estado = estados.get(resultado["dominio"])
+                if estado is not None:
+                    resultado.update(acepta_correo=estado["acepta_correo"], mx=estado["mx"], motivo=estado["motivo"],
+                                     valido=estado["acepta_correo"])
+                yield resultado
+
+    def cerrar(self):
+        if self._ejecutor is not None:
+            self._ejecutor.shutdown(wait=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Criba correos sin APIs de pago: sintaxis, desechables y MX (salida JSONL).")
+    parser.add_argument("entrada", nargs="?", default="-", help="fichero con un correo por línea ('-' para stdin)")
+    parser.add_argument("-o", "--salida", default="-")
+    parser.add_argument("--dns", action="append", help="resolutor a usar (se puede repetir); por defecto el del sistema")
+    parser.add_argument("--sin-dns", action="store_true", help="solo sintaxis y desechables")
+    args = parser.parse_args(argv)
+
+    inicio = time.monotonic()
+    criba = CribaCorreo(ResolutorDNS(args.dns))
+    origen = sys.stdin if args.entrada == "-" else open(args.entrada, "r", encoding="utf-8")
+    salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8")
+    total = validos = 0
+    try:
+        lineas = (l.strip() for l in origen)
+        emails = (l for l in lineas if l and not l.startswith("#"))
+        resultados = (criba.cribar(e, dns=False) for e in emails) if args.sin_dns else criba.cribar_lote(emails)
+        for resultado in resultados:
+            total += 1
+            validos += resultado["valido"] is True
+            salida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+    finally:
+        if origen is not sys.stdin:
+            origen.close()
+        if salida is not sys.stdout:
+            salida.close()
+        criba.cerrar()
+    print(f"{total} correos ({validos} pasan la criba) en {time.monotonic() - inicio:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from configuracion import ruta_datos
+from consultas import ErrorConsulta
+
+# --- Registro de proveedores y fichas de entidad ---
+# Para una IP, un email o un teléfono se consultan a la vez todos los proveedores
+# configurados y sus respuestas se funden en una sola ficha con campos normalizados.
+# Cada campo recuerda qué proveedor lo aportó (y qué dijeron los demás), y la ficha se
+# puede mostrar en cuanto contesta el primero: la latencia total es la del más lento,
+# no la suma de todos. Los proveedores locales (sin red) se consultan antes que el resto,
+# y un proveedor remoto no se llega a lanzar si todo lo que puede aportar ya se conoce.
+
+
+def _ubicacion(texto):
+    """'lat,lon' de ipinfo -> (lat, lon)."""
+    try:
+        latitud, longitud = (float(v) for v in texto.split(","))
+        return latitud, longitud
+    except (AttributeError, ValueError):
+        return None, None
+
+
+def _campos_ipinfo(data):
+    latitud, longitud = _ubicacion(data.get("loc"))
+    asn = data.get("asn")
+    return {
+        "ip": data.get("ip"), "hostname": data.get("hostname"), "ciudad": data.get("city"),
+        "region": data.get("region"), "codigo_pais": data.get("country"),
+        "latitud": latitud, "longitud": longitud, "organizacion": data.get("org"),
+        "asn": asn.get("asn") if isinstance(asn, dict) else None,
+    }
+
+
+def _campos_abstractapi_ip(data):
+    return {
+        "ip": data.get("ip_address"), "pais": data.get("country"), "codigo_pais": data.get("country_code"),
+        "region": data.get("region"), "ciudad": data.get("city"),
+        "latitud": data.get("latitude"), "longitud": data.get("longitude"),
+        "isp": (data.get("connection") or {}).get("isp_name"),
+    }
+
+
+def _campos_shodan(data):
+    return {
+        "ip": data.get("ip_str"), "organizacion": data.get("org"), "isp": data.get("isp"),
+        "pais": data.get("country_name"), "codigo_pais": data.get("country_code"), "ciudad": data.get("city"),
+        "latitud": data.get("latitude"), "longitud": data.get("longitude"), "asn": data.get("asn"),
+        "hostnames": data.get("hostnames") or None, "puertos": sorted(data.get("ports") or []) or None,
+    }
+
+
+def _campos_ip_local(data):
+    return {c: data.get(c) for c in ("ip", "codigo_pais", "pais", "region", "ciudad", "latitud", "longitud", "asn", "organizacion")}
+
+
+def _campos_telefono_local(data):
+    return {c: data.get(c) for c in ("valido", "numero_internacional", "codigo_pais", "tipo_linea")}
+
+
+def _campos_email_local(data):
+    return {c: data.get(c) for c in ("email", "formato_valido", "desechable", "acepta_correo", "mx")}
+
+
+def _campos_dehashed(data):
+    entradas = data.get("entries") or []
+    bases = sorted({e.get("database_name") for e in entradas if e.get("database_name")})
+    return {"filtraciones": data.get("total") or 0, "bases_filtradas": bases or None}
+
+
+def _valor(campo):
+    # AbstractAPI envuelve los booleanos: {"value": true, "text": "TRUE"}
+    return campo.get("value") if isinstance(campo, dict) else campo
+
+
+def _campos_abstractapi_email(data):
+    return {
+        "email": data.get("email"), "formato_valido": _valor(data.get("is_valid_format")),
+        "smtp_valido": _valor(data.get("is_smtp_valid")), "desechable": _valor(data.get("is_disposable_email")),
+        "entregabilidad": data.get("deliverability"),
+    }
+
+
+def _campos_veriphone(data):
+    return {
+        "valido": data.get("phone_valid"), "numero_internacional": data.get("international_number"),
+        "pais": data.get("country"), "codigo_pais": data.get("country_code"),
+        "operador": data.get("carrier"), "tipo_linea": data.get("phone_type"),
+    }
+
+
+def _campos_abstractapi_telefono(data):
+    return {
+        "valido": data.get("valid"),
+        "numero_internacional": (data.get("format") or {}).get("international") or data.get("international_format"),
+        "pais": (data.get("country") or {}).get("name"), "codigo_pais": (data.get("country") or {}).get("code"),
+        "operador": data.get("carrier"), "tipo_linea": data.get("type"),
+    }
+
+
+# Por tipo, los proveedores en orden de preferencia: si dos dan valores distintos
+# para un campo, manda el que va antes. Cada uno indica la clave de apis.json que
+# necesita (None si funciona sin clave), cómo normalizar su respuesta y qué campos
+# puede aportar ("aporta"); "local" marca los que responden sin salir a la red y
+# "concluyente", si su respuesta basta para no consultar a nadie más; "necesario"
+# decide, con lo que ya se sabe, si merece la pena consultar a un proveedor remoto.
+PROVEEDORES = {
+    "ip": (
+        {"nombre": "ipinfo", "clave": None, "campos": _campos_ipinfo,
+         "aporta": ("ip", "hostname", "ciudad", "region", "codigo_pais", "latitud", "longitud", "organizacion", "asn")},
+        {"nombre": "shodan", "clave": "shodan", "campos": _campos_shodan,
+         "aporta": ("ip", "organizacion", "isp", "pais", "codigo_pais", "ciudad", "latitud", "longitud", "asn", "hostnames", "puertos")},
+        {"nombre": "abstractapi_ip", "clave": "abstractapi_ip", "campos": _campos_abstractapi_ip,
+         "aporta": ("ip", "pais", "codigo_pais", "region", "ciudad", "latitud", "longitud", "isp")},
+        # Último en preferencia (las bases gratuitas son menos finas), pero el primero en contestar
+        {"nombre": "ip_local", "clave": None, "campos": _campos_ip_local, "local": True,
+         "aporta": ("ip", "codigo_pais", "pais", "region", "ciudad", "latitud", "longitud", "asn", "organizacion")},
+    ),
+    "email": (
+        {"nombre": "abstractapi_email", "clave": "abstractapi_email", "campos": _campos_abstractapi_email,
+         "necesario": lambda campos: campos.get("desechable") is not True and campos.get("acepta_correo") is not False,
+         "aporta": ("email", "formato_valido", "smtp_valido", "desechable", "entregabilidad")},
+        {"nombre": "dehashed", "clave": "dehashed_user", "campos": _campos_dehashed,
+         "aporta": ("filtraciones", "bases_filtradas")},
+        # Una dirección mal formada no tiene nada que buscar en ningún sitio
+        {"nombre": "email_local", "clave": None, "campos": _campos_email_local, "local": True,
+         "concluyente": lambda campos: campos.get("formato_valido") is False,
+         "aporta": ("email", "formato_valido", "desechable", "acepta_correo", "mx")},
+    ),
+    "telefono": (
+        {"nombre": "veriphone", "clave": "veriphone", "campos": _campos_veriphone,
+         "aporta": ("valido", "numero_internacional", "pais", "codigo_pais", "operador", "tipo_linea")},
+        {"nombre": "abstractapi_telefono", "clave": "abstractapi", "campos": _campos_abstractapi_telefono,
+         "aporta": ("valido", "numero_internacional", "pais", "codigo_pais", "operador", "tipo_linea")},
+        # Un número que ya se sabe inválido no merece una consulta de pago
+        {"nombre": "telefono_local", "clave": None, "campos": _campos_telefono_local, "local": True,
+         "concluyente": lambda campos: campos.get("valido") is False,
+         "aporta": ("valido", "numero_internacional", "codigo_pais", "tipo_linea")},
+    ),
+}
+
+
+def proveedores_configurados(tipo, apis):
+    """Proveedores del tipo utilizables con las claves de 'apis' (en orden de preferencia)."""
+    disponibles = [p for p in PROVEEDORES[tipo] if p["clave"] is None or apis.get(p["clave"])]
+    # La base local solo cuenta si ya se ha importado (importación diferida: arranque rápido)
+    from base_ip import BASE_IP_FILE
+    return [p for p in disponibles if p["nombre"] != "ip_local" or os.path.exists(ruta_datos(BASE_IP_FILE))]
+
+
+class FichaEntidad:
+    """
+    Ficha fusionada de una entidad. Para cada campo guarda lo que dijo cada proveedor;
+    el valor de la ficha es el del proveedor preferido entre los que lo aportaron.
+    """
+
+    def __init__(self, tipo, valor, proveedores):
+        self.tipo = tipo
+        self.valor = valor
+        self.orden = list(proveedores)
+        self.fuentes = {}       # campo -> {proveedor: valor}
+        self.errores = {}       # proveedor -> mensaje
+        self.pendientes = set(self.orden)
+        self.inicio = time.monotonic()
+        self.duraciones = {}    # proveedor -> segundos hasta su respuesta
+        self.omitidos = []      # proveedores que no hizo falta consultar
+        self._lock = threading.Lock()
+
+    def _elegir(self, campo):
+        valores = self.fuentes[campo]
+        proveedor = min(valores, key=self.orden.index)
+        return valores[proveedor], proveedor
+
+    def incorporar(self, proveedor, campos):
+        """Añade la respuesta de un proveedor; devuelve {campo: (valor, fuente)} de lo que ha cambiado."""
+        with self._lock:
+            antes = {c: self._elegir(c) for c in campos if c in self.fuentes}
+            for campo, valor in campos.items():
+                if valor not in (None, "", []):
+                    self.fuentes.setdefault(campo, {})[proveedor] = valor
+            self._terminar(proveedor)
+            return {c: self._elegir(c) for c in campos if c in self.fuentes and antes.get(c) != self._elegir(c)}
+
+    def omitir(self, proveedor):
+        """El proveedor no se consulta (no tiene nada nuevo que aportar)."""
+        with self._lock:
+            self.omitidos.append(proveedor)
+            self.pendientes.discard(proveedor)
+
+    def fallar(self, proveedor, mensaje):
+        with self._lock:
+            self.errores[proveedor] = mensaje
+            self._terminar(proveedor)
+
+    def _terminar(self, proveedor):
+        self.pendientes.discard(proveedor)
+        self.duraciones[proveedor] = time.monotonic() - self.inicio
+
+    @property
+    def completa(self):
+        return not self.pendientes
+
+    def campos(self):
+        """{campo: (valor, fuente)} con el valor preferido de cada campo."""
+        with self._lock:
+            return {c: self._elegir(c) for c in self.fuentes}
+
+    def discrepancias(self):
+        """{campo: {proveedor: valor}} de los campos en los que los proveedores no coinciden."""
+        with self._lock:
+            return {c: dict(v) for c, v in self.fuentes.items() if len({repr(x) for x in v.values()}) > 1}
+
+    def como_dict(self):
+        campos = {c: {"valor": v, "fuente": f} for c, (v, f) in self.campos().items()}
+        with self._lock:
+            return {
+                "tipo": self.tipo,
+                "valor": self.valor,
+                "campos": campos,
+                "fuentes": {c: dict(v) for c, v in self.fuentes.items()},
+                "errores": dict(self.errores),
+                "pendientes": [p for p in self.orden if p in self.pendientes],
+                "duraciones": {p: round(s, 3) for p, s in self.duraciones.items()},
+                "omitidos": list(self.omitidos),
+            }
+
+
+def _incorporar(ficha, proveedor, obtener, al_actualizar):
+    try:
+        cambios = ficha.incorporar(proveedor["nombre"], proveedor["campos"](obtener()))
+    except ErrorConsulta as e:
+        cambios = None
+        ficha.fallar(proveedor["nombre"], str(e))
+    except Exception as e:
+        cambios = None
+        ficha.fallar(proveedor["nombre"], f"Error inesperado: {e}")
+    if al_actualizar:
+        al_actualizar(ficha, proveedor["nombre"], cambios)
+
+
+def consultar_entidad(consultor, tipo, valor, al_actualizar=None, proveedores=None, campos=None):
+    """
+    Lanza en paralelo todos los proveedores configurados para el tipo y funde sus
+    respuestas en una FichaEntidad. al_actualizar(ficha, proveedor, cambios) se llama
+    (desde el hilo que llama a esta función) cada vez que contesta uno, empezando por
+    el más rápido; 'cambios' es {campo: (valor, fuente)} o None si ese proveedor falló.
+
+    Los proveedores locales contestan primero; después se omiten los remotos que no
+    aportarían ningún campo que falte, o todos si un local es concluyente. Con 'campos' (iterable de nombres) solo se
+    consulta a quien pueda dar alguno de esos campos que siga sin conocerse.
+    """
+    disponibles = proveedores if proveedores is not None else proveedores_configurados(tipo, consultor.apis)
+    ficha = FichaEntidad(tipo, valor, [p["nombre"] for p in disponibles])
+    if not disponibles:
+        return ficha
+    concluida = False
+    for proveedor in disponibles:
+        if proveedor.get("local"):
+            _incorporar(ficha, proveedor, lambda: consultor.consultar(proveedor["nombre"], valor), al_actualizar)
+            if "concluyente" in proveedor:
+                propios = {c: v[proveedor["nombre"]] for c, v in ficha.fuentes.items() if proveedor["nombre"] in v}
+                concluida = concluida or proveedor["concluyente"](propios)
+    conocidos = set(ficha.fuentes)
+    valores = {c: v for c, (v, _) in ficha.campos().items()}
+    remotos = []
+    for proveedor in disponibles:
+        if proveedor.get("local"):
+            continue
+        if concluida or ("necesario" in proveedor and not proveedor["necesario"](valores)):
+            ficha.omitir(proveedor["nombre"])
+            continue
+        utiles = set(proveedor.get("aporta") or ())
+        if campos is not None:
+            utiles &= set(campos)
+        # Sin "aporta" no se sabe qué daría: se consulta siempre
+        if "aporta" in proveedor and (not utiles or utiles <= conocidos):
+            ficha.omitir(proveedor["nombre"])
+        else:
+            remotos.append(proveedor)
+    if not remotos:
+        return ficha
+    # Las peticiones ya pasan por el motor (límites por host y globales); estos hilos solo esperan
+    with ThreadPoolExecutor(max_workers=len(remotos), thread_name_prefix=f"entidad-{tipo}") as ejecutor:
+        futuros = {ejecutor.submit(consultor.consultar, p["nombre"], valor): p for p in remotos}
+        for futuro in as_completed(futuros):
+            _incorporar(ficha, futuros[futuro], futuro.result, al_actualizar)
+    return ficha
@@ -0,0 +1,110 @@
+import json
+import sqlite3
+import threading
+import time
+
+from configuracion import crear_directorio, ruta_datos
+
+# --- Almacén local de filtraciones (Dehashed) ---
+# Todas las entradas que devuelve Dehashed se guardan aquí, sin duplicados (por su id),
+# con índices por email, usuario, hash de contraseña e IP. Así las preguntas cruzadas
+# ("¿qué otros emails comparten este hash?") se responden en local, sin gastar consultas.
+
+FILTRACIONES_FILE = "filtraciones.sqlite"
+CAMPOS_ENTRADA = ("email", "username", "hashed_password", "password", "ip_address", "name", "phone", "database_name")
+CAMPOS_INDEXADOS = ("email", "username", "hashed_password", "password", "ip_address")
+# Solo estos se comparan sin distinguir mayúsculas; contraseñas y hashes (bcrypt, base64) sí distinguen
+CAMPOS_SIN_MAYUSCULAS = ("email", "username")
+
+
+def id_entrada(entrada):
+    """Identificador estable de una entrada: el de Dehashed o, si falta, su contenido."""
+    if entrada.get("id"):
+        return str(entrada["id"])
+    return json.dumps({c: entrada.get(c) for c in CAMPOS_ENTRADA}, sort_keys=True)
+
+
+def normalizar(campo, valor):
+    # Dehashed devuelve algunos campos como lista en la API nueva
+    if isinstance(valor, list):
+        valor = valor[0] if valor else None
+    if valor in (None, ""):
+        return None
+    valor = str(valor).strip()
+    return valor.lower() if campo in CAMPOS_SIN_MAYUSCULAS else valor
+
+
+class AlmacenFiltraciones:
+    def __init__(self, ruta=None):
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(crear_directorio(ruta or ruta_datos(FILTRACIONES_FILE)), check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS entradas ("
+            " id TEXT PRIMARY KEY, " + ", ".join(f"{c} TEXT" for c in CAMPOS_ENTRADA) + ","
+            " datos TEXT NOT NULL, consulta TEXT, visto REAL NOT NULL)"
+        )
+        for campo in CAMPOS_INDEXADOS:
+            self._con.execute(f"CREATE INDEX IF NOT EXISTS idx_entradas_{campo} ON entradas ({campo})")
+        self._con.commit()
+
+    def guardar_lote(self, entradas, consulta=None):
+        """Guarda las entradas nuevas (las ya conocidas se ignoran). Devuelve cuántas eran nuevas."""
+        ahora = time.time()
+        filas = [
+            (id_entrada(e),) + tuple(normalizar(c, e.get(c)) for c in CAMPOS_ENTRADA)
+            + (json.dumps(e, ensure_ascii=False), consulta, ahora)
+            for e in entradas
+        ]
+        marcas = ", ".join("?" * (len(CAMPOS_ENTRADA) + 4))
+        with self._lock, self._con:
+            antes = self._con.total_changes
+            self._con.executemany(f"INSERT OR IGNORE INTO entradas VALUES ({marcas})", filas)
+            return self._con.total_changes - antes
+
+    def buscar(self, campo, valor, limite=None):
+        """Entradas guardadas cuyo 'campo' (uno de CAMPOS_INDEXADOS) vale 'valor'."""
+        if campo not in CAMPOS_INDEXADOS:
+            raise ValueError(f"Campo no indexado: {campo}")
+        consulta = f"SELECT datos FROM entradas WHERE {campo} = ? ORDER BY id"
+        parametros = [normalizar(campo, valor)]
+        if limite:
+            consulta += " LIMIT ?"
+            parametros.append(limite)
+        with self._lock:
+            filas = self._con.execute(consulta, parametros).fetchall()
+        return [json.loads(datos) for (datos,) in filas]
+
+    def relacionados(self, campo, valor, por=("hashed_password", "password", "username")):
+        """
+        Para cada campo de 'por', valores que comparte la entidad (campo = valor) con
+        otras entidades: {por: {valor_compartido: [otros valores de 'campo'], ...}}.
+        Ej.: relacionados("email", x) -> otros emails con el mismo hash, contraseña o usuario.
+        """
+        if campo not in CAMPOS_INDEXADOS:
+            raise ValueError(f"Campo no indexado: {campo}")
+        valor = normalizar(campo, valor)
+        resultado = {}
+        with self._lock:
+            for enlace in por:
+                filas = self._con.execute(
+                    f"SELECT DISTINCT b.{enlace}, b.{campo} FROM entradas a JOIN entradas b ON a.{enlace} = b.{enlace}"
+                    f" WHERE a.{campo} = ? AND b.{campo} IS NOT NULL AND b.{campo} != ? ORDER BY 1, 2",
+                    (valor, valor),
+                ).fetchall()
+                for compartido, otro in filas:
+                    resultado.setdefault(enlace, {}).setdefault(compartido, []).append(otro)
+        return resultado
+
+    def contar(self):
+        with self._lock:
+            return self._con.execute("SELECT COUNT(*) FROM entradas").fetchone()[0]
+
+    def limpiar(self):
+        with self._lock, self._con:
+            self._con.execute("DELETE FROM entradas")
+
+    def cerrar(self):
+        with self._lock:
+            self._con.close()
@@ -0,0 +1,404 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from functools import lru_cache
+
+from configuracion import crear_directorio, ruta_datos
+from metadatos import EXTENSIONES, recorrer_imagenes
+
+# --- Índice local de imágenes similares (huellas perceptuales) ---
+# Para cada imagen se calculan tres huellas de 64 bits que cambian poco aunque la
+# imagen se recomprima, se redimensione o se retoque ligeramente:
+#   aHash: 8x8 en gris, cada bit dice si el píxel supera la media;
+#   dHash: 9x8 en gris, cada bit compara un píxel con su vecino de la derecha;
+#   pHash: DCT de 32x32, bits de las 8x8 frecuencias bajas frente a su mediana.
+# Dos imágenes son casi iguales si la distancia de Hamming entre huellas es pequeña.
+# Las huellas se calculan con NumPy sobre paquetes de imágenes a la vez (la DCT es un
+# producto de matrices para todo el paquete) y los paquetes se reparten entre varios
+# procesos, como el modo carpeta de metadatos.py. Decodificar necesita Pillow; ambas
+# dependencias son opcionales y solo se importan al usar este módulo.
+#
+# Las huellas se guardan en SQLite (ruta + tamaño + mtime, como la caché de EXIF) y se
+# buscan con un índice multi-tabla: la huella se parte en TROZOS trozos de 16 bits y,
+# si dos huellas están a distancia <= d, al menos un trozo está a <= d // TROZOS. Así
+# una búsqueda solo mira unos cientos de cubetas, no todo el corpus, y responde en
+# milisegundos con cientos de miles de imágenes. Todo es local: no sale nada a la red.
+#
+#   python huellas_imagen.py indexar /ruta/a/incautacion
+#   python huellas_imagen.py buscar sospechosa.jpg --umbral 8
+#   python huellas_imagen.py duplicados --umbral 6 -o grupos.jsonl
+
+INDICE_FILE = "huellas_imagen.sqlite"
+EXTENSIONES_HUELLAS = (EXTENSIONES - {".heic", ".heif", ".hif"}) | {".bmp", ".gif", ".webp"}  # lo que decodifica Pillow
+TIPOS_HUELLA = ("ahash", "dhash", "phash")
+TIPO_POR_DEFECTO = "phash"
+UMBRAL_POR_DEFECTO = 10   # bits distintos de 64
+LADO_PHASH = 32
+LADO_HASH = 8
+TROZOS = 4
+BITS_TROZO = 64 // TROZOS
+IMAGENES_POR_PAQUETE = 64
+BITS_64 = (1 << 64) - 1
+
+
+class ErrorHuellas(Exception):
+    pass
+
+
+def _dependencias():
+    """(numpy, PIL.Image, PIL.ImageOps), o ErrorHuellas si no están instalados."""
+    try:
+        import numpy
+        from PIL import Image, ImageOps
+    except ImportError as e:
+        raise ErrorHuellas(f"Las huellas de imagen necesitan NumPy y Pillow (pip install numpy pillow): {e}")
+    return numpy, Image, ImageOps
+
+
+def distancia(a, b):
+    return (a ^ b).bit_count()
+
+
+@lru_cache(maxsize=None)
+def _matriz_dct(n):
+    np, _, _ = _dependencias()
+    k = np.arange(n)[:, None]
+    matriz = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matriz[0] /= np.sqrt(2)
+    return matriz.astype(np.float32)
+
+
+def _cargar(ruta, Image, ImageOps, np):
+    """Las tres reducciones en gris de la imagen: (32x32, 8x8, 8 filas x 9 columnas)."""
+    filtro = getattr(Image, "Resampling", Image).BOX
+    with Image.open(ruta) as imagen:
+        # En JPEG decodifica directamente a escala reducida (hasta 1/8): es lo más caro
+        imagen.draft("L", (LADO_PHASH * 4, LADO_PHASH * 4))
+        gris = ImageOps.exif_transpose(imagen).convert("L")
+    return (np.asarray(gris.resize((LADO_PHASH, LADO_PHASH), filtro), dtype=np.float32),
+            np.asarray(gris.resize((LADO_HASH, LADO_HASH), filtro), dtype=np.float32),
+            np.asarray(gris.resize((LADO_HASH + 1, LADO_HASH), filtro), dtype=np.float32))
+
+
+def _empaquetar(bits, np):
+    """(n, 64) booleanos -> lista de n enteros de 64 bits."""
+    return [int(v) for v in np.packbits(bits, axis=1).view(">u8").ravel()]
+
+
+def calcular_huellas(grandes, pequenas, anchas):
+    """
+    Huellas de un paquete de imágenes ya reducidas: arrays (n, 32, 32), (n, 8, 8) y
+    (n, 8, 9). Devuelve {"ahash": [...], "dhash": [...], "phash": [...]}.
+    """
+    np, _, _ = _dependencias()
+    n = len(grandes)
+    medias = pequenas.reshape(n, -1).mean(axis=1, keepdims=True)
+    ahash = pequenas.reshape(n, -1) > medias
+    dhash = (anchas[:, :, 1:] > anchas[:, :, :-1]).reshape(n, -1)
+    dct = _matriz_dct(LADO_PHASH)
+    frecuencias = (dct @ grandes @ dct.T)[:, :LADO_HASH, :LADO_HASH].reshape(n, -1)
+    # La componente continua (brillo medio) no cuenta para la mediana
+    medianas = np.median(frecuencias[:, 1:], axis=1, keepdims=True)
+    phash = frecuencias > medianas
+    return {"ahash": _empaquetar(ahash, np), "dhash": _empaquetar(dhash, np), "phash": _empaquetar(phash, np)}
+
+
+def _huellas_para_lote(rutas):
+    """Punto de entrada de los procesos: [(ruta, huellas o None, error o None)]; nunca lanza excepciones."""
+    np, Image, ImageOps = _dependencias()
+    cargadas, resultados = [], {}
+    for ruta in rutas:
+        try:
+            cargadas.append((ruta, _cargar(ruta, Image, ImageOps, np)))
+        except (OSError, ValueError, SyntaxError, Image.DecompressionBombError) as e:
+            resultados[ruta] = (ruta, None, str(e) or type(e).__name__)
+    if cargadas:
+        grandes, pequenas, anchas = (np.stack([c[1][i] for c in cargadas]) for i in range(3))
+        huellas = calcular_huellas(grandes, pequenas, anchas)
+        for i, (ruta, _) in enumerate(cargadas):
+            resultados[ruta] = (ruta, {tipo: huellas[tipo][i] for tipo in TIPOS_HUELLA}, None)
+    return [resultados[ruta] for ruta in rutas]
+
+
+def huellas_imagen(ruta):
+    """Las tres huellas de una imagen; ErrorHuellas si no se puede decodificar."""
+    _, huellas, error = _huellas_para_lote([ruta])[0]
+    if error:
+        raise ErrorHuellas(f"No se pudo leer la imagen: {error}")
+    return huellas
+
+
+@lru_cache(maxsize=None)
+def _vecinos_trozo(radio):
+    """Máscaras XOR de BITS_TROZO bits con como mucho 'radio' bits a 1."""
+    return tuple(m for m in range(1 << BITS_TROZO) if m.bit_count() <= radio)
+
+
+def _trozos(huella):
+    mascara = (1 << BITS_TROZO) - 1
+    return [(huella >> (BITS_TROZO * i)) & mascara for i in range(TROZOS)]
+
+
+def _con_signo(huella):
+    # SQLite guarda enteros de 64 bits con signo
+    return huella - (1 << 64) if huella >> 63 else huella
+
+
+class IndiceImagenes:
+    def __init__(self, ruta=None, tipo=TIPO_POR_DEFECTO):
+        if tipo not in TIPOS_HUELLA:
+            raise ValueError(f"Tipo de huella no válido: {tipo}")
+        self.tipo = tipo
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(crear_directorio(ruta or ruta_datos(INDICE_FILE)), check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS huellas ("
+            " ruta TEXT PRIMARY KEY, tamano INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+            " ahash INTEGER NOT NULL, dhash INTEGER NOT NULL, phash INTEGER NOT NULL)"
+        )
+        self._con.commit()
+        # Índice en memoria; se construye en la primera búsqueda
+        self._rutas = None      # id -> ruta
+        self._huellas = None    # id -> huella del tipo elegido
+        self._vigente = None    # ruta -> id actual (las versiones anteriores quedan huérfanas)
+        self._tablas = None     # una por trozo: valor del trozo -> [ids]
+
+    def obtener(self, ruta, estado):
+        """Huellas guardadas si el fichero no ha cambiado desde entonces; si no, None."""
+        with self._lock:
+            fila = self._con.execute(
+                "SELECT ahash, dhash, phash FROM huellas WHERE ruta = ? AND tamano = ? AND mtime_ns = ?",
+                (os.path.abspath(ruta), estado.st_size, estado.st_mtime_ns),
+            ).fetchone()
+        return {tipo: valor & BITS_64 for tipo, valor in zip(TIPOS_HUELLA, fila)} if fila else None
+
+    def guardar_varias(self, filas):
+        """Guarda [(ruta, estado, huellas), ...] en una transacción y las añade al índice en memoria."""
+        with self._lock:
+            with self._con:
+                self._con.executemany(
+                    "INSERT OR REPLACE INTO huellas VALUES (?, ?, ?, ?, ?, ?)",
+                    [(os.path.abspath(ruta), estado.st_size, estado.st_mtime_ns,
+                      *(_con_signo(huellas[tipo]) for tipo in TIPOS_HUELLA)) for ruta, estado, huellas in filas],
+                )
+            if self._tablas is not None:
+                for ruta, _, huellas in filas:
+                    self._anadir(os.path.abspath(ruta), huellas[self.tipo])
+
+    def _anadir(self, ruta, huella):
+        identificador = len(self._rutas)
+        self._rutas.append(ruta)
+        self._huellas.append(huella)
+        self._vigente[ruta] = identificador
+        for tabla, trozo in zip(self._tablas, _trozos(huella)):
+            tabla.setdefault(trozo, []).append(identificador)
+
+    def _cargar(self):
+        if self._tablas is not None:
+            return
+        self._rutas, self._huellas, self._vigente = [], [], {}
+        self._tablas = [{} for _ in range(TROZOS)]
+        for ruta, huella in self._con.execute(f"SELECT ruta, {self.tipo} FROM huellas"):
+            self._anadir(ruta, huella & BITS_64)
+
+    def __len__(self):
+        with self._lock:
+            self._cargar()
+            return len(self._vigente)
+
+    def buscar(self, huella, umbral=UMBRAL_POR_DEFECTO):
+        """Imágenes a distancia <= umbral de la huella: [(distancia, ruta)] de más a menos parecida."""
+        vecinos = _vecinos_trozo(umbral // TROZOS)
+        with self._lock:
+            self._cargar()
+            candidatos = set()
+            for tabla, trozo in zip(self._tablas, _trozos(huella)):
+                for mascara in vecinos:
+                    candidatos.update(tabla.get(trozo ^ mascara, ()))
+            encontradas = []
+            for identificador in candidatos:
+                ruta = self._rutas[identificador]
+                if self._vigente.get(ruta) != identificador:
+                    continue
+                d = distancia(huella, self._huellas[identificador])
+                if d <= umbral:
+                    encontradas.append((d, ruta))
+        # Las que se han borrado o movido desde que se indexaron salen del índice
+        desaparecidas = {ruta for _, ruta in encontradas if not os.path.exists(ruta)}
+        if desaparecidas:
+            self.quitar(desaparecidas)
+        return sorted((d, ruta) for d, ruta in encontradas if ruta not in desaparecidas)
+
+    def duplicados(self, umbral=UMBRAL_POR_DEFECTO):
+        """Grupos de imágenes casi iguales entre sí (componentes conexas), de mayor a menor."""
+        with self._lock:
+            self._cargar()
+            vigentes = [(ruta, self._huellas[i]) for ruta, i in self._vigente.items()]
+        padre = {}
+
+        def raiz(ruta):
+            while padre.get(ruta, ruta) != ruta:
+                padre[ruta] = padre.get(padre[ruta], padre[ruta])
+                ruta = padre[ruta]
+            return ruta
+
+        for ruta, huella in vigentes:
+            for _, otra in self.buscar(huella, umbral):
+                a, b = raiz(ruta), raiz(otra)
+                if a != b:
+                    padre[b] = a
+        grupos = {}
+        for ruta, _ in vigentes:
+            grupos.setdefault(raiz(ruta), set()).add(ruta)
+        return sorted((sorted(g) for g in grupos.values() if len(g) > 1), key=len, reverse=True)
+
+    def quitar(self, rutas):
+        rutas = [os.path.abspath(ruta) for ruta in rutas]
+        with self._lock:
+            with self._con:
+                self._con.executemany("DELETE FROM huellas WHERE ruta = ?", [(ruta,) for ruta in rutas])
+            if self._tablas is not None:
+                # Sus ids quedan huérfanos en las tablas y buscar() los salta
+                for ruta in rutas:
+                    self._vigente.pop(ruta, None)
+
+    def podar(self, carpeta, vigentes):
+        """Quita las rutas indexadas bajo 'carpeta' que no están en 'vigentes'; devuelve cuántas."""
+        prefijo = os.path.join(os.path.abspath(carpeta), "")
+        with self._lock:
+            guardadas = [ruta for (ruta,) in self._con.execute(
+                "SELECT ruta FROM huellas WHERE substr(ruta, 1, ?) = ?", (len(prefijo), prefijo))]
+        sobrantes = [ruta for ruta in guardadas if ruta not in vigentes]
+        self.quitar(sobrantes)
+        return len(sobrantes)
+
+    def limpiar(self):
+        with self._lock:
+            with self._con:
+                self._con.execute("DELETE FROM huellas")
+            self._tablas = None
+
+    def cerrar(self):
+        with self._lock:
+            self._con.close()
+
+
+def indexar_carpeta(carpeta, indice, procesos=None):
+    """
+    Calcula las huellas de todas las imágenes de la carpeta en un pool de procesos (por
+    paquetes de IMAGENES_POR_PAQUETE) y devuelve (ruta, error, desde_indice) según
+    terminan. Los ficheros que no han cambiado desde que se indexaron no se abren. Al
+    terminar el recorrido se quitan del índice las rutas de la carpeta que ya no existen
+    o ya no se pueden leer.
+    """
+    _dependencias()
+    procesos = procesos or os.cpu_count() or 2
+    # 'spawn' evita heredar los hilos (y el Tk) del proceso principal al hacer fork
+    contexto = multiprocessing.get_context("spawn")
+    rutas = recorrer_imagenes(carpeta, EXTENSIONES_HUELLAS)
+    paquete, estados, en_vuelo, vigentes = [], {}, {}, set()
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as ejecutor:
+        try:
+            agotadas = False
+            while True:
+                while not agotadas and len(en_vuelo) < procesos * 2:
+                    ruta = next(rutas, None)
+                    if ruta is None:
+                        agotadas = True
+                    else:
+                        try:
+                            estado = os.stat(ruta)
+                        except OSError as e:
+                            yield os.path.abspath(ruta), str(e), False
+                            continue
+                        if indice.obtener(ruta, estado) is not None:
+                            vigentes.add(os.path.abspath(ruta))
+                            yield os.path.abspath(ruta), None, True
+                            continue
+                        paquete.append(ruta)
+                        estados[ruta] = estado
+                    if paquete and (agotadas or len(paquete) >= IMAGENES_POR_PAQUETE):
+                        en_vuelo[ejecutor.submit(_huellas_para_lote, paquete)] = paquete
+                        paquete = []
+                if not en_vuelo:
+                    break
+                hechos, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                for futuro in hechos:
+                    del en_vuelo[futuro]
+                    resultados = futuro.result()
+                    indice.guardar_varias([(ruta, estados[ruta], huellas) for ruta, huellas, _ in resultados if huellas])
+                    for ruta, _, error in resultados:
+                        del estados[ruta]
+                        if not error:
+                            vigentes.add(os.path.abspath(ruta))
+                        yield os.path.abspath(ruta), error, False
+            # Solo si se ha recorrido la carpeta entera (no al cancelar a medias)
+            indice.podar(carpeta, vigentes)
+        finally:
+            for futuro in en_vuelo:
+                futuro.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Índice local de imágenes casi iguales (aHash, dHash, pHash).")
+    parser.add_argument("--indice", help=f"base SQLite (por defecto {INDICE_FILE} en el directorio de datos)")
+    parser.add_argument("--tipo", choices=TIPOS_HUELLA, default=TIPO_POR_DEFECTO, help="huella con la que se compara")
+    ordenes = parser.add_subparsers(dest="orden", required=True)
+    indexar = ordenes.add_parser("indexar", help="añade al índice las imágenes de una carpeta (recursivo)")
+    indexar.add_argument("carpeta")
+    indexar.add_argument("-p", "--procesos", type=int, help="procesos en paralelo (por defecto, uno por CPU)")
+    buscar = ordenes.add_parser("buscar", help="imágenes del índice parecidas a una dada")
+    buscar.add_argument("imagen")
+    buscar.add_argument("--umbral", type=int, default=UMBRAL_POR_DEFECTO)
+    duplicados = ordenes.add_parser("duplicados", help="grupos de imágenes casi iguales dentro del índice (JSONL)")
+    duplicados.add_argument("--umbral", type=int, default=UMBRAL_POR_DEFECTO)
+    duplicados.add_argument("-o", "--salida", default="-")
+    args = parser.parse_args(argv)
+
+    inicio = time.monotonic()
+    indice = IndiceImagenes(args.indice, args.tipo)
+    try:
+        if args.orden == "indexar":
+            total = errores = previas = 0
+            for ruta, error, desde_indice in indexar_carpeta(args.carpeta, indice, args.procesos):
+                total += 1
+                previas += desde_indice
+                if error:
+                    errores += 1
+                    print(f"{ruta}: {error}", file=sys.stderr)
+            print(f"{total} imágenes ({errores} con error, {previas} ya indexadas) en {time.monotonic() - inicio:.1f}s",
+                  file=sys.stderr)
+        elif args.orden == "buscar":
+            huella = huellas_imagen(args.imagen)[args.tipo]
+            for d, ruta in indice.buscar(huella, args.umbral):
+                print(f"{d}\t{ruta}")
+        else:
+            salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8")
+            try:
+                grupos = indice.duplicados(args.umbral)
+                for grupo in grupos:
+                    salida.write(json.dumps(grupo, ensure_ascii=False) + "\n")
+            finally:
+                if salida is not sys.stdout:
+                    salida.close()
+            print(f"{len(grupos)} grupos de imágenes casi iguales en {time.monotonic() - inicio:.1f}s", file=sys.stderr)
+    except ErrorHuellas as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        indice.cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,373 @@
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+
+from configuracion import crear_directorio, ruta_datos
+from consultas import ErrorConsulta, PROVEEDORES_POR_TIPO, PROVEEDORES_LOCALES
+from filtraciones import id_entrada
+from metricas import obtener_metricas
+
+# --- Histórico de investigaciones y lista de vigilancia ---
+# Cada resultado estructurado (los datos que devuelve el proveedor, no el texto de la
+# ventana) se guarda en un SQLite persistente por entidad, proveedor y momento. La
+# tabla es de solo inserción: un disparador impide modificar o borrar filas. Si un
+# resultado es idéntico al anterior de la misma entidad y proveedor (misma huella
+# SHA-256 del contenido normalizado) solo se anota la comprobación, sin repetir los
+# datos. Un índice FTS5 permite buscar texto en todo lo guardado.
+#
+# La lista de vigilancia vuelve a consultar periódicamente IPs, dominios, emails y
+# usuarios. Solo se comprueban las entradas cuyo intervalo ha vencido; las APIs se
+# revalidan con If-None-Match / If-Modified-Since (ver Consultor.revalidando), y lo
+# que vuelve se compara por huella: de cada cambio se informa con sus diferencias.
+#
+#   python investigaciones.py buscar "AS15169"
+#   python investigaciones.py historial 8.8.8.8
+#   python investigaciones.py vigilar ip 8.8.8.8 --horas 12
+#   python investigaciones.py comprobar --todas
+
+INVESTIGACIONES_FILE = "investigaciones.sqlite"
+HORA = 3600
+INTERVALO_VIGILANCIA = 24 * HORA
+TIPOS_VIGILABLES = ("ip", "dominio", "email", "usuario")
+MAX_RESULTADOS_BUSQUEDA = 200
+
+
+def tipo_de_proveedor(proveedor):
+    return next((tipo for tipo, nombres in PROVEEDORES_POR_TIPO.items() if proveedor in nombres), None)
+
+
+def normalizar_entidad(tipo, entidad):
+    entidad = entidad.strip()
+    # Los nombres de usuario se guardan tal cual: algunos sitios distinguen mayúsculas
+    return entidad if tipo == "usuario" else entidad.lower()
+
+
+def comparable(proveedor, datos):
+    """La parte de los datos que cuenta para decidir si algo ha cambiado."""
+    if proveedor == "whois" and isinstance(datos, dict):
+        # El texto crudo lleva marcas de tiempo de la consulta; los campos no
+        return datos.get("campos", datos)
+    if proveedor == "usuario" and isinstance(datos, list):
+        return {r["sitio"]: r["estado"] for r in datos}
+    if proveedor == "dehashed" and isinstance(datos, dict):
+        # Las entradas por su id: que Dehashed las devuelva en otro orden no es un cambio
+        return {"total": datos.get("total"), "entries": {id_entrada(e): e for e in datos.get("entries") or ()}}
+    return datos
+
+
+def huella(datos):
+    return hashlib.sha256(json.dumps(datos, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def aplanar(datos, prefijo=""):
+    """{ruta: valor} con rutas como 'asn.asn' o 'ports[2]'."""
+    if isinstance(datos, dict):
+        planos = {}
+        for clave, valor in datos.items():
+            planos.update(aplanar(valor, f"{prefijo}.{clave}" if prefijo else str(clave)))
+        return planos
+    if isinstance(datos, list):
+        if all(not isinstance(v, (dict, list)) for v in datos):
+            # Listas de valores simples: se comparan como conjunto, el orden no es un cambio
+            return {f"{prefijo}[{json.dumps(v, ensure_ascii=False, default=str)}]": True for v in datos} or {prefijo: []}
+        planos = {}
+        for i, valor in enumerate(datos):
+            planos.update(aplanar(valor, f"{prefijo}[{i}]"))
+        return planos
+    return {prefijo: datos}
+
+
+def diferencias(antes, despues):
+    """{"añadidos": {ruta: valor}, "eliminados": {ruta: valor}, "cambiados": {ruta: (antes, después)}}."""
+    a, d = aplanar(antes), aplanar(despues)
+    return {
+        "añadidos": {r: d[r] for r in d.keys() - a.keys()},
+        "eliminados": {r: a[r] for r in a.keys() - d.keys()},
+        "cambiados": {r: (a[r], d[r]) for r in a.keys() & d.keys() if a[r] != d[r]},
+    }
+
+
+def texto_buscable(entidad, proveedor, datos):
+    planos = aplanar(datos)
+    # Las listas simples quedan en la ruta ('ports[443]'), así que la ruta también se indexa
+    return " ".join([entidad, proveedor] + [ruta if valor in (None, "", True) else f"{ruta} {valor}" for ruta, valor in planos.items()])
+
+
+class AlmacenInvestigaciones:
+    def __init__(self, ruta=None):
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(crear_directorio(ruta or ruta_datos(INVESTIGACIONES_FILE)), check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS resultados ("
+            " id INTEGER PRIMARY KEY, hora REAL NOT NULL, tipo TEXT, entidad TEXT NOT NULL,"
+            " proveedor TEXT NOT NULL, huella TEXT NOT NULL, datos TEXT)"  # datos NULL: igual que el anterior
+        )
+        self._con.execute("CREATE INDEX IF NOT EXISTS idx_resultados_entidad ON resultados (entidad, proveedor, id)")
+        for operacion in ("UPDATE", "DELETE"):
+            self._con.execute(
+                f"CREATE TRIGGER IF NOT EXISTS resultados_solo_insercion_{operacion.lower()} BEFORE {operacion} ON resultados"
+                " BEGIN SELECT RAISE(ABORT, 'el histórico de investigaciones es de solo inserción'); END"
+            )
+        try:
+            # Sin contenido propio: el texto solo sirve para encontrar el id del resultado
+            self._con.execute("CREATE VIRTUAL TABLE IF NOT EXISTS resultados_fts USING fts5(texto, content='')")
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite compilado sin FTS5: se busca con LIKE sobre los datos
+            self.fts = False
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS vigilancia ("
+            " tipo TEXT NOT NULL, entidad TEXT NOT NULL, intervalo REAL NOT NULL, alta REAL NOT NULL,"
+            " ultima REAL, PRIMARY KEY (tipo, entidad))"
+        )
+        self._con.commit()
+
+    # --- Histórico ---
+    def _ultimo(self, entidad, proveedor):
+        """(huella, datos) del último resultado con datos de la entidad y proveedor."""
+        return self._con.execute(
+            "SELECT huella, datos FROM resultados WHERE entidad = ? AND proveedor = ? AND datos IS NOT NULL"
+            " ORDER BY id DESC LIMIT 1",
+            (entidad, proveedor),
+        ).fetchone()
+
+    def registrar(self, tipo, entidad, proveedor, datos, hora=None):
+        """
+        Añade un resultado y devuelve (id, diferencias): diferencias es None si es el
+        primero de la entidad con ese proveedor y un dict vacío si no ha cambiado nada.
+        """
+        tipo = tipo or tipo_de_proveedor(proveedor)
+        entidad = normalizar_entidad(tipo, entidad)
+        contenido = comparable(proveedor, datos)
+        nueva_huella = huella(contenido)
+        with self._lock:
+            anterior = self._ultimo(entidad, proveedor)
+            sin_cambios = anterior is not None and anterior[0] == nueva_huella
+            cursor = self._con.execute(
+                "INSERT INTO resultados (hora, tipo, entidad, proveedor, huella, datos) VALUES (?, ?, ?, ?, ?, ?)",
+                (hora or time.time(), tipo, entidad, proveedor, nueva_huella,
+                 None if sin_cambios else json.dumps(datos, ensure_ascii=False, default=str)),
+            )
+            if self.fts and not sin_cambios:
+                self._con.execute("INSERT INTO resultados_fts (rowid, texto) VALUES (?, ?)",
+                                  (cursor.lastrowid, texto_buscable(entidad, proveedor, contenido)))
+            self._con.commit()
+        if anterior is None:
+            return cursor.lastrowid, None
+        if sin_cambios:
+            return cursor.lastrowid, {}
+        cambios = diferencias(comparable(proveedor, json.loads(anterior[1])), contenido)
+        # Otra huella pero las mismas rutas y valores (p. ej. una lista reordenada): no es un cambio
+        return cursor.lastrowid, cambios if any(cambios.values()) else {}
+
+    def historial(self, entidad, proveedor=None, tipo=None, limite=100):
+        """Resultados de la entidad, del más reciente al más antiguo: dicts con 'sin_cambios' y 'datos'."""
+        # Sin tipo no se sabe si distingue mayúsculas: vale la forma exacta y la normalizada
+        variantes = [normalizar_entidad(tipo, entidad)] if tipo else [entidad.strip(), entidad.strip().lower()]
+        condicion, parametros = "entidad IN (?, ?)", (variantes * 2)[:2]
+        if proveedor:
+            condicion += " AND proveedor = ?"
+            parametros.append(proveedor)
+        with self._lock:
+            filas = self._con.execute(
+                f"SELECT id, hora, tipo, entidad, proveedor, huella, datos FROM resultados WHERE {condicion} ORDER BY id DESC LIMIT ?",
+                parametros + [limite],
+            ).fetchall()
+        return [{"id": i, "hora": h, "tipo": t, "entidad": e, "proveedor": p, "huella": hu,
+                 "sin_cambios": d is None, "datos": json.loads(d) if d else None}
+                for i, h, t, e, p, hu, d in filas]
+
+    def datos(self, id_resultado):
+        """Los datos de un resultado; si se anotó como sin cambios, los de la versión que repite."""
+        with self._lock:
+            fila = self._con.execute("SELECT entidad, proveedor, huella FROM resultados WHERE id = ?", (id_resultado,)).fetchone()
+            if fila is None:
+                return None
+            datos = self._con.execute(
+                "SELECT datos FROM resultados WHERE entidad = ? AND proveedor = ? AND huella = ? AND datos IS NOT NULL"
+                " AND id <= ? ORDER BY id DESC LIMIT 1",
+                fila + (id_resultado,),
+            ).fetchone()
+        return json.loads(datos[0]) if datos else None
+
+    def buscar(self, texto, limite=MAX_RESULTADOS_BUSQUEDA):
+        """Resultados guardados que contienen todas las palabras: [(id, hora, tipo, entidad, proveedor)]."""
+        palabras = texto.split()
+        if not palabras:
+            return []
+        with self._lock:
+            if self.fts:
+                # Cada palabra como frase literal: los caracteres de la sintaxis FTS no cuentan
+                consulta = " ".join('"' + p.replace('"', '""') + '"' for p in palabras)
+                return self._con.execute(
+                    "SELECT r.id, r.hora, r.tipo, r.entidad, r.proveedor FROM resultados_fts f"
+                    " JOIN resultados r ON r.id = f.rowid WHERE resultados_fts MATCH ? ORDER BY r.id DESC LIMIT ?",
+                    (consulta, limite),
+                ).fetchall()
+            condiciones = " AND ".join("(entidad || ' ' || proveedor || ' ' || datos) LIKE ?" for _ in palabras)
+            return self._con.execute(
+                f"SELECT id, hora, tipo, entidad, proveedor FROM resultados WHERE datos IS NOT NULL AND {condiciones}"
+                " ORDER BY id DESC LIMIT ?",
+                [f"%{p}%" for p in palabras] + [limite],
+            ).fetchall()
+
+    # --- Lista de vigilancia ---
+    def vigilar(self, tipo, entidad, intervalo=INTERVALO_VIGILANCIA):
+        if tipo not in TIPOS_VIGILABLES:
+            raise ValueError(f"Tipo no vigilable: {tipo} (usa {', '.join(TIPOS_VIGILABLES)})")
+        with self._lock:
+            self._con.execute(
+                "INSERT INTO vigilancia (tipo, entidad, intervalo, alta) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (tipo, entidad) DO UPDATE SET intervalo = excluded.intervalo",
+                (tipo, normalizar_entidad(tipo, entidad), intervalo, time.time()),
+            )
+            self._con.commit()
+
+    def dejar_de_vigilar(self, tipo, entidad):
+        with self._lock:
+            self._con.execute("DELETE FROM vigilancia WHERE tipo = ? AND entidad = ?", (tipo, normalizar_entidad(tipo, entidad)))
+            self._con.commit()
+
+    def vigiladas(self):
+        """[(tipo, entidad, intervalo, ultima)] por orden de alta."""
+        with self._lock:
+            return self._con.execute("SELECT tipo, entidad, intervalo, ultima FROM vigilancia ORDER BY alta").fetchall()
+
+    def vencidas(self, ahora=None):
+        """Las entradas vigiladas que toca volver a comprobar: [(tipo, entidad)]."""
+        ahora = ahora or time.time()
+        with self._lock:
+            return self._con.execute(
+                "SELECT tipo, entidad FROM vigilancia WHERE ultima IS NULL OR ultima + intervalo <= ? ORDER BY alta",
+                (ahora,),
+            ).fetchall()
+
+    def marcar_comprobada(self, tipo, entidad, hora=None):
+        with self._lock:
+            self._con.execute("UPDATE vigilancia SET ultima = ? WHERE tipo = ? AND entidad = ?",
+                              (hora or time.time(), tipo, entidad))
+            self._con.commit()
+
+    def cerrar(self):
+        with self._lock:
+            self._con.close()
+
+
+def proveedores_vigilancia(tipo, apis):
+    """Los proveedores con red que se vuelven a consultar para el tipo (los locales no cambian solos)."""
+    if tipo in ("ip", "email"):
+        from entidades import proveedores_configurados
+        return [p["nombre"] for p in proveedores_configurados(tipo, apis) if p["nombre"] not in PROVEEDORES_LOCALES]
+    return list(PROVEEDORES_POR_TIPO[tipo])
+
+
+def _obtener(consultor, proveedor, entidad):
+    if proveedor == "usuario":
+        return list(consultor.usuario(entidad))
+    return consultor.consultar(proveedor, entidad)
+
+
+def comprobar_vigiladas(almacen, consultor, al_avanzar=None, todas=False):
+    """
+    Vuelve a consultar las entradas vigiladas vencidas (o todas) y guarda lo que llegue.
+    Por cada proveedor llama a al_avanzar con un evento {"tipo", "entidad", "proveedor",
+    "resultado", "diferencias", "error"}; resultado es 'nueva', 'cambios', 'sin_cambios',
+    'no_modificada' (el servidor respondió 304) o 'error'. Devuelve la lista de eventos.
+    """
+    metricas = obtener_metricas()
+    pendientes = [(t, e) for t, e, _, _ in almacen.vigiladas()] if todas else almacen.vencidas()
+    eventos = []
+    for tipo, entidad in pendientes:
+        for proveedor in proveedores_vigilancia(tipo, consultor.apis):
+            evento = {"tipo": tipo, "entidad": entidad, "proveedor": proveedor, "diferencias": None, "error": None}
+            try:
+                with consultor.revalidando() as revalidacion:
+                    datos = _obtener(consultor, proveedor, entidad)
+            except ErrorConsulta as e:
+                evento.update(resultado="error", error=str(e))
+            else:
+                _, cambios = almacen.registrar(tipo, entidad, proveedor, datos)
+                if cambios is None:
+                    evento["resultado"] = "nueva"
+                elif cambios:
+                    evento.update(resultado="cambios", diferencias=cambios)
+                elif revalidacion["peticiones"] and revalidacion["no_modificadas"] == revalidacion["peticiones"]:
+                    evento["resultado"] = "no_modificada"
+                else:
+                    evento["resultado"] = "sin_cambios"
+            metricas.incrementar("vigilancia", proveedor=proveedor, resultado=evento["resultado"])
+            eventos.append(evento)
+            if al_avanzar:
+                al_avanzar(evento)
+        almacen.marcar_comprobada(tipo, entidad)
+    return eventos
+
+
+def describir_diferencias(diferencias, limite=20):
+    """Líneas legibles ('+ ruta: valor', '- ruta: valor', '~ ruta: antes -> después')."""
+    lineas = [f"+ {r}: {v}" if v is not True else f"+ {r}" for r, v in sorted(diferencias["añadidos"].items())]
+    lineas += [f"- {r}: {v}" if v is not True else f"- {r}" for r, v in sorted(diferencias["eliminados"].items())]
+    lineas += [f"~ {r}: {a} -> {d}" for r, (a, d) in sorted(diferencias["cambiados"].items())]
+    if len(lineas) > limite:
+        lineas = lineas[:limite] + [f"... y {len(lineas) - limite} cambios más"]
+    return lineas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Histórico de investigaciones y lista de vigilancia de WicOsintX.")
+    parser.add_argument("--base", help=f"base SQLite (por defecto {INVESTIGACIONES_FILE} en el directorio de datos)")
+    ordenes = parser.add_subparsers(dest="orden", required=True)
+    buscar = ordenes.add_parser("buscar", help="busca texto en todos los resultados guardados")
+    buscar.add_argument("texto")
+    historial = ordenes.add_parser("historial", help="resultados guardados de una entidad")
+    historial.add_argument("entidad")
+    historial.add_argument("--proveedor")
+    vigilar = ordenes.add_parser("vigilar", help="añade (o actualiza) una entrada de la lista de vigilancia")
+    vigilar.add_argument("tipo", choices=TIPOS_VIGILABLES)
+    vigilar.add_argument("entidad")
+    vigilar.add_argument("--horas", type=float, default=INTERVALO_VIGILANCIA / HORA)
+    quitar = ordenes.add_parser("quitar", help="quita una entrada de la lista de vigilancia")
+    quitar.add_argument("tipo", choices=TIPOS_VIGILABLES)
+    quitar.add_argument("entidad")
+    ordenes.add_parser("lista", help="muestra la lista de vigilancia")
+    comprobar = ordenes.add_parser("comprobar", help="vuelve a consultar las entradas vencidas (JSONL de eventos)")
+    comprobar.add_argument("--todas", action="store_true", help="también las que no han vencido")
+    args = parser.parse_args(argv)
+
+    almacen = AlmacenInvestigaciones(args.base)
+    try:
+        if args.orden == "buscar":
+            for id_resultado, hora, tipo, entidad, proveedor in almacen.buscar(args.texto):
+                print(f"{id_resultado}\t{time.strftime('%Y-%m-%d %H:%M', time.localtime(hora))}\t{tipo}\t{entidad}\t{proveedor}")
+        elif args.orden == "historial":
+            for resultado in almacen.historial(args.entidad, args.proveedor):
+                print(json.dumps(resultado, ensure_ascii=False, default=str))
+        elif args.orden == "vigilar":
+            almacen.vigilar(args.tipo, args.entidad, args.horas * HORA)
+        elif args.orden == "quitar":
+            almacen.dejar_de_vigilar(args.tipo, args.entidad)
+        elif args.orden == "lista":
+            for tipo, entidad, intervalo, ultima in almacen.vigiladas():
+                comprobada = time.strftime("%Y-%m-%d %H:%M", time.localtime(ultima)) if ultima else "nunca"
+                print(f"{tipo}\t{entidad}\tcada {intervalo / HORA:g} h\túltima: {comprobada}")
+        else:
+            from configuracion import cargar_apis
+            from consultas import Consultor
+            consultor = Consultor(cargar_apis())
+            eventos = comprobar_vigiladas(almacen, consultor, todas=args.todas,
+                                          al_avanzar=lambda e: print(json.dumps(e, ensure_ascii=False, default=str), flush=True))
+            cambios = sum(e["resultado"] == "cambios" for e in eventos)
+            print(f"{len(eventos)} comprobaciones, {cambios} con cambios", file=sys.stderr)
+    finally:
+        almacen.cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
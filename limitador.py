@@ -0,0 +1,236 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# --- Límite de ritmo, reintentos y cuotas por proveedor ---
+# Cada proveedor tiene un cubo de tokens (peticiones/segundo y ráfaga). Las respuestas
+# transitorias (429, 5xx, timeouts) se reintentan con espera exponencial con jitter,
+# respetando Retry-After; un 429 además congela el cubo de esa cuenta.
+# Las cabeceras de cuota que devuelven las APIs se guardan por proveedor y clave.
+#
+# Un proveedor puede tener varias claves (un "pool"): cada una tiene su propio cubo,
+# porque los límites son por cuenta, así que con N claves el ritmo máximo es N veces
+# el de una. elegir_clave() reparte las peticiones entre ellas por turno ponderado:
+# pesa más la que tiene más cuota restante y menos errores recientes. Las claves que
+# reciben un 429, se quedan sin cuota o son rechazadas (401/402/403), o fallan varias
+# veces seguidas, se enfrían un tiempo y no se eligen mientras haya otras disponibles.
+
+# (peticiones por segundo, ráfaga); se pueden cambiar con "limites" en apis.json
+LIMITES_POR_PROVEEDOR = {
+    "ipinfo": (10, 20),
+    "abstractapi_ip": (1, 1),
+    "abstractapi_email": (1, 1),
+    "abstractapi_telefono": (1, 1),
+    "shodan": (1, 1),
+    "dehashed": (5, 5),
+    "veriphone": (5, 5),
+}
+LIMITE_POR_DEFECTO = (5, 5)
+
+STATUS_REINTENTABLES = {429, 500, 502, 503, 504}
+MAX_INTENTOS = 4
+ESPERA_BASE = 0.5
+ESPERA_MAXIMA = 30.0
+
+CABECERAS_RESTANTES = ("X-RateLimit-Remaining", "RateLimit-Remaining", "X-Ratelimit-Remaining-Day")
+CABECERAS_LIMITE = ("X-RateLimit-Limit", "RateLimit-Limit", "X-Ratelimit-Limit-Day")
+
+# Enfriamiento de claves (segundos)
+ENFRIAMIENTO_LIMITADA = 60.0      # 429 sin Retry-After
+ENFRIAMIENTO_AGOTADA = 3600.0     # cuota a cero o clave rechazada (401/402/403)
+ENFRIAMIENTO_FALLOS = 30.0        # tras FALLOS_PARA_ENFRIAR errores seguidos; se duplica en cada racha
+ENFRIAMIENTO_MAXIMO = 600.0
+FALLOS_PARA_ENFRIAR = 3
+STATUS_CLAVE_RECHAZADA = {401, 402, 403}
+SUAVIZADO_ERRORES = 0.2  # peso de la última petición en la tasa de errores reciente
+PESO_MINIMO = 0.05
+
+
+def parsear_retry_after(valor):
+    """Devuelve los segundos indicados por Retry-After (número o fecha HTTP), o None."""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def espera_reintento(intento, retry_after=None):
+    """Espera exponencial con jitter completo; nunca menos de lo que pide Retry-After."""
+    espera = random.uniform(0, min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** intento))
+    if retry_after is not None:
+        espera = max(espera, min(retry_after, ESPERA_MAXIMA * 4))
+    return espera
+
+
+def huella_clave(clave):
+    """Identificador corto de una clave API para informes, sin exponerla entera."""
+    return f"…{clave[-4:]}" if clave else "-"
+
+
+class CuboTokens:
+    def __init__(self, tasa, rafaga):
+        self.tasa = float(tasa)
+        self.rafaga = float(rafaga)
+        self._tokens = self.rafaga
+        self._ultimo = time.monotonic()
+        self._pausado_hasta = 0.0
+        self._lock = threading.Lock()
+
+    def reservar(self):
+        """Consume un token y devuelve cuántos segundos hay que esperar para usarlo."""
+        with self._lock:
+            ahora = time.monotonic()
+            self._tokens = min(self.rafaga, self._tokens + (ahora - self._ultimo) * self.tasa)
+            self._ultimo = ahora
+            # Los tokens pueden quedar en negativo: es la cola de reservas pendientes
+            self._tokens -= 1
+            espera = -self._tokens / self.tasa if self._tokens < 0 else 0.0
+            return max(espera, self._pausado_hasta - ahora)
+
+    async def adquirir(self):
+        espera = self.reservar()
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+    def pausar(self, segundos):
+        with self._lock:
+            self._pausado_hasta = max(self._pausado_hasta, time.monotonic() + segundos)
+
+
+class Limitador:
+    def __init__(self, limites=None):
+        self._limites = dict(LIMITES_POR_PROVEEDOR)
+        self._cubos = {}
+        self._cuotas = {}
+        self._turno = {}  # proveedor -> "reloj" del turno ponderado de su pool
+        self._pools = {}  # proveedor -> claves de su pool (las de la última elección)
+        self._lock = threading.Lock()
+        if limites:
+            self.configurar(limites)
+
+    def configurar(self, limites):
+        """
+        Acepta {"proveedor": {"rps": x, "rafaga": y}} o {"proveedor": [x, y]} (límite de cada clave).
+        Lanza ValueError si algún ritmo no es positivo o la ráfaga es menor que 1.
+        """
+        nuevos = {}
+        for proveedor, valor in limites.items():
+            if isinstance(valor, dict):
+                tasa, rafaga = valor.get("rps", LIMITE_POR_DEFECTO[0]), valor.get("rafaga", 1)
+            else:
+                tasa, rafaga = valor
+            if not tasa > 0 or not rafaga >= 1:
+                raise ValueError(f"Límite no válido para {proveedor}: rps={tasa}, rafaga={rafaga} (rps > 0 y rafaga >= 1)")
+            nuevos[proveedor] = (tasa, rafaga)
+        with self._lock:
+            for proveedor, limite in nuevos.items():
+                self._limites[proveedor] = limite
+                for clave in [c for c in self._cubos if c[0] == proveedor]:
+                    del self._cubos[clave]
+
+    def cubo(self, proveedor, clave=None):
+        """Cubo de la cuenta: uno por proveedor y clave (sin clave, uno para todo el proveedor)."""
+        with self._lock:
+            cubo = self._cubos.get((proveedor, clave))
+            if cubo is None:
+                cubo = self._cubos[proveedor, clave] = CuboTokens(*self._limites.get(proveedor, LIMITE_POR_DEFECTO))
+            return cubo
+
+    def _cuota(self, proveedor, clave):
+        return self._cuotas.setdefault((proveedor, clave), {
+            "peticiones": 0, "errores": 0, "limitadas": 0, "restantes": None, "limite": None,
+            "elegida": 0, "turno": 0.0, "tasa_errores": 0.0, "fallos_seguidos": 0, "enfriada_hasta": 0.0,
+        })
+
+    def _enfriar(self, cuota, segundos):
+        cuota["enfriada_hasta"] = max(cuota["enfriada_hasta"], time.monotonic() + segundos)
+
+    def registrar(self, proveedor, clave, resp=None, error=None):
+        """Anota una petición terminada (respuesta o excepción) en la cuenta de la clave."""
+        with self._lock:
+            cuota = self._cuota(proveedor, clave)
+            cuota["peticiones"] += 1
+            # Solo cuentan como fallo de la clave la red, los 5xx y los rechazos; un 404 es una respuesta
+            fallo = error is not None or resp.status_code >= 500 or resp.status_code in STATUS_CLAVE_RECHAZADA
+            if error is not None or resp.status_code >= 400:
+                cuota["errores"] += 1
+            cuota["tasa_errores"] += SUAVIZADO_ERRORES * (fallo - cuota["tasa_errores"])
+            cuota["fallos_seguidos"] = cuota["fallos_seguidos"] + 1 if fallo else 0
+            if cuota["fallos_seguidos"] >= FALLOS_PARA_ENFRIAR:
+                rachas = cuota["fallos_seguidos"] - FALLOS_PARA_ENFRIAR
+                self._enfriar(cuota, min(ENFRIAMIENTO_MAXIMO, ENFRIAMIENTO_FALLOS * 2 ** rachas))
+            if resp is None:
+                return
+            if resp.status_code == 429:
+                cuota["limitadas"] += 1
+                retry_after = parsear_retry_after(resp.headers.get("Retry-After"))
+                self._enfriar(cuota, retry_after if retry_after is not None else ENFRIAMIENTO_LIMITADA)
+            elif resp.status_code in STATUS_CLAVE_RECHAZADA:
+                self._enfriar(cuota, ENFRIAMIENTO_AGOTADA)
+            for campo, cabeceras in (("restantes", CABECERAS_RESTANTES), ("limite", CABECERAS_LIMITE)):
+                for cabecera in cabeceras:
+                    valor = resp.headers.get(cabecera)
+                    if valor is not None and valor.strip().isdigit():
+                        cuota[campo] = int(valor)
+                        break
+            if cuota["restantes"] == 0:
+                self._enfriar(cuota, ENFRIAMIENTO_AGOTADA)
+
+    def _peso(self, cuota):
+        peso = 1.0 - cuota["tasa_errores"]
+        if cuota["restantes"] is not None:
+            # Sin límite conocido se compara con la clave más holgada posible
+            peso *= cuota["restantes"] / cuota["limite"] if cuota["limite"] else min(1.0, cuota["restantes"] / 1000)
+        return max(PESO_MINIMO, peso)
+
+    def elegir_clave(self, proveedor, claves):
+        """
+        La clave del pool a usar para la siguiente petición: turno ponderado entre las que
+        no están enfriándose (cada elección adelanta el turno de la clave 1/peso). Si todas
+        se están enfriando, la que termina antes.
+        """
+        if len(claves) == 1:
+            return claves[0]
+        with self._lock:
+            self._pools[proveedor] = tuple(claves)
+            clave = self._elegir(proveedor, claves)
+            if clave is None:
+                clave = min(claves, key=lambda c: self._cuota(proveedor, c)["enfriada_hasta"])
+                self._cuota(proveedor, clave)["elegida"] += 1
+            return clave
+
+    def alternativa(self, proveedor, clave):
+        """Otra clave disponible del pool del proveedor para reintentar lo que falló con 'clave', o None."""
+        with self._lock:
+            return self._elegir(proveedor, [c for c in self._pools.get(proveedor, ()) if c != clave])
+
+    def _elegir(self, proveedor, claves):
+        # Con el lock tomado; None si todas se están enfriando
+        ahora = time.monotonic()
+        disponibles = [(c, q) for c, q in ((c, self._cuota(proveedor, c)) for c in claves) if q["enfriada_hasta"] <= ahora]
+        if not disponibles:
+            return None
+        # La que vuelve de enfriarse se pone al día: no recupera de golpe los turnos perdidos
+        reloj = self._turno.get(proveedor, 0.0)
+        for _, q in disponibles:
+            q["turno"] = max(q["turno"], reloj)
+        clave, cuota = min(disponibles, key=lambda par: par[1]["turno"])
+        self._turno[proveedor] = cuota["turno"]
+        cuota["turno"] += 1.0 / self._peso(cuota)
+        cuota["elegida"] += 1
+        return clave
+
+    def resumen_cuotas(self):
+        """Copia de las cuentas: {(proveedor, huella de clave): {...}}; 'enfriada' son los segundos que faltan."""
+        with self._lock:
+            ahora = time.monotonic()
+            return {(proveedor, huella_clave(clave)): dict(valor, enfriada=max(0.0, valor["enfriada_hasta"] - ahora))
+                    for (proveedor, clave), valor in self._cuotas.items()}
@@ -0,0 +1,282 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from configuracion import cargar_apis
+from consultas import Consultor, ErrorConsulta, PROVEEDORES_POR_TIPO
+from metricas import obtener_metricas
+from rangos_ip import expandir_entradas
+
+# --- Modo por lotes (sin interfaz gráfica) ---
+# Lee una entrada por línea (fichero o stdin), la pasa por los mismos proveedores que
+# la ventana de WicOsintX con concurrencia acotada y escribe un registro JSON por línea
+# en cuanto termina cada consulta. Solo hay en memoria las consultas en vuelo, así que
+# el consumo no depende del tamaño de la entrada. Un checkpoint permite reanudar.
+# Con --tipo ip cada línea puede ser también un CIDR, un rango o una lista (rangos_ip.py),
+# y los proveedores con endpoint por lotes (ipinfo con token, la base local) reciben
+# las IPs en paquetes: barrer un /16 son decenas de peticiones, no 65 536.
+#
+#   python lote.py --tipo ip --proveedores ipinfo,shodan ips.txt -o ips.jsonl
+#   python lote.py --tipo ip ips.txt -o ips.jsonl --reanudar
+#   echo 203.0.113.0/24 | python lote.py --tipo ip --proveedores ipinfo,ip_local
+
+CONCURRENCIA_POR_DEFECTO = 16
+INTERVALO_CHECKPOINT = 2.0  # segundos entre guardados del checkpoint
+
+
+def leer_entradas(origen, desde_linea=0):
+    """Generador perezoso de (número de línea, dato); salta vacías, comentarios y ya procesadas."""
+    for n, linea in enumerate(origen, 1):
+        if n <= desde_linea:
+            continue
+        dato = linea.strip()
+        if dato and not dato.startswith("#"):
+            yield n, dato
+
+
+class Checkpoint:
+    """
+    Guarda la "marca de agua": la última línea tal que todas las anteriores ya están
+    escritas en la salida. Como los resultados llegan desordenados, al reanudar
+    pueden repetirse algunas líneas posteriores a la marca (llevan su número de línea).
+    Una línea puede expandirse en muchos datos (un CIDR), así que la última leída no
+    cuenta como terminada hasta que se lee la siguiente o se agota la entrada.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.linea = 0
+        self._ultima_leida = 0
+        self._agotada = False
+        self._en_vuelo = {}  # línea -> tareas pendientes
+
+    def cargar(self):
+        if self.ruta and os.path.exists(self.ruta):
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                self.linea = json.load(f).get("linea", 0)
+        self._ultima_leida = self.linea
+        return self.linea
+
+    def iniciar(self, linea, tareas):
+        self._en_vuelo[linea] = self._en_vuelo.get(linea, 0) + tareas
+        self._ultima_leida = linea
+
+    def terminar(self, linea):
+        self._en_vuelo[linea] -= 1
+        if not self._en_vuelo[linea]:
+            del self._en_vuelo[linea]
+        self._actualizar()
+
+    def agotar(self):
+        """La entrada se ha terminado: la última línea leída ya no dará más datos."""
+        self._agotada = True
+        self._actualizar()
+
+    def _actualizar(self):
+        if self._en_vuelo:
+            self.linea = min(self._en_vuelo) - 1
+        elif self._agotada:
+            self.linea = self._ultima_leida
+        else:
+            self.linea = max(self.linea, self._ultima_leida - 1)
+
+    def guardar(self):
+        if not self.ruta:
+            return
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({"linea": self.linea, "fecha": time.time()}, f)
+        os.replace(temporal, self.ruta)
+
+
+def consultar_proveedor(consultor, tipo, proveedor, linea, dato):
+    """Ejecuta una consulta y devuelve la lista de registros que produce."""
+    base = {"linea": linea, "entrada": dato, "tipo": tipo, "proveedor": proveedor}
+    try:
+        if proveedor == "usuario":
+            registros = []
+            for resultado in consultor.usuario(dato):
+                if resultado["estado"] == "error":
+                    registros.append(dict(base, sitio=resultado["sitio"], url=resultado["url"], estado="error", error=resultado["detalle"]))
+                else:
+                    registros.append(dict(base, estado="ok", datos=resultado))
+            return registros
+        return [dict(base, estado="ok", datos=consultor.consultar(proveedor, dato))]
+    except ErrorConsulta as e:
+        return [dict(base, estado="error", error=str(e))]
+    except Exception as e:
+        return [dict(base, estado="error", error=f"Error inesperado: {e}")]
+
+
+def consultar_paquete(consultor, tipo, proveedor, paquete):
+    """Consulta [(línea, dato), ...] en el endpoint por lotes del proveedor; un registro por dato."""
+    try:
+        respuestas = consultor.consultar_lote(proveedor, [dato for _, dato in paquete])
+    except ErrorConsulta as e:
+        respuestas = {}
+        fallo = str(e)
+    except Exception as e:
+        respuestas = {}
+        fallo = f"Error inesperado: {e}"
+    else:
+        fallo = "Sin respuesta en el lote"
+    registros = []
+    for linea, dato in paquete:
+        base = {"linea": linea, "entrada": dato, "tipo": tipo, "proveedor": proveedor}
+        respuesta = respuestas.get(dato)
+        if respuesta is None:
+            registros.append(dict(base, estado="error", error=fallo))
+        elif isinstance(respuesta, ErrorConsulta):
+            registros.append(dict(base, estado="error", error=str(respuesta)))
+        else:
+            registros.append(dict(base, estado="ok", datos=respuesta))
+    return registros
+
+
+def procesar_lote(entradas, consultor, tipo, proveedores, concurrencia=CONCURRENCIA_POR_DEFECTO, checkpoint=None):
+    """
+    Procesa (línea, dato) de 'entradas' y va generando listas de registros según
+    terminan las consultas. Como mucho hay 2 × concurrencia tareas en vuelo, así que
+    la entrada se consume al ritmo de la salida. Los proveedores con endpoint por
+    lotes (Consultor.tamano_lote) acumulan datos y hacen una petición por paquete;
+    los paquetes a medias se envían al agotarse la entrada.
+    """
+    ultimo_guardado = time.monotonic()
+    en_vuelo = {}  # futuro -> líneas de los datos que cubre
+    entradas = iter(entradas)
+    agotadas = False
+    tamanos = {p: consultor.tamano_lote(p) for p in proveedores}
+    individuales = [p for p in proveedores if not tamanos[p]]
+    paquetes = {p: [] for p in proveedores if tamanos[p]}
+
+    with ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix="lote") as ejecutor:
+        def enviar_paquete(proveedor):
+            paquete, paquetes[proveedor] = paquetes[proveedor], []
+            futuro = ejecutor.submit(consultar_paquete, consultor, tipo, proveedor, paquete)
+            en_vuelo[futuro] = [linea for linea, _ in paquete]
+
+        try:
+            while en_vuelo or not agotadas:
+                while not agotadas and len(en_vuelo) < concurrencia * 2:
+                    try:
+                        linea, dato = next(entradas)
+                    except StopIteration:
+                        agotadas = True
+                        if checkpoint:
+                            checkpoint.agotar()
+                        for proveedor, paquete in paquetes.items():
+                            if paquete:
+                                enviar_paquete(proveedor)
+                        break
+                    if checkpoint:
+                        checkpoint.iniciar(linea, len(proveedores))
+                    for proveedor in individuales:
+                        futuro = ejecutor.submit(consultar_proveedor, consultor, tipo, proveedor, linea, dato)
+                        en_vuelo[futuro] = [linea]
+                    for proveedor, paquete in paquetes.items():
+                        paquete.append((linea, dato))
+                        if len(paquete) >= tamanos[proveedor]:
+                            enviar_paquete(proveedor)
+                if not en_vuelo:
+                    break
+
+                hechos, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                registros = []
+                lineas = []
+                for futuro in hechos:
+                    lineas.extend(en_vuelo.pop(futuro))
+                    registros.extend(futuro.result())
+                # Quien consume escribe los registros antes de volver aquí: solo entonces avanza la marca de agua
+                yield registros
+                if checkpoint:
+                    for linea in lineas:
+                        checkpoint.terminar(linea)
+                    if time.monotonic() - ultimo_guardado >= INTERVALO_CHECKPOINT:
+                        checkpoint.guardar()
+                        ultimo_guardado = time.monotonic()
+        finally:
+            # Ante una interrupción no se esperan las tareas encoladas: quedan por
+            # detrás de la marca de agua y se repetirán al reanudar.
+            for futuro in en_vuelo:
+                futuro.cancel()
+            if checkpoint:
+                checkpoint.guardar()
+
+
+def ejecutar_lote(entradas, salida, consultor, tipo, proveedores, concurrencia=CONCURRENCIA_POR_DEFECTO, checkpoint=None):
+    """
+    Procesa (línea, dato) de 'entradas' escribiendo JSONL en 'salida' (ver procesar_lote).
+    Devuelve (registros escritos, registros con error).
+    """
+    total = errores = 0
+    for registros in procesar_lote(entradas, consultor, tipo, proveedores, concurrencia, checkpoint):
+        for registro in registros:
+            salida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            total += 1
+            errores += registro["estado"] == "error"
+        salida.flush()
+    return total, errores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="WicOsintX en modo por lotes: una entrada por línea, salida JSONL.")
+    parser.add_argument("entrada", nargs="?", default="-", help="fichero con una entrada por línea ('-' para stdin)")
+    parser.add_argument("--tipo", required=True, choices=sorted(PROVEEDORES_POR_TIPO))
+    parser.add_argument("--proveedores", help="lista separada por comas (por defecto el primero del tipo)")
+    parser.add_argument("-o", "--salida", default="-", help="fichero JSONL de salida ('-' para stdout)")
+    parser.add_argument("-c", "--concurrencia", type=int, default=CONCURRENCIA_POR_DEFECTO)
+    parser.add_argument("--checkpoint", help="ruta del checkpoint (por defecto <salida>.checkpoint)")
+    parser.add_argument("--reanudar", action="store_true", help="continúa desde el checkpoint existente")
+    parser.add_argument("--metricas", help="exporta las métricas al terminar (.json o texto de Prometheus)")
+    args = parser.parse_args(argv)
+
+    disponibles = PROVEEDORES_POR_TIPO[args.tipo]
+    proveedores = args.proveedores.split(",") if args.proveedores else [disponibles[0]]
+    desconocidos = [p for p in proveedores if p not in disponibles]
+    if desconocidos:
+        parser.error(f"proveedores no válidos para '{args.tipo}': {', '.join(desconocidos)} (disponibles: {', '.join(disponibles)})")
+
+    ruta_checkpoint = args.checkpoint or (args.salida + ".checkpoint" if args.salida != "-" else None)
+    if args.reanudar and not ruta_checkpoint:
+        parser.error("--reanudar necesita --checkpoint cuando la salida es stdout")
+    checkpoint = Checkpoint(ruta_checkpoint)
+    desde = checkpoint.cargar() if args.reanudar else 0
+
+    origen = sys.stdin if args.entrada == "-" else open(args.entrada, "r", encoding="utf-8")
+    salida = sys.stdout if args.salida == "-" else open(args.salida, "a" if args.reanudar else "w", encoding="utf-8")
+    consultor = Consultor(cargar_apis())
+    entradas = leer_entradas(origen, desde)
+    if args.tipo == "ip":
+        entradas = expandir_entradas(entradas)
+    inicio = time.monotonic()
+    try:
+        total, errores = ejecutar_lote(
+            entradas, salida, consultor,
+            args.tipo, proveedores, max(1, args.concurrencia), checkpoint,
+        )
+    except KeyboardInterrupt:
+        print(f"\nInterrumpido. Reanuda con --reanudar (procesado hasta la línea {checkpoint.linea}).", file=sys.stderr)
+        return 130
+    finally:
+        if origen is not sys.stdin:
+            origen.close()
+        if salida is not sys.stdout:
+            salida.close()
+        if args.metricas:
+            obtener_metricas().exportar(args.metricas)
+    print(f"{total} resultados ({errores} con error) en {time.monotonic() - inicio:.1f}s", file=sys.stderr)
+    for (proveedor, clave), cuota in sorted(consultor.motor.limitador.resumen_cuotas().items()):
+        if proveedor.startswith("sitio:"):
+            continue
+        restantes = cuota["restantes"] if cuota["restantes"] is not None else "?"
+        enfriada = f", enfriándose {cuota['enfriada']:.0f}s" if cuota["enfriada"] else ""
+        print(f"  {proveedor} [{clave}]: {cuota['peticiones']} peticiones, {cuota['limitadas']} limitadas (429), "
+              f"{cuota['errores']} errores, cuota restante {restantes}{enfriada}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,545 @@
+import argparse
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import sqlite3
+import struct
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from configuracion import crear_directorio, ruta_datos
+
+# --- Extracción de metadatos (EXIF) sin herramientas externas ---
+# Lee JPEG, TIFF, PNG y HEIC/HEIF proyectando el fichero en memoria (mmap) y
+# recorriendo solo las cabeceras: los segmentos APPn del JPEG, los chunks del PNG
+# (sin tocar sus datos) o las cajas 'meta' del HEIC. El bloque EXIF es siempre una
+# estructura TIFF, que se interpreta con el mismo código para todos los formatos.
+# El modo carpeta reparte los ficheros entre varios procesos y devuelve cada registro
+# en cuanto termina; una caché SQLite (ruta + tamaño + mtime -> hash + registro)
+# evita volver a leer los ficheros que no han cambiado.
+#
+#   python metadatos.py /ruta/a/fotos -o metadatos.jsonl
+
+CACHE_FILE = "metadatos_cache.sqlite"
+EXTENSIONES = {".jpg", ".jpeg", ".jpe", ".tif", ".tiff", ".png", ".heic", ".heif", ".hif"}
+MAX_ENTRADAS_IFD = 512
+MAX_VALORES_TAG = 1024
+
+# (formato struct, valores por elemento, bytes por elemento) de cada tipo TIFF
+TIPOS_TIFF = {
+    1: ("B", 1, 1), 2: ("s", 1, 1), 3: ("H", 1, 2), 4: ("I", 1, 4), 5: ("I", 2, 8),
+    6: ("b", 1, 1), 7: ("s", 1, 1), 8: ("h", 1, 2), 9: ("i", 1, 4), 10: ("i", 2, 8),
+    11: ("f", 1, 4), 12: ("d", 1, 8),
+}
+TAG_EXIF = 0x8769
+TAG_GPS = 0x8825
+
+ETIQUETAS = {
+    0x010E: "ImageDescription", 0x010F: "Make", 0x0110: "Model", 0x0112: "Orientation",
+    0x0100: "ImageWidth", 0x0101: "ImageLength", 0x0131: "Software", 0x0132: "DateTime",
+    0x013B: "Artist", 0x8298: "Copyright", 0x829A: "ExposureTime", 0x829D: "FNumber",
+    0x8827: "ISOSpeedRatings", 0x9000: "ExifVersion", 0x9003: "DateTimeOriginal",
+    0x9004: "DateTimeDigitized", 0x9010: "OffsetTime", 0x9011: "OffsetTimeOriginal",
+    0x9209: "Flash", 0x920A: "FocalLength", 0xA002: "PixelXDimension", 0xA003: "PixelYDimension",
+    0xA420: "ImageUniqueID", 0xA430: "CameraOwnerName", 0xA431: "BodySerialNumber",
+    0xA433: "LensMake", 0xA434: "LensModel", 0xA435: "LensSerialNumber",
+}
+ETIQUETAS_GPS = {
+    0x00: "GPSVersionID", 0x01: "GPSLatitudeRef", 0x02: "GPSLatitude", 0x03: "GPSLongitudeRef",
+    0x04: "GPSLongitude", 0x05: "GPSAltitudeRef", 0x06: "GPSAltitude", 0x07: "GPSTimeStamp",
+    0x10: "GPSImgDirectionRef", 0x11: "GPSImgDirection", 0x12: "GPSMapDatum", 0x1D: "GPSDateStamp",
+}
+MARCAS_HEIF = {b"heic", b"heix", b"heim", b"heis", b"hevc", b"hevx", b"mif1", b"msf1", b"avif"}
+
+
+class ErrorMetadatos(Exception):
+    pass
+
+
+# --- TIFF / EXIF ---
+def _valor_legible(valor):
+    """Convierte un valor TIFF en algo serializable a JSON."""
+    if isinstance(valor, bytes):
+        if valor and all(32 <= c < 127 for c in valor):
+            return valor.decode("ascii")
+        return valor[:32].hex()
+    if isinstance(valor, tuple):
+        return valor[0] if len(valor) == 1 else list(valor)
+    return valor
+
+
+def _leer_ifd(buf, base, fin, offset, orden, nombres, visitados):
+    """Lee un IFD en base + offset y devuelve {nombre: valor} con las etiquetas conocidas."""
+    pos = base + offset
+    if offset in visitados or offset < 8 or pos + 2 > fin:
+        return {}, {}
+    visitados.add(offset)
+    (entradas,) = struct.unpack_from(orden + "H", buf, pos)
+    entradas = min(entradas, MAX_ENTRADAS_IFD, (fin - pos - 2) // 12)
+    valores, punteros = {}, {}
+    for i in range(entradas):
+        entrada = pos + 2 + i * 12
+        tag, tipo, cuenta = struct.unpack_from(orden + "HHI", buf, entrada)
+        if tipo not in TIPOS_TIFF or (tag not in nombres and tag not in (TAG_EXIF, TAG_GPS)):
+            continue
+        formato, por_elemento, tamano = TIPOS_TIFF[tipo]
+        total = cuenta * tamano
+        if total <= 4:
+            inicio = entrada + 8
+        else:
+            inicio = base + struct.unpack_from(orden + "I", buf, entrada + 8)[0]
+        if inicio + total > fin or (formato != "s" and cuenta > MAX_VALORES_TAG):
+            continue
+        if formato == "s":
+            crudo = bytes(buf[inicio:inicio + total])
+            valor = crudo.split(b"\0", 1)[0].decode("utf-8", "replace").strip() if tipo == 2 else crudo
+        else:
+            numeros = struct.unpack_from(f"{orden}{cuenta * por_elemento}{formato}", buf, inicio)
+            if por_elemento == 2:
+                # Racionales: numerador / denominador
+                numeros = tuple(n / d if d else None for n, d in zip(numeros[::2], numeros[1::2]))
+            valor = numeros
+        if tag in (TAG_EXIF, TAG_GPS) and tag not in nombres:
+            # Un puntero sin valores (cuenta 0) o que no es entero no lleva a ningún IFD
+            if valor and isinstance(valor[0], int):
+                punteros[tag] = valor[0]
+        else:
+            valores[nombres[tag]] = _valor_legible(valor)
+    return valores, punteros
+
+
+def parsear_tiff(buf, base, fin):
+    """Interpreta una estructura TIFF (cabecera en 'base') y devuelve (etiquetas, etiquetas_gps)."""
+    if fin - base < 8:
+        raise ErrorMetadatos("Bloque TIFF truncado")
+    cabecera = bytes(buf[base:base + 2])
+    if cabecera == b"II":
+        orden = "<"
+    elif cabecera == b"MM":
+        orden = ">"
+    else:
+        raise ErrorMetadatos("Cabecera TIFF no válida")
+    magico, offset_ifd0 = struct.unpack_from(orden + "HI", buf, base + 2)
+    if magico != 42:
+        raise ErrorMetadatos("Cabecera TIFF no válida")
+    visitados = set()
+    etiquetas, punteros = _leer_ifd(buf, base, fin, offset_ifd0, orden, ETIQUETAS, visitados)
+    gps = {}
+    if TAG_EXIF in punteros:
+        exif, _ = _leer_ifd(buf, base, fin, punteros[TAG_EXIF], orden, ETIQUETAS, visitados)
+        etiquetas.update(exif)
+    if TAG_GPS in punteros:
+        gps, _ = _leer_ifd(buf, base, fin, punteros[TAG_GPS], orden, ETIQUETAS_GPS, visitados)
+    return etiquetas, gps
+
+
+def _grados(valor, referencia):
+    if not isinstance(valor, list) or len(valor) != 3 or None in valor:
+        return None
+    grados = valor[0] + valor[1] / 60 + valor[2] / 3600
+    return round(-grados if referencia in ("S", "W") else grados, 7)
+
+
+def coordenadas_gps(gps):
+    """{"latitud", "longitud", "altitud"} a partir de las etiquetas GPS, o None si no hay posición."""
+    latitud = _grados(gps.get("GPSLatitude"), gps.get("GPSLatitudeRef"))
+    longitud = _grados(gps.get("GPSLongitude"), gps.get("GPSLongitudeRef"))
+    if latitud is None or longitud is None:
+        return None
+    altitud = gps.get("GPSAltitude")
+    if isinstance(altitud, (int, float)) and gps.get("GPSAltitudeRef") in (1, "01"):
+        altitud = -altitud
+    return {"latitud": latitud, "longitud": longitud, "altitud": altitud}
+
+
+# --- Contenedores ---
+def _jpeg(buf, n):
+    """Recorre los segmentos hasta el inicio de la imagen (SOS)."""
+    etiquetas, gps, dimensiones = {}, {}, None
+    pos = 2
+    while pos + 4 <= n:
+        if buf[pos] != 0xFF:
+            break
+        marcador = buf[pos + 1]
+        if marcador == 0xFF:  # bytes de relleno
+            pos += 1
+            continue
+        if marcador in (0x01, 0xD8) or 0xD0 <= marcador <= 0xD7:
+            pos += 2
+            continue
+        if marcador in (0xD9, 0xDA):
+            break
+        (largo,) = struct.unpack_from(">H", buf, pos + 2)
+        inicio, fin = pos + 4, min(pos + 2 + largo, n)
+        if marcador == 0xE1 and buf[inicio:inicio + 6] == b"Exif\0\0" and not etiquetas:
+            etiquetas, gps = parsear_tiff(buf, inicio + 6, fin)
+        elif 0xC0 <= marcador <= 0xCF and marcador not in (0xC4, 0xC8, 0xCC) and fin - inicio >= 5:
+            alto, ancho = struct.unpack_from(">HH", buf, inicio + 1)
+            dimensiones = (ancho, alto)
+        pos = pos + 2 + largo
+    return etiquetas, gps, dimensiones, {}
+
+
+def _png(buf, n):
+    """Recorre los chunks leyendo solo su cabecera; los datos solo de IHDR, eXIf y texto."""
+    etiquetas, gps, dimensiones, textos = {}, {}, None, {}
+    pos = 8
+    while pos + 8 <= n:
+        largo, tipo = struct.unpack_from(">I4s", buf, pos)
+        inicio, fin = pos + 8, pos + 8 + largo
+        if fin > n or tipo == b"IEND":
+            break
+        if tipo == b"IHDR" and largo >= 8:
+            dimensiones = struct.unpack_from(">II", buf, inicio)
+        elif tipo == b"eXIf":
+            etiquetas, gps = parsear_tiff(buf, inicio, fin)
+        elif tipo == b"tEXt":
+            clave, _, texto = bytes(buf[inicio:fin]).partition(b"\0")
+            textos[clave.decode("latin-1")] = texto.decode("latin-1")
+        elif tipo == b"iTXt":
+            clave, _, resto = bytes(buf[inicio:fin]).partition(b"\0")
+            # resto = compresión (1) + método (1) + idioma\0 + clave traducida\0 + texto
+            if resto[:1] == b"\0":
+                texto = resto[2:].split(b"\0", 2)[-1]
+                textos[clave.decode("latin-1")] = texto.decode("utf-8", "replace")
+        pos = fin + 4  # CRC
+    return etiquetas, gps, dimensiones, textos
+
+
+def _cajas(buf, inicio, fin):
+    """Genera (tipo, inicio de los datos, fin) de las cajas ISOBMFF entre inicio y fin."""
+    pos = inicio
+    while pos + 8 <= fin:
+        tamano, tipo = struct.unpack_from(">I4s", buf, pos)
+        cabecera = 8
+        if tamano == 1:
+            (tamano,) = struct.unpack_from(">Q", buf, pos + 8)
+            cabecera = 16
+        elif tamano == 0:
+            tamano = fin - pos
+        if tamano < cabecera or pos + tamano > fin:
+            return
+        yield tipo, pos + cabecera, pos + tamano
+        pos += tamano
+
+
+def _entero(buf, pos, tamano):
+    if tamano == 0:
+        return 0, pos
+    return struct.unpack_from(">I" if tamano == 4 else ">Q" if tamano == 8 else ">H", buf, pos)[0], pos + tamano
+
+
+def _items_exif(buf, inicio, fin):
+    """Identificadores de los items de tipo 'Exif' de la caja iinf."""
+    if inicio + 6 > fin:
+        return set()
+    version = buf[inicio]
+    pos = inicio + 4 + (2 if version == 0 else 4)
+    ids = set()
+    for tipo, a, _ in _cajas(buf, pos, fin):
+        if tipo != b"infe" or a >= fin or buf[a] < 2:
+            continue
+        tam_id = 2 if buf[a] == 2 else 4
+        item_id, p = _entero(buf, a + 4, tam_id)
+        if bytes(buf[p + 2:p + 6]) == b"Exif":
+            ids.add(item_id)
+    return ids
+
+
+def _ubicaciones(buf, inicio, fin):
+    """Caja iloc: {item_id: (offset, longitud)} del primer extent de cada item."""
+    if inicio + 8 > fin:
+        return {}
+    version = buf[inicio]
+    pos = inicio + 4
+    tam_offset, tam_longitud = buf[pos] >> 4, buf[pos] & 0x0F
+    tam_base, tam_indice = buf[pos + 1] >> 4, (buf[pos + 1] & 0x0F if version in (1, 2) else 0)
+    pos += 2
+    cuenta, pos = _entero(buf, pos, 2 if version < 2 else 4)
+    ubicaciones = {}
+    for _ in range(cuenta):
+        if pos >= fin:
+            break
+        item_id, pos = _entero(buf, pos, 2 if version < 2 else 4)
+        metodo = 0
+        if version in (1, 2):
+            metodo = struct.unpack_from(">H", buf, pos)[0] & 0x0F
+            pos += 2
+        pos += 2  # data_reference_index
+        base, pos = _entero(buf, pos, tam_base)
+        extents, pos = _entero(buf, pos, 2)
+        for i in range(extents):
+            _, pos = _entero(buf, pos, tam_indice)
+            offset, pos = _entero(buf, pos, tam_offset)
+            longitud, pos = _entero(buf, pos, tam_longitud)
+            if i == 0 and metodo == 0:
+                ubicaciones[item_id] = (base + offset, longitud)
+    return ubicaciones
+
+
+def _heif(buf, n):
+    """Busca el item Exif en meta/iinf + meta/iloc y las dimensiones en meta/iprp/ipco/ispe."""
+    etiquetas, gps, dimensiones = {}, {}, None
+    cajas = {tipo: (a, b) for tipo, a, b in _cajas(buf, 0, n)}
+    if b"meta" not in cajas:
+        return etiquetas, gps, dimensiones, {}
+    a, b = cajas[b"meta"]
+    meta = {tipo: (x, y) for tipo, x, y in _cajas(buf, a + 4, b)}
+    if b"iprp" in meta:
+        for tipo, x, y in _cajas(buf, *meta[b"iprp"]):
+            if tipo == b"ipco":
+                for propiedad, p, _ in _cajas(buf, x, y):
+                    if propiedad == b"ispe":
+                        ancho, alto = struct.unpack_from(">II", buf, p + 4)
+                        if not dimensiones or ancho * alto > dimensiones[0] * dimensiones[1]:
+                            dimensiones = (ancho, alto)
+    if b"iinf" in meta and b"iloc" in meta:
+        ubicaciones = _ubicaciones(buf, *meta[b"iloc"])
+        for item_id in _items_exif(buf, *meta[b"iinf"]):
+            if item_id not in ubicaciones:
+                continue
+            offset, longitud = ubicaciones[item_id]
+            fin = min(offset + longitud, n) if longitud else n
+            if offset + 4 > fin:
+                continue
+            # El item empieza con el desplazamiento hasta la cabecera TIFF
+            (salto,) = struct.unpack_from(">I", buf, offset)
+            etiquetas, gps = parsear_tiff(buf, offset + 4 + salto, fin)
+            break
+    return etiquetas, gps, dimensiones, {}
+
+
+def _detectar_formato(buf):
+    if buf[:3] == b"\xff\xd8\xff":
+        return "jpeg", _jpeg
+    if buf[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png", _png
+    if buf[:4] in (b"II*\0", b"MM\0*"):
+        return "tiff", lambda b, n: parsear_tiff(b, 0, n) + (None, {})
+    if buf[4:8] == b"ftyp" and bytes(buf[8:12]) in MARCAS_HEIF:
+        return "heif", _heif
+    return None, None
+
+
+def leer_metadatos(ruta, calcular_hash=False):
+    """
+    Extrae los metadatos de una imagen y devuelve un registro con ruta, formato, dimensiones,
+    cámara, fechas, GPS y todas las etiquetas reconocidas. El hash (SHA-256) obliga a leer el
+    fichero entero, así que solo se calcula con calcular_hash (para evidencias); si no, es None.
+    """
+    with open(ruta, "rb") as f:
+        estado = os.fstat(f.fileno())
+        if not estado.st_size:
+            raise ErrorMetadatos("Fichero vacío")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            formato, parser = _detectar_formato(buf[:16])
+            if parser is None:
+                raise ErrorMetadatos("Formato no soportado")
+            try:
+                etiquetas, gps, dimensiones, textos = parser(buf, len(buf))
+            except (struct.error, IndexError):
+                # Offsets o longitudes que apuntan fuera del fichero en cualquier contenedor
+                raise ErrorMetadatos(f"Fichero {formato} corrupto o truncado")
+            huella = hashlib.sha256(buf).hexdigest() if calcular_hash else None
+
+    if not dimensiones and "PixelXDimension" in etiquetas:
+        dimensiones = (etiquetas["PixelXDimension"], etiquetas.get("PixelYDimension"))
+    elif not dimensiones and "ImageWidth" in etiquetas:
+        dimensiones = (etiquetas["ImageWidth"], etiquetas.get("ImageLength"))
+    return {
+        "ruta": os.path.abspath(ruta),
+        "hash": huella,
+        "tamano": estado.st_size,
+        "mtime": estado.st_mtime,
+        "formato": formato,
+        "dimensiones": list(dimensiones) if dimensiones else None,
+        "marca": etiquetas.get("Make"),
+        "modelo": etiquetas.get("Model"),
+        "objetivo": etiquetas.get("LensModel"),
+        "numero_serie": etiquetas.get("BodySerialNumber"),
+        "software": etiquetas.get("Software"),
+        "autor": etiquetas.get("Artist") or etiquetas.get("CameraOwnerName"),
+        "fecha_original": etiquetas.get("DateTimeOriginal"),
+        "fecha_digitalizada": etiquetas.get("DateTimeDigitized"),
+        "fecha_modificacion": etiquetas.get("DateTime"),
+        "gps": coordenadas_gps(gps),
+        "etiquetas": dict(etiquetas, **gps),
+        "textos": textos,
+    }
+
+
+def _leer_para_lote(ruta, calcular_hash=False):
+    """Punto de entrada de los procesos del modo carpeta: nunca lanza excepciones."""
+    try:
+        return leer_metadatos(ruta, calcular_hash)
+    except (OSError, ValueError, ErrorMetadatos) as e:
+        return {"ruta": os.path.abspath(ruta), "error": str(e)}
+
+
+# --- Caché ---
+class CacheMetadatos:
+    """Registro de cada fichero ya leído, válido mientras no cambien su tamaño ni su mtime."""
+
+    def __init__(self, ruta=None):
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(crear_directorio(ruta or ruta_datos(CACHE_FILE)), check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS metadatos ("
+            " ruta TEXT PRIMARY KEY, tamano INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+            " hash TEXT, datos TEXT NOT NULL)"
+        )
+        self._con.execute("CREATE INDEX IF NOT EXISTS idx_metadatos_hash ON metadatos (hash)")
+        self._con.commit()
+
+    def obtener(self, ruta, estado):
+        """Registro guardado si el fichero no ha cambiado desde entonces; si no, None."""
+        with self._lock:
+            fila = self._con.execute(
+                "SELECT datos FROM metadatos WHERE ruta = ? AND tamano = ? AND mtime_ns = ?",
+                (os.path.abspath(ruta), estado.st_size, estado.st_mtime_ns),
+            ).fetchone()
+        return json.loads(fila[0]) if fila else None
+
+    def guardar(self, registro, estado):
+        with self._lock, self._con:
+            self._con.execute(
+                "INSERT OR REPLACE INTO metadatos VALUES (?, ?, ?, ?, ?)",
+                (registro["ruta"], estado.st_size, estado.st_mtime_ns, registro.get("hash"),
+                 json.dumps(registro, ensure_ascii=False)),
+            )
+
+    def por_hash(self, huella):
+        """Registros de todos los ficheros con ese contenido (copias en distintas rutas)."""
+        with self._lock:
+            filas = self._con.execute("SELECT datos FROM metadatos WHERE hash = ?", (huella,)).fetchall()
+        return [json.loads(datos) for (datos,) in filas]
+
+    def limpiar(self):
+        with self._lock, self._con:
+            self._con.execute("DELETE FROM metadatos")
+
+    def cerrar(self):
+        with self._lock:
+            self._con.close()
+
+
+def _sirve_cacheado(registro, calcular_hash):
+    # Un registro guardado sin hash no vale si ahora se pide
+    return registro is not None and (registro.get("hash") or not calcular_hash)
+
+
+def leer_con_cache(ruta, cache=None, calcular_hash=False):
+    """leer_metadatos() pasando por la caché. Devuelve (registro, desde_cache)."""
+    estado = os.stat(ruta)
+    if cache is not None:
+        registro = cache.obtener(ruta, estado)
+        if _sirve_cacheado(registro, calcular_hash):
+            return registro, True
+    registro = leer_metadatos(ruta, calcular_hash)
+    if cache is not None:
+        cache.guardar(registro, estado)
+    return registro, False
+
+
+# --- Modo carpeta ---
+def recorrer_imagenes(carpeta, extensiones=EXTENSIONES):
+    """Generador perezoso de las rutas de imágenes bajo 'carpeta' (recursivo)."""
+    pendientes = [carpeta]
+    while pendientes:
+        actual = pendientes.pop()
+        try:
+            with os.scandir(actual) as entradas:
+                for entrada in entradas:
+                    if entrada.is_dir(follow_symlinks=False):
+                        pendientes.append(entrada.path)
+                    elif os.path.splitext(entrada.name)[1].lower() in extensiones:
+                        yield entrada.path
+        except OSError:
+            continue
+
+
+def escanear_carpeta(carpeta, cache=None, procesos=None, calcular_hash=False):
+    """
+    Extrae los metadatos de todas las imágenes de la carpeta en un pool de procesos y
+    devuelve (registro, desde_cache) según terminan. Los ficheros sin cambios salen de la
+    caché sin abrirse; como mucho hay 4 × procesos ficheros pendientes a la vez.
+    """
+    procesos = procesos or os.cpu_count() or 2
+    # 'spawn' evita heredar los hilos (y el Tk) del proceso principal al hacer fork
+    contexto = multiprocessing.get_context("spawn")
+    rutas = recorrer_imagenes(carpeta)
+    en_vuelo = {}
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as ejecutor:
+        try:
+            while True:
+                while len(en_vuelo) < procesos * 4:
+                    ruta = next(rutas, None)
+                    if ruta is None:
+                        break
+                    try:
+                        estado = os.stat(ruta)
+                    except OSError as e:
+                        yield {"ruta": os.path.abspath(ruta), "error": str(e)}, False
+                        continue
+                    registro = cache.obtener(ruta, estado) if cache is not None else None
+                    if _sirve_cacheado(registro, calcular_hash):
+                        yield registro, True
+                        continue
+                    en_vuelo[ejecutor.submit(_leer_para_lote, ruta, calcular_hash)] = estado
+                if not en_vuelo:
+                    break
+                hechos, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                for futuro in hechos:
+                    estado = en_vuelo.pop(futuro)
+                    registro = futuro.result()
+                    if cache is not None and "error" not in registro:
+                        cache.guardar(registro, estado)
+                    yield registro, False
+        finally:
+            for futuro in en_vuelo:
+                futuro.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extrae metadatos EXIF de una imagen o carpeta; salida JSONL.")
+    parser.add_argument("ruta", help="imagen o carpeta (se recorre recursivamente)")
+    parser.add_argument("-o", "--salida", default="-", help="fichero JSONL de salida ('-' para stdout)")
+    parser.add_argument("-p", "--procesos", type=int, help="procesos en paralelo (por defecto, uno por CPU)")
+    parser.add_argument("--sin-cache", action="store_true", help="relee todos los ficheros")
+    parser.add_argument("--hash", action="store_true", help="calcula el SHA-256 de cada fichero (lo lee entero)")
+    args = parser.parse_args(argv)
+
+    cache = None if args.sin_cache else CacheMetadatos()
+    salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8")
+    total = errores = cacheados = 0
+    try:
+        if os.path.isdir(args.ruta):
+            registros = escanear_carpeta(args.ruta, cache, args.procesos, args.hash)
+        else:
+            try:
+                registros = [leer_con_cache(args.ruta, cache, args.hash)]
+            except (OSError, ErrorMetadatos) as e:
+                registros = [({"ruta": os.path.abspath(args.ruta), "error": str(e)}, False)]
+        for registro, desde_cache in registros:
+            salida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            total += 1
+            errores += "error" in registro
+            cacheados += desde_cache
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+        if cache is not None:
+            cache.cerrar()
+    print(f"{total} ficheros ({errores} con error, {cacheados} desde la caché)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import bisect
+import json
+import threading
+import time
+
+# --- Métricas de la aplicación ---
+# Registro en memoria de contadores, gauges e histogramas con etiquetas, pensado para
+# el camino caliente: cada operación es un acceso a diccionario bajo un lock. El motor
+# HTTP anota la duración de cada fase de las peticiones (cola, conexión, espera del
+# servidor, descarga), los errores y las peticiones en vuelo; la ventana anota la
+# profundidad de su cola y lo que tarda cada volcado. Se puede exportar como texto
+# de Prometheus o como una instantánea JSON.
+
+PREFIJO = "wicosintx"
+# Límites superiores (segundos) de las cubetas de los histogramas
+CUBETAS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+AYUDA = {
+    "peticiones": "Peticiones HTTP terminadas por proveedor y resultado",
+    "reintentos": "Reintentos por error de red, 429 o 5xx",
+    "duracion_segundos": "Duración de cada fase de las peticiones (cola, conexion, espera, descarga, total)",
+    "en_vuelo": "Peticiones ejecutándose ahora mismo",
+    "en_cola": "Peticiones esperando un hueco del límite de concurrencia",
+    "cache": "Consultas a la caché de respuestas por resultado (fresca, obsoleta, fallo, no_modificada)",
+    "agrupadas": "Peticiones GET/HEAD por resultado: 'nueva' sale a la red, 'compartida' espera a una idéntica en vuelo",
+    "descartados_local": "Consultas a APIs de pago evitadas porque la validación local ya descarta el dato",
+    "trabajos": "Trabajos del planificador terminados por estado y prioridad",
+    "trabajos_en_cola": "Trabajos esperando un trabajador libre",
+    "vigilancia": "Comprobaciones de la lista de vigilancia por resultado (nueva, cambios, sin_cambios, no_modificada, error)",
+    "ui_cola": "Mensajes pendientes de volcar en la ventana",
+    "ui_filas": "Filas añadidas al área de resultados",
+    "ui_volcado_segundos": "Duración de cada volcado de la cola de la ventana",
+}
+
+
+class Histograma:
+    def __init__(self, cubetas=CUBETAS):
+        self.cubetas = cubetas
+        self.cuentas = [0] * (len(cubetas) + 1)  # la última es +Inf
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.cuentas[bisect.bisect_left(self.cubetas, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+    def percentil(self, p):
+        """Estimación por interpolación lineal dentro de la cubeta (como histogram_quantile)."""
+        if not self.total:
+            return None
+        objetivo = p / 100 * self.total
+        acumulado = 0
+        for i, cuenta in enumerate(self.cuentas):
+            if acumulado + cuenta >= objetivo and cuenta:
+                inferior = self.cubetas[i - 1] if i else 0.0
+                if i == len(self.cubetas):
+                    return inferior
+                return inferior + (self.cubetas[i] - inferior) * (objetivo - acumulado) / cuenta
+            acumulado += cuenta
+        return self.cubetas[-1]
+
+    @property
+    def media(self):
+        return self.suma / self.total if self.total else None
+
+
+def _clave(etiquetas):
+    return tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+
+def _etiquetas_prometheus(etiquetas, extra=()):
+    pares = list(etiquetas) + list(extra)
+    if not pares:
+        return ""
+    escapar = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escapar(v)}"' for k, v in pares) + "}"
+
+
+class Metricas:
+    def __init__(self, prefijo=PREFIJO):
+        self.prefijo = prefijo
+        self._lock = threading.Lock()
+        self._contadores = {}    # nombre -> {etiquetas: valor}
+        self._gauges = {}
+        self._histogramas = {}
+        self.inicio = time.time()
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        with self._lock:
+            serie = self._contadores.setdefault(nombre, {})
+            clave = _clave(etiquetas)
+            serie[clave] = serie.get(clave, 0) + valor
+
+    def sumar(self, nombre, valor, **etiquetas):
+        """Suma (o resta) a un gauge."""
+        with self._lock:
+            serie = self._gauges.setdefault(nombre, {})
+            clave = _clave(etiquetas)
+            serie[clave] = serie.get(clave, 0) + valor
+
+    def fijar(self, nombre, valor, **etiquetas):
+        with self._lock:
+            self._gauges.setdefault(nombre, {})[_clave(etiquetas)] = valor
+
+    def observar(self, nombre, valor, **etiquetas):
+        with self._lock:
+            serie = self._histogramas.setdefault(nombre, {})
+            clave = _clave(etiquetas)
+            histograma = serie.get(clave)
+            if histograma is None:
+                histograma = serie[clave] = Histograma()
+            histograma.observar(valor)
+
+    def series(self, nombre):
+        """[(etiquetas, valor o Histograma)] de una métrica, sea del tipo que sea."""
+        with self._lock:
+            for tipo in (self._contadores, self._gauges, self._histogramas):
+                if nombre in tipo:
+                    return [(dict(clave), valor) for clave, valor in tipo[nombre].items()]
+        return []
+
+    def instantanea(self):
+        """Estado actual como dict serializable a JSON (con p50/p95/p99 estimados)."""
+        with self._lock:
+            simples = lambda tipo: {
+                nombre: [{"etiquetas": dict(clave), "valor": valor} for clave, valor in serie.items()]
+                for nombre, serie in tipo.items()
+            }
+            return {
+                "fecha": time.time(),
+                "desde": self.inicio,
+                "contadores": simples(self._contadores),
+                "gauges": simples(self._gauges),
+                "histogramas": {
+                    nombre: [
+                        {"etiquetas": dict(clave), "cuenta": h.total, "suma": round(h.suma, 6),
+                         "cubetas": dict(zip([str(c) for c in h.cubetas] + ["+Inf"], h.cuentas)),
+                         "p50": h.percentil(50), "p95": h.percentil(95), "p99": h.percentil(99)}
+                        for clave, h in serie.items()
+                    ]
+                    for nombre, serie in self._histogramas.items()
+                },
+            }
+
+    def a_prometheus(self):
+        """Formato de exposición de texto de Prometheus (versión 0.0.4)."""
+        lineas = []
+        with self._lock:
+            for tipo, sufijo, datos in (("counter", "_total", self._contadores), ("gauge", "", self._gauges)):
+                for nombre, serie in sorted(datos.items()):
+                    completo = f"{self.prefijo}_{nombre}{sufijo}"
+                    if nombre in AYUDA:
+                        lineas.append(f"# HELP {completo} {AYUDA[nombre]}")
+                    lineas.append(f"# TYPE {completo} {tipo}")
+                    for clave, valor in sorted(serie.items()):
+                        lineas.append(f"{completo}{_etiquetas_prometheus(clave)} {valor}")
+            for nombre, serie in sorted(self._histogramas.items()):
+                completo = f"{self.prefijo}_{nombre}"
+                if nombre in AYUDA:
+                    lineas.append(f"# HELP {completo} {AYUDA[nombre]}")
+                lineas.append(f"# TYPE {completo} histogram")
+                for clave, h in sorted(serie.items()):
+                    acumulado = 0
+                    for limite, cuenta in zip([str(c) for c in h.cubetas] + ["+Inf"], h.cuentas):
+                        acumulado += cuenta
+                        lineas.append(f"{completo}_bucket{_etiquetas_prometheus(clave, [('le', limite)])} {acumulado}")
+                    lineas.append(f"{completo}_sum{_etiquetas_prometheus(clave)} {h.suma}")
+                    lineas.append(f"{completo}_count{_etiquetas_prometheus(clave)} {h.total}")
+        return "\n".join(lineas) + "\n"
+
+    def exportar(self, ruta):
+        """Escribe las métricas en 'ruta': JSON si termina en .json, texto de Prometheus si no."""
+        contenido = json.dumps(self.instantanea(), indent=4) if ruta.endswith(".json") else self.a_prometheus()
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(contenido)
+
+    def limpiar(self):
+        with self._lock:
+            self._contadores.clear()
+            self._histogramas.clear()
+            # Los gauges reflejan estado actual (en vuelo, en cola): no se reinician
+            self.inicio = time.time()
+
+
+_metricas = Metricas()
+
+
+def obtener_metricas():
+    """Registro de métricas compartido por toda la aplicación."""
+    return _metricas
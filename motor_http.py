@@ -0,0 +1,302 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from limitador import (Limitador, MAX_INTENTOS, STATUS_REINTENTABLES, STATUS_CLAVE_RECHAZADA, espera_reintento,
+                       parsear_retry_after)
+from metricas import obtener_metricas
+
+# --- Motor HTTP compartido ---
+# Todas las consultas (buscadores, perfiles y APIs) pasan por un único motor:
+# una sesión de requests con conexiones keep-alive reutilizadas por host, un bucle
+# asyncio en segundo plano que limita la concurrencia global y por host, y un pool
+# fijo de hilos que ejecuta las peticiones bloqueantes. Las peticiones a APIs indican
+# su proveedor y pasan además por el limitador (ritmo, reintentos y cuotas).
+# Cada petición deja en las métricas el tiempo de cada fase: cola (limitador y huecos
+# de concurrencia), conexión (DNS + TCP + TLS, solo si se abre una nueva), espera
+# (hasta recibir las cabeceras) y descarga (cuerpo y procesado).
+# Las peticiones GET/HEAD idénticas que coinciden en el tiempo (doble clic, entradas
+# repetidas en un lote, la misma URL en varios dorks) comparten una sola llamada.
+
+MAX_CONEXIONES_GLOBAL = 32
+MAX_CONEXIONES_POR_HOST = 6
+TIMEOUT_POR_DEFECTO = 10
+METODOS_AGRUPABLES = ("GET", "HEAD")
+
+# Tiempo de conexión acumulado por la petición que se ejecuta en cada hilo del pool
+_medicion = threading.local()
+
+
+class _ConexionMedida(HTTPConnection):
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _medicion.conexion = getattr(_medicion, "conexion", 0.0) + time.perf_counter() - inicio
+
+
+class _ConexionMedidaTLS(HTTPSConnection):
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _medicion.conexion = getattr(_medicion, "conexion", 0.0) + time.perf_counter() - inicio
+
+
+class _PoolMedido(HTTPConnectionPool):
+    ConnectionCls = _ConexionMedida
+
+
+class _PoolMedidoTLS(HTTPSConnectionPool):
+    ConnectionCls = _ConexionMedidaTLS
+
+
+class AdaptadorMedido(HTTPAdapter):
+    """HTTPAdapter cuyas conexiones anotan cuánto tardan en abrirse (DNS, TCP y TLS)."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _PoolMedido, "https": _PoolMedidoTLS}
+
+
+def etiqueta_proveedor(proveedor, url):
+    """Nombre con el que una petición aparece en las métricas."""
+    if proveedor is None:
+        return urlsplit(url).netloc.lower()
+    # Los ~200 sitios del comprobador de usuarios se agrupan en una sola serie
+    return "sitios_usuario" if proveedor.startswith("sitio:") else proveedor
+
+
+class MotorHTTP:
+    def __init__(self, max_global=MAX_CONEXIONES_GLOBAL, max_por_host=MAX_CONEXIONES_POR_HOST, metricas=None):
+        self.max_global = max_global
+        self.max_por_host = max_por_host
+        self.metricas = metricas or obtener_metricas()
+
+        self._sesion = requests.Session()
+        adaptador = AdaptadorMedido(pool_connections=max_global, pool_maxsize=max_por_host)
+        self._sesion.mount("http://", adaptador)
+        self._sesion.mount("https://", adaptador)
+        self._sesion.hooks["response"].append(self._al_recibir_cabeceras)
+
+        self._ejecutor = ThreadPoolExecutor(max_workers=max_global, thread_name_prefix="motor-http")
+        self._bucle = asyncio.new_event_loop()
+        self._hilo = threading.Thread(target=self._bucle.run_forever, name="motor-http-bucle", daemon=True)
+        self._hilo.start()
+
+        self._sem_global = asyncio.Semaphore(max_global)
+        self._sem_hosts = {}
+        self.limitador = Limitador()
+
+        self._en_vuelo = {}  # clave de la petición -> Future compartido
+        self._lock_vuelo = threading.Lock()
+
+    def _semaforo_host(self, host):
+        # Solo se llama desde el bucle, así que no necesita lock
+        sem = self._sem_hosts.get(host)
+        if sem is None:
+            sem = self._sem_hosts[host] = asyncio.Semaphore(self.max_por_host)
+        return sem
+
+    @staticmethod
+    def _al_recibir_cabeceras(resp, *args, **kwargs):
+        # requests llama a este hook con las cabeceras ya leídas y antes de descargar el cuerpo
+        _medicion.cabeceras = time.perf_counter()
+
+    def _llamar(self, metodo, url, kwargs, procesar, etiqueta, encolada):
+        metricas = self.metricas
+        inicio = time.perf_counter()
+        metricas.observar("duracion_segundos", inicio - encolada, proveedor=etiqueta, fase="cola")
+        metricas.sumar("en_vuelo", 1, proveedor=etiqueta)
+        _medicion.conexion = 0.0
+        _medicion.cabeceras = None
+        resultado = "error"
+        try:
+            resp = self._sesion.request(metodo, url, **kwargs)
+            resultado = f"http_{resp.status_code // 100}xx"
+            if procesar is not None:
+                # Se ejecuta aquí, en el hilo del pool y dentro de los límites de concurrencia,
+                # para que leer el cuerpo (p. ej. con stream=True) no salga del motor.
+                resp.procesado = procesar(resp)
+            return resp
+        except requests.exceptions.Timeout:
+            resultado = "timeout"
+            raise
+        except requests.exceptions.ConnectionError:
+            resultado = "error_conexion"
+            raise
+        finally:
+            total = time.perf_counter() - inicio
+            conexion = _medicion.conexion
+            metricas.sumar("en_vuelo", -1, proveedor=etiqueta)
+            metricas.incrementar("peticiones", proveedor=etiqueta, resultado=resultado)
+            metricas.observar("duracion_segundos", total, proveedor=etiqueta, fase="total")
+            if conexion:
+                metricas.observar("duracion_segundos", conexion, proveedor=etiqueta, fase="conexion")
+            if _medicion.cabeceras is not None:
+                cabeceras = _medicion.cabeceras - inicio
+                metricas.observar("duracion_segundos", max(0.0, cabeceras - conexion), proveedor=etiqueta, fase="espera")
+                metricas.observar("duracion_segundos", max(0.0, total - cabeceras), proveedor=etiqueta, fase="descarga")
+
+    async def _enviar(self, metodo, url, kwargs, procesar=None, etiqueta=None, encolada=None):
+        host = urlsplit(url).netloc.lower()
+        etiqueta = etiqueta or host
+        encolada = encolada or time.perf_counter()
+        self.metricas.sumar("en_cola", 1, proveedor=etiqueta)
+        en_cola = True
+        try:
+            # Primero el límite por host: si un host está saturado, sus peticiones esperan
+            # sin ocupar huecos del límite global que podrían usar otros hosts.
+            async with self._semaforo_host(host):
+                async with self._sem_global:
+                    self.metricas.sumar("en_cola", -1, proveedor=etiqueta)
+                    en_cola = False
+                    llamada = partial(self._llamar, metodo, url, kwargs, procesar, etiqueta, encolada)
+                    return await self._bucle.run_in_executor(self._ejecutor, llamada)
+        finally:
+            if en_cola:  # cancelada mientras esperaba
+                self.metricas.sumar("en_cola", -1, proveedor=etiqueta)
+
+    async def _peticion(self, metodo, url, kwargs, proveedor=None, clave_api=None, procesar=None, intentos=MAX_INTENTOS,
+                        rotar=None):
+        etiqueta = etiqueta_proveedor(proveedor, url)
+        if proveedor is None:
+            return await self._enviar(metodo, url, kwargs, procesar, etiqueta)
+
+        # Cada clave es una cuenta con su propio límite (ver los pools en limitador.py)
+        cubo = self.limitador.cubo(proveedor, clave_api)
+        for intento in range(intentos):
+            ultimo = intento == intentos - 1
+            if intento:
+                self.metricas.incrementar("reintentos", proveedor=etiqueta)
+            # La espera del limitador también cuenta como cola
+            encolada = time.perf_counter()
+            await cubo.adquirir()
+            try:
+                resp = await self._enviar(metodo, url, kwargs, procesar, etiqueta, encolada)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                self.limitador.registrar(proveedor, clave_api, error=e)
+                if ultimo:
+                    raise
+                await asyncio.sleep(espera_reintento(intento))
+                continue
+
+            self.limitador.registrar(proveedor, clave_api, resp)
+            if rotar is not None and not ultimo and (resp.status_code == 429 or resp.status_code in STATUS_CLAVE_RECHAZADA):
+                # Con un pool de claves no se espera a que esta se recupere: se reintenta con otra
+                cambio = rotar(clave_api)
+                if cambio is not None:
+                    resp.close()
+                    url, kwargs, clave_api = cambio
+                    cubo = self.limitador.cubo(proveedor, clave_api)
+                    continue
+            if resp.status_code not in STATUS_REINTENTABLES or ultimo:
+                return resp
+            espera = espera_reintento(intento, parsear_retry_after(resp.headers.get("Retry-After")))
+            if resp.status_code == 429:
+                # El límite es de la cuenta, no de esta petición: frenamos todo lo de esa clave
+                cubo.pausar(espera)
+            resp.close()
+            await asyncio.sleep(espera)
+
+    def solicitar(self, metodo, url, proveedor=None, clave_api=None, procesar=None, intentos=MAX_INTENTOS, rotar=None,
+                  **kwargs):
+        """
+        Encola una petición y devuelve un concurrent.futures.Future con la respuesta.
+        Si se indica el proveedor, se aplica su límite de ritmo y hasta 'intentos'
+        intentos, y la petición cuenta en la cuota de clave_api. Si se pasa procesar,
+        se llama con la respuesta en el hilo del pool y su valor queda en resp.procesado.
+        Con rotar(clave) -> (url, kwargs, clave) o None, un 429 o una clave rechazada se
+        reintentan enseguida con otra clave del pool.
+        """
+        kwargs.setdefault("timeout", TIMEOUT_POR_DEFECTO)
+        metodo = metodo.upper()
+        if metodo not in METODOS_AGRUPABLES:
+            return self._lanzar(metodo, url, kwargs, proveedor, clave_api, procesar, intentos, rotar)
+
+        # Idénticas = mismo método, URL, proveedor, clave, procesado y opciones
+        clave = (metodo, url, proveedor, clave_api, procesar, intentos, repr(sorted(kwargs.items())))
+        with self._lock_vuelo:
+            compartido = self._en_vuelo.get(clave)
+            nueva = compartido is None
+            if nueva:
+                compartido = self._en_vuelo[clave] = self._lanzar(metodo, url, kwargs, proveedor, clave_api, procesar, intentos, rotar)
+        if nueva:
+            compartido.add_done_callback(partial(self._aterrizar, clave))
+        self.metricas.incrementar("agrupadas", proveedor=etiqueta_proveedor(proveedor, url),
+                                  resultado="nueva" if nueva else "compartida")
+        # Cada llamador recibe su propio Future: si uno lo cancela, los demás siguen esperando
+        return _copiar_futuro(compartido)
+
+    def _lanzar(self, metodo, url, kwargs, proveedor, clave_api, procesar, intentos, rotar=None):
+        corrutina = self._peticion(metodo, url, kwargs, proveedor, clave_api, procesar, intentos, rotar)
+        return asyncio.run_coroutine_threadsafe(corrutina, self._bucle)
+
+    def _aterrizar(self, clave, futuro):
+        with self._lock_vuelo:
+            if self._en_vuelo.get(clave) is futuro:
+                del self._en_vuelo[clave]
+
+    @property
+    def peticiones_en_vuelo(self):
+        with self._lock_vuelo:
+            return len(self._en_vuelo)
+
+    def montar_adaptador(self, prefijo, adaptador):
+        """Sustituye el adaptador de transporte para las URLs que empiezan por 'prefijo' (p. ej. en benchmark.py)."""
+        self._sesion.mount(prefijo, adaptador)
+
+    def get(self, url, **kwargs):
+        """Versión bloqueante de solicitar('GET', ...) para usar desde hilos de trabajo."""
+        return self.solicitar("GET", url, **kwargs).result()
+
+    def head(self, url, **kwargs):
+        return self.solicitar("HEAD", url, **kwargs).result()
+
+    def cerrar(self):
+        self._bucle.call_soon_threadsafe(self._bucle.stop)
+        self._hilo.join(timeout=2)
+        self._ejecutor.shutdown(wait=False, cancel_futures=True)
+        self._sesion.close()
+
+
+def _copiar_futuro(origen):
+    """Future que termina igual que 'origen' pero se puede cancelar por separado."""
+    copia = Future()
+
+    def propagar(futuro):
+        try:
+            if futuro.cancelled():
+                copia.cancel()
+            elif futuro.exception() is not None:
+                copia.set_exception(futuro.exception())
+            else:
+                copia.set_result(futuro.result())
+        except InvalidStateError:
+            pass  # el llamador ya la había cancelado
+
+    origen.add_done_callback(propagar)
+    return copia
+
+
+_motor = None
+_motor_lock = threading.Lock()
+
+
+def obtener_motor():
+    """Devuelve el motor HTTP compartido por toda la aplicación, creándolo la primera vez."""
+    global _motor
+    with _motor_lock:
+        if _motor is None:
+            _motor = MotorHTTP()
+        return _motor
@@ -0,0 +1,366 @@
+import argparse
+import heapq
+import ipaddress
+import json
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from consultas import ErrorConsulta
+from usuarios import ENCONTRADO
+
+# --- Pivotes: de un dato a un grafo de investigación ---
+# Cada resultado se convierte en entidades tipadas (un hostname de Shodan, los emails y
+# servidores DNS de un WHOIS, los usuarios e IPs de una filtración...) que se consultan
+# a su vez en anchura: primero todo lo que está a un salto de la semilla, luego a dos...
+# Dentro de cada nivel van antes las relaciones más reveladoras (PRIORIDAD_RELACION).
+# Hay tope de profundidad y de peticiones, y cada entidad se consulta una sola vez.
+# El grafo vive en memoria con ids enteros y listas de adyacencia, así que aguanta
+# decenas de miles de nodos, y se exporta a JSON o GraphML (Gephi, Cytoscape...).
+#
+#   python pivotes.py ejemplo.com --profundidad 3 --max-peticiones 200 -o grafo.graphml
+
+PROFUNDIDAD_POR_DEFECTO = 2
+MAX_PETICIONES_POR_DEFECTO = 40
+CONCURRENCIA_POR_DEFECTO = 8
+MAX_PIVOTES_POR_NODO = 25  # de cada resultado se siguen como mucho estas entidades
+
+# Proveedores que se consultan para expandir cada tipo (los demás tipos son hojas)
+PROVEEDORES_PIVOTE = {
+    "ip": ("ipinfo", "shodan"),
+    "dominio": ("whois",),
+    "email": ("dehashed",),
+    "usuario": ("usuario",),
+}
+CLAVES_PROVEEDOR = {"shodan": "shodan", "dehashed": "dehashed_user"}
+
+# Menor = se sigue antes dentro del mismo nivel
+PRIORIDAD_RELACION = {
+    "mismo_hash": 0, "misma_contrasena": 0, "mismo_usuario": 1,
+    "usuario_filtrado": 1, "email_filtrado": 1, "contacto_whois": 2,
+    "hostname": 3, "dominio": 3, "dominio_email": 4, "ip_filtrada": 4, "telefono_filtrado": 5,
+    "contacto_abuso": 7, "servidor_dns": 8, "perfil": 9,
+}
+
+# Dominios de correo gratuito: no dicen nada de la persona y su WHOIS sería un gasto inútil
+DOMINIOS_CORREO_GRATUITO = {
+    "gmail.com", "googlemail.com", "hotmail.com", "hotmail.es", "outlook.com", "outlook.es", "live.com",
+    "msn.com", "yahoo.com", "yahoo.es", "icloud.com", "me.com", "protonmail.com", "proton.me", "gmx.com",
+    "gmx.es", "aol.com", "mail.com", "yandex.com", "zoho.com", "telefonica.net",
+}
+
+# Escapado mínimo para el texto de GraphML (xml.sax.saxutils arrastra urllib.request al importar)
+_ESCAPE_XML = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+
+def escape(texto):
+    return texto.translate(_ESCAPE_XML)
+
+
+RE_TELEFONO = re.compile(r"^\+?[\d\s().-]{7,}$")
+RE_DOMINIO = re.compile(r"^(?=.{4,253}$)([a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}$")
+
+
+def detectar_tipo(valor):
+    """Tipo de entidad de un dato escrito por el usuario: ip, email, telefono, dominio o usuario."""
+    valor = valor.strip()
+    try:
+        ipaddress.ip_address(valor)
+        return "ip"
+    except ValueError:
+        pass
+    if "@" in valor:
+        return "email"
+    if RE_TELEFONO.match(valor):
+        return "telefono"
+    if RE_DOMINIO.match(valor.lower().rstrip(".")):
+        return "dominio"
+    return "usuario"
+
+
+def normalizar_entidad(tipo, valor):
+    valor = str(valor).strip()
+    if tipo == "ip":
+        return str(ipaddress.ip_address(valor))
+    if tipo in ("email", "dominio"):
+        return valor.lower().rstrip(".")
+    return valor
+
+
+class Grafo:
+    """
+    Grafo dirigido compacto: cada entidad es un id entero y sus datos van en listas
+    paralelas, con índices de adyacencia de salida y de entrada y un índice por tipo.
+    """
+
+    def __init__(self):
+        self._ids = {}          # (tipo, valor) -> id
+        self.tipos = []         # id -> tipo
+        self.valores = []       # id -> valor
+        self.profundidad = []   # id -> saltos desde la semilla
+        self.salientes = []     # id -> [(destino, relacion)]
+        self.entrantes = []     # id -> [(origen, relacion)]
+        self.por_tipo = {}      # tipo -> [ids]
+        self._aristas = {}      # (origen, destino, relacion) -> proveedor que la descubrió
+        self.peticiones = 0     # consultas hechas para construirlo
+        self.sin_explorar = 0   # entidades que quedaron en cola al agotar el presupuesto
+
+    def __len__(self):
+        return len(self.tipos)
+
+    @property
+    def num_aristas(self):
+        return len(self._aristas)
+
+    def buscar(self, tipo, valor):
+        return self._ids.get((tipo, normalizar_entidad(tipo, valor)))
+
+    def nodo(self, tipo, valor, profundidad=0):
+        """Id de la entidad, creándola si no existe. Devuelve (id, nueva)."""
+        clave = (tipo, normalizar_entidad(tipo, valor))
+        id_nodo = self._ids.get(clave)
+        if id_nodo is not None:
+            return id_nodo, False
+        id_nodo = self._ids[clave] = len(self.tipos)
+        self.tipos.append(tipo)
+        self.valores.append(clave[1])
+        self.profundidad.append(profundidad)
+        self.salientes.append([])
+        self.entrantes.append([])
+        self.por_tipo.setdefault(tipo, []).append(id_nodo)
+        return id_nodo, True
+
+    def enlazar(self, origen, destino, relacion, fuente=None):
+        """Añade la arista si no existía; devuelve si es nueva."""
+        clave = (origen, destino, relacion)
+        if origen == destino or clave in self._aristas:
+            return False
+        self._aristas[clave] = fuente
+        self.salientes[origen].append((destino, relacion))
+        self.entrantes[destino].append((origen, relacion))
+        return True
+
+    def vecinos(self, id_nodo, relacion=None):
+        """Ids conectados en cualquier sentido (opcionalmente solo por una relación)."""
+        return sorted({otro for otro, r in self.salientes[id_nodo] + self.entrantes[id_nodo] if relacion in (None, r)})
+
+    def resumen(self):
+        """{tipo: número de nodos}"""
+        return {tipo: len(ids) for tipo, ids in sorted(self.por_tipo.items())}
+
+    def como_dict(self):
+        return {
+            "nodos": [
+                {"id": i, "tipo": self.tipos[i], "valor": self.valores[i], "profundidad": self.profundidad[i]}
+                for i in range(len(self.tipos))
+            ],
+            "aristas": [
+                {"origen": o, "destino": d, "relacion": r, "fuente": f}
+                for (o, d, r), f in self._aristas.items()
+            ],
+        }
+
+    def exportar(self, ruta):
+        """Escribe el grafo en 'ruta': GraphML si termina en .graphml, JSON si no."""
+        with open(ruta, "w", encoding="utf-8") as f:
+            if ruta.endswith(".graphml"):
+                self._escribir_graphml(f)
+            else:
+                json.dump(self.como_dict(), f, ensure_ascii=False)
+
+    def _escribir_graphml(self, f):
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+                '  <key id="tipo" for="node" attr.name="tipo" attr.type="string"/>\n'
+                '  <key id="valor" for="node" attr.name="valor" attr.type="string"/>\n'
+                '  <key id="profundidad" for="node" attr.name="profundidad" attr.type="int"/>\n'
+                '  <key id="relacion" for="edge" attr.name="relacion" attr.type="string"/>\n'
+                '  <key id="fuente" for="edge" attr.name="fuente" attr.type="string"/>\n'
+                '  <graph edgedefault="directed">\n')
+        for i, (tipo, valor) in enumerate(zip(self.tipos, self.valores)):
+            f.write(f'    <node id="n{i}"><data key="tipo">{escape(tipo)}</data><data key="valor">{escape(valor)}</data>'
+                    f'<data key="profundidad">{self.profundidad[i]}</data></node>\n')
+        for (o, d, r), fuente in self._aristas.items():
+            f.write(f'    <edge source="n{o}" target="n{d}"><data key="relacion">{escape(r)}</data>'
+                    f'<data key="fuente">{escape(fuente or "")}</data></edge>\n')
+        f.write("  </graph>\n</graphml>\n")
+
+
+# --- Extracción de entidades de cada resultado: [(tipo, valor, relacion)] ---
+def _pivotes_ipinfo(valor, datos):
+    return [("dominio", datos["hostname"], "hostname")] if datos.get("hostname") else []
+
+
+def _pivotes_shodan(valor, datos):
+    return ([("dominio", h, "hostname") for h in datos.get("hostnames") or []]
+            + [("dominio", d, "dominio") for d in datos.get("domains") or []])
+
+
+def _pivotes_whois(valor, datos):
+    campos = datos.get("campos") or {}
+    pivotes = [("email", e, "contacto_abuso" if e.startswith("abuse") else "contacto_whois") for e in campos.get("emails") or []]
+    return pivotes + [("dominio", ns, "servidor_dns") for ns in campos.get("servidores_nombre") or []]
+
+
+def _pivotes_dehashed(valor, datos):
+    pivotes = []
+    for entrada in datos.get("entries") or []:
+        for campo, tipo, relacion in (("username", "usuario", "usuario_filtrado"), ("email", "email", "email_filtrado"),
+                                      ("ip_address", "ip", "ip_filtrada"), ("phone", "telefono", "telefono_filtrado")):
+            dato = entrada.get(campo)
+            if isinstance(dato, list):  # la API nueva devuelve algunos campos como lista
+                dato = dato[0] if dato else None
+            if dato:
+                pivotes.append((tipo, dato, relacion))
+    nombres = {"hashed_password": "mismo_hash", "password": "misma_contrasena", "username": "mismo_usuario"}
+    for enlace, compartidos in (datos.get("relacionados") or {}).items():
+        for otros in compartidos.values():
+            pivotes += [("email", otro, nombres[enlace]) for otro in otros]
+    return pivotes
+
+
+def _pivotes_usuario(valor, datos):
+    return [("perfil", r["url"], "perfil") for r in datos if r["estado"] == ENCONTRADO]
+
+
+EXTRACTORES = {
+    "ipinfo": _pivotes_ipinfo,
+    "shodan": _pivotes_shodan,
+    "whois": _pivotes_whois,
+    "dehashed": _pivotes_dehashed,
+    "usuario": _pivotes_usuario,
+}
+
+
+def pivotes_locales(tipo, valor):
+    """Entidades que se deducen del propio dato, sin consultar nada."""
+    if tipo == "email" and "@" in valor:
+        dominio = valor.rsplit("@", 1)[1]
+        if dominio not in DOMINIOS_CORREO_GRATUITO:
+            return [("dominio", dominio, "dominio_email")]
+    return []
+
+
+def _consultar(consultor, proveedor, valor):
+    """Se ejecuta en un hilo del pool: la consulta y lo que haya que leer del almacén local."""
+    if proveedor == "usuario":
+        return list(consultor.usuario(valor))
+    datos = consultor.consultar(proveedor, valor)
+    if proveedor == "dehashed":
+        por = ("hashed_password", "password", "username")
+        datos = dict(datos, relacionados=consultor.filtraciones.relacionados("email", valor, por=por))
+    return datos
+
+
+def _valido(tipo, valor):
+    try:
+        normalizar_entidad(tipo, valor)
+        return True
+    except ValueError:  # p. ej. una "IP" mal formada en una filtración
+        return False
+
+
+def expandir(consultor, semilla, tipo=None, max_profundidad=PROFUNDIDAD_POR_DEFECTO,
+             max_peticiones=MAX_PETICIONES_POR_DEFECTO, concurrencia=CONCURRENCIA_POR_DEFECTO,
+             al_avanzar=None, grafo=None):
+    """
+    Expande la semilla en anchura y devuelve el Grafo. al_avanzar(evento) se llama desde
+    el hilo que llama a esta función tras cada consulta, con un dict: tipo, valor,
+    profundidad, proveedor, nuevas [(tipo, valor, relacion)] y error (o None).
+    """
+    grafo = grafo if grafo is not None else Grafo()
+    tipo = tipo or detectar_tipo(semilla)
+    origen, _ = grafo.nodo(tipo, semilla, 0)
+    utilizables = lambda t: [p for p in PROVEEDORES_PIVOTE.get(t, ()) if p not in CLAVES_PROVEEDOR
+                             or consultor.apis.get(CLAVES_PROVEEDOR[p])]
+    pendientes = [(0, 0, 0, origen)]  # (profundidad, prioridad de la relación, orden, id)
+    orden = 1
+    peticiones = 0
+    en_vuelo = {}
+
+    def incorporar(id_nodo, hallazgos, fuente):
+        nonlocal orden
+        profundidad = grafo.profundidad[id_nodo] + 1
+        nuevas = []
+        hallazgos = sorted(hallazgos, key=lambda h: PRIORIDAD_RELACION.get(h[2], 10))
+        for tipo_h, valor_h, relacion in hallazgos:
+            if not _valido(tipo_h, valor_h):
+                continue
+            destino, nuevo = grafo.nodo(tipo_h, valor_h, profundidad)
+            if not grafo.enlazar(id_nodo, destino, relacion, fuente) or not nuevo:
+                continue
+            nuevas.append((tipo_h, grafo.valores[destino], relacion))
+            if profundidad < max_profundidad and len(nuevas) <= MAX_PIVOTES_POR_NODO:
+                heapq.heappush(pendientes, (profundidad, PRIORIDAD_RELACION.get(relacion, 10), orden, destino))
+                orden += 1
+        return nuevas
+
+    with ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix="pivotes") as ejecutor:
+        try:
+            while pendientes or en_vuelo:
+                while pendientes and len(en_vuelo) < concurrencia and peticiones < max_peticiones:
+                    _, _, _, id_nodo = heapq.heappop(pendientes)
+                    tipo_n, valor_n = grafo.tipos[id_nodo], grafo.valores[id_nodo]
+                    incorporar(id_nodo, pivotes_locales(tipo_n, valor_n), None)
+                    for proveedor in utilizables(tipo_n)[:max_peticiones - peticiones]:
+                        en_vuelo[ejecutor.submit(_consultar, consultor, proveedor, valor_n)] = (id_nodo, proveedor)
+                        peticiones += 1
+                if not en_vuelo:
+                    break
+
+                hechos, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                for futuro in hechos:
+                    id_nodo, proveedor = en_vuelo.pop(futuro)
+                    valor_n = grafo.valores[id_nodo]
+                    evento = {"tipo": grafo.tipos[id_nodo], "valor": valor_n, "profundidad": grafo.profundidad[id_nodo],
+                              "proveedor": proveedor, "nuevas": [], "error": None}
+                    try:
+                        evento["nuevas"] = incorporar(id_nodo, EXTRACTORES[proveedor](valor_n, futuro.result()), proveedor)
+                    except ErrorConsulta as e:
+                        evento["error"] = str(e)
+                    except Exception as e:
+                        evento["error"] = f"Error inesperado: {e}"
+                    if al_avanzar:
+                        al_avanzar(evento)
+        finally:
+            for futuro in en_vuelo:
+                futuro.cancel()
+    grafo.peticiones += peticiones
+    grafo.sin_explorar = len(pendientes)
+    return grafo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Expande un dato (IP, dominio, email, usuario) en un grafo de entidades relacionadas.")
+    parser.add_argument("semilla")
+    parser.add_argument("--tipo", choices=("ip", "dominio", "email", "usuario", "telefono"), help="por defecto se deduce del dato")
+    parser.add_argument("--profundidad", type=int, default=PROFUNDIDAD_POR_DEFECTO, help="saltos máximos desde la semilla")
+    parser.add_argument("--max-peticiones", type=int, default=MAX_PETICIONES_POR_DEFECTO, help="consultas a proveedores como máximo")
+    parser.add_argument("-c", "--concurrencia", type=int, default=CONCURRENCIA_POR_DEFECTO)
+    parser.add_argument("-o", "--salida", help="exporta el grafo (.graphml o .json)")
+    args = parser.parse_args(argv)
+
+    from configuracion import cargar_apis
+    from consultas import Consultor
+
+    def al_avanzar(evento):
+        detalle = evento["error"] or f"+{len(evento['nuevas'])} entidades"
+        print(f"[{evento['profundidad']}] {evento['proveedor']} {evento['valor']}: {detalle}", file=sys.stderr)
+
+    inicio = time.monotonic()
+    try:
+        grafo = expandir(Consultor(cargar_apis()), args.semilla, args.tipo, args.profundidad,
+                         args.max_peticiones, max(1, args.concurrencia), al_avanzar)
+    except KeyboardInterrupt:
+        return 130
+    print(f"{len(grafo)} nodos, {grafo.num_aristas} aristas, {grafo.peticiones} peticiones en "
+          f"{time.monotonic() - inicio:.1f}s ({grafo.sin_explorar} entidades sin explorar)", file=sys.stderr)
+    print(json.dumps(grafo.resumen(), ensure_ascii=False))
+    if args.salida:
+        grafo.exportar(args.salida)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
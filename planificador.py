@@ -0,0 +1,237 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+from metricas import obtener_metricas
+
+# --- Planificador de trabajos ---
+# Todas las acciones de la ventana pasan por aquí en lugar de abrir un hilo nuevo cada
+# una: hay un número fijo de trabajadores y una cola con prioridades, así que una
+# consulta suelta adelanta a un barrido masivo que ya esté esperando, y el número de
+# hilos no crece por muchas investigaciones que se encolen. Uno de los trabajadores
+# queda reservado para lo interactivo, de modo que aunque todos los demás estén
+# ocupados con trabajos largos una consulta suelta empieza enseguida.
+#
+# La cancelación es cooperativa: cancelar() marca el trabajo y el propio trabajo lo
+# comprueba (comprobar_cancelacion() lanza TrabajoCancelado) en sus puntos de espera;
+# la ventana lo hace cada vez que el trabajo muestra algo.
+
+TRABAJADORES = 4
+RESERVADOS_INTERACTIVOS = 1
+MAX_EN_COLA = 200
+MAX_HISTORIAL = 200
+
+INTERACTIVA, NORMAL, MASIVA = 0, 1, 2
+NOMBRES_PRIORIDAD = {INTERACTIVA: "interactiva", NORMAL: "normal", MASIVA: "masiva"}
+
+EN_COLA, EJECUTANDO, TERMINADO, CANCELADO, FALLIDO = "en cola", "ejecutando", "terminado", "cancelado", "error"
+
+_local = threading.local()
+
+
+class ColaLlena(Exception):
+    """No caben más trabajos en la cola (contrapresión)."""
+
+
+class TrabajoCancelado(BaseException):
+    """
+    El trabajo en curso ha sido cancelado. Hereda de BaseException para atravesar los
+    'except Exception' con los que cada acción informa de sus propios errores.
+    """
+
+
+class Trabajo:
+    def __init__(self, identificador, nombre, funcion, args, prioridad):
+        self.id = identificador
+        self.nombre = nombre
+        self.funcion = funcion
+        self.args = args
+        self.prioridad = prioridad
+        self.estado = EN_COLA
+        self.error = None
+        self.hechos = 0
+        self.total = None
+        self.creado = time.monotonic()
+        self.inicio = None
+        self.fin = None
+        self._cancelado = threading.Event()
+
+    def cancelar(self):
+        self._cancelado.set()
+
+    @property
+    def cancelado(self):
+        return self._cancelado.is_set()
+
+    def avanzar(self, hechos=1, total=None):
+        """Suma progreso (y fija el total si se conoce); comprueba de paso la cancelación."""
+        self.hechos += hechos
+        if total is not None:
+            self.total = total
+        if self.cancelado:
+            raise TrabajoCancelado(self.nombre)
+
+    @property
+    def duracion(self):
+        if self.inicio is None:
+            return 0.0
+        return (self.fin or time.monotonic()) - self.inicio
+
+
+def trabajo_actual():
+    """El Trabajo que está ejecutando este hilo, o None fuera del planificador."""
+    return getattr(_local, "trabajo", None)
+
+
+def comprobar_cancelacion():
+    trabajo = trabajo_actual()
+    if trabajo is not None and trabajo.cancelado:
+        raise TrabajoCancelado(trabajo.nombre)
+
+
+class Planificador:
+    def __init__(self, trabajadores=TRABAJADORES, reservados=RESERVADOS_INTERACTIVOS, max_en_cola=MAX_EN_COLA,
+                 al_fallar=None):
+        self.max_en_cola = max_en_cola
+        self.al_fallar = al_fallar  # (trabajo, excepción) para los errores no capturados por el trabajo
+        self._cola = []  # heap de (prioridad, orden, trabajo)
+        self._orden = itertools.count()
+        self._ids = itertools.count(1)
+        self._condicion = threading.Condition()
+        self._activos = {}
+        self._historial = deque(maxlen=MAX_HISTORIAL)
+        self._cerrando = False
+        self._metricas = obtener_metricas()
+        self._hilos = [
+            threading.Thread(target=self._trabajar, args=(i < reservados,), name=f"trabajador-{i}", daemon=True)
+            for i in range(max(trabajadores, reservados + 1))
+        ]
+        for hilo in self._hilos:
+            hilo.start()
+
+    def enviar(self, nombre, funcion, *args, prioridad=NORMAL, esperar=False):
+        """
+        Encola funcion(*args) y devuelve su Trabajo. Con la cola llena lanza ColaLlena,
+        o espera a que haya sitio si esperar=True (no usarlo desde el hilo de la ventana).
+        """
+        with self._condicion:
+            while len(self._cola) >= self.max_en_cola and not self._cerrando:
+                if not esperar:
+                    raise ColaLlena(f"Hay {len(self._cola)} trabajos esperando; espera a que terminen o cancela alguno")
+                self._condicion.wait()
+            if self._cerrando:
+                raise ColaLlena("La aplicación se está cerrando")
+            trabajo = Trabajo(next(self._ids), nombre, funcion, args, prioridad)
+            heapq.heappush(self._cola, (prioridad, next(self._orden), trabajo))
+            self._metricas.fijar("trabajos_en_cola", len(self._cola))
+            self._condicion.notify_all()
+            return trabajo
+
+    def _siguiente(self, solo_interactivos):
+        with self._condicion:
+            while True:
+                # Los cancelados mientras esperaban se retiran sin ocupar a nadie
+                while self._cola and self._cola[0][2].cancelado:
+                    self._retirar(heapq.heappop(self._cola)[2], CANCELADO)
+                if self._cola and (not solo_interactivos or self._cola[0][0] == INTERACTIVA):
+                    trabajo = heapq.heappop(self._cola)[2]
+                    trabajo.estado, trabajo.inicio = EJECUTANDO, time.monotonic()
+                    self._activos[trabajo.id] = trabajo
+                    self._metricas.fijar("trabajos_en_cola", len(self._cola))
+                    self._condicion.notify_all()  # hay sitio en la cola
+                    return trabajo
+                if self._cerrando:
+                    return None
+                self._condicion.wait()
+
+    def _retirar(self, trabajo, estado):
+        trabajo.estado, trabajo.fin = estado, time.monotonic()
+        self._activos.pop(trabajo.id, None)
+        self._historial.append(trabajo)
+        self._metricas.incrementar("trabajos", estado=estado, prioridad=NOMBRES_PRIORIDAD[trabajo.prioridad])
+        self._condicion.notify_all()
+
+    def _trabajar(self, solo_interactivos):
+        while True:
+            trabajo = self._siguiente(solo_interactivos)
+            if trabajo is None:
+                return
+            _local.trabajo = trabajo
+            estado = TERMINADO
+            try:
+                trabajo.funcion(*trabajo.args)
+            except TrabajoCancelado:
+                estado = CANCELADO
+            except Exception as e:
+                estado, trabajo.error = FALLIDO, e
+            finally:
+                _local.trabajo = None
+                if estado == TERMINADO and trabajo.cancelado:
+                    estado = CANCELADO
+                with self._condicion:
+                    self._retirar(trabajo, estado)
+            if estado == FALLIDO and self.al_fallar:
+                try:
+                    self.al_fallar(trabajo, trabajo.error)
+                except Exception:
+                    pass
+
+    def trabajos(self):
+        """Los trabajos en curso, en cola y los últimos terminados (para la ventana de trabajos)."""
+        with self._condicion:
+            en_cola = [t for _, _, t in sorted(self._cola)]
+            return list(self._activos.values()) + en_cola + list(reversed(self._historial))
+
+    def cancelar(self, identificador):
+        """Cancela un trabajo: si aún esperaba sale de la cola; si está en marcha se le avisa."""
+        with self._condicion:
+            trabajo = self._activos.get(identificador)
+            if trabajo is not None:
+                trabajo.cancelar()
+                return True
+            for i, (_, _, trabajo) in enumerate(self._cola):
+                if trabajo.id == identificador:
+                    trabajo.cancelar()
+                    self._cola[i] = self._cola[-1]
+                    self._cola.pop()
+                    heapq.heapify(self._cola)
+                    self._metricas.fijar("trabajos_en_cola", len(self._cola))
+                    self._retirar(trabajo, CANCELADO)
+                    return True
+        return False
+
+    @property
+    def pendientes(self):
+        """Trabajos en cola más los que se están ejecutando."""
+        with self._condicion:
+            return len(self._cola) + len(self._activos)
+
+    def cerrar(self, cancelar_en_curso=False):
+        """
+        Deja de aceptar trabajos y cancela los que esperaban en la cola. Los que están
+        en marcha terminan (o se les pide cancelar); los trabajadores salen al quedar libres.
+        """
+        with self._condicion:
+            self._cerrando = True
+            while self._cola:
+                trabajo = heapq.heappop(self._cola)[2]
+                trabajo.cancelar()
+                self._retirar(trabajo, CANCELADO)
+            self._metricas.fijar("trabajos_en_cola", 0)
+            if cancelar_en_curso:
+                for trabajo in self._activos.values():
+                    trabajo.cancelar()
+            self._condicion.notify_all()
+
+    def esperar(self, plazo):
+        """Espera hasta 'plazo' segundos a que acaben los trabajos; True si no queda ninguno."""
+        limite = time.monotonic() + plazo
+        with self._condicion:
+            while self._cola or self._activos:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                self._condicion.wait(restante)
+            return True
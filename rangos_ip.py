@@ -0,0 +1,91 @@
+import ipaddress
+import re
+from itertools import islice
+
+# --- Rangos de IPs ---
+# Los análisis de IP aceptan, además de una dirección suelta, bloques CIDR
+# (192.0.2.0/24), rangos (192.0.2.10-192.0.2.50, o 192.0.2.10-50 para el último
+# octeto) y listas separadas por comas, espacios o saltos de línea. La expansión es
+# perezosa: un /16 no se convierte en una lista de 65 536 cadenas, se recorre de
+# una en una, y trocear() la agrupa en paquetes para los endpoints por lotes.
+
+SEPARADORES = re.compile(r"[\s,;]+")
+
+
+def _rango(texto):
+    """(inicio, fin) como ip_address de un elemento: IP, CIDR o rango 'a-b'."""
+    if "/" in texto:
+        red = ipaddress.ip_network(texto, strict=False)
+        return red.network_address, red.broadcast_address
+    if "-" in texto:
+        primero, _, ultimo = (t.strip() for t in texto.partition("-"))
+        inicio = ipaddress.ip_address(primero)
+        if ultimo.isdigit() and inicio.version == 4:
+            # 192.0.2.10-50: solo cambia el último octeto
+            ultimo = primero.rsplit(".", 1)[0] + "." + ultimo
+        fin = ipaddress.ip_address(ultimo)
+        if fin.version != inicio.version or fin < inicio:
+            raise ValueError(f"Rango de IPs no válido: {texto!r}")
+        return inicio, fin
+    direccion = ipaddress.ip_address(texto)
+    return direccion, direccion
+
+
+def elementos(texto):
+    """Separa una entrada en sus elementos (IPs, CIDR o rangos), admitiendo 'a - b'."""
+    return SEPARADORES.split(re.sub(r"\s*-\s*", "-", texto.strip())) if texto.strip() else []
+
+
+def es_multiple(texto):
+    """True si la entrada describe más de una dirección o no es una IP suelta."""
+    texto = texto.strip()
+    return "/" in texto or "-" in texto or bool(SEPARADORES.search(texto))
+
+
+def contar(texto):
+    """Número de direcciones de la entrada, sin expandirla. ValueError si algo no es válido."""
+    total = 0
+    for elemento in elementos(texto):
+        inicio, fin = _rango(elemento)
+        total += int(fin) - int(inicio) + 1
+    return total
+
+
+def expandir(texto):
+    """Genera, en orden y de una en una, las direcciones de la entrada como texto."""
+    # Se validan todos los elementos antes de generar nada: un error no deja la salida a medias
+    rangos = [_rango(elemento) for elemento in elementos(texto)]
+    for inicio, fin in rangos:
+        clase = type(inicio)
+        for entero in range(int(inicio), int(fin) + 1):
+            yield str(clase(entero))
+
+
+def expandir_entradas(entradas):
+    """
+    Envuelve un generador de (línea, dato) expandiendo los datos con varios objetivos
+    (cada IP resultante conserva su número de línea). Lo que no se puede interpretar
+    se deja pasar tal cual, para que el proveedor informe del error como siempre.
+    """
+    for linea, dato in entradas:
+        if not es_multiple(dato):
+            yield linea, dato
+            continue
+        try:
+            direcciones = expandir(dato)
+            yield linea, next(direcciones)
+        except (ValueError, StopIteration):
+            yield linea, dato
+            continue
+        for direccion in direcciones:
+            yield linea, direccion
+
+
+def trocear(iterable, tamano):
+    """Genera listas de como mucho 'tamano' elementos sin materializar el resto."""
+    iterable = iter(iterable)
+    while True:
+        paquete = list(islice(iterable, tamano))
+        if not paquete:
+            return
+        yield paquete
@@ -0,0 +1,387 @@
+import argparse
+import json
+import sys
+import time
+
+# --- Validación local de teléfonos (E.164) ---
+# Antes de gastar una consulta de Veriphone o AbstractAPI se comprueba el número sin
+# salir a la red: se normaliza a E.164, se busca su prefijo internacional y se mira
+# la longitud del número nacional y, donde se conoce, el tipo de línea por el rango
+# (móvil, fijo, gratuito, tarificación adicional...). Un número mal formado o con una
+# longitud imposible no llega a la API; uno válido solo necesita la API para los
+# datos del operador. Los números sin prefijo internacional solo se pueden resolver
+# si se indica el país por defecto; si no, quedan sin decidir (valido None). Lo mismo
+# pasa con los prefijos que no están en estas tablas, que son un subconjunto.
+#
+# Las tablas se compilan la primera vez que se usan en un índice de prefijos plano
+# (un diccionario de "prefijo E.164 -> datos"): buscar un número es probar sus
+# primeros dígitos de más largo a más corto, sin bajar dígito a dígito.
+#
+#   python telefonos.py numeros.txt -o numeros.jsonl --pais ES
+
+LONGITUD_MAXIMA_E164 = 15
+CARACTERES_DESCARTABLES = str.maketrans("", "", " -.()/\t ")
+TIPOS_SIN_LONGITUD = frozenset({"gratuito", "tarificacion", "personal"})
+
+# prefijo  ISO  longitud(es) del número nacional  [t=prefijo troncal]  [tipo=prefijos nacionales,...]
+# Los tipos son: movil, fijo, gratuito, tarificacion, personal, voip, invalido.
+# La longitud es la de la numeración geográfica y móvil; los rangos no geográficos
+# (TIPOS_SIN_LONGITUD) tienen a menudo otra y no se descartan por ella.
+METADATOS = """
+1 US 10 t=1 invalido=0,1 gratuito=800,833,844,855,866,877,888 tarificacion=900
+7 RU 10 t=8 movil=9 fijo=3,4,8 gratuito=800
+20 EG 9-10 t=0 movil=10,11,12,15 fijo=2,3
+27 ZA 9 t=0 movil=6,7,8 fijo=1,2,3,4,5 gratuito=80
+30 GR 10 movil=69 fijo=2 gratuito=800
+31 NL 9 t=0 movil=6 fijo=1,2,3,4,5,7 gratuito=800 tarificacion=900,906,909
+32 BE 8-9 t=0 movil=45,46,47,48,49 gratuito=800 tarificacion=90
+33 FR 9 t=0 movil=6,7 fijo=1,2,3,4,5 voip=9 gratuito=80 tarificacion=89
+34 ES 9 movil=6,71,72,73,74 fijo=8,9 personal=70 gratuito=800,900 tarificacion=803,806,807,905
+36 HU 8-9 t=06 movil=20,30,31,50,70
+39 IT 6-11 movil=3 fijo=0 gratuito=80 tarificacion=89
+40 RO 9 t=0 movil=7 fijo=2,3 gratuito=800 tarificacion=90
+41 CH 9 t=0 movil=75,76,77,78,79 fijo=2,3,4,5,6,8 gratuito=800 tarificacion=90
+43 AT 4-13 t=0 movil=65,66,67,68,69 gratuito=800 tarificacion=90
+44 GB 9-10 t=0 movil=71,72,73,74,75,77,78,79 fijo=1,2 personal=70 gratuito=800,808 tarificacion=9
+45 DK 8
+46 SE 7-13 t=0 movil=70,72,73,76,79 gratuito=20 tarificacion=900,939,944
+47 NO 8 movil=4,9 fijo=2,3,5,6,7 gratuito=80
+48 PL 9 movil=45,50,51,53,57,60,66,69,72,73,78,79,88 gratuito=800 tarificacion=70
+49 DE 5-13 t=0 movil=15,16,17 gratuito=800 tarificacion=900
+51 PE 8-9 t=0 movil=9 fijo=1,4,5,6,7,8
+52 MX 10
+53 CU 8 t=0 movil=5
+54 AR 10-11 t=0 movil=9 gratuito=800 tarificacion=600
+55 BR 10-11 t=0 gratuito=800 tarificacion=900
+56 CL 9 movil=9 fijo=2,3,4,5,6,7 gratuito=800
+57 CO 10 movil=3 fijo=60 gratuito=800
+58 VE 10 t=0 movil=4 fijo=2 gratuito=800
+60 MY 8-10 t=0 movil=1 fijo=3,4,5,6,7,8,9
+61 AU 9 t=0 movil=4 fijo=2,3,7,8 gratuito=1800 tarificacion=19
+62 ID 8-12 t=0 movil=8 gratuito=800
+63 PH 10 t=0 movil=9 fijo=2,3,4,5,6,7,8
+64 NZ 8-10 t=0 movil=2 fijo=3,4,6,7,9 gratuito=800
+65 SG 8 movil=8,9 fijo=6 gratuito=800
+66 TH 8-9 t=0 movil=6,8,9 fijo=2,3,4,5,7
+81 JP 9-10 t=0 movil=70,80,90 gratuito=120 voip=50
+82 KR 8-10 t=0 movil=10 gratuito=80 voip=70
+84 VN 9-10 t=0 movil=3,5,7,8,9 fijo=2
+86 CN 10-11 t=0 movil=13,14,15,16,17,18,19 gratuito=400,800
+90 TR 10 t=0 movil=5 fijo=2,3,4 gratuito=800 tarificacion=900
+91 IN 10 t=0 movil=6,7,8,9 gratuito=1800
+92 PK 9-10 t=0 movil=3
+93 AF 9 t=0 movil=7
+94 LK 9 t=0 movil=7
+95 MM 7-10 t=0 movil=9
+98 IR 10 t=0 movil=9
+211 SS 9 t=0
+212 MA 9 t=0 movil=6,7 fijo=5
+213 DZ 8-9 t=0 movil=5,6,7
+216 TN 8 movil=2,4,5,9 fijo=3,7
+218 LY 9 t=0 movil=91,92,93,94,95
+220 GM 7
+221 SN 9 movil=7
+222 MR 8
+223 ML 8
+224 GN 9
+225 CI 10
+226 BF 8
+227 NE 8
+228 TG 8
+229 BJ 8-10
+230 MU 7-8 movil=5
+231 LR 7-9 t=0
+232 SL 8 t=0
+233 GH 9 t=0 movil=2,5
+234 NG 8-10 t=0 movil=70,80,81,90,91
+235 TD 8
+236 CF 8
+237 CM 9 movil=6
+238 CV 7
+239 ST 7
+240 GQ 9
+241 GA 7-8
+242 CG 9
+243 CD 9 t=0 movil=8,9
+244 AO 9 movil=9
+245 GW 7-9
+246 IO 7
+248 SC 7
+249 SD 9 t=0 movil=9,1
+250 RW 9 t=0 movil=7
+251 ET 9 t=0 movil=9,7
+252 SO 7-9 t=0
+253 DJ 8
+254 KE 9-10 t=0 movil=7,1
+255 TZ 9 t=0 movil=6,7
+256 UG 9 t=0 movil=7
+257 BI 8
+258 MZ 8-9 movil=8
+260 ZM 9 t=0 movil=7,9
+261 MG 9 t=0 movil=3
+262 RE 9 t=0 movil=69
+263 ZW 9 t=0 movil=7
+264 NA 8-9 t=0 movil=8
+265 MW 7-9 t=0
+266 LS 8
+267 BW 7-8 movil=7
+268 SZ 8
+269 KM 7
+290 SH 4-5
+291 ER 7 t=0
+297 AW 7
+298 FO 6
+299 GL 6
+350 GI 8
+351 PT 9 movil=9 fijo=2 gratuito=800 tarificacion=707,708,760
+352 LU 4-11 movil=6
+353 IE 7-9 t=0 movil=83,85,86,87,89 gratuito=1800
+354 IS 7 movil=6,7,8
+355 AL 8-9 t=0 movil=6
+356 MT 8 movil=7,9 fijo=2
+357 CY 8 movil=9 fijo=2
+358 FI 5-12 t=0 movil=4,50 gratuito=800
+359 BG 7-9 t=0 movil=87,88,89,98
+370 LT 8 t=8 movil=6
+371 LV 8 movil=2 fijo=6
+372 EE 7-8 movil=5,8
+373 MD 8 t=0 movil=6,7
+374 AM 8 t=0 movil=4,5,7,9
+375 BY 9 t=8 movil=25,29,33,44
+376 AD 6-9 movil=3,4,6
+377 MC 8-9 movil=4,6
+378 SM 6-10
+380 UA 9 t=0 movil=39,50,63,66,67,68,73,91,92,93,94,95,96,97,98,99
+381 RS 8-10 t=0 movil=6
+382 ME 8 t=0 movil=6
+383 XK 8-9 t=0 movil=4
+385 HR 8-9 t=0 movil=9
+386 SI 8 t=0 movil=30,31,40,41,51,64,68,69,70,71
+387 BA 8-9 t=0 movil=6
+389 MK 8 t=0 movil=7
+420 CZ 9 movil=6,7 fijo=2,3,4,5
+421 SK 9 t=0 movil=9
+423 LI 7-9 movil=7
+500 FK 5
+501 BZ 7
+502 GT 8 movil=3,4,5
+503 SV 8 movil=6,7 fijo=2
+504 HN 8 movil=3,7,8,9 fijo=2
+505 NI 8 movil=5,7,8
+506 CR 8 movil=5,6,7,8 fijo=2 gratuito=800
+507 PA 7-8 movil=6
+508 PM 6
+509 HT 8
+590 GP 9 t=0 movil=69
+591 BO 8 t=0 movil=6,7
+592 GY 7
+593 EC 8-9 t=0 movil=9
+594 GF 9 t=0 movil=69
+595 PY 9 t=0 movil=9
+596 MQ 9 t=0 movil=69
+597 SR 6-7
+598 UY 8 t=0 movil=9
+599 CW 7-8
+670 TL 7-8
+672 NF 6
+673 BN 7
+674 NR 7
+675 PG 7-8
+676 TO 5-7
+677 SB 5-7
+678 VU 5-7
+679 FJ 7
+680 PW 7
+681 WF 6
+682 CK 5
+683 NU 4-7
+685 WS 5-7
+686 KI 5-8
+687 NC 6
+688 TV 5-7
+689 PF 6-8
+690 TK 4-7
+691 FM 7
+692 MH 7
+850 KP 8-10
+852 HK 8 movil=5,6,9 fijo=2,3 gratuito=800
+853 MO 8 movil=6
+855 KH 8-9 t=0
+856 LA 8-10 t=0 movil=20
+880 BD 10 t=0 movil=1
+886 TW 8-9 t=0 movil=9
+960 MV 7 movil=7,9
+961 LB 7-8 t=0 movil=3,7,8
+962 JO 8-9 t=0 movil=7
+963 SY 8-9 t=0 movil=9
+964 IQ 8-10 t=0 movil=7
+965 KW 8 movil=5,6,9
+966 SA 9 t=0 movil=5
+967 YE 7-9 t=0 movil=7
+968 OM 8 movil=7,9
+970 PS 8-9 t=0 movil=5
+971 AE 8-9 t=0 movil=5 gratuito=800
+972 IL 8-9 t=0 movil=5 gratuito=1800
+973 BH 8 movil=3
+974 QA 8 movil=3,5,6,7
+975 BT 7-8 movil=17,77
+976 MN 8 movil=8,9
+977 NP 8-10 t=0 movil=9
+992 TJ 9 movil=9
+993 TM 8 t=8 movil=6
+994 AZ 9 t=0 movil=4,5,7
+995 GE 9 t=0 movil=5
+996 KG 9 t=0 movil=5,7,9
+998 UZ 9 movil=9
+"""
+
+# En el plan de numeración norteamericano (+1) el país sale del código de área
+AREAS_NANP = {
+    "CA": "204 226 236 249 250 263 289 306 343 354 365 367 368 382 387 403 416 418 428 431 437 438 450 460 "
+          "468 474 506 514 519 548 579 581 584 587 604 613 639 647 672 683 705 709 742 753 778 780 782 807 "
+          "819 825 867 873 879 902 905 942",
+    "PR": "787 939", "DO": "809 829 849", "JM": "658 876", "TT": "868", "BS": "242", "BB": "246",
+    "AI": "264", "AG": "268", "VG": "284", "VI": "340", "KY": "345", "BM": "441", "GD": "473",
+    "TC": "649", "MS": "664", "MP": "670", "GU": "671", "AS": "684", "SX": "721", "LC": "758",
+    "DM": "767", "VC": "784", "KN": "869",
+}
+# Prefijos de país que comparten código: +7 6/7 es Kazajistán
+PREFIJOS_COMPARTIDOS = {"76": "KZ", "77": "KZ"}
+MOVILES_COMPARTIDOS = {"KZ": "70,74,75,76,77"}
+
+_indice = None          # prefijo E.164 -> (prefijo país, ISO, mínimo, máximo, tipo)
+_por_pais = None        # ISO -> (prefijo país, prefijo troncal)
+_longitud_maxima = 0
+
+
+def _compilar():
+    """Construye el índice de prefijos a partir de las tablas (una sola vez)."""
+    global _indice, _por_pais, _longitud_maxima
+    indice, por_pais = {}, {}
+    for linea in METADATOS.strip().splitlines():
+        codigo, iso, longitudes, *resto = linea.split()
+        minimo, _, maximo = longitudes.partition("-")
+        minimo, maximo = int(minimo), int(maximo or minimo)
+        indice[codigo] = (codigo, iso, minimo, maximo, None)
+        troncal = ""
+        for campo in resto:
+            clave, _, valores = campo.partition("=")
+            if clave == "t":
+                troncal = valores
+                continue
+            for prefijo in valores.split(","):
+                indice[codigo + prefijo] = (codigo, iso, minimo, maximo, clave)
+        por_pais.setdefault(iso, (codigo, troncal))
+    # Los países que comparten prefijo heredan longitudes y tipos del titular
+    for prefijo, iso in PREFIJOS_COMPARTIDOS.items():
+        codigo, _, minimo, maximo, tipo = indice[prefijo[0]]
+        indice[prefijo] = (codigo, iso, minimo, maximo, tipo)
+        por_pais.setdefault(iso, (codigo, por_pais[indice[codigo][1]][1]))
+    for iso, prefijos in MOVILES_COMPARTIDOS.items():
+        codigo = por_pais[iso][0]
+        minimo, maximo = indice[codigo][2:4]
+        for prefijo in prefijos.split(","):
+            indice[codigo + prefijo] = (codigo, iso, minimo, maximo, "movil")
+    for iso, areas in AREAS_NANP.items():
+        for area in areas.split():
+            indice["1" + area] = ("1", iso, 10, 10, None)
+        por_pais.setdefault(iso, ("1", "1"))
+    _indice, _por_pais = indice, por_pais
+    _longitud_maxima = max(len(p) for p in indice)
+
+
+def _normalizar(numero, pais):
+    """(dígitos E.164 sin '+', None) o (None, motivo); (None, None) si no se puede decidir."""
+    texto = numero.strip().translate(CARACTERES_DESCARTABLES)
+    if texto[:1] == "+":
+        digitos = texto[1:]
+    elif texto[:2] == "00":
+        digitos = texto[2:]
+    else:
+        digitos = None
+    comprobar = texto if digitos is None else digitos
+    if not (comprobar.isdigit() and comprobar.isascii()):
+        return None, "caracteres no válidos"
+    if digitos is None:
+        if not pais:
+            return None, None  # número nacional sin país por defecto
+        datos = _por_pais.get(pais.upper())
+        if datos is None:
+            return None, f"país por defecto desconocido: {pais}"
+        codigo, troncal = datos
+        digitos = codigo + (texto[len(troncal):] if troncal and texto.startswith(troncal) else texto)
+    if len(digitos) > LONGITUD_MAXIMA_E164:
+        return None, f"más de {LONGITUD_MAXIMA_E164} dígitos"
+    return digitos, None
+
+
+def clasificar(numero, pais=None):
+    """
+    {entrada, valido, motivo, numero_internacional, codigo_pais, prefijo_pais,
+    numero_nacional, tipo_linea}. valido es True/False si se puede decidir sin red y
+    None si no (número nacional sin país por defecto, prefijo fuera de las tablas o
+    rango no geográfico con una longitud distinta). tipo_linea es None donde no se
+    conocen los rangos.
+    """
+    if _indice is None:
+        _compilar()
+    digitos, motivo = _normalizar(numero, pais)
+    if digitos is None:
+        return {"entrada": numero, "valido": False if motivo else None, "motivo": motivo, "numero_internacional": None,
+                "codigo_pais": None, "prefijo_pais": None, "numero_nacional": None, "tipo_linea": None}
+    obtener = _indice.get
+    for longitud in range(min(_longitud_maxima, len(digitos)), 0, -1):
+        entrada = obtener(digitos[:longitud])
+        if entrada is not None:
+            break
+    else:
+        return {"entrada": numero, "valido": None, "motivo": "prefijo de país fuera de las tablas locales",
+                "numero_internacional": "+" + digitos, "codigo_pais": None, "prefijo_pais": None, "numero_nacional": None, "tipo_linea": None}
+    codigo, iso, minimo, maximo, tipo = entrada
+    nacional = digitos[len(codigo):]
+    valido, motivo = True, None
+    if tipo == "invalido":
+        valido, motivo, tipo = False, "rango no asignado", None
+    elif not minimo <= len(nacional) <= maximo and tipo in TIPOS_SIN_LONGITUD:
+        valido, motivo = None, f"longitud {len(nacional)} sin comprobar en un rango {tipo} de {iso}"
+    elif not minimo <= len(nacional) <= maximo:
+        esperado = str(minimo) if minimo == maximo else f"{minimo}-{maximo}"
+        valido, motivo = False, f"longitud {len(nacional)} (se esperan {esperado} dígitos en {iso})"
+    return {"entrada": numero, "valido": valido, "motivo": motivo, "numero_internacional": "+" + digitos,
+            "codigo_pais": iso, "prefijo_pais": codigo, "numero_nacional": nacional, "tipo_linea": tipo}
+
+
+def clasificar_lote(numeros, pais=None):
+    """Genera clasificar(numero) para cada número de un iterable, sin red."""
+    for numero in numeros:
+        yield clasificar(numero, pais)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Valida y clasifica teléfonos sin salir a la red (uno por línea, salida JSONL).")
+    parser.add_argument("entrada", nargs="?", default="-", help="fichero con un número por línea ('-' para stdin)")
+    parser.add_argument("-o", "--salida", default="-")
+    parser.add_argument("--pais", help="país (ISO) de los números sin prefijo internacional, p. ej. ES")
+    args = parser.parse_args(argv)
+
+    inicio = time.monotonic()
+    origen = sys.stdin if args.entrada == "-" else open(args.entrada, "r", encoding="utf-8")
+    salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8")
+    total = validos = 0
+    try:
+        lineas = (l.strip() for l in origen)
+        for resultado in clasificar_lote((l for l in lineas if l and not l.startswith("#")), args.pais):
+            total += 1
+            validos += resultado["valido"] is True
+            salida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+    finally:
+        if origen is not sys.stdin:
+            origen.close()
+        if salida is not sys.stdout:
+            salida.close()
+    print(f"{total} números ({validos} válidos) en {time.monotonic() - inicio:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
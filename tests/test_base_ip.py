@@ -0,0 +1,56 @@
+import pytest
+
+from base_ip import BaseIP, ErrorBaseIP, importar
+
+
+@pytest.fixture
+def base(tmp_path):
+    paises = tmp_path / "paises.csv"
+    paises.write_text(
+        "start_ip,end_ip,country,country_name\n"
+        "10.0.0.0,10.255.255.255,ES,España\n"
+        "10.1.2.0,10.1.2.127,PT,Portugal\n"          # más específico que el anterior
+        "192.0.2.10,192.0.2.20,FR,Francia\n"          # rango que no cae en un solo prefijo
+        "2001:db8::,2001:db8::ffff,DE,Alemania\n"
+        "no-es-una-ip,10.0.0.1,XX,Nada\n",
+        encoding="utf-8")
+    asn = tmp_path / "asn.csv"
+    asn.write_text("network,asn,as_name\n10.1.0.0/16,64500,Ejemplo AS\n", encoding="utf-8")
+    ruta = str(tmp_path / "base_ip.bin")
+    metadatos = importar([str(paises), str(asn)], ruta)
+    base = BaseIP(ruta)
+    yield base, metadatos
+    base.cerrar()
+
+
+def test_busquedas_con_prefijo_mas_especifico(base):
+    base, metadatos = base
+    assert base.buscar("10.200.0.1") == {"codigo_pais": "ES", "pais": "España"}
+    # Los campos de los dos ficheros se combinan y manda el prefijo más específico
+    assert base.buscar("10.1.9.9") == {"codigo_pais": "ES", "pais": "España", "asn": "AS64500", "organizacion": "Ejemplo AS"}
+    assert base.buscar("10.1.2.5") == {"codigo_pais": "PT", "pais": "Portugal", "asn": "AS64500", "organizacion": "Ejemplo AS"}
+    assert base.buscar("10.1.2.128")["codigo_pais"] == "ES"
+    assert [base.buscar(f"192.0.2.{n}") for n in (9, 10, 20, 21)] == [None, {"codigo_pais": "FR", "pais": "Francia"},
+                                                                       {"codigo_pais": "FR", "pais": "Francia"}, None]
+    assert base.buscar("2001:db8::1")["codigo_pais"] == "DE"
+    assert base.buscar("2001:db9::1") is None
+    assert metadatos["campos"] == ["asn", "codigo_pais", "organizacion", "pais"]
+    with pytest.raises(ValueError):
+        base.buscar("300.1.1.1")
+
+
+def test_lote_conserva_el_orden_y_tolera_basura(base):
+    base, _ = base
+    ips = ["10.1.2.5", "basura", "192.0.2.15", "10.1.2.6", "8.8.8.8"]
+    resultado = list(base.buscar_lote(ips))
+    assert [ip for ip, _ in resultado] == ips
+    assert [d and d["codigo_pais"] for _, d in resultado] == ["PT", None, "FR", "PT", None]
+
+
+def test_fichero_ausente_o_ajeno(tmp_path):
+    with pytest.raises(ErrorBaseIP):
+        BaseIP(str(tmp_path / "no_existe.bin"))
+    ajeno = tmp_path / "ajeno.bin"
+    ajeno.write_bytes(b"\0" * 64)
+    with pytest.raises(ErrorBaseIP):
+        BaseIP(str(ajeno))
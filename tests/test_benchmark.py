@@ -0,0 +1,31 @@
+from benchmark import comparar, percentil
+
+
+def _resultado(escenario, ops, p95, p99):
+    return {"escenario": escenario, "ops_por_segundo": ops, "p95_ms": p95, "p99_ms": p99}
+
+
+def test_percentil_sin_valores():
+    assert percentil([], 95) is None
+    assert percentil([3, 1, 2], 50) == 2
+
+
+def test_comparar_detecta_regresiones():
+    referencia = [_resultado("cache", 100, 10, 20), _resultado("motor", 50, 5, 8)]
+    resultados = [_resultado("cache", 80, 10.5, 20), _resultado("motor", 50, 5, 9.5), _resultado("nuevo", 1, 99, 99)]
+    assert comparar(resultados, referencia, 0.1) == [
+        "cache: 80 ops/s (antes 100)",
+        "motor: p99_ms 9.5 (antes 8)",
+    ]
+
+
+def test_comparar_sin_percentil_actual():
+    # Un escenario en el que todo falló no tiene percentiles: es una regresión, no un TypeError
+    referencia = [_resultado("dns", 100, 10, 20)]
+    resultados = [_resultado("dns", 100, None, None)]
+    assert comparar(resultados, referencia, 0.1) == [
+        "dns: sin p95_ms (antes 10)",
+        "dns: sin p99_ms (antes 20)",
+    ]
+    # Sin referencia para el percentil no hay nada que comparar
+    assert comparar(resultados, [_resultado("dns", 100, None, None)], 0.1) == []
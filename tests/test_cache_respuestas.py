@@ -0,0 +1,132 @@
+import time
+from concurrent.futures import Future
+
+import pytest
+
+import cache_respuestas
+from cache_respuestas import CacheRespuestas
+
+
+class _Reloj:
+    def __init__(self):
+        self.ahora = 1_000_000.0
+
+    def time(self):
+        return self.ahora
+
+
+class _Respuesta:
+    def __init__(self, status_code=200, datos=None, headers=None):
+        self.status_code = status_code
+        self._datos = datos
+        self.headers = headers or {}
+
+    def json(self):
+        if self._datos is None:
+            raise ValueError("sin JSON")
+        return self._datos
+
+
+def _hecho(resp):
+    futuro = Future()
+    futuro.set_result(resp)
+    return futuro
+
+
+def _sin_red(cabeceras=None):
+    raise AssertionError("no debería salir a la red")
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = _Reloj()
+    monkeypatch.setattr(cache_respuestas, "time", reloj)
+    return reloj
+
+
+@pytest.fixture
+def cache():
+    cache = CacheRespuestas(":memory:", ttl_por_proveedor={"shodan": 100})
+    yield cache
+    cache.cerrar()
+
+
+def test_acierto_fresco_no_sale_a_la_red(cache, reloj):
+    pedidas = []
+    resp = cache.consultar("shodan", "1.2.3.4", lambda cabeceras=None: pedidas.append(1) or _hecho(_Respuesta(datos={"v": 1})))
+    assert resp.json() == {"v": 1} and pedidas == [1]
+    reloj.ahora += 50
+    # Las variantes triviales de la consulta comparten entrada
+    resp = cache.consultar("shodan", " 1.2.3.4 ", _sin_red)
+    assert resp.desde_cache and resp.json() == {"v": 1}
+
+
+def test_respuesta_no_valida_no_se_guarda(cache, reloj):
+    cache.consultar("shodan", "x", lambda cabeceras=None: _hecho(_Respuesta(500, {"error": 1})))
+    cache.consultar("shodan", "y", lambda cabeceras=None: _hecho(_Respuesta(200, None)))
+    assert cache.obtener("shodan", "x") == (None, None)
+    assert cache.obtener("shodan", "y") == (None, None)
+
+
+def test_obsoleta_se_sirve_y_se_refresca_en_segundo_plano(cache, reloj):
+    cache.guardar("shodan", "1.2.3.4", 200, {"v": 1})
+    reloj.ahora += 150  # pasado el TTL, dentro de FACTOR_OBSOLETO × TTL
+    pendiente = Future()
+    lanzadas = []
+
+    def lanzar(cabeceras=None):
+        lanzadas.append(1)
+        return pendiente
+
+    assert cache.consultar("shodan", "1.2.3.4", lanzar).json() == {"v": 1}
+    # Un segundo acierto obsoleto mientras se refresca no lanza otra petición
+    assert cache.consultar("shodan", "1.2.3.4", lanzar).json() == {"v": 1}
+    assert lanzadas == [1]
+    pendiente.set_result(_Respuesta(datos={"v": 2}))
+    for _ in range(100):
+        respuesta, estado = cache.obtener("shodan", "1.2.3.4")
+        if estado == "fresca":
+            break
+        time.sleep(0.01)
+    assert (respuesta.json(), estado) == ({"v": 2}, "fresca")
+
+
+def test_caducada_del_todo_se_borra(cache, reloj):
+    cache.guardar("shodan", "1.2.3.4", 200, {"v": 1})
+    reloj.ahora += 100 * cache_respuestas.FACTOR_OBSOLETO + 1
+    assert cache.obtener("shodan", "1.2.3.4") == (None, None)
+
+
+def test_expulsion_lru_al_llegar_al_tope(reloj):
+    cache = CacheRespuestas(":memory:", max_entradas=3)
+    for ip in ("a", "b", "c"):
+        cache.guardar("shodan", ip, 200, {"ip": ip})
+        reloj.ahora += 1
+    cache.obtener("shodan", "a")  # "a" pasa a ser la usada más recientemente
+    reloj.ahora += 1
+    cache.guardar("shodan", "d", 200, {"ip": "d"})
+    assert [ip for ip in "abcd" if cache.obtener("shodan", ip)[0] is not None] == ["a", "c", "d"]
+    cache.cerrar()
+
+
+def test_revalidacion_304_reutiliza_los_datos(cache, reloj):
+    cache.guardar("shodan", "1.2.3.4", 200, {"v": 1}, etag='"abc"', modificado="Tue, 01 Jul 2025 10:00:00 GMT")
+    enviadas = []
+
+    def lanzar(cabeceras=None):
+        enviadas.append(cabeceras)
+        return _hecho(_Respuesta(304))
+
+    resp = cache.consultar("shodan", "1.2.3.4", lanzar, revalidar=True)
+    assert enviadas == [{"If-None-Match": '"abc"', "If-Modified-Since": "Tue, 01 Jul 2025 10:00:00 GMT"}]
+    assert resp.no_modificada and not resp.desde_cache and resp.json() == {"v": 1}
+
+
+def test_revalidacion_200_sustituye_la_entrada(cache, reloj):
+    cache.guardar("shodan", "1.2.3.4", 200, {"v": 1}, etag='"abc"')
+    resp = _Respuesta(datos={"v": 2}, headers={"ETag": '"def"'})
+    assert cache.consultar("shodan", "1.2.3.4", lambda cabeceras=None: _hecho(resp), revalidar=True) is resp
+    enviadas = []
+    cache.consultar("shodan", "1.2.3.4", lambda cabeceras=None: enviadas.append(cabeceras) or _hecho(_Respuesta(304)),
+                    revalidar=True)
+    assert enviadas == [{"If-None-Match": '"def"'}]
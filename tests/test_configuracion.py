@@ -0,0 +1,24 @@
+import os
+
+from configuracion import crear_directorio, ruta_datos
+
+
+def test_ruta_datos_por_usuario_salvo_fichero_antiguo(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    monkeypatch.setenv("APPDATA", str(tmp_path / "config"))
+    monkeypatch.chdir(tmp_path)
+    por_usuario = os.path.join(str(tmp_path / "config"), "wicosintx", "cache.sqlite")
+
+    assert ruta_datos("cache.sqlite") == por_usuario
+    assert not os.path.exists(os.path.dirname(por_usuario))  # resolver no crea nada
+
+    # Un fichero de versiones anteriores en el directorio actual sigue usándose
+    (tmp_path / "cache.sqlite").write_bytes(b"")
+    assert ruta_datos("cache.sqlite") == str(tmp_path / "cache.sqlite")
+
+
+def test_crear_directorio(tmp_path):
+    ruta = str(tmp_path / "a" / "b" / "base.sqlite")
+    assert crear_directorio(ruta) == ruta
+    assert os.path.isdir(os.path.dirname(ruta))
+    assert crear_directorio(":memory:") == ":memory:"
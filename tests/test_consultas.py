@@ -0,0 +1,22 @@
+from consultas import _sustituir_clave
+
+
+def test_rotar_solo_cambia_el_parametro_de_la_clave():
+    url = "https://api.ejemplo.test/v1/?api_key=K1&email=K1@ejemplo.test&q=K1"
+    nueva_url, _ = _sustituir_clave(url, {}, "K1", "K2")
+    assert nueva_url == "https://api.ejemplo.test/v1/?api_key=K2&email=K1@ejemplo.test&q=K1"
+
+
+def test_rotar_cuenta_dehashed_no_toca_la_busqueda():
+    url = "https://api.dehashed.com/search?query=email:yo@ejemplo.test%20password:secreto"
+    kwargs = {"auth": ("yo@ejemplo.test", "secreto"), "timeout": 10}
+    nueva_url, nuevos = _sustituir_clave(url, kwargs, "yo@ejemplo.test", "otra@ejemplo.test", ("secreto", "clave2"))
+    assert nueva_url == url
+    assert nuevos == {"auth": ("otra@ejemplo.test", "clave2"), "timeout": 10}
+    assert kwargs["auth"] == ("yo@ejemplo.test", "secreto")
+
+
+def test_rotar_cabecera_bearer():
+    kwargs = {"headers": {"Authorization": "Bearer T1", "X-Otra": "T1"}, "json": ["T1"]}
+    _, nuevos = _sustituir_clave("https://ipinfo.io/batch", kwargs, "T1", "T2")
+    assert nuevos == {"headers": {"Authorization": "Bearer T2", "X-Otra": "T1"}, "json": ["T1"]}
@@ -0,0 +1,216 @@
+import socketserver
+import struct
+import threading
+
+import pytest
+
+import correo
+from correo import (CribaCorreo, ErrorDNS, ResolutorDNS, analizar_sintaxis, cargar_desechables,
+                    NXDOMAIN, TIPO_A, TIPO_MX, TTL_ERROR, TTL_MINIMO)
+
+# Resolutor de pega en 127.0.0.1 (UDP y TCP en el mismo puerto). Las respuestas se
+# construyen a mano; los nombres de los registros son punteros (0xC00C) a la pregunta.
+PUNTERO_PREGUNTA = b"\xc0\x0c"
+
+
+def _nombre(nombre):
+    return b"".join(bytes([len(e)]) + e.encode("ascii") for e in nombre.split(".") if e) + b"\0"
+
+
+def _registro(tipo, ttl, datos, nombre=PUNTERO_PREGUNTA):
+    return nombre + struct.pack(">HHIH", tipo, 1, ttl, len(datos)) + datos
+
+
+def _mx(preferencia, host, ttl=600):
+    return _registro(TIPO_MX, ttl, struct.pack(">H", preferencia) + _nombre(host))
+
+
+def _soa(ttl, minimo):
+    datos = _nombre("ns.test") + _nombre("hostmaster.test") + struct.pack(">IIIII", 1, 3600, 600, 86400, minimo)
+    return _registro(6, ttl, datos, _nombre("test"))
+
+
+# (nombre, tipo) -> (rcode, respuestas, autoridad, truncada por UDP)
+ZONA = {
+    ("correo.test", TIPO_MX): (0, [_mx(20, "mx2.correo.test"), _mx(10, "mx1.correo.test", ttl=300)], [], False),
+    ("nulo.test", TIPO_MX): (0, [_mx(0, "")], [], False),
+    ("noexiste.test", TIPO_MX): (NXDOMAIN, [], [_soa(900, 120)], False),
+    ("sinmx.test", TIPO_MX): (0, [], [_soa(3600, 300)], False),
+    ("sinmx.test", TIPO_A): (0, [_registro(TIPO_A, 60, bytes([192, 0, 2, 1]))], [], False),
+    ("grande.test", TIPO_MX): (0, [_mx(10, "mx.grande.test")], [], True),
+    ("roto.test", TIPO_A): (0, [_registro(TIPO_A, 60, b"\x01\x02\x03")], [], False),
+}
+
+
+def _responder(consulta, por_tcp):
+    identificador = consulta[:2]
+    posicion, etiquetas = 12, []
+    while consulta[posicion]:
+        etiquetas.append(consulta[posicion + 1:posicion + 1 + consulta[posicion]].decode("ascii"))
+        posicion += 1 + consulta[posicion]
+    (tipo,) = struct.unpack(">H", consulta[posicion + 1:posicion + 3])
+    pregunta = consulta[12:posicion + 5]
+    rcode, respuestas, autoridad, truncada = ZONA.get((".".join(etiquetas), tipo), (NXDOMAIN, [], [], False))
+    if truncada and not por_tcp:
+        respuestas, autoridad = [], []
+    flags = 0x8180 | rcode | (0x0200 if truncada and not por_tcp else 0)
+    return (identificador + struct.pack(">HHHHH", flags, 1, len(respuestas), len(autoridad), 0)
+            + pregunta + b"".join(respuestas) + b"".join(autoridad))
+
+
+class _ManejadorUDP(socketserver.BaseRequestHandler):
+    def handle(self):
+        datos, s = self.request
+        self.server.consultas.append("udp")
+        s.sendto(_responder(datos, False), self.client_address)
+
+
+class _ManejadorTCP(socketserver.StreamRequestHandler):
+    def handle(self):
+        (longitud,) = struct.unpack(">H", self.rfile.read(2))
+        self.server.consultas.append("tcp")
+        respuesta = _responder(self.rfile.read(longitud), True)
+        self.wfile.write(struct.pack(">H", len(respuesta)) + respuesta)
+
+
+@pytest.fixture
+def resolutor():
+    udp = socketserver.ThreadingUDPServer(("127.0.0.1", 0), _ManejadorUDP)
+    puerto = udp.server_address[1]
+    tcp = socketserver.ThreadingTCPServer(("127.0.0.1", puerto), _ManejadorTCP)
+    consultas = udp.consultas = tcp.consultas = []
+    for servidor in (udp, tcp):
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield ResolutorDNS(["127.0.0.1"], puerto=puerto, timeout=2, intentos=1), consultas
+    for servidor in (udp, tcp):
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def test_mx_ordenados_por_preferencia(resolutor):
+    dns, _ = resolutor
+    rcode, registros, _ = dns.consultar("correo.test", TIPO_MX)
+    assert rcode == 0
+    assert sorted(registros) == [((10, "mx1.correo.test"), 300), ((20, "mx2.correo.test"), 600)]
+
+    estado = CribaCorreo(resolutor=dns).dominio("correo.test")
+    assert estado == {"acepta_correo": True, "mx": ["mx1.correo.test", "mx2.correo.test"], "motivo": None}
+
+
+def test_mx_nulo_no_acepta_correo(resolutor):
+    dns, _ = resolutor
+    estado = CribaCorreo(resolutor=dns).dominio("nulo.test")
+    assert estado["acepta_correo"] is False and "MX nulo" in estado["motivo"]
+
+
+def test_nxdomain_usa_el_ttl_del_soa(resolutor):
+    dns, _ = resolutor
+    rcode, registros, ttl_negativo = dns.consultar("noexiste.test", TIPO_MX)
+    assert (rcode, registros, ttl_negativo) == (NXDOMAIN, [], 120)
+
+    resultado = CribaCorreo(resolutor=dns).cribar("alguien@noexiste.test")
+    assert resultado["valido"] is False and resultado["motivo"] == "el dominio no existe"
+
+
+def test_sin_mx_vale_la_direccion_del_dominio(resolutor):
+    dns, _ = resolutor
+    estado = CribaCorreo(resolutor=dns).dominio("sinmx.test")
+    assert estado == {"acepta_correo": True, "mx": ["sinmx.test"], "motivo": None}
+
+
+def test_respuesta_truncada_se_repite_por_tcp(resolutor):
+    dns, consultas = resolutor
+    rcode, registros, _ = dns.consultar("grande.test", TIPO_MX)
+    assert rcode == 0 and registros == [((10, "mx.grande.test"), 600)]
+    assert consultas == ["udp", "tcp"]
+
+
+def test_registro_a_mal_formado_es_error_dns(resolutor):
+    dns, _ = resolutor
+    with pytest.raises(ErrorDNS):
+        dns.consultar("roto.test", TIPO_A)
+
+
+def test_dominios_repetidos_se_resuelven_una_vez(resolutor):
+    dns, consultas = resolutor
+    criba = CribaCorreo(resolutor=dns, desechables=cargar_desechables())
+    resultados = list(criba.cribar_lote([f"u{i}@correo.test" for i in range(50)] + ["mal@", "x@mailinator.com"]))
+    criba.cerrar()
+    assert [r["valido"] for r in resultados[:50]] == [True] * 50
+    assert resultados[50]["formato_valido"] is False
+    assert resultados[51]["desechable"] is True
+    # correo.test una vez; mailinator.com no existe en la zona de pega (NXDOMAIN)
+    assert consultas == ["udp", "udp"]
+
+
+class _ResolutorCaido:
+    def __init__(self):
+        self.consultas = 0
+
+    def consultar(self, dominio, tipo):
+        self.consultas += 1
+        raise ErrorDNS("sin respuesta")
+
+
+class _Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def monotonic(self):
+        return self.ahora
+
+
+def test_los_errores_dns_caducan_antes_que_el_ttl_minimo(monkeypatch):
+    reloj = _Reloj()
+    monkeypatch.setattr(correo, "time", reloj)
+    dns = _ResolutorCaido()
+    criba = CribaCorreo(resolutor=dns, desechables=set())
+    assert criba.dominio("caido.test")["acepta_correo"] is None
+    reloj.ahora += TTL_ERROR - 1
+    criba.dominio("caido.test")
+    assert dns.consultas == 1
+    reloj.ahora += 2
+    assert TTL_ERROR + 1 < TTL_MINIMO
+    criba.dominio("caido.test")
+    assert dns.consultas == 2
+
+
+@pytest.mark.parametrize("email, dominio", [
+    ("usuario@ejemplo.com", "ejemplo.com"),
+    ("nombre.apellido+etiqueta@sub.ejemplo.es", "sub.ejemplo.es"),
+    ('"con espacios y @"@ejemplo.com', "ejemplo.com"),
+    ("josé@bücher.de", "xn--bcher-kva.de"),
+    ("admin@[192.0.2.1]", "[192.0.2.1]"),
+    ("admin@[IPv6:2001:db8::1]", "[IPv6:2001:db8::1]"),
+])
+def test_sintaxis_valida(email, dominio):
+    assert analizar_sintaxis(email)[1] == dominio
+
+
+@pytest.mark.parametrize("email", [
+    "sinarroba.com",
+    "@ejemplo.com",
+    "usuario@",
+    "a..b@ejemplo.com",
+    ".empieza@ejemplo.com",
+    "con espacio@ejemplo.com",
+    '"sin cerrar@ejemplo.com',
+    "x" * 65 + "@ejemplo.com",
+    "usuario@localhost",
+    "usuario@1.2.3.4",
+    "usuario@-guion.com",
+    "usuario@" + "a" * 60 + "." + "b" * 60 + "." + "c" * 60 + "." + "d" * 60 + ".com",
+])
+def test_sintaxis_no_valida(email):
+    with pytest.raises(ValueError):
+        analizar_sintaxis(email)
+
+
+def test_desechables_incluye_subdominios(tmp_path):
+    extra = tmp_path / "desechables.txt"
+    extra.write_text("# lista de pruebas\ncorreo-basura.test\n", encoding="utf-8")
+    desechables = cargar_desechables(str(extra))
+    assert desechables.contiene_o_padre("mailinator.com")
+    assert desechables.contiene_o_padre("buzon.correo-basura.test")
+    assert not desechables.contiene_o_padre("gmail.com")
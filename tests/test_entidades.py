@@ -0,0 +1,80 @@
+import threading
+
+from consultas import ErrorConsulta
+from entidades import PROVEEDORES, consultar_entidad
+
+
+class _ConsultorPega:
+    """Responde con datos fijos por (proveedor, valor) y anota a quién se ha preguntado."""
+
+    def __init__(self, respuestas, apis=None):
+        self.respuestas = respuestas
+        self.apis = apis or {}
+        self.consultados = []
+        self._lock = threading.Lock()
+
+    def consultar(self, proveedor, valor):
+        with self._lock:
+            self.consultados.append(proveedor)
+        respuesta = self.respuestas[proveedor, valor]
+        if isinstance(respuesta, Exception):
+            raise respuesta
+        return respuesta
+
+
+def _proveedores(tipo, *nombres):
+    return [p for p in PROVEEDORES[tipo] if p["nombre"] in nombres]
+
+
+IP = "203.0.113.7"
+
+
+def test_fusion_con_fuente_por_campo_y_discrepancias():
+    consultor = _ConsultorPega({
+        ("ipinfo", IP): {"ip": IP, "city": "Madrid", "country": "ES", "org": "AS64500 Ejemplo", "loc": "40.4,-3.7"},
+        ("shodan", IP): {"ip_str": IP, "city": "Barcelona", "country_code": "ES", "ports": [443, 22], "isp": "Ejemplo ISP"},
+    })
+    avisos = []
+    ficha = consultar_entidad(consultor, "ip", IP, proveedores=_proveedores("ip", "ipinfo", "shodan"),
+                              al_actualizar=lambda ficha, proveedor, cambios: avisos.append(proveedor))
+    campos = ficha.campos()
+    # En un conflicto manda el proveedor preferido (ipinfo va antes que shodan)
+    assert campos["ciudad"] == ("Madrid", "ipinfo")
+    assert campos["latitud"] == (40.4, "ipinfo")
+    assert campos["puertos"] == ([22, 443], "shodan")
+    assert campos["isp"] == ("Ejemplo ISP", "shodan")
+    assert ficha.discrepancias() == {"ciudad": {"ipinfo": "Madrid", "shodan": "Barcelona"}}
+    assert ficha.completa and sorted(avisos) == ["ipinfo", "shodan"]
+    assert ficha.como_dict()["campos"]["codigo_pais"] == {"valor": "ES", "fuente": "ipinfo"}
+
+
+def test_un_proveedor_que_falla_no_impide_la_ficha():
+    consultor = _ConsultorPega({
+        ("ipinfo", IP): ErrorConsulta("Error HTTP 503"),
+        ("shodan", IP): {"ip_str": IP, "city": "Barcelona"},
+    })
+    ficha = consultar_entidad(consultor, "ip", IP, proveedores=_proveedores("ip", "ipinfo", "shodan"))
+    assert ficha.errores == {"ipinfo": "Error HTTP 503"}
+    assert ficha.campos()["ciudad"] == ("Barcelona", "shodan")
+
+
+def test_local_concluyente_evita_las_consultas_de_pago():
+    consultor = _ConsultorPega({("email_local", "no-es-un-correo"): {"formato_valido": False}})
+    ficha = consultar_entidad(consultor, "email", "no-es-un-correo",
+                              proveedores=_proveedores("email", "abstractapi_email", "dehashed", "email_local"))
+    assert consultor.consultados == ["email_local"]
+    assert sorted(ficha.omitidos) == ["abstractapi_email", "dehashed"]
+    assert ficha.completa
+
+
+def test_solo_se_pregunta_a_quien_aporta_campos_que_faltan():
+    consultor = _ConsultorPega({
+        ("ip_local", IP): {"ip": IP, "ciudad": "Madrid", "codigo_pais": "ES"},
+        ("shodan", IP): {"ip_str": IP, "ports": [80]},
+    })
+    ficha = consultar_entidad(consultor, "ip", IP, proveedores=_proveedores("ip", "ipinfo", "shodan", "ip_local"),
+                              campos=("ciudad", "puertos"))
+    # ipinfo solo podría dar la ciudad, que ya se sabe; los puertos solo los da shodan
+    assert consultor.consultados == ["ip_local", "shodan"]
+    assert ficha.omitidos == ["ipinfo"]
+    assert ficha.campos()["puertos"] == ([80], "shodan")
@@ -0,0 +1,90 @@
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from cache_respuestas import CacheRespuestas
+from consultas import Consultor
+from filtraciones import AlmacenFiltraciones
+from motor_http import MotorHTTP
+
+
+def _entrada(identificador, email, username, hash_):
+    return {"id": identificador, "email": [email], "username": [username], "hashed_password": [hash_],
+            "database_name": "Pega"}
+
+
+# Tres páginas de dos: la segunda repite una entrada de la primera y la tercera viene corta
+PAGINAS = {
+    1: [_entrada("1", "Ana@Ejemplo.test", "ana", "h1"), _entrada("2", "ana@ejemplo.test", "ana_x", "h2")],
+    2: [_entrada("2", "ana@ejemplo.test", "ana_x", "h2"), _entrada("3", "ana@ejemplo.test", "ana", "h3")],
+    3: [_entrada("4", "ana@ejemplo.test", "anita", "h1")],
+}
+
+
+class _DehashedPega(BaseAdapter):
+    def __init__(self):
+        super().__init__()
+        self.paginas = []
+
+    def send(self, request, **kwargs):
+        parametros = parse_qs(urlsplit(request.url).query)
+        pagina = int(parametros["page"][0])
+        self.paginas.append(pagina)
+        resp = requests.Response()
+        resp.status_code = 200
+        resp._content = json.dumps({"total": 4, "entries": PAGINAS.get(pagina, [])}).encode()
+        resp.request, resp.url = request, request.url
+        return resp
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def consultor():
+    motor = MotorHTTP(max_global=4, max_por_host=4)
+    adaptador = _DehashedPega()
+    motor.montar_adaptador("https://api.dehashed.com/", adaptador)
+    consultor = Consultor({"dehashed_user": "yo@ejemplo.test", "dehashed_pass": "secreto", "sin_cache": True},
+                          motor, CacheRespuestas(":memory:"), AlmacenFiltraciones(":memory:"))
+    yield consultor, adaptador
+    consultor.cerrar()
+    motor.cerrar()
+
+
+def test_paginas_perezosas_sin_duplicados(consultor):
+    consultor, adaptador = consultor
+    paginas = consultor.dehashed_paginas("ana@ejemplo.test", tamano=2)
+    assert adaptador.paginas == []
+    total, nuevas = next(paginas)
+    assert (total, [e["id"] for e in nuevas], adaptador.paginas) == (4, ["1", "2"], [1])
+    total, nuevas = next(paginas)
+    assert ([e["id"] for e in nuevas], adaptador.paginas) == (["3"], [1, 2])
+    assert [e["id"] for _, nuevas in paginas for e in nuevas] == ["4"]
+    # La tercera página viene incompleta: no se pide una cuarta
+    assert adaptador.paginas == [1, 2, 3]
+    assert consultor.filtraciones.contar() == 4
+
+
+def test_busquedas_locales_por_email_usuario_y_hash(consultor):
+    consultor, _ = consultor
+    list(consultor.dehashed_paginas("ana@ejemplo.test", tamano=2))
+    filtraciones = consultor.filtraciones
+    assert [e["id"] for e in filtraciones.buscar("email", "ANA@ejemplo.test")] == ["1", "2", "3", "4"]
+    assert [e["id"] for e in filtraciones.buscar("username", "Ana")] == ["1", "3"]
+    assert [e["id"] for e in filtraciones.buscar("hashed_password", "h1")] == ["1", "4"]
+    # Los hashes distinguen mayúsculas
+    assert filtraciones.buscar("hashed_password", "H1") == []
+    assert filtraciones.relacionados("username", "ana", por=("hashed_password",)) == {"hashed_password": {"h1": ["anita"]}}
+    with pytest.raises(ValueError):
+        filtraciones.buscar("name", "Ana")
+
+
+def test_guardar_lote_ignora_las_conocidas():
+    almacen = AlmacenFiltraciones(":memory:")
+    assert almacen.guardar_lote(PAGINAS[1]) == 2
+    assert almacen.guardar_lote(PAGINAS[2]) == 1
+    almacen.cerrar()
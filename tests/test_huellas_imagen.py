@@ -0,0 +1,116 @@
+import os
+import random
+
+import pytest
+
+from huellas_imagen import IndiceImagenes, distancia, indexar_carpeta, huellas_imagen
+
+
+class _Estado:
+    st_size = 1
+    st_mtime_ns = 1
+
+
+def _fila(ruta, huella):
+    return ruta, _Estado, {"ahash": huella, "dhash": huella, "phash": huella}
+
+
+@pytest.fixture
+def indice(tmp_path):
+    indice = IndiceImagenes(str(tmp_path / "huellas.sqlite"))
+    yield indice
+    indice.cerrar()
+
+
+@pytest.fixture
+def imagenes(tmp_path):
+    carpeta = tmp_path / "imagenes"
+    carpeta.mkdir()
+    return carpeta
+
+
+def _crear(carpeta, nombres):
+    for nombre in nombres:
+        (carpeta / nombre).write_bytes(b"")
+    return [str(carpeta / nombre) for nombre in nombres]
+
+
+def test_busqueda_multi_indice_igual_que_fuerza_bruta(indice, imagenes):
+    aleatorio = random.Random(1)
+    huellas = [aleatorio.getrandbits(64) for _ in range(2000)]
+    # Vecinas a 1..12 bits de algunas huellas, para que haya aciertos cerca del umbral
+    for i in range(0, 200, 10):
+        bits = aleatorio.sample(range(64), i // 10 % 12 + 1)
+        huellas.append(huellas[i] ^ sum(1 << b for b in bits))
+    rutas = _crear(imagenes, [f"{i}.jpg" for i in range(len(huellas))])
+    indice.guardar_varias([_fila(r, h) for r, h in zip(rutas, huellas)])
+
+    for umbral in (4, 10, 12):
+        for consulta in huellas[:200:10]:
+            esperado = sorted((distancia(consulta, h), r) for r, h in zip(rutas, huellas) if distancia(consulta, h) <= umbral)
+            assert indice.buscar(consulta, umbral) == esperado
+
+
+def test_reindexar_sustituye_la_huella(indice, imagenes):
+    (ruta,) = _crear(imagenes, ["a.jpg"])
+    indice.guardar_varias([_fila(ruta, 0)])
+    assert indice.buscar(0, 0) == [(0, ruta)]
+    indice.guardar_varias([_fila(ruta, 2 ** 64 - 1)])
+    assert indice.buscar(0, 0) == []
+    assert indice.buscar(2 ** 64 - 1, 0) == [(0, ruta)]
+    assert len(indice) == 1
+
+
+def test_las_rutas_que_ya_no_existen_no_se_devuelven(indice, tmp_path, imagenes):
+    a, b = _crear(imagenes, ["a.jpg", "b.jpg"])
+    indice.guardar_varias([_fila(a, 5), _fila(b, 7)])
+    os.remove(b)
+    assert indice.buscar(5, 3) == [(0, a)]
+    assert len(indice) == 1
+    # También desaparecen de la base, no solo de la memoria
+    reabierto = IndiceImagenes(str(tmp_path / "huellas.sqlite"))
+    assert len(reabierto) == 1
+    reabierto.cerrar()
+
+
+def test_podar_solo_toca_la_carpeta(indice, tmp_path, imagenes):
+    otra = tmp_path / "imagenes_2"
+    otra.mkdir()
+    a, b = _crear(imagenes, ["a.jpg", "b.jpg"])
+    (c,) = _crear(otra, ["c.jpg"])
+    indice.guardar_varias([_fila(a, 1), _fila(b, 2), _fila(c, 3)])
+
+    assert indice.podar(str(imagenes), {a}) == 1
+    assert indice.buscar(0, 2) == [(1, a), (2, c)]
+
+
+def test_duplicados_agrupa_por_componentes(indice, imagenes):
+    rutas = _crear(imagenes, ["0.jpg", "1.jpg", "2.jpg", "3.jpg", "4.jpg"])
+    # 0-1 y 0-2 a 1 bit, 3 a 2 bits de 0; 4 lejos de todas
+    indice.guardar_varias([_fila(r, h) for r, h in zip(rutas, [5, 7, 2 ** 63 + 5, 6, 2 ** 64 - 1])])
+    assert indice.duplicados(2) == [rutas[:4]]
+
+
+def test_indexar_y_buscar_imagenes(indice, imagenes):
+    pytest.importorskip("numpy")
+    Image = pytest.importorskip("PIL.Image")
+    aleatorio = random.Random(2)
+    for i in range(5):
+        original = Image.new("L", (40, 30))
+        original.putdata([aleatorio.randrange(256) for _ in range(40 * 30)])
+        original = original.resize((400, 300))
+        original.save(imagenes / f"{i}.png")
+        if i == 0:
+            original.resize((200, 150)).convert("RGB").save(imagenes / "copia.jpg", quality=70)
+    (imagenes / "rota.jpg").write_bytes(b"no es una imagen")
+
+    resultados = {os.path.basename(r): (error, previa) for r, error, previa in indexar_carpeta(str(imagenes), indice, 1)}
+    assert len(resultados) == 7 and resultados["rota.jpg"][0]
+    parecidas = [os.path.basename(r) for _, r in indice.buscar(huellas_imagen(str(imagenes / "copia.jpg"))["phash"])]
+    assert parecidas == ["0.png", "copia.jpg"] or parecidas == ["copia.jpg", "0.png"]
+
+    # Segunda pasada: nada se recalcula y lo borrado sale del índice
+    os.remove(imagenes / "1.png")
+    resultados = list(indexar_carpeta(str(imagenes), indice, 1))
+    assert all(previa for _, error, previa in resultados if not error)
+    assert len(indice) == 5
@@ -0,0 +1,76 @@
+import sqlite3
+from contextlib import contextmanager
+
+import pytest
+
+from investigaciones import AlmacenInvestigaciones, comprobar_vigiladas, describir_diferencias
+
+IP = "203.0.113.7"
+
+
+def test_guardar_y_recargar_una_investigacion(tmp_path):
+    ruta = str(tmp_path / "investigaciones.sqlite")
+    almacen = AlmacenInvestigaciones(ruta)
+    primero, cambios = almacen.registrar("ip", IP, "shodan", {"org": "Ejemplo", "ports": [80, 443]}, hora=100)
+    assert cambios is None
+    # Un resultado idéntico solo anota la comprobación, sin repetir los datos
+    _, cambios = almacen.registrar("ip", IP, "shodan", {"ports": [80, 443], "org": "Ejemplo"}, hora=200)
+    assert cambios == {}
+    # La misma lista en otro orden tampoco es un cambio
+    _, cambios = almacen.registrar("ip", IP, "shodan", {"org": "Ejemplo", "ports": [443, 80]}, hora=250)
+    assert cambios == {}
+    _, cambios = almacen.registrar("ip", IP, "shodan", {"org": "Otra", "ports": [443, 8080]}, hora=300)
+    assert cambios == {"añadidos": {"ports[8080]": True}, "eliminados": {"ports[80]": True},
+                       "cambiados": {"org": ("Ejemplo", "Otra")}}
+    assert describir_diferencias(cambios) == ["+ ports[8080]", "- ports[80]", "~ org: Ejemplo -> Otra"]
+    almacen.cerrar()
+
+    almacen = AlmacenInvestigaciones(ruta)
+    historial = almacen.historial(IP)
+    assert [(h["hora"], h["sin_cambios"]) for h in historial] == [(300, False), (250, False), (200, True), (100, False)]
+    # Una comprobación sin cambios devuelve los datos de la versión que repite
+    assert almacen.datos(historial[2]["id"]) == {"org": "Ejemplo", "ports": [80, 443]}
+    assert [fila[0] for fila in almacen.buscar("Otra 8080")] == [historial[0]["id"]]
+    assert [fila[0] for fila in almacen.buscar("ejemplo")] == [historial[1]["id"], primero]
+    almacen.cerrar()
+
+
+def test_el_historico_es_de_solo_insercion(tmp_path):
+    ruta = str(tmp_path / "inv.sqlite")
+    almacen = AlmacenInvestigaciones(ruta)
+    almacen.registrar("ip", IP, "ipinfo", {"city": "Madrid"})
+    almacen.cerrar()
+    con = sqlite3.connect(ruta)
+    for sentencia in ("DELETE FROM resultados", "UPDATE resultados SET datos = NULL"):
+        with pytest.raises(sqlite3.DatabaseError):
+            con.execute(sentencia)
+    con.close()
+
+
+class _ConsultorPega:
+    def __init__(self, respuestas):
+        self.apis = {}
+        self.respuestas = respuestas
+
+    @contextmanager
+    def revalidando(self):
+        yield {"peticiones": 0, "no_modificadas": 0}
+
+    def consultar(self, proveedor, entidad):
+        return self.respuestas.pop(0)
+
+
+def test_vigilancia_solo_comprueba_lo_vencido(tmp_path):
+    almacen = AlmacenInvestigaciones(str(tmp_path / "inv.sqlite"))
+    almacen.vigilar("dominio", "Ejemplo.test", intervalo=3600)
+    assert almacen.vencidas() == [("dominio", "ejemplo.test")]
+    consultor = _ConsultorPega([{"campos": {"registrador": "A"}}, {"campos": {"registrador": "B"}}])
+    eventos = comprobar_vigiladas(almacen, consultor)
+    assert [(e["proveedor"], e["resultado"]) for e in eventos] == [("whois", "nueva")]
+    assert almacen.vencidas() == []
+    eventos = comprobar_vigiladas(almacen, consultor, todas=True)
+    assert eventos[0]["resultado"] == "cambios"
+    assert eventos[0]["diferencias"]["cambiados"] == {"registrador": ("A", "B")}
+    almacen.dejar_de_vigilar("dominio", "ejemplo.test")
+    assert almacen.vigiladas() == []
+    almacen.cerrar()
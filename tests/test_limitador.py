@@ -0,0 +1,78 @@
+import pytest
+
+import limitador
+from limitador import CuboTokens, Limitador
+
+
+class _Reloj:
+    """Sustituye al módulo time dentro de limitador: el tiempo solo avanza a mano."""
+
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def monotonic(self):
+        return self.ahora
+
+    def time(self):
+        return self.ahora
+
+
+class _Respuesta:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = _Reloj()
+    monkeypatch.setattr(limitador, "time", reloj)
+    return reloj
+
+
+def test_rafaga_y_recarga(reloj):
+    cubo = CuboTokens(10, 3)
+    assert [cubo.reservar() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Sin tokens, cada reserva espera un intervalo más que la anterior
+    assert cubo.reservar() == pytest.approx(0.1)
+    assert cubo.reservar() == pytest.approx(0.2)
+    reloj.ahora += 1.0
+    # En un segundo se recuperan 10 tokens, pero la ráfaga tope es 3
+    assert [cubo.reservar() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert cubo.reservar() > 0
+
+
+def test_ritmo_no_positivo_se_rechaza():
+    with pytest.raises(ValueError):
+        Limitador({"shodan": (0, 1)})
+    with pytest.raises(ValueError):
+        Limitador({"shodan": {"rps": -2}})
+    with pytest.raises(ValueError):
+        Limitador().configurar({"shodan": [1, 0]})
+
+
+def test_turno_ponderado_por_cuota_restante(reloj):
+    limites = Limitador()
+    limites.registrar("shodan", "holgada", _Respuesta(headers={"X-RateLimit-Remaining": "100", "X-RateLimit-Limit": "100"}))
+    limites.registrar("shodan", "justa", _Respuesta(headers={"X-RateLimit-Remaining": "25", "X-RateLimit-Limit": "100"}))
+    elegidas = [limites.elegir_clave("shodan", ["holgada", "justa"]) for _ in range(100)]
+    # Peso 1 frente a 0.25: cuatro veces más turnos para la que tiene más cuota
+    assert elegidas.count("holgada") == 80 and elegidas.count("justa") == 20
+
+
+def test_429_enfria_la_clave_hasta_retry_after(reloj):
+    limites = Limitador()
+    claves = ["a", "b"]
+    limites.registrar("shodan", "a", _Respuesta(429, {"Retry-After": "5"}))
+    assert {limites.elegir_clave("shodan", claves) for _ in range(4)} == {"b"}
+    assert limites.alternativa("shodan", "b") is None
+    assert limites.resumen_cuotas()["shodan", "…a"]["enfriada"] == pytest.approx(5)
+    reloj.ahora += 6
+    assert limites.alternativa("shodan", "b") == "a"
+
+
+def test_todas_enfriadas_elige_la_que_termina_antes(reloj):
+    limites = Limitador()
+    limites.registrar("shodan", "a", _Respuesta(429, {"Retry-After": "30"}))
+    limites.registrar("shodan", "b", _Respuesta(429, {"Retry-After": "10"}))
+    assert limites.elegir_clave("shodan", ["a", "b"]) == "b"
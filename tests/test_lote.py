@@ -0,0 +1,56 @@
+import json
+
+from lote import Checkpoint, leer_entradas, procesar_lote
+from rangos_ip import expandir_entradas
+
+
+class _ConsultorFalso:
+    """Responde al instante con la propia IP; sin endpoint por lotes."""
+
+    def tamano_lote(self, proveedor):
+        return 0
+
+    def consultar(self, proveedor, dato):
+        return {"ip": dato}
+
+
+def _entradas(lineas, desde=0):
+    return expandir_entradas(leer_entradas(lineas, desde))
+
+
+def test_cidr_a_medias_no_avanza_la_marca_de_agua(tmp_path):
+    ruta = str(tmp_path / "salida.checkpoint")
+    lineas = ["10.0.0.0/28\n", "192.0.2.1\n"]
+    checkpoint = Checkpoint(ruta)
+    lotes = procesar_lote(_entradas(lineas), _ConsultorFalso(), "ip", ["ipinfo"], concurrencia=1, checkpoint=checkpoint)
+    vistas = []
+    for registros in lotes:
+        # La marca de agua la fija el lote anterior, ya escrito
+        assert checkpoint.linea == 0
+        vistas.extend(r["entrada"] for r in registros)
+        if len(vistas) >= 8:
+            break
+    lotes.close()
+    with open(ruta, encoding="utf-8") as f:
+        assert json.load(f)["linea"] == 0
+
+    # Al reanudar se repite el CIDR entero: no se pierde ninguna de sus IPs
+    reanudado = Checkpoint(ruta)
+    desde = reanudado.cargar()
+    resto = [r["entrada"] for registros in procesar_lote(_entradas(lineas, desde), _ConsultorFalso(), "ip", ["ipinfo"],
+                                                           concurrencia=1, checkpoint=reanudado)
+             for r in registros]
+    assert sorted(resto) == sorted([f"10.0.0.{i}" for i in range(16)] + ["192.0.2.1"])
+    assert reanudado.linea == 2
+
+
+def test_la_linea_termina_al_leer_la_siguiente():
+    checkpoint = Checkpoint(None)
+    checkpoint.iniciar(1, 1)
+    checkpoint.terminar(1)
+    assert checkpoint.linea == 0
+    checkpoint.iniciar(2, 1)
+    checkpoint.terminar(2)
+    assert checkpoint.linea == 1
+    checkpoint.agotar()
+    assert checkpoint.linea == 2
@@ -0,0 +1,83 @@
+import hashlib
+import struct
+
+import pytest
+
+from metadatos import CacheMetadatos, ErrorMetadatos, escanear_carpeta, leer_con_cache, leer_metadatos, TAG_EXIF, TAG_GPS
+
+
+def _tiff(entradas):
+    """TIFF little-endian con un único IFD: entradas = [(tag, tipo, cuenta, valor de 4 bytes)]."""
+    ifd = struct.pack("<H", len(entradas))
+    for tag, tipo, cuenta, valor in entradas:
+        ifd += struct.pack("<HHI", tag, tipo, cuenta) + valor
+    return b"II*\0" + struct.pack("<I", 8) + ifd + struct.pack("<I", 0)
+
+
+def _ascii(texto):
+    return texto.encode("ascii") + b"\0"
+
+
+def test_tiff_con_marca_y_modelo(tmp_path):
+    # Make (0x010F) cabe en los 4 bytes del valor; Model (0x0110) va tras el IFD
+    modelo = _ascii("Pruebas")
+    offset_modelo = 8 + 2 + 2 * 12 + 4
+    ruta = tmp_path / "bien.tif"
+    ruta.write_bytes(_tiff([(0x010F, 2, 4, _ascii("Cam")), (0x0110, 2, len(modelo), struct.pack("<I", offset_modelo))]) + modelo)
+
+    registro = leer_metadatos(ruta)
+    assert registro["formato"] == "tiff"
+    assert (registro["marca"], registro["modelo"]) == ("Cam", "Pruebas")
+
+
+@pytest.mark.parametrize("tag", [TAG_EXIF, TAG_GPS])
+def test_puntero_con_cuenta_cero_no_rompe(tmp_path, tag):
+    ruta = tmp_path / "puntero.tif"
+    ruta.write_bytes(_tiff([(tag, 4, 0, b"\0\0\0\0")]))
+
+    registro = leer_metadatos(ruta)
+    assert registro["formato"] == "tiff" and registro["tamano"] == 26
+    assert registro["etiquetas"] == {} and registro["gps"] is None
+
+
+@pytest.mark.parametrize("contenido", [
+    _tiff([(0x010F, 2, 64, struct.pack("<I", 0xFFFF))])[:20],           # TIFF truncado a mitad del IFD
+    b"\xff\xd8\xff\xe1\x00\x40Exif\0\0II*\0",                           # APP1 que promete más de lo que hay
+    b"\0\0\0\x18ftypheic\0\0\0\0mif1heic" + b"\0\0\0\x0cmeta\0\0\0\0",  # HEIF con meta vacía
+    b"\0\0\0\x18ftypheic\0\0\0\0mif1heic" + b"\0\0\0\x14meta\0\0\0\0\0\0\0\x08iloc",  # iloc sin contenido
+])
+def test_ficheros_corruptos_solo_dan_error_metadatos(tmp_path, contenido):
+    # Puede leerse (vacío) o dar ErrorMetadatos, pero nunca IndexError ni struct.error
+    ruta = tmp_path / "corrupto.bin"
+    ruta.write_bytes(contenido)
+    try:
+        leer_metadatos(ruta)
+    except ErrorMetadatos:
+        pass
+
+
+def test_un_fichero_corrupto_no_para_la_carpeta(tmp_path):
+    (tmp_path / "roto.jpg").write_bytes(b"\xff\xd8\xff\xe1\x00\x40Exif\0\0II*\0")
+    (tmp_path / "puntero.tif").write_bytes(_tiff([(TAG_EXIF, 4, 0, b"\0\0\0\0")]))
+    (tmp_path / "bien.tif").write_bytes(_tiff([(0x010F, 2, 4, _ascii("Cam"))]))
+
+    registros = {r["ruta"].rsplit("/", 1)[-1]: r for r, _ in escanear_carpeta(str(tmp_path), procesos=1)}
+    assert set(registros) == {"roto.jpg", "puntero.tif", "bien.tif"}
+    assert "error" in registros["roto.jpg"]
+    assert "error" not in registros["puntero.tif"]
+    assert registros["bien.tif"]["marca"] == "Cam"
+
+
+def test_hash_solo_si_se_pide(tmp_path):
+    ruta = tmp_path / "bien.tif"
+    ruta.write_bytes(_tiff([(0x010F, 2, 4, _ascii("Cam"))]))
+    cache = CacheMetadatos(str(tmp_path / "cache.sqlite"))
+    try:
+        registro, desde_cache = leer_con_cache(ruta, cache)
+        assert registro["hash"] is None and not desde_cache
+        # El registro cacheado sin hash no sirve cuando se pide para evidencias
+        registro, desde_cache = leer_con_cache(ruta, cache, calcular_hash=True)
+        assert registro["hash"] == hashlib.sha256(ruta.read_bytes()).hexdigest() and not desde_cache
+        assert leer_con_cache(ruta, cache)[1] and leer_con_cache(ruta, cache, calcular_hash=True)[1]
+    finally:
+        cache.cerrar()
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from metricas import Histograma, Metricas
+
+
+@pytest.fixture
+def metricas():
+    metricas = Metricas()
+    metricas.incrementar("peticiones", proveedor="shodan", resultado="http_2xx")
+    metricas.incrementar("peticiones", 2, proveedor="shodan", resultado="http_2xx")
+    metricas.incrementar("peticiones", proveedor='raro"host', resultado="timeout")
+    metricas.sumar("en_vuelo", 3, proveedor="shodan")
+    metricas.sumar("en_vuelo", -1, proveedor="shodan")
+    for segundos in (0.004, 0.02, 0.02, 0.3, 40):
+        metricas.observar("duracion_segundos", segundos, proveedor="shodan", fase="total")
+    return metricas
+
+
+def test_formato_prometheus(metricas):
+    lineas = metricas.a_prometheus().splitlines()
+    assert "# TYPE wicosintx_peticiones_total counter" in lineas
+    assert 'wicosintx_peticiones_total{proveedor="shodan",resultado="http_2xx"} 3' in lineas
+    # Las comillas de las etiquetas se escapan
+    assert 'wicosintx_peticiones_total{proveedor="raro\\"host",resultado="timeout"} 1' in lineas
+    assert "# TYPE wicosintx_en_vuelo gauge" in lineas
+    assert 'wicosintx_en_vuelo{proveedor="shodan"} 2' in lineas
+    assert "# TYPE wicosintx_duracion_segundos histogram" in lineas
+    cubetas = [l for l in lineas if l.startswith("wicosintx_duracion_segundos_bucket")]
+    # Cubetas acumuladas y terminadas en +Inf
+    assert cubetas[0] == 'wicosintx_duracion_segundos_bucket{fase="total",proveedor="shodan",le="0.005"} 1'
+    assert cubetas[2] == 'wicosintx_duracion_segundos_bucket{fase="total",proveedor="shodan",le="0.025"} 3'
+    assert cubetas[-1] == 'wicosintx_duracion_segundos_bucket{fase="total",proveedor="shodan",le="+Inf"} 5'
+    assert 'wicosintx_duracion_segundos_count{fase="total",proveedor="shodan"} 5' in lineas
+    assert all(l.startswith("# HELP ") for l in lineas if l.startswith("# ") and not l.startswith("# TYPE "))
+
+
+def test_exportar_json_y_texto(metricas, tmp_path):
+    ruta = tmp_path / "metricas.json"
+    metricas.exportar(str(ruta))
+    datos = json.loads(ruta.read_text(encoding="utf-8"))
+    assert {"fecha", "desde", "contadores", "gauges", "histogramas"} <= set(datos)
+    [duracion] = datos["histogramas"]["duracion_segundos"]
+    assert duracion["etiquetas"] == {"fase": "total", "proveedor": "shodan"}
+    assert duracion["cuenta"] == 5 and duracion["cubetas"]["+Inf"] == 1
+    # Los percentiles se interpolan dentro de la cubeta que los contiene
+    assert 0.01 < duracion["p50"] <= 0.025 and duracion["p99"] > 10
+    texto = tmp_path / "metricas.prom"
+    metricas.exportar(str(texto))
+    assert texto.read_text(encoding="utf-8") == metricas.a_prometheus()
+
+
+def test_percentiles_del_histograma():
+    histograma = Histograma(cubetas=(1.0, 2.0))
+    assert histograma.percentil(95) is None and histograma.media is None
+    for valor in (0.5, 1.5, 1.5, 1.5):
+        histograma.observar(valor)
+    assert histograma.percentil(25) == pytest.approx(1.0)
+    assert histograma.percentil(100) == pytest.approx(2.0)
+    assert histograma.media == pytest.approx(1.25)
+
+
+def test_limpiar_conserva_los_gauges(metricas):
+    metricas.limpiar()
+    assert metricas.series("peticiones") == [] and metricas.series("duracion_segundos") == []
+    assert metricas.series("en_vuelo") == [({"proveedor": "shodan"}, 2)]
@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from motor_http import MotorHTTP
+
+
+class _AdaptadorPega(BaseAdapter):
+    """Transporte de pega: cuenta las peticiones que salen y las retiene hasta soltar()."""
+
+    def __init__(self, fallo=None):
+        super().__init__()
+        self.enviadas = []
+        self.fallo = fallo
+        self._soltar = threading.Event()
+        self._lock = threading.Lock()
+
+    def soltar(self):
+        self._soltar.set()
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.enviadas.append(request.method)
+        self._soltar.wait(5)
+        if self.fallo:
+            raise self.fallo
+        resp = requests.Response()
+        resp.status_code = 200
+        resp._content = b'{"ok": true}'
+        resp.request, resp.url = request, request.url
+        return resp
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def motor():
+    motor = MotorHTTP(max_global=8, max_por_host=8)
+    yield motor
+    motor.cerrar()
+
+
+def _montar(motor, adaptador):
+    motor.montar_adaptador("http://pega.test/", adaptador)
+    return adaptador
+
+
+def test_get_identicos_simultaneos_salen_una_vez(motor):
+    adaptador = _montar(motor, _AdaptadorPega())
+    futuros = [motor.solicitar("GET", "http://pega.test/recurso") for _ in range(20)]
+    assert motor.peticiones_en_vuelo == 1
+    adaptador.soltar()
+    respuestas = [f.result(timeout=5) for f in futuros]
+    assert adaptador.enviadas == ["GET"]
+    assert all(r.json() == {"ok": True} for r in respuestas)
+    assert motor.peticiones_en_vuelo == 0
+
+
+def test_la_excepcion_llega_a_todos_los_que_esperan(motor):
+    adaptador = _montar(motor, _AdaptadorPega(fallo=requests.exceptions.ConnectionError("conexión rechazada")))
+    futuros = [motor.solicitar("GET", "http://pega.test/cae") for _ in range(5)]
+    adaptador.soltar()
+    for futuro in futuros:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            futuro.result(timeout=5)
+    assert adaptador.enviadas == ["GET"]
+
+
+def test_cancelar_un_llamador_no_cancela_a_los_demas(motor):
+    adaptador = _montar(motor, _AdaptadorPega())
+    primero, segundo = (motor.solicitar("GET", "http://pega.test/recurso") for _ in range(2))
+    primero.cancel()
+    adaptador.soltar()
+    assert segundo.result(timeout=5).status_code == 200
+
+
+def test_metodos_no_idempotentes_nunca_se_agrupan(motor):
+    adaptador = _montar(motor, _AdaptadorPega())
+    futuros = [motor.solicitar(metodo, "http://pega.test/recurso", json={"a": 1})
+               for metodo in ("POST", "POST", "PUT", "DELETE")]
+    adaptador.soltar()
+    for futuro in futuros:
+        futuro.result(timeout=5)
+    assert sorted(adaptador.enviadas) == ["DELETE", "POST", "POST", "PUT"]
@@ -0,0 +1,80 @@
+import json
+import threading
+
+from consultas import ErrorConsulta
+from pivotes import detectar_tipo, expandir
+
+
+class _ConsultorPega:
+    def __init__(self, respuestas, apis=None):
+        self.respuestas = respuestas
+        self.apis = apis or {}
+        self.consultados = []
+        self._lock = threading.Lock()
+
+    def consultar(self, proveedor, valor):
+        with self._lock:
+            self.consultados.append((proveedor, valor))
+        respuesta = self.respuestas.get((proveedor, valor), {})
+        if isinstance(respuesta, Exception):
+            raise respuesta
+        return respuesta
+
+
+IP = "203.0.113.7"
+RESPUESTAS = {
+    ("ipinfo", IP): {"hostname": "web.ejemplo.test"},
+    ("shodan", IP): {"hostnames": ["web.ejemplo.test"], "domains": ["ejemplo.test"]},
+    ("whois", "ejemplo.test"): {"campos": {"emails": ["admin@ejemplo.test", "abuse@registrador.test"],
+                                           "servidores_nombre": ["ns1.registrador.test"]}},
+    ("whois", "web.ejemplo.test"): ErrorConsulta("Sin servidor WHOIS"),
+}
+
+
+def test_detectar_tipo():
+    assert [detectar_tipo(v) for v in (IP, "a@b.test", "+34 600 000 000", "ejemplo.test", "ana_x")] == \
+        ["ip", "email", "telefono", "dominio", "usuario"]
+
+
+def test_expansion_en_anchura_con_tope_de_profundidad():
+    consultor = _ConsultorPega(RESPUESTAS, apis={"shodan": "k"})
+    eventos = []
+    grafo = expandir(consultor, IP, max_profundidad=2, concurrencia=1, al_avanzar=eventos.append)
+
+    valores = dict(zip(grafo.valores, grafo.profundidad))
+    assert valores == {IP: 0, "web.ejemplo.test": 1, "ejemplo.test": 1, "admin@ejemplo.test": 2,
+                       "abuse@registrador.test": 2, "ns1.registrador.test": 2}
+    # Cada entidad se consulta una sola vez aunque la descubran dos proveedores, y lo que
+    # queda a profundidad 2 no se expande
+    assert sorted(consultor.consultados) == [("ipinfo", IP), ("shodan", IP), ("whois", "ejemplo.test"),
+                                             ("whois", "web.ejemplo.test")]
+    ip, web = grafo.buscar("ip", IP), grafo.buscar("dominio", "WEB.ejemplo.test.")
+    assert grafo.vecinos(ip) == sorted([web, grafo.buscar("dominio", "ejemplo.test")])
+    aristas = {(a["origen"], a["destino"], a["relacion"]): a["fuente"] for a in grafo.como_dict()["aristas"]}
+    assert aristas[ip, web, "hostname"] == "ipinfo"
+    assert [e["error"] for e in eventos if e["error"]] == ["Sin servidor WHOIS"]
+    assert grafo.peticiones == 4 and grafo.sin_explorar == 0
+
+
+def test_presupuesto_de_peticiones_y_exportacion(tmp_path):
+    consultor = _ConsultorPega(RESPUESTAS, apis={"shodan": "k"})
+    grafo = expandir(consultor, IP, max_profundidad=3, max_peticiones=2, concurrencia=1)
+    assert len(consultor.consultados) == 2 and grafo.sin_explorar == 2
+
+    ruta = tmp_path / "grafo.json"
+    grafo.exportar(str(ruta))
+    datos = json.loads(ruta.read_text(encoding="utf-8"))
+    assert len(datos["nodos"]) == len(grafo) and len(datos["aristas"]) == grafo.num_aristas
+    graphml = tmp_path / "grafo.graphml"
+    grafo.exportar(str(graphml))
+    assert graphml.read_text(encoding="utf-8").count("<node ") == len(grafo)
+
+
+def test_dominio_del_email_sin_consultar_nada():
+    consultor = _ConsultorPega({})
+    grafo = expandir(consultor, "ana@empresa.test", max_profundidad=1)
+    assert grafo.buscar("dominio", "empresa.test") is not None
+    # Sin clave de Dehashed el email no tiene proveedores
+    assert consultor.consultados == []
+    grafo = expandir(_ConsultorPega({}), "ana@gmail.com", max_profundidad=1)
+    assert len(grafo) == 1
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from lote import procesar_lote
+from planificador import (CANCELADO, INTERACTIVA, MASIVA, NORMAL, TERMINADO, Planificador, comprobar_cancelacion)
+
+
+def test_prioridad_y_orden_de_llegada():
+    planificador = Planificador(trabajadores=1, reservados=0)
+    empezado, soltar = threading.Event(), threading.Event()
+    orden = []
+    planificador.enviar("bloqueo", lambda: empezado.set() or soltar.wait())
+    assert empezado.wait(5)
+    for nombre, prioridad in (("masiva", MASIVA), ("normal-1", NORMAL), ("interactiva", INTERACTIVA), ("normal-2", NORMAL)):
+        planificador.enviar(nombre, orden.append, nombre, prioridad=prioridad)
+    soltar.set()
+    assert planificador.esperar(5)
+    assert orden == ["interactiva", "normal-1", "normal-2", "masiva"]
+    planificador.cerrar()
+
+
+def test_el_reservado_atiende_lo_interactivo_con_los_demas_ocupados():
+    planificador = Planificador(trabajadores=2, reservados=1)
+    soltar = threading.Event()
+    planificador.enviar("largo", soltar.wait, prioridad=MASIVA)
+    planificador.enviar("otro largo", soltar.wait, prioridad=MASIVA)
+    hecho = threading.Event()
+    planificador.enviar("consulta", hecho.set, prioridad=INTERACTIVA)
+    assert hecho.wait(5)
+    soltar.set()
+    planificador.cerrar()
+
+
+def test_cancelar_en_cola_y_en_curso():
+    planificador = Planificador(trabajadores=1, reservados=0)
+    empezado = threading.Event()
+    ejecutados = []
+
+    def largo():
+        empezado.set()
+        while True:
+            comprobar_cancelacion()
+            time.sleep(0.01)
+
+    en_curso = planificador.enviar("largo", largo)
+    empezado.wait(5)
+    en_cola = planificador.enviar("esperando", ejecutados.append, 1)
+    assert planificador.cancelar(en_cola.id)
+    assert planificador.cancelar(en_curso.id)
+    assert planificador.esperar(5)
+    assert (en_curso.estado, en_cola.estado, ejecutados) == (CANCELADO, CANCELADO, [])
+    assert not planificador.cancelar(en_cola.id)
+    planificador.cerrar()
+
+
+def test_los_hilos_no_crecen_con_los_trabajos():
+    antes = threading.active_count()
+    planificador = Planificador(trabajadores=3, reservados=1)
+    trabajos = [planificador.enviar(f"t{i}", time.sleep, 0.001) for i in range(100)]
+    assert threading.active_count() - antes == 3
+    assert planificador.esperar(5)
+    assert {t.estado for t in trabajos} == {TERMINADO}
+    planificador.cerrar()
+
+
+class _ConsultorHilos:
+    def __init__(self):
+        self.hilos = set()
+
+    def tamano_lote(self, proveedor):
+        return 0
+
+    def consultar(self, proveedor, dato):
+        self.hilos.add(threading.current_thread().name)
+        time.sleep(0.005)
+        return {}
+
+
+def test_barrido_de_rango_usa_un_pool_fijo():
+    from wicosintxx import CONCURRENCIA_RANGO
+    consultor = _ConsultorHilos()
+    entradas = ((1, f"10.0.0.{i}") for i in range(64))
+    list(procesar_lote(entradas, consultor, "ip", ["ipinfo"], concurrencia=CONCURRENCIA_RANGO))
+    assert 1 <= len(consultor.hilos) <= CONCURRENCIA_RANGO
@@ -0,0 +1,23 @@
+import pytest
+
+from telefonos import clasificar
+
+
+@pytest.mark.parametrize("numero", ["+247 4000", "+800 1234 5678", "+870 773 111 632", "+882 1234 5678", "+979 123 456 789"])
+def test_prefijo_fuera_de_las_tablas_queda_sin_decidir(numero):
+    resultado = clasificar(numero)
+    assert resultado["valido"] is None
+    assert resultado["numero_internacional"] == "+" + "".join(c for c in numero if c.isdigit())
+
+
+@pytest.mark.parametrize("numero, pais", [("+61 1800 123 456", "AU"), ("+972 1800 123 456", "IL")])
+def test_gratuito_con_otra_longitud_no_se_descarta(numero, pais):
+    resultado = clasificar(numero)
+    assert resultado["valido"] is None
+    assert (resultado["codigo_pais"], resultado["tipo_linea"]) == (pais, "gratuito")
+
+
+def test_longitud_y_rango_imposibles_se_descartan():
+    assert clasificar("+34 61234")["valido"] is False
+    assert clasificar("+1 055 555 1234")["valido"] is False
+    assert clasificar("+34 612 345 678")["valido"] is True
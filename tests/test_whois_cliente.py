@@ -0,0 +1,126 @@
+import socketserver
+import threading
+import time
+
+import pytest
+
+from whois_cliente import ClienteWhois, ErrorWhois
+
+# Tres servidores WHOIS de pega en el mismo puerto y distintas direcciones de loopback:
+# IANA (127.0.0.1), el registro del TLD (127.0.0.2) y el registrador (127.0.0.3).
+IANA, REGISTRO, REGISTRADOR = "127.0.0.1", "127.0.0.2", "127.0.0.3"
+
+RESPUESTAS = {
+    IANA: {
+        "test": "% IANA WHOIS server\ndomain:       TEST\nrefer:        127.0.0.2\n",
+        "vacio": "% IANA WHOIS server\ndomain:       VACIO\n",
+    },
+    REGISTRO: {
+        "ejemplo.test": (
+            "Domain Name: EJEMPLO.TEST\n"
+            "Registrar WHOIS Server: 127.0.0.3\n"
+            "Registrar: Registro de Pruebas S.L.\n"
+            "Creation Date: 2001-02-03T04:05:06Z\n"
+            "Registry Expiry Date: 2030-02-03T04:05:06Z\n"
+            "Domain Status: clientTransferProhibited https://icann.org/epp#clientTransferProhibited\n"
+            "Name Server: NS1.EJEMPLO.TEST\n"
+            "Name Server: NS2.EJEMPLO.TEST\n"
+            ">>> Last update of whois database: 2026-01-01T00:00:00Z <<<\n"
+        ),
+    },
+    REGISTRADOR: {
+        "ejemplo.test": (
+            "Domain Name: ejemplo.test\n"
+            "Registrant Organization: Ejemplo S.A.\n"
+            "Registrant Country: ES\n"
+            "Registrant Email: abuse@ejemplo.test\n"
+            "Name Server: ns1.ejemplo.test\n"
+        ),
+    },
+}
+
+
+class _Manejador(socketserver.StreamRequestHandler):
+    def handle(self):
+        consulta = self.rfile.readline().decode("ascii").strip()
+        servidor = self.server.server_address[0]
+        self.server.consultas.append(consulta)
+        time.sleep(self.server.retardo)
+        self.wfile.write(RESPUESTAS[servidor].get(consulta, "No match\n").encode("utf-8"))
+
+
+class _Servidor(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, direccion):
+        super().__init__(direccion, _Manejador)
+        self.consultas = []
+        self.retardo = 0
+
+
+@pytest.fixture
+def servidores():
+    primero = _Servidor((IANA, 0))
+    puerto = primero.server_address[1]
+    try:
+        resto = [_Servidor((direccion, puerto)) for direccion in (REGISTRO, REGISTRADOR)]
+    except OSError as e:
+        primero.server_close()
+        pytest.skip(f"No se pueden abrir varias direcciones de loopback: {e}")
+    todos = {s.server_address[0]: s for s in [primero, *resto]}
+    for servidor in todos.values():
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield puerto, todos
+    for servidor in todos.values():
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def _cliente(puerto):
+    return ClienteWhois(timeout=5, ruta_servidores="", puerto=puerto, servidor_iana=IANA)
+
+
+def test_sigue_referencias_y_combina_campos(servidores):
+    puerto, todos = servidores
+    resultado = _cliente(puerto).consultar("Ejemplo.Test.")
+
+    assert resultado["dominio"] == "ejemplo.test"
+    assert resultado["servidores"] == [REGISTRO, REGISTRADOR]
+    campos = resultado["campos"]
+    assert campos["registrador"] == "Registro de Pruebas S.L."
+    assert campos["creado"] == "2001-02-03T04:05:06Z"
+    assert campos["expira"] == "2030-02-03T04:05:06Z"
+    assert campos["registrante"] == "Ejemplo S.A."
+    assert campos["pais"] == "ES"
+    assert campos["estados"] == ["clientTransferProhibited"]
+    # El registrador sustituye la lista del registro
+    assert campos["servidores_nombre"] == ["ns1.ejemplo.test"]
+    assert campos["emails"] == ["abuse@ejemplo.test"]
+    assert todos[IANA].consultas == ["test"]
+
+
+def test_tld_sin_servidor_en_iana(servidores):
+    puerto, _ = servidores
+    with pytest.raises(ErrorWhois):
+        _cliente(puerto).consultar("algo.vacio")
+
+
+def test_una_sola_consulta_a_iana_por_tld(servidores):
+    puerto, todos = servidores
+    todos[IANA].retardo = 0.2
+    cliente = _cliente(puerto)
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(cliente.servidor_para(f"d{i}.test"))) for i in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert resultados == [REGISTRO] * 8
+    assert todos[IANA].consultas == ["test"]
+
+
+def test_rechaza_dominios_no_validos():
+    with pytest.raises(ErrorWhois):
+        ClienteWhois(ruta_servidores="").consultar("no es un dominio; rm -rf /")
@@ -0,0 +1,146 @@
+import json
+import os
+import re
+from concurrent.futures import as_completed
+from functools import partial
+from urllib.parse import quote
+
+# --- Enumeración de nombres de usuario ---
+# El catálogo (sitios_usuario.json) describe cada sitio con:
+#   nombre, url        plantilla del perfil con {} para el usuario
+#   deteccion          "status" (2xx existe, 404/410 no), "redireccion" (una redirección
+#                      significa que no existe) o "contenido" (busca marcadores en el cuerpo)
+#   marcador_ausente   texto que solo aparece si el usuario NO existe
+#   marcador_presente  texto que solo aparece si el usuario existe
+#   url_sonda          URL a consultar si no es la del perfil (p. ej. una API)
+#   regex_usuario      nombres válidos en el sitio; los demás no se consultan
+#   rps, timeout, max_bytes   límites propios del sitio
+# Los cuerpos se leen por trozos solo cuando la regla lo necesita, y se deja de leer
+# en cuanto aparece un marcador o se alcanza max_bytes.
+
+CATALOGO_POR_DEFECTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sitios_usuario.json")
+DETECCIONES = ("status", "redireccion", "contenido")
+MAX_BYTES_POR_DEFECTO = 64 * 1024
+TAMANO_TROZO = 8192
+TIMEOUT_SITIO = 7
+INTENTOS_SITIO = 2
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0"
+
+ENCONTRADO = "encontrado"
+NO_ENCONTRADO = "no_encontrado"
+DESCONOCIDO = "desconocido"
+NO_VALIDO = "no_valido"
+ERROR = "error"
+
+
+def cargar_catalogo(ruta=CATALOGO_POR_DEFECTO):
+    """Lee y valida el catálogo; compila las expresiones y codifica los marcadores una sola vez."""
+    with open(ruta, "r", encoding="utf-8") as f:
+        entradas = json.load(f)
+    catalogo = []
+    for entrada in entradas:
+        if "{}" not in entrada.get("url", "") or entrada.get("deteccion") not in DETECCIONES:
+            raise ValueError(f"Entrada de catálogo no válida: {entrada.get('nombre', entrada)}")
+        sitio = dict(entrada)
+        sitio["_regex"] = re.compile(entrada["regex_usuario"]) if entrada.get("regex_usuario") else None
+        sitio["_ausente"] = entrada["marcador_ausente"].encode("utf-8") if entrada.get("marcador_ausente") else None
+        sitio["_presente"] = entrada["marcador_presente"].encode("utf-8") if entrada.get("marcador_presente") else None
+        if sitio["deteccion"] == "contenido" and not (sitio["_ausente"] or sitio["_presente"]):
+            raise ValueError(f"El sitio {sitio['nombre']} usa 'contenido' sin marcadores")
+        catalogo.append(sitio)
+    return catalogo
+
+
+def _buscar_marcadores(resp, marcadores, max_bytes):
+    """Lee el cuerpo por trozos hasta encontrar uno de los marcadores (lo devuelve) o agotar max_bytes."""
+    solape = max(len(m) for m in marcadores) - 1
+    cola = b""
+    leidos = 0
+    for trozo in resp.iter_content(TAMANO_TROZO):
+        # Se conserva el final del trozo anterior por si un marcador queda partido
+        ventana = cola + trozo
+        for marcador in marcadores:
+            if marcador in ventana:
+                return marcador
+        cola = ventana[-solape:] if solape else b""
+        leidos += len(trozo)
+        if leidos >= max_bytes:
+            break
+    return None
+
+
+def evaluar_respuesta(sitio, resp):
+    """Aplica la regla del sitio a la respuesta (abierta con stream=True). Devuelve (estado, detalle)."""
+    try:
+        status = resp.status_code
+        if status == 429 or status >= 500:
+            return DESCONOCIDO, f"HTTP {status}"
+        if status in (404, 410):
+            return NO_ENCONTRADO, f"HTTP {status}"
+
+        regla = sitio["deteccion"]
+        if regla == "redireccion":
+            if 300 <= status < 400:
+                return NO_ENCONTRADO, f"redirige a {resp.headers.get('Location', '?')}"
+            return (ENCONTRADO, f"HTTP {status}") if 200 <= status < 300 else (DESCONOCIDO, f"HTTP {status}")
+        if not 200 <= status < 300:
+            return DESCONOCIDO, f"HTTP {status}"
+        if regla == "status":
+            return ENCONTRADO, f"HTTP {status}"
+
+        marcadores = [m for m in (sitio["_ausente"], sitio["_presente"]) if m]
+        hallado = _buscar_marcadores(resp, marcadores, sitio.get("max_bytes", MAX_BYTES_POR_DEFECTO))
+        if hallado is not None:
+            return (NO_ENCONTRADO, "marcador de ausencia") if hallado == sitio["_ausente"] else (ENCONTRADO, "marcador de perfil")
+        # Ningún marcador: si se esperaba uno de presencia, el perfil no está
+        return (NO_ENCONTRADO, "sin marcador de perfil") if sitio["_presente"] else (ENCONTRADO, "sin marcador de ausencia")
+    finally:
+        # Cerrar sin leer el resto descarta la conexión, pero evita descargar páginas enteras
+        resp.close()
+
+
+class ComprobadorUsuarios:
+    def __init__(self, motor, catalogo=None):
+        self.motor = motor
+        self.catalogo = catalogo if catalogo is not None else cargar_catalogo()
+        # Un procesado fijo por sitio: así el motor puede agrupar comprobaciones idénticas simultáneas
+        self._procesar = {sitio["nombre"]: partial(evaluar_respuesta, sitio) for sitio in self.catalogo}
+        self.motor.limitador.configurar({
+            self._proveedor(sitio): (sitio["rps"], max(1, int(sitio["rps"])))
+            for sitio in self.catalogo if sitio.get("rps")
+        })
+
+    @staticmethod
+    def _proveedor(sitio):
+        return f"sitio:{sitio['nombre']}"
+
+    def comprobar(self, usuario, sitios=None):
+        """
+        Lanza todas las comprobaciones a la vez y devuelve dicts con sitio, url, estado y
+        detalle según van terminando. 'sitios' permite limitarse a algunos nombres.
+        """
+        usuario_url = quote(usuario, safe="")
+        futuros = {}
+        for sitio in self.catalogo:
+            if sitios is not None and sitio["nombre"] not in sitios:
+                continue
+            url = sitio["url"].format(usuario_url)
+            if sitio["_regex"] and not sitio["_regex"].match(usuario):
+                yield {"sitio": sitio["nombre"], "url": url, "estado": NO_VALIDO, "detalle": "nombre no válido en el sitio"}
+                continue
+            futuro = self.motor.solicitar(
+                "GET", sitio.get("url_sonda", sitio["url"]).format(usuario_url),
+                proveedor=self._proveedor(sitio), intentos=INTENTOS_SITIO,
+                procesar=self._procesar[sitio["nombre"]],
+                stream=True, allow_redirects=sitio["deteccion"] != "redireccion",
+                timeout=sitio.get("timeout", TIMEOUT_SITIO), headers={"User-Agent": USER_AGENT},
+            )
+            futuros[futuro] = (sitio["nombre"], url)
+
+        for futuro in as_completed(futuros):
+            nombre, url = futuros[futuro]
+            try:
+                estado, detalle = futuro.result().procesado
+            except Exception as e:
+                estado, detalle = ERROR, str(e)
+            yield {"sitio": nombre, "url": url, "estado": estado, "detalle": detalle}
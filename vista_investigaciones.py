@@ -0,0 +1,119 @@
+import json
+import time
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from investigaciones import TIPOS_VIGILABLES, INTERVALO_VIGILANCIA, HORA
+
+# --- Ventana de investigaciones ---
+# Arriba, búsqueda de texto en el histórico de resultados (investigaciones.py): al
+# seleccionar uno se ven sus datos tal como se guardaron. Abajo, la lista de
+# vigilancia: añadir o quitar entradas y lanzar una comprobación de todas.
+
+COLUMNAS_BUSQUEDA = (
+    ("hora", "Fecha", 120),
+    ("tipo", "Tipo", 70),
+    ("entidad", "Entidad", 200),
+    ("proveedor", "Proveedor", 130),
+)
+COLUMNAS_VIGILANCIA = (
+    ("tipo", "Tipo", 70),
+    ("entidad", "Entidad", 240),
+    ("intervalo", "Cada", 70),
+    ("ultima", "Última comprobación", 140),
+)
+
+
+def _fecha(hora):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(hora)) if hora else "nunca"
+
+
+def _tabla(master, columnas, alto):
+    tabla = ttk.Treeview(master, columns=[c for c, _, _ in columnas], show="headings", height=alto)
+    for columna, titulo, ancho in columnas:
+        tabla.heading(columna, text=titulo)
+        tabla.column(columna, width=ancho, anchor=tk.W, stretch=(columna == "entidad"))
+    return tabla
+
+
+class VistaInvestigaciones(tk.Toplevel):
+    def __init__(self, master, almacen, al_comprobar):
+        super().__init__(master)
+        self.title("Investigaciones")
+        self.geometry("640x620")
+        self.almacen = almacen
+        self.al_comprobar = al_comprobar
+
+        busqueda = tk.Frame(self)
+        busqueda.pack(fill=tk.X, padx=5, pady=5)
+        self.var_texto = tk.StringVar()
+        entrada = tk.Entry(busqueda, textvariable=self.var_texto)
+        entrada.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        entrada.bind("<Return>", lambda _: self._buscar())
+        tk.Button(busqueda, text="Buscar en el histórico", command=self._buscar).pack(side=tk.LEFT, padx=3)
+
+        self.resultados = _tabla(self, COLUMNAS_BUSQUEDA, 8)
+        self.resultados.pack(fill=tk.BOTH, expand=True, padx=5)
+        self.resultados.bind("<<TreeviewSelect>>", lambda _: self._mostrar_datos())
+        self.detalle = tk.Text(self, height=8, wrap=tk.NONE)
+        self.detalle.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        tk.Label(self, text="Lista de vigilancia", anchor=tk.W).pack(fill=tk.X, padx=5)
+        self.vigiladas = _tabla(self, COLUMNAS_VIGILANCIA, 6)
+        self.vigiladas.pack(fill=tk.BOTH, expand=True, padx=5)
+
+        alta = tk.Frame(self)
+        alta.pack(fill=tk.X, padx=5, pady=5)
+        self.var_tipo = tk.StringVar(value=TIPOS_VIGILABLES[0])
+        ttk.Combobox(alta, textvariable=self.var_tipo, values=TIPOS_VIGILABLES, state="readonly", width=8).pack(side=tk.LEFT)
+        self.var_entidad = tk.StringVar()
+        tk.Entry(alta, textvariable=self.var_entidad).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=3)
+        tk.Label(alta, text="cada (h):").pack(side=tk.LEFT)
+        self.var_horas = tk.StringVar(value=f"{INTERVALO_VIGILANCIA / HORA:g}")
+        tk.Entry(alta, textvariable=self.var_horas, width=5).pack(side=tk.LEFT, padx=3)
+        tk.Button(alta, text="Vigilar", command=self._vigilar).pack(side=tk.LEFT)
+
+        botones = tk.Frame(self)
+        botones.pack(pady=5)
+        tk.Button(botones, text="Quitar seleccionada", command=self._quitar).pack(side=tk.LEFT, padx=3)
+        tk.Button(botones, text="Comprobar todas ahora", command=self.al_comprobar).pack(side=tk.LEFT, padx=3)
+        self._refrescar_vigiladas()
+
+    def _buscar(self):
+        self.resultados.delete(*self.resultados.get_children())
+        for id_resultado, hora, tipo, entidad, proveedor in self.almacen.buscar(self.var_texto.get()):
+            self.resultados.insert("", tk.END, iid=str(id_resultado), values=(_fecha(hora), tipo or "", entidad, proveedor))
+
+    def _mostrar_datos(self):
+        seleccion = self.resultados.selection()
+        if not seleccion:
+            return
+        datos = self.almacen.datos(int(seleccion[0]))
+        self.detalle.delete("1.0", tk.END)
+        self.detalle.insert(tk.END, json.dumps(datos, ensure_ascii=False, indent=2, default=str))
+
+    def _refrescar_vigiladas(self):
+        self.vigiladas.delete(*self.vigiladas.get_children())
+        for tipo, entidad, intervalo, ultima in self.almacen.vigiladas():
+            self.vigiladas.insert("", tk.END, values=(tipo, entidad, f"{intervalo / HORA:g} h", _fecha(ultima)))
+
+    def _vigilar(self):
+        entidad = self.var_entidad.get().strip()
+        if not entidad:
+            return
+        try:
+            horas = float(self.var_horas.get().replace(",", "."))
+            if horas <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showwarning("Vigilancia", "El intervalo debe ser un número de horas mayor que cero.", parent=self)
+            return
+        self.almacen.vigilar(self.var_tipo.get(), entidad, horas * HORA)
+        self.var_entidad.set("")
+        self._refrescar_vigiladas()
+
+    def _quitar(self):
+        for iid in self.vigiladas.selection():
+            tipo, entidad = (str(v) for v in self.vigiladas.item(iid, "values")[:2])
+            self.almacen.dejar_de_vigilar(tipo, entidad)
+        self._refrescar_vigiladas()
@@ -0,0 +1,160 @@
+import threading
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+# --- Panel de estadísticas en vivo ---
+# Ventana que cada segundo resume el registro de métricas por proveedor: peticiones,
+# errores, timeouts, en vuelo / en cola, lo ahorrado (aciertos de caché y peticiones
+# compartidas con otra idéntica) y latencias (p50/p95 del total y media de cada fase).
+# Permite exportar el registro completo como Prometheus o JSON. Debajo, el uso de cada
+# clave API (útil con pools de claves): peticiones, veces elegida, errores, cuota
+# restante y si se está enfriando.
+
+INTERVALO_MS = 1000
+FASES = ("cola", "conexion", "espera", "descarga")
+COLUMNAS_PANEL = (
+    ("proveedor", "Proveedor", 150),
+    ("peticiones", "Pet.", 55),
+    ("http_4xx", "4xx", 45),
+    ("errores", "Errores", 60),
+    ("timeouts", "Timeouts", 65),
+    ("en_vuelo", "En vuelo", 65),
+    ("en_cola", "En cola", 60),
+    ("cache", "Caché", 55),
+    ("compartidas", "Compart.", 65),
+    ("p50", "p50 ms", 65),
+    ("p95", "p95 ms", 65),
+) + tuple((fase, f"{fase.capitalize()} ms", 80) for fase in FASES)
+
+
+COLUMNAS_CLAVES = (
+    ("proveedor", "Proveedor", 150),
+    ("clave", "Clave", 70),
+    ("peticiones", "Pet.", 55),
+    ("elegida", "Elegida", 60),
+    ("errores", "Errores", 60),
+    ("limitadas", "429", 45),
+    ("restantes", "Restantes", 75),
+    ("estado", "Estado", 120),
+)
+
+
+def _ms(segundos):
+    return f"{segundos * 1000:.0f}" if segundos is not None else "-"
+
+
+def resumen_por_proveedor(metricas):
+    """{proveedor: {columna: valor}} a partir del registro de métricas."""
+    filas = {}
+    nueva = lambda p: filas.setdefault(p, {"peticiones": 0, "http_4xx": 0, "errores": 0, "timeouts": 0, "en_vuelo": 0,
+                                           "en_cola": 0, "cache": 0, "compartidas": 0})
+    for etiquetas, valor in metricas.series("peticiones"):
+        fila = nueva(etiquetas["proveedor"])
+        fila["peticiones"] += valor
+        resultado = etiquetas["resultado"]
+        if resultado == "timeout":
+            fila["timeouts"] += valor
+        elif resultado == "http_4xx":
+            # Un 404 es la respuesta normal de un perfil que no existe: no es un fallo
+            fila["http_4xx"] += valor
+        elif resultado not in ("ok", "http_2xx", "http_3xx"):
+            fila["errores"] += valor
+    for etiquetas, valor in metricas.series("cache"):
+        if etiquetas["resultado"] != "fallo":
+            nueva(etiquetas["proveedor"])["cache"] += valor
+    for etiquetas, valor in metricas.series("agrupadas"):
+        if etiquetas["resultado"] == "compartida":
+            nueva(etiquetas["proveedor"])["compartidas"] += valor
+    for nombre in ("en_vuelo", "en_cola"):
+        for etiquetas, valor in metricas.series(nombre):
+            nueva(etiquetas["proveedor"])[nombre] = valor
+    for etiquetas, histograma in metricas.series("duracion_segundos"):
+        fila = nueva(etiquetas["proveedor"])
+        if etiquetas["fase"] == "total":
+            fila["p50"], fila["p95"] = histograma.percentil(50), histograma.percentil(95)
+        else:
+            fila[etiquetas["fase"]] = histograma.media
+    return filas
+
+
+class VistaMetricas(tk.Toplevel):
+    def __init__(self, master, metricas, cola_ui=None, limitador=None):
+        super().__init__(master)
+        self.title("Estadísticas en vivo")
+        self.geometry("1140x560")
+        self.metricas = metricas
+        self.cola_ui = cola_ui
+        self.limitador = limitador
+
+        self.tabla = ttk.Treeview(self, columns=[c for c, _, _ in COLUMNAS_PANEL], show="headings")
+        for columna, titulo, ancho in COLUMNAS_PANEL:
+            self.tabla.heading(columna, text=titulo)
+            self.tabla.column(columna, width=ancho, anchor=tk.W if columna == "proveedor" else tk.E,
+                              stretch=(columna == "proveedor"))
+        self.tabla.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        self.estado = tk.Label(self, anchor=tk.W, justify=tk.LEFT)
+        self.estado.pack(fill=tk.X, padx=5)
+
+        self.tabla_claves = None
+        if limitador is not None:
+            self.tabla_claves = ttk.Treeview(self, columns=[c for c, _, _ in COLUMNAS_CLAVES], show="headings", height=5)
+            for columna, titulo, ancho in COLUMNAS_CLAVES:
+                self.tabla_claves.heading(columna, text=titulo)
+                self.tabla_claves.column(columna, width=ancho, anchor=tk.W if columna in ("proveedor", "estado") else tk.E,
+                                         stretch=(columna == "proveedor"))
+            self.tabla_claves.pack(fill=tk.X, padx=5, pady=5)
+
+        botones = tk.Frame(self)
+        botones.pack(pady=5)
+        tk.Button(botones, text="Exportar Prometheus", command=lambda: self._exportar(".prom")).pack(side=tk.LEFT, padx=3)
+        tk.Button(botones, text="Exportar JSON", command=lambda: self._exportar(".json")).pack(side=tk.LEFT, padx=3)
+        tk.Button(botones, text="Reiniciar", command=self._reiniciar).pack(side=tk.LEFT, padx=3)
+        self._refrescar()
+
+    def _refrescar(self):
+        if not self.winfo_exists():
+            return
+        self.tabla.delete(*self.tabla.get_children())
+        for proveedor, fila in sorted(resumen_por_proveedor(self.metricas).items()):
+            valores = [proveedor, fila["peticiones"], fila["http_4xx"], fila["errores"], fila["timeouts"], fila["en_vuelo"],
+                       fila["en_cola"], fila["cache"], fila["compartidas"], _ms(fila.get("p50")), _ms(fila.get("p95"))]
+            valores += [_ms(fila.get(fase)) for fase in FASES]
+            self.tabla.insert("", tk.END, values=valores)
+
+        volcados = self.metricas.series("ui_volcado_segundos")
+        volcado = volcados[0][1] if volcados else None
+        filas_ui = sum(v for _, v in self.metricas.series("ui_filas"))
+        self.estado.configure(text=(
+            f"Cola de la ventana: {self.cola_ui.qsize() if self.cola_ui is not None else '-'} mensajes   "
+            f"Volcados: p95 {_ms(volcado.percentil(95) if volcado else None)} ms   "
+            f"Filas mostradas: {filas_ui}   Hilos activos: {threading.active_count()}"
+        ))
+        if self.tabla_claves is not None:
+            self._refrescar_claves()
+        self.after(INTERVALO_MS, self._refrescar)
+
+    def _refrescar_claves(self):
+        self.tabla_claves.delete(*self.tabla_claves.get_children())
+        for (proveedor, clave), cuota in sorted(self.limitador.resumen_cuotas().items()):
+            if proveedor.startswith("sitio:"):
+                continue
+            estado = f"enfriándose {cuota['enfriada']:.0f}s" if cuota["enfriada"] else "disponible"
+            restantes = cuota["restantes"] if cuota["restantes"] is not None else "?"
+            self.tabla_claves.insert("", tk.END, values=(proveedor, clave, cuota["peticiones"], cuota["elegida"],
+                                                        cuota["errores"], cuota["limitadas"], restantes, estado))
+
+    def _exportar(self, extension):
+        tipos = [("JSON", "*.json")] if extension == ".json" else [("Prometheus", "*.prom *.txt")]
+        ruta = filedialog.asksaveasfilename(parent=self, defaultextension=extension, filetypes=tipos,
+                                            initialfile=f"metricas_wicosintx{extension}")
+        if not ruta:
+            return
+        try:
+            self.metricas.exportar(ruta)
+        except OSError as e:
+            messagebox.showerror("Error", f"No se pudieron exportar las métricas: {e}", parent=self)
+
+    def _reiniciar(self):
+        # Los gauges (en vuelo, en cola) se conservan; el resto vuelve a cero en el siguiente tick
+        self.metricas.limpiar()
@@ -0,0 +1,173 @@
+import time
+import tkinter as tk
+from tkinter import ttk
+
+# --- Vista virtual de resultados ---
+# Tabla que solo crea tantos items de Treeview como filas caben en pantalla y los
+# rellena desde el AlmacenResultados según la posición del scroll. Así el coste de
+# pintar no depende de cuántos resultados lleve la sesión.
+
+ALTO_FILA = 20
+COLORES_ESTADO = {
+    "success": "lightgreen",
+    "not_found": "red",
+    "info": "yellow",
+    "error": "orange",
+    "pending": "gray",
+    "normal": "white",
+}
+COLUMNAS_VISTA = (
+    ("hora", "Hora", 70),
+    ("proveedor", "Proveedor", 140),
+    ("entidad", "Entidad", 140),
+    ("estado", "Estado", 80),
+    ("texto", "Resultado", 500),
+)
+
+
+class VistaResultados(tk.Frame):
+    def __init__(self, master, almacen, al_abrir_url):
+        super().__init__(master, bg="#2b2b2b")
+        self.almacen = almacen
+        self.al_abrir_url = al_abrir_url
+        self.orden = "id"
+        self.descendente = False
+        self.primera = 0
+        self.total_vista = 0
+        self.siguiendo_final = True
+        self._items = []
+        self._fila_de_item = {}
+
+        self._crear_filtros()
+
+        estilo = ttk.Style(self)
+        estilo.configure("Resultados.Treeview", background="#2b2b2b", fieldbackground="#2b2b2b",
+                         foreground="white", rowheight=ALTO_FILA)
+        self.tabla = ttk.Treeview(self, columns=[c for c, _, _ in COLUMNAS_VISTA], show="headings",
+                                  style="Resultados.Treeview", selectmode="browse")
+        for columna, titulo, ancho in COLUMNAS_VISTA:
+            self.tabla.heading(columna, text=titulo, command=lambda c=columna: self._ordenar_por(c))
+            self.tabla.column(columna, width=ancho, stretch=(columna == "texto"))
+        for estado, color in COLORES_ESTADO.items():
+            self.tabla.tag_configure(estado, foreground=color)
+        self.tabla.tag_configure("link", font=("TkDefaultFont", 9, "underline"))
+
+        self.scroll = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._desplazar)
+        self.scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tabla.pack(fill=tk.BOTH, expand=True)
+
+        self.tabla.bind("<Configure>", lambda e: self.refrescar())
+        self.tabla.bind("<MouseWheel>", lambda e: self._mover(-1 if e.delta > 0 else 1, "units"))
+        self.tabla.bind("<Button-4>", lambda e: self._mover(-1, "units"))
+        self.tabla.bind("<Button-5>", lambda e: self._mover(1, "units"))
+        self.tabla.bind("<Button-1>", self._al_hacer_clic)
+        self.tabla.bind("<Motion>", self._al_mover_raton)
+
+    def _crear_filtros(self):
+        barra = tk.Frame(self, bg="#2b2b2b")
+        barra.pack(side=tk.TOP, fill=tk.X, pady=(0, 3))
+        self.vars_filtro = {}
+        for columna, titulo in (("proveedor", "Proveedor"), ("estado", "Estado"), ("entidad", "Entidad")):
+            tk.Label(barra, text=f"{titulo}:", bg="#2b2b2b", fg="white").pack(side=tk.LEFT, padx=(4, 1))
+            var = tk.StringVar()
+            combo = ttk.Combobox(barra, textvariable=var, width=14)
+            combo.configure(postcommand=lambda c=combo, col=columna: c.configure(values=[""] + self.almacen.distintos(col)))
+            combo.pack(side=tk.LEFT)
+            combo.bind("<<ComboboxSelected>>", lambda e: self._aplicar_filtro())
+            combo.bind("<Return>", lambda e: self._aplicar_filtro())
+            self.vars_filtro[columna] = var
+        tk.Label(barra, text="Texto:", bg="#2b2b2b", fg="white").pack(side=tk.LEFT, padx=(4, 1))
+        var_texto = tk.StringVar()
+        entrada = tk.Entry(barra, textvariable=var_texto, width=16)
+        entrada.pack(side=tk.LEFT)
+        entrada.bind("<Return>", lambda e: self._aplicar_filtro())
+        self.vars_filtro["texto"] = var_texto
+        tk.Button(barra, text="✖", command=self._quitar_filtros).pack(side=tk.LEFT, padx=4)
+
+    @property
+    def filtro(self):
+        return {columna: var.get().strip() for columna, var in self.vars_filtro.items()}
+
+    def _aplicar_filtro(self):
+        self.primera = 0
+        self.siguiendo_final = True
+        self.refrescar()
+
+    def _quitar_filtros(self):
+        for var in self.vars_filtro.values():
+            var.set("")
+        self._aplicar_filtro()
+
+    def _ordenar_por(self, columna):
+        orden = "id" if columna == "hora" else columna
+        self.descendente = not self.descendente if orden == self.orden else False
+        self.orden = orden
+        self.siguiendo_final = False
+        self.primera = 0
+        self.refrescar()
+
+    def _filas_visibles(self):
+        # El alto incluye la cabecera, que ocupa aproximadamente una fila
+        return max(1, self.tabla.winfo_height() // ALTO_FILA - 1)
+
+    def _desplazar(self, *args):
+        """Callback del Scrollbar: ('moveto', fracción) o ('scroll', n, 'units'|'pages')."""
+        if args[0] == "moveto":
+            self.primera = int(float(args[1]) * self.total_vista)
+            self.siguiendo_final = False
+            self.refrescar()
+        elif args[0] == "scroll":
+            self._mover(int(args[1]), args[2])
+
+    def _mover(self, cantidad, unidad):
+        paso = self._filas_visibles() if unidad == "pages" else 3
+        self.primera += cantidad * paso
+        self.siguiendo_final = False
+        self.refrescar()
+        return "break"
+
+    def refrescar(self):
+        """Recalcula el tamaño de la vista y repinta solo las filas visibles."""
+        visibles = self._filas_visibles()
+        filtro = self.filtro
+        self.total_vista = self.almacen.contar(filtro)
+        ultima_primera = max(0, self.total_vista - visibles)
+        if self.siguiendo_final and self.orden == "id" and not self.descendente:
+            self.primera = ultima_primera
+        self.primera = min(max(0, self.primera), ultima_primera)
+        # Si el usuario vuelve a bajar hasta el final, la vista retoma el seguimiento
+        self.siguiendo_final = self.primera == ultima_primera
+
+        filas = self.almacen.pagina(self.primera, visibles, filtro, self.orden, self.descendente)
+
+        while len(self._items) < visibles:
+            self._items.append(self.tabla.insert("", tk.END))
+        while len(self._items) > visibles:
+            self.tabla.delete(self._items.pop())
+
+        self._fila_de_item.clear()
+        for item, fila in zip(self._items, filas):
+            id_fila, hora, proveedor, entidad, estado, texto, url = fila
+            tags = (estado, "link") if url else (estado,)
+            self.tabla.item(item, values=(time.strftime("%H:%M:%S", time.localtime(hora)),
+                                          proveedor or "", entidad or "", estado, texto), tags=tags)
+            self._fila_de_item[item] = id_fila
+        for item in self._items[len(filas):]:
+            self.tabla.item(item, values=("", "", "", "", ""), tags=())
+
+        if self.total_vista:
+            self.scroll.set(self.primera / self.total_vista, min(1.0, (self.primera + visibles) / self.total_vista))
+        else:
+            self.scroll.set(0.0, 1.0)
+
+    def _url_en(self, y):
+        id_fila = self._fila_de_item.get(self.tabla.identify_row(y))
+        return self.almacen.url(id_fila) if id_fila else None
+
+    def _al_hacer_clic(self, event):
+        url = self._url_en(event.y)
+        if url:
+            self.al_abrir_url(url)
+
+    def _al_mover_raton(self, event):
+        self.tabla.configure(cursor="hand2" if self._url_en(event.y) else "")
@@ -0,0 +1,77 @@
+import tkinter as tk
+from tkinter import ttk
+
+from planificador import NOMBRES_PRIORIDAD, EN_COLA, EJECUTANDO
+
+# --- Ventana de trabajos ---
+# Lista lo que está haciendo el planificador: trabajos en marcha, los que esperan en la
+# cola (por orden de prioridad) y los últimos terminados, con su progreso y duración.
+# Permite cancelar el trabajo seleccionado o todos los pendientes.
+
+INTERVALO_MS = 500
+COLUMNAS = (
+    ("id", "#", 45),
+    ("nombre", "Trabajo", 300),
+    ("prioridad", "Prioridad", 80),
+    ("estado", "Estado", 80),
+    ("progreso", "Progreso", 90),
+    ("duracion", "Duración", 70),
+)
+
+
+def _progreso(trabajo):
+    if trabajo.total:
+        return f"{trabajo.hechos}/{trabajo.total}"
+    return str(trabajo.hechos) if trabajo.hechos else "-"
+
+
+class VistaTrabajos(tk.Toplevel):
+    def __init__(self, master, planificador):
+        super().__init__(master)
+        self.title("Trabajos")
+        self.geometry("720x360")
+        self.planificador = planificador
+
+        self.tabla = ttk.Treeview(self, columns=[c for c, _, _ in COLUMNAS], show="headings")
+        for columna, titulo, ancho in COLUMNAS:
+            self.tabla.heading(columna, text=titulo)
+            self.tabla.column(columna, width=ancho, anchor=tk.W if columna == "nombre" else tk.E,
+                              stretch=(columna == "nombre"))
+        self.tabla.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        self.estado = tk.Label(self, anchor=tk.W)
+        self.estado.pack(fill=tk.X, padx=5)
+
+        botones = tk.Frame(self)
+        botones.pack(pady=5)
+        tk.Button(botones, text="Cancelar seleccionado", command=self._cancelar_seleccion).pack(side=tk.LEFT, padx=3)
+        tk.Button(botones, text="Cancelar todos", command=self._cancelar_todos).pack(side=tk.LEFT, padx=3)
+        self._refrescar()
+
+    def _refrescar(self):
+        if not self.winfo_exists():
+            return
+        seleccion = set(self.tabla.selection())
+        self.tabla.delete(*self.tabla.get_children())
+        en_marcha = en_cola = 0
+        for trabajo in self.planificador.trabajos():
+            en_marcha += trabajo.estado == EJECUTANDO
+            en_cola += trabajo.estado == EN_COLA
+            iid = str(trabajo.id)
+            self.tabla.insert("", tk.END, iid=iid, values=(
+                trabajo.id, trabajo.nombre, NOMBRES_PRIORIDAD[trabajo.prioridad],
+                "cancelando" if trabajo.estado == EJECUTANDO and trabajo.cancelado else trabajo.estado,
+                _progreso(trabajo), f"{trabajo.duracion:.1f}s"))
+            if iid in seleccion:
+                self.tabla.selection_add(iid)
+        self.estado.configure(text=f"En marcha: {en_marcha}   En cola: {en_cola}")
+        self.after(INTERVALO_MS, self._refrescar)
+
+    def _cancelar_seleccion(self):
+        for iid in self.tabla.selection():
+            self.planificador.cancelar(int(iid))
+
+    def _cancelar_todos(self):
+        for trabajo in self.planificador.trabajos():
+            if trabajo.estado in (EN_COLA, EJECUTANDO):
+                self.planificador.cancelar(trabajo.id)
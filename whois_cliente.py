@@ -0,0 +1,261 @@
+import json
+import os
+import re
+import socket
+import threading
+import time
+from concurrent.futures import Future
+
+from configuracion import crear_directorio, ruta_datos
+from metricas import obtener_metricas
+
+# --- Cliente WHOIS (puerto 43) ---
+# Sustituye a lanzar el comando 'whois' por cada consulta. El servidor de cada TLD se
+# pregunta una vez a whois.iana.org y se guarda en un mapa persistente; luego se siguen
+# las referencias al WHOIS del registrador ("Registrar WHOIS Server", "refer", ...).
+# Cada servidor tiene su propio límite de conexiones simultáneas, así que las listas
+# grandes de dominios se pueden resolver en paralelo sin que nos bloqueen.
+
+SERVIDOR_IANA = "whois.iana.org"
+PUERTO_WHOIS = 43
+TIMEOUT_WHOIS = 10
+MAX_POR_SERVIDOR = 2
+MAX_REFERENCIAS = 2
+MAX_RESPUESTA = 1024 * 1024
+SERVIDORES_FILE = "whois_servidores.json"
+
+# Servidores conocidos para no tener que preguntar a IANA por los TLD más habituales
+SERVIDORES_CONOCIDOS = {
+    "com": "whois.verisign-grs.com",
+    "net": "whois.verisign-grs.com",
+    "org": "whois.publicinterestregistry.org",
+    "info": "whois.nic.info",
+    "io": "whois.nic.io",
+    "es": "whois.nic.es",
+    "eu": "whois.eu",
+    "de": "whois.denic.de",
+    "fr": "whois.nic.fr",
+    "it": "whois.nic.it",
+    "uk": "whois.nic.uk",
+    "nl": "whois.domain-registry.nl",
+    "me": "whois.nic.me",
+    "co": "whois.nic.co",
+    "dev": "whois.nic.google",
+    "app": "whois.nic.google",
+}
+
+# Algunos servidores necesitan un formato de consulta propio
+FORMATO_CONSULTA = {
+    "whois.verisign-grs.com": "domain {}",
+    "whois.denic.de": "-T dn,ace {}",
+}
+
+CLAVES_REFERENCIA = ("registrar whois server", "whois server", "refer", "referralserver")
+
+# Alias habituales de cada campo en las distintas salidas WHOIS
+CAMPOS = {
+    "dominio": ("domain name", "domain"),
+    "registrador": ("registrar", "registrar name", "sponsoring registrar"),
+    "creado": ("creation date", "created", "created on", "registered on", "registration time", "created date"),
+    "actualizado": ("updated date", "last updated", "last modified", "changed", "last update"),
+    "expira": ("registry expiry date", "registrar registration expiration date", "expiration date",
+               "expiry date", "expires", "expires on", "paid-till"),
+    "registrante": ("registrant organization", "registrant", "registrant name", "org"),
+    "pais": ("registrant country", "country"),
+    "dnssec": ("dnssec",),
+}
+CAMPOS_LISTA = {
+    "estados": ("domain status", "status", "state"),
+    "servidores_nombre": ("name server", "nserver", "nameservers", "name servers"),
+}
+RE_EMAIL = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+RE_DOMINIO = re.compile(r"^(?=.{1,253}$)(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z0-9-]{2,63}$")
+
+
+class ErrorWhois(Exception):
+    pass
+
+
+def normalizar_dominio(dominio):
+    """Valida el dominio y lo pasa a ASCII (IDNA). Rechaza cualquier carácter extraño."""
+    dominio = dominio.strip().rstrip(".").lower()
+    try:
+        dominio = dominio.encode("idna").decode("ascii")
+    except UnicodeError:
+        raise ErrorWhois(f"Dominio no válido: {dominio!r}")
+    if not RE_DOMINIO.match(dominio):
+        raise ErrorWhois(f"Dominio no válido: {dominio!r}")
+    return dominio
+
+
+def parsear_whois(texto):
+    """Extrae los campos principales de una respuesta WHOIS ('Clave: valor')."""
+    alias = {a: campo for campo, nombres in CAMPOS.items() for a in nombres}
+    alias_lista = {a: campo for campo, nombres in CAMPOS_LISTA.items() for a in nombres}
+    campos = {campo: [] for campo in CAMPOS_LISTA}
+    for linea in texto.splitlines():
+        if ":" not in linea or linea.lstrip().startswith(("%", "#", ">>>")):
+            continue
+        clave, _, valor = linea.partition(":")
+        clave, valor = clave.strip().lower(), valor.strip()
+        if not valor:
+            continue
+        if clave in alias and alias[clave] not in campos:
+            campos[alias[clave]] = valor
+        elif clave in alias_lista:
+            # "clientTransferProhibited https://icann.org/epp#..." -> solo el estado
+            valor = valor.split()[0]
+            if alias_lista[clave] == "servidores_nombre":
+                valor = valor.lower()
+            if valor not in campos[alias_lista[clave]]:
+                campos[alias_lista[clave]].append(valor)
+    campos["emails"] = sorted(set(e.lower() for e in RE_EMAIL.findall(texto)))
+    return campos
+
+
+def _buscar_referencia(texto, servidor_actual):
+    for linea in texto.splitlines():
+        clave, _, valor = linea.partition(":")
+        if clave.strip().lower() in CLAVES_REFERENCIA:
+            valor = valor.strip()
+            # ARIN devuelve "whois://whois.ripe.net" o "rwhois://host:4321"
+            if "://" in valor:
+                esquema, _, valor = valor.partition("://")
+                if esquema != "whois":
+                    continue
+            valor = valor.split("/")[0].split(":")[0].lower()
+            if valor and valor != servidor_actual:
+                return valor
+    return None
+
+
+class ClienteWhois:
+    def __init__(self, timeout=TIMEOUT_WHOIS, max_por_servidor=MAX_POR_SERVIDOR,
+                 ruta_servidores=None, puerto=PUERTO_WHOIS, servidor_iana=SERVIDOR_IANA):
+        self.timeout = timeout
+        self.max_por_servidor = max_por_servidor
+        self.puerto = puerto
+        self.servidor_iana = servidor_iana
+        # None: el mapa en el directorio de datos; "": no se guarda en disco
+        self.ruta_servidores = ruta_datos(SERVIDORES_FILE) if ruta_servidores is None else ruta_servidores
+        self._lock = threading.Lock()
+        self._semaforos = {}
+        self._en_vuelo = {}  # TLD -> Future de la consulta a IANA en marcha
+        self._servidores = dict(SERVIDORES_CONOCIDOS)
+        if self.ruta_servidores and os.path.exists(self.ruta_servidores):
+            with open(self.ruta_servidores, "r", encoding="utf-8") as f:
+                self._servidores.update(json.load(f))
+
+    def _semaforo(self, servidor):
+        with self._lock:
+            sem = self._semaforos.get(servidor)
+            if sem is None:
+                sem = self._semaforos[servidor] = threading.BoundedSemaphore(self.max_por_servidor)
+            return sem
+
+    def consultar_servidor(self, servidor, consulta):
+        """Envía una consulta cruda a un servidor WHOIS y devuelve la respuesta como texto."""
+        formato = FORMATO_CONSULTA.get(servidor, "{}")
+        metricas = obtener_metricas()
+        encolada = time.perf_counter()
+        with self._semaforo(servidor):
+            inicio = time.perf_counter()
+            metricas.observar("duracion_segundos", inicio - encolada, proveedor="whois", fase="cola")
+            metricas.sumar("en_vuelo", 1, proveedor="whois")
+            resultado = "error_conexion"
+            try:
+                with socket.create_connection((servidor, self.puerto), timeout=self.timeout) as s:
+                    metricas.observar("duracion_segundos", time.perf_counter() - inicio, proveedor="whois", fase="conexion")
+                    s.sendall((formato.format(consulta) + "\r\n").encode("ascii"))
+                    partes, total = [], 0
+                    while total < MAX_RESPUESTA:
+                        datos = s.recv(65536)
+                        if not datos:
+                            break
+                        partes.append(datos)
+                        total += len(datos)
+                resultado = "ok"
+            except socket.timeout:
+                resultado = "timeout"
+                raise
+            finally:
+                metricas.sumar("en_vuelo", -1, proveedor="whois")
+                metricas.incrementar("peticiones", proveedor="whois", resultado=resultado)
+                metricas.observar("duracion_segundos", time.perf_counter() - inicio, proveedor="whois", fase="total")
+        crudo = b"".join(partes)
+        try:
+            return crudo.decode("utf-8")
+        except UnicodeDecodeError:
+            return crudo.decode("latin-1")
+
+    def servidor_para(self, dominio):
+        """
+        Servidor WHOIS del TLD del dominio; si no se conoce, se pregunta a IANA y se guarda.
+        Los hilos que piden a la vez el mismo TLD esperan a una única consulta a IANA.
+        """
+        tld = dominio.rsplit(".", 1)[-1]
+        with self._lock:
+            servidor = self._servidores.get(tld)
+            if servidor:
+                return servidor
+            compartido = self._en_vuelo.get(tld)
+            nueva = compartido is None
+            if nueva:
+                compartido = self._en_vuelo[tld] = Future()
+        if not nueva:
+            return compartido.result()
+        try:
+            servidor = _buscar_referencia(self.consultar_servidor(self.servidor_iana, tld), self.servidor_iana)
+            if not servidor:
+                raise ErrorWhois(f"El TLD .{tld} no tiene servidor WHOIS publicado en IANA")
+            with self._lock:
+                self._servidores[tld] = servidor
+                self._guardar_servidores()
+        except BaseException as e:
+            compartido.set_exception(e)
+            raise
+        else:
+            compartido.set_result(servidor)
+            return servidor
+        finally:
+            with self._lock:
+                del self._en_vuelo[tld]
+
+    def _guardar_servidores(self):
+        if not self.ruta_servidores:
+            return
+        aprendidos = {tld: s for tld, s in self._servidores.items() if SERVIDORES_CONOCIDOS.get(tld) != s}
+        temporal = crear_directorio(self.ruta_servidores) + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(aprendidos, f, indent=4, sort_keys=True)
+        os.replace(temporal, self.ruta_servidores)
+
+    def consultar(self, dominio):
+        """
+        Consulta el dominio en el registro y sigue las referencias al registrador.
+        Devuelve {"dominio", "servidores", "texto", "campos"}; los campos del registrador
+        completan o sustituyen a los del registro.
+        """
+        dominio = normalizar_dominio(dominio)
+        servidor = self.servidor_para(dominio)
+        servidores, textos, campos = [], [], {}
+        for _ in range(MAX_REFERENCIAS + 1):
+            try:
+                texto = self.consultar_servidor(servidor, dominio)
+            except OSError as e:
+                if not textos:
+                    raise ErrorWhois(f"No se pudo consultar {servidor}: {e}")
+                # Si falla el registrador nos quedamos con lo que dio el registro
+                break
+            servidores.append(servidor)
+            textos.append(texto)
+            for campo, valor in parsear_whois(texto).items():
+                if valor:
+                    campos[campo] = valor
+            servidor = _buscar_referencia(texto, servidor)
+            if not servidor or servidor in servidores:
+                break
+        for campo in CAMPOS_LISTA:
+            campos.setdefault(campo, [])
+        campos.setdefault("emails", [])
+        return {"dominio": dominio, "servidores": servidores, "texto": "\n".join(textos), "campos": campos}
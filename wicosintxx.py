@@ -1,27 +1,41 @@
 import tkinter as tk
-from tkinter import messagebox, scrolledtext, filedialog
-import json
+from tkinter import messagebox, filedialog
 import os
-import requests
-import subprocess
-import webbrowser
-from urllib.parse import quote_plus
+from concurrent.futures import as_completed
 import threading
+import queue
+import sqlite3
 import time
+from pathlib import Path
 
-# --- Configuración y Utilidades ---
-CONFIG_FILE = "apis.json"
+# Solo lo necesario para abrir la ventana: requests, el motor HTTP, webbrowser y el
+# lector de metadatos se importan la primera vez que se usan (ver consultas.Consultor).
+from configuracion import cargar_apis, guardar_apis, ruta_datos
+from consultas import Consultor, ErrorConsulta, buscadores_persona
+from entidades import consultar_entidad, proveedores_configurados
+from pivotes import expandir, detectar_tipo, PROFUNDIDAD_POR_DEFECTO, MAX_PETICIONES_POR_DEFECTO
+from usuarios import ENCONTRADO, NO_ENCONTRADO, NO_VALIDO, DESCONOCIDO
+from almacen_resultados import AlmacenResultados
+from vista_resultados import VistaResultados, COLORES_ESTADO
+from metricas import obtener_metricas
+from vista_metricas import VistaMetricas
+from planificador import (Planificador, ColaLlena, trabajo_actual, comprobar_cancelacion, INTERACTIVA, NORMAL, MASIVA,
+                          EN_COLA, EJECUTANDO)
+from vista_trabajos import VistaTrabajos
+from investigaciones import (AlmacenInvestigaciones, INVESTIGACIONES_FILE, comprobar_vigiladas, describir_diferencias,
+                             tipo_de_proveedor)
+from vista_investigaciones import VistaInvestigaciones
 
-def cargar_apis():
-    if not os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump({}, f)
-    with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def guardar_apis(apis):
-    with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-        json.dump(apis, f, indent=4)
+# Los hilos de trabajo encolan el texto y la UI lo vuelca por lotes en cada "frame"
+INTERVALO_UI_MS = 50
+MAX_INSERCIONES_POR_FRAME = 2000
+MAX_IPS_RANGO = 65536  # un /16; para barridos mayores está lote.py
+# Sin token de ipinfo cada IP es una petición y, con CONCURRENCIA_RANGO hilos, un /16 tardaría horas
+MAX_IPS_RANGO_SIN_LOTES = 1024
+CONCURRENCIA_RANGO = 2  # hilos por barrido de rango: el motor ya acota la red y los trabajos se suman
+PLAZO_DRENAJE = 3.0   # segundos que se deja terminar a los trabajos en marcha al cerrar
+PLAZO_CANCELACION = 2.0  # y después de pedirles que cancelen
+INTERVALO_VIGILANCIA_MS = 60000  # cada cuánto se mira si alguna entrada vigilada ha vencido
 
 # --- Clase Principal de la Aplicación ---
 class WicOsintXApp:
@@ -30,8 +44,56 @@ class WicOsintXApp:
         self.root.title("WicOsintX")
         self.root.geometry("800x600")
         self.apis = cargar_apis()
-        self.link_map = {} 
+        self.consultor = Consultor(self.apis)
+        self.consultor.al_servir_cache = lambda proveedor, consulta: self._mostrar_resultado("♻️ Respuesta servida desde la caché local.\n", "info")
+        self.almacen = AlmacenResultados()
+        self.metricas = obtener_metricas()
+        self._cache_metadatos = None
+        self._indice_imagenes = None
+        self._investigaciones = None
+        self._vigilancia_en_curso = None
+        self._ultimo_grafo = None
+        self._cola_ui = queue.SimpleQueue()
+        self._contexto = threading.local()
+        self.planificador = Planificador(al_fallar=self._al_fallar_trabajo)
+        self._cierre = None  # (fase, plazo) mientras se cierra la ventana
         self._crear_interfaz()
+        self.root.after(INTERVALO_UI_MS, self._drenar_cola_ui)
+        self.root.after(INTERVALO_VIGILANCIA_MS, self._programar_vigilancia)
+        self.root.protocol("WM_DELETE_WINDOW", self._al_cerrar)
+
+    def _al_cerrar(self):
+        """
+        Cierre ordenado: no se aceptan más trabajos, los que esperaban se descartan y a
+        los que están en marcha se les deja terminar unos segundos antes de cancelarlos.
+        """
+        if self._cierre is not None:
+            return
+        self.planificador.cerrar()
+        self._cierre = ("drenaje", time.monotonic() + PLAZO_DRENAJE)
+        self._esperar_cierre()
+
+    def _esperar_cierre(self):
+        fase, plazo = self._cierre
+        pendientes = self.planificador.pendientes
+        if pendientes and time.monotonic() < plazo:
+            self.root.title(f"WicOsintX — cerrando: esperando {pendientes} trabajo(s)...")
+            self.root.after(100, self._esperar_cierre)
+            return
+        if pendientes and fase == "drenaje":
+            self.planificador.cerrar(cancelar_en_curso=True)
+            self._cierre = ("cancelacion", time.monotonic() + PLAZO_CANCELACION)
+            self.root.after(100, self._esperar_cierre)
+            return
+        self.almacen.cerrar()
+        if self._cache_metadatos is not None:
+            self._cache_metadatos.cerrar()
+        if self._indice_imagenes is not None:
+            self._indice_imagenes.cerrar()
+        if self._investigaciones is not None:
+            self._investigaciones.cerrar()
+        self.consultor.cerrar()
+        self.root.destroy()
 
     def _crear_interfaz(self):
         self.frame_menu = tk.Frame(self.root, width=200, bg="lightgray")
@@ -45,8 +107,13 @@ class WicOsintXApp:
             ("👤 Usuario (Redes)", self._mostrar_menu_usuario),
             ("🖼 Imagen (Opciones)", self._mostrar_menu_imagen),
             ("📱 Teléfono (Opciones)", self._mostrar_menu_telefono),
+            ("🕸️ Pivotar (grafo)", lambda: self._crear_ventana_input("Pivotar desde IP, dominio, email o usuario", self._ejecutar_pivotes, NORMAL)),
+            ("💾 Exportar grafo", self._exportar_grafo),
+            ("🗂️ Investigaciones", self._mostrar_investigaciones),
             ("---", None),
             ("⚙️ Claves API", self._configurar_apis),
+            ("🧵 Trabajos", self._mostrar_trabajos),
+            ("📊 Estadísticas", self._mostrar_estadisticas),
             ("🧹 Limpiar Resultados", self._limpiar_resultado)
         ]
 
@@ -56,67 +123,143 @@ class WicOsintXApp:
             else:
                 tk.Label(self.frame_menu, text=texto, bg="lightgray", fg="gray").pack(pady=2)
 
-        self.text_resultado = scrolledtext.ScrolledText(self.root, wrap=tk.WORD, bg="#2b2b2b", fg="white", insertbackground="white")
-        self.text_resultado.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
-        # Configuración para que los enlaces sean clickables
-        self.text_resultado.tag_config("link", foreground="cyan", underline=1)
-        self.text_resultado.tag_bind("link", "<Button-1>", self._abrir_link)
-        self.text_resultado.tag_bind("link", "<Enter>", lambda e: self.text_resultado.config(cursor="hand2"))
-        self.text_resultado.tag_bind("link", "<Leave>", lambda e: self.text_resultado.config(cursor=""))
-
-        # Tags para estados de búsqueda
-        self.text_resultado.tag_config("success", foreground="lightgreen")
-        self.text_resultado.tag_config("not_found", foreground="red")
-        self.text_resultado.tag_config("info", foreground="yellow")
-        self.text_resultado.tag_config("error", foreground="orange")
-        self.text_resultado.tag_config("pending", foreground="gray")
-
-
-    def _abrir_link(self, event):
-        """Abre la URL asociada a una etiqueta 'link' cuando se hace clic."""
-        index = self.text_resultado.index(f"@{event.x},{event.y}")
-        tags = self.text_resultado.tag_names(index)
-        for tag in tags:
-            if tag.startswith("link-"):
-                url = self.link_map.get(tag)
-                if url:
-                    webbrowser.open(url)
-                return
+        self.vista_resultado = VistaResultados(self.root, self.almacen, self._abrir_link)
+        self.vista_resultado.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+    def _abrir_link(self, url):
+        """Abre la URL de una fila de resultados cuando se hace clic."""
+        import webbrowser
+        webbrowser.open(url)
+
+    def _fijar_contexto(self, proveedor, entidad):
+        """Proveedor y entidad por defecto de los resultados que muestre este hilo."""
+        self._contexto.proveedor = proveedor
+        self._contexto.entidad = entidad
+
+    def _encolar(self, nombre, funcion, *args, prioridad=INTERACTIVA):
+        """Manda la acción al planificador; con la cola llena avisa en vez de bloquear la ventana."""
+        try:
+            return self.planificador.enviar(nombre, funcion, *args, prioridad=prioridad)
+        except ColaLlena as e:
+            messagebox.showwarning("Demasiados trabajos", str(e), parent=self.root)
+            return None
+
+    def _al_fallar_trabajo(self, trabajo, error):
+        self._mostrar_resultado(f"❌ Error inesperado en «{trabajo.nombre}»: {error}\n", "error")
+
+    @staticmethod
+    def _avanzar(hechos=1, total=None):
+        """Progreso del trabajo en curso (para la ventana de trabajos); también atiende la cancelación."""
+        trabajo = trabajo_actual()
+        if trabajo is not None:
+            trabajo.avanzar(hechos, total)
+
+    def _mostrar_trabajos(self):
+        VistaTrabajos(self.root, self.planificador)
+
+    @property
+    def investigaciones(self):
+        if self._investigaciones is None:
+            self._investigaciones = AlmacenInvestigaciones()
+        return self._investigaciones
+
+    def _registrar(self, datos, proveedor=None, entidad=None):
+        """Guarda el resultado estructurado en el histórico (por defecto con el contexto del hilo)."""
+        proveedor = proveedor or self._contexto.proveedor
+        try:
+            self.investigaciones.registrar(tipo_de_proveedor(proveedor), entidad or self._contexto.entidad, proveedor, datos)
+        except sqlite3.Error as e:
+            self._mostrar_resultado(f"⚠️ No se pudo guardar en el histórico: {e}\n", "info")
+
+    def _mostrar_investigaciones(self):
+        VistaInvestigaciones(self.root, self.investigaciones, lambda: self._encolar_vigilancia(todas=True))
+
+    def _programar_vigilancia(self):
+        # Comprobar si hay algo vencido es una consulta a SQLite; solo se encola si lo hay
+        if self._cierre is None:
+            if self._investigaciones is not None or os.path.exists(ruta_datos(INVESTIGACIONES_FILE)):
+                if self.investigaciones.vencidas():
+                    self._encolar_vigilancia()
+            self.root.after(INTERVALO_VIGILANCIA_MS, self._programar_vigilancia)
+
+    def _encolar_vigilancia(self, todas=False):
+        en_curso = self._vigilancia_en_curso
+        if en_curso is not None and en_curso.estado in (EN_COLA, EJECUTANDO):
+            return
+        self._vigilancia_en_curso = self._encolar("Vigilancia", self._ejecutar_vigilancia, todas, prioridad=NORMAL)
+
+    def _ejecutar_vigilancia(self, todas):
+        self._fijar_contexto("vigilancia", "lista")
+        eventos = comprobar_vigiladas(self.investigaciones, self.consultor, self._mostrar_evento_vigilancia, todas=todas)
+        if eventos:
+            cambios = sum(e["resultado"] == "cambios" for e in eventos)
+            self._mostrar_resultado(f"👁️ Vigilancia: {len(eventos)} comprobaciones, {cambios} con cambios.\n", "info")
+
+    def _mostrar_evento_vigilancia(self, evento):
+        self._avanzar()
+        prefijo = f"👁️ {evento['entidad']} · {evento['proveedor']}"
+        resultado = evento["resultado"]
+        if resultado == "error":
+            self._mostrar_resultado(f"{prefijo}: ❌ {evento['error']}\n", "error", proveedor=evento["proveedor"], entidad=evento["entidad"])
+        elif resultado == "cambios":
+            lineas = describir_diferencias(evento["diferencias"])
+            self._mostrar_resultado(f"{prefijo}: 🔔 ha cambiado\n" + "".join(f"   {l}\n" for l in lineas), "success",
+                                    proveedor=evento["proveedor"], entidad=evento["entidad"])
+        elif resultado == "nueva":
+            self._mostrar_resultado(f"{prefijo}: primera comprobación guardada\n", "info", proveedor=evento["proveedor"], entidad=evento["entidad"])
+
+    def _mostrar_resultado(self, texto, tags=None, proveedor=None, url=None, entidad=None):
+        """
+        Encola texto (con sus tags) para el área de resultados. Se puede llamar desde cualquier hilo.
+        Si se pasa url, la fila queda como enlace clicable. Si el trabajo que muestra el texto
+        se ha cancelado, se interrumpe aquí (cada salida es un punto de cancelación).
+        """
+        comprobar_cancelacion()
+        proveedor = proveedor or getattr(self._contexto, "proveedor", None)
+        entidad = entidad or getattr(self._contexto, "entidad", None)
+        self._cola_ui.put((texto, tags, proveedor, entidad, url))
+
+    def _drenar_cola_ui(self):
+        """
+        Se ejecuta en el hilo principal cada INTERVALO_UI_MS: vuelca todo lo pendiente
+        en una sola inserción y hace un único scroll, en vez de una llamada por línea.
+        """
+        inicio = time.perf_counter()
+        self.metricas.fijar("ui_cola", self._cola_ui.qsize())
+        filas = []
+        try:
+            for _ in range(MAX_INSERCIONES_POR_FRAME):
+                texto, tags, proveedor, entidad, url = self._cola_ui.get_nowait()
+                if isinstance(tags, str):
+                    tags = (tags,)
+                estado = next((t for t in tags or () if t in COLORES_ESTADO), "normal")
+                for linea in texto.splitlines():
+                    if linea.strip():
+                        filas.append((proveedor, entidad, estado, linea, url))
+        except queue.Empty:
+            pass
+        try:
+            if filas:
+                self.almacen.agregar_lote(filas)
+                self.vista_resultado.refrescar()
+                self.metricas.incrementar("ui_filas", len(filas))
+                self.metricas.observar("ui_volcado_segundos", time.perf_counter() - inicio)
+        finally:
+            # Aunque falle un volcado (SQLite, TclError) el panel sigue vaciando la cola
+            self.root.after(INTERVALO_UI_MS, self._drenar_cola_ui)
 
-    def _ejecutar_en_hilo(self, funcion, *args):
-        hilo = threading.Thread(target=funcion, args=args, daemon=True)
-        hilo.start()
-
-    def _mostrar_resultado(self, texto, tags=None):
-        """Inserta texto en el área de resultados y hace scroll al final, aceptando tags."""
-        # Usamos .after para asegurar que la actualización de la UI se hace en el hilo principal
-        self.root.after(0, lambda: self._insertar_en_ui(texto, tags))
-
-    def _insertar_en_ui(self, texto, tags):
-        """Función auxiliar para insertar texto en el scrolledtext desde el hilo principal."""
-        self.text_resultado.insert(tk.END, texto)
-        if tags:
-            # Apply tags from the start of the inserted text to the end
-            start_index = f"{self.text_resultado.index(tk.END)} - {len(texto)}c"
-            end_index = self.text_resultado.index(tk.END)
-            # Check if tags is a single string or a tuple/list of strings
-            if isinstance(tags, str):
-                self.text_resultado.tag_add(tags, start_index, end_index)
-            else: # Assume it's an iterable of tags
-                for tag in tags:
-                    self.text_resultado.tag_add(tag, start_index, end_index)
-        self.text_resultado.see(tk.END)
+    def _mostrar_estadisticas(self):
+        VistaMetricas(self.root, self.metricas, self._cola_ui, self.consultor.motor.limitador)
 
 
     def _limpiar_resultado(self):
-        self.text_resultado.delete(1.0, tk.END)
-        self.link_map.clear() # Limpiar el mapa de enlaces también
+        self.almacen.limpiar()
+        self.vista_resultado.refrescar()
 
     def _configurar_apis(self):
         ventana = tk.Toplevel(self.root)
         ventana.title("Configurar Claves API")
-        ventana.geometry("400x550")
+        ventana.geometry("400x750")
         ventana.transient(self.root)
         ventana.grab_set()
         
@@ -130,14 +273,17 @@ class WicOsintXApp:
             ventana.destroy()
 
         api_keys_list = [
-            "veriphone", "abstractapi", "shodan", "dehashed_user",
+            "ipinfo", "veriphone", "abstractapi", "pais_telefono", "shodan", "dehashed_user",
             "dehashed_pass", "abstractapi_email", "abstractapi_ip",
             "censys_uid", "censys_secret"
         ]
 
+        tk.Label(ventana, text="Varias claves separadas por comas: se reparten las peticiones entre ellas.",
+                 fg="gray").pack(pady=2, anchor=tk.W, padx=10)
         for i, clave in enumerate(api_keys_list):
             tk.Label(ventana, text=f"{clave}:").pack(pady=2, anchor=tk.W, padx=10)
-            var = tk.StringVar(value=self.apis.get(clave, ""))
+            valor = self.apis.get(clave, "")
+            var = tk.StringVar(value=", ".join(valor) if isinstance(valor, list) else valor)
             entry = tk.Entry(ventana, textvariable=var, width=50)
             entry.pack(pady=2, padx=10)
             api_entries_vars[clave] = var
@@ -147,11 +293,20 @@ class WicOsintXApp:
             menu.add_command(label="Pegar", command=lambda e=entry: e.event_generate("<<Paste>>"))
             entry.bind("<Button-3>", lambda event, m=menu: m.tk_popup(event.x_root, event.y_root))
 
+        var_sin_cache = tk.BooleanVar(value=bool(self.apis.get("sin_cache", False)))
+        tk.Checkbutton(ventana, text="Ignorar caché (consultar siempre la API)", variable=var_sin_cache).pack(pady=4, anchor=tk.W, padx=10)
+        api_entries_vars["sin_cache"] = var_sin_cache
+
+        def vaciar_cache():
+            self.consultor.cache.limpiar()
+            messagebox.showinfo("Caché", "Caché de respuestas vaciada", parent=ventana)
+
+        tk.Button(ventana, text="Vaciar Caché", command=vaciar_cache).pack(pady=2)
         tk.Button(ventana, text="Guardar Claves", command=guardar, bg="#4CAF50", fg="white").pack(pady=15)
         ventana.protocol("WM_DELETE_WINDOW", lambda: self.root.grab_release() or ventana.destroy())
 
 
-    def _crear_ventana_input(self, titulo, accion_callback):
+    def _crear_ventana_input(self, titulo, accion_callback, prioridad=INTERACTIVA):
         ventana_input = tk.Toplevel(self.root)
         ventana_input.title(titulo)
         ventana_input.geometry("350x150")
@@ -166,8 +321,8 @@ class WicOsintXApp:
         def ejecutar_y_cerrar():
             dato = entrada_dato.get().strip()
             if dato:
-                self._ejecutar_en_hilo(accion_callback, dato)
-                ventana_input.destroy()
+                if self._encolar(f"{titulo}: {dato}", accion_callback, dato, prioridad=prioridad):
+                    ventana_input.destroy()
             else:
                 messagebox.showwarning("Campo Vacío", "Por favor, introduce un dato.", parent=ventana_input)
 
@@ -179,94 +334,53 @@ class WicOsintXApp:
         self._mostrar_resultado(msg + "\n", "error")
         messagebox.showwarning("API no configurada", msg, parent=parent_window if parent_window else self.root)
         return False
-        
+
     # --- MÓDULO BÚSQUEDA DE PERSONAS (MEJORADO) ---
     def _ejecutar_busqueda_persona(self, query):
         """
-        MODIFICADO: Realiza búsquedas más específicas y reporta el estado de conexión
-        a la página de resultados.
+        Lanza a la vez las búsquedas y dorks de buscadores_persona() y muestra, según
+        terminan, si cada página de resultados es accesible.
         """
+        self._fijar_contexto("persona", query)
         self._mostrar_resultado(f"\n[Búsqueda Persona] Iniciando búsqueda para: \"{query}\"\n" + "="*50 + "\n", "info")
-        query_encoded = quote_plus(f'"{query}"') # Codifica la consulta para URL, con comillas para búsqueda exacta
-
-        # Definimos los "buscadores" con sus dorks o URLs de búsqueda directa
-        # Hemos cambiado algunos para usar dorks de Google que son más efectivos para "buscar en 50 páginas"
-        # y hemos añadido comentarios sobre la expectativa de "encontrado/no encontrado"
-        buscadores_y_dorks = [
-            # Buscadores generales (la "presencia" se basa en si el buscador devuelve una página de resultados)
-            {"nombre": "Google (General)", "url": f"https://www.google.com/search?q={query_encoded}", "tipo": "general"},
-            {"nombre": "Google (PDFs/Docs)", "url": f"https://www.google.com/search?q=filetype:pdf+OR+filetype:doc+OR+filetype:docx+OR+filetype:xls+OR+filetype:xlsx+{query_encoded}", "tipo": "general"},
-            {"nombre": "DuckDuckGo", "url": f"https://duckduckgo.com/?q={query_encoded}", "tipo": "general"},
-            {"nombre": "Bing", "url": f"https://www.bing.com/search?q={query_encoded}", "tipo": "general"},
-
-            # Redes Sociales (búsqueda directa o dorks específicos)
-            {"nombre": "LinkedIn", "url": f"https://www.linkedin.com/search/results/all/?keywords={query_encoded}", "tipo": "social"},
-            {"nombre": "Facebook", "url": f"https://www.facebook.com/search/top/?q={query_encoded}", "tipo": "social"},
-            {"nombre": "Twitter / X", "url": f"https://twitter.com/search?q={query_encoded}&src=typed_query", "tipo": "social"},
-            {"nombre": "Instagram (Google Dork)", "url": f"https://www.google.com/search?q=site:instagram.com+{query_encoded}", "tipo": "social"},
-            {"nombre": "Reddit (Google Dork)", "url": f"https://www.google.com/search?q=site:reddit.com+{query_encoded}", "tipo": "social"},
-            {"nombre": "TikTok (Google Dork)", "url": f"https://www.google.com/search?q=site:tiktok.com+{query_encoded}", "tipo": "social"},
-            {"nombre": "YouTube (Google Dork)", "url": f"https://www.google.com/search?q=site:youtube.com+{query_encoded}", "tipo": "social"},
-
-            # Registros Oficiales / Públicos (España)
-            {"nombre": "BOE (Boletín Oficial)", "url": f"https://www.boe.es/buscar/boe.php?campo%5B1%5D=DOC&operador%5B1%5D=and&texto%5B1%5D={query_encoded}", "tipo": "official"},
-            {"nombre": "Noticias (Google News)", "url": f"https://news.google.com/search?q={query_encoded}&hl=es&gl=ES&ceid=ES:es", "tipo": "news"},
-            
-            # Otros recursos útiles (más genéricos o especializados)
-            {"nombre": "Pastebin (Google Dork)", "url": f"https://www.google.com/search?q=site:pastebin.com+{query_encoded}", "tipo": "other"},
-            {"nombre": "GitHub (Google Dork)", "url": f"https://www.google.com/search?q=site:github.com+{query_encoded}", "tipo": "other"},
-            {"nombre": "Stack Overflow (Google Dork)", "url": f"https://www.google.com/search?q=site:stackoverflow.com+{query_encoded}", "tipo": "other"},
-            {"nombre": "Foros España (Google Dork)", "url": f"https://www.google.com/search?q=site:.es+foro+{query_encoded}", "tipo": "other"},
-            {"nombre": "Blogs Personales (Google Dork)", "url": f"https://www.google.com/search?q=blog+personal+{query_encoded}", "tipo": "other"},
-        ]
-        
-        # Una lista para almacenar hilos
-        threads = []
-        for i, item in enumerate(buscadores_y_dorks):
-            thread = threading.Thread(target=self._realizar_busqueda_web, args=(item['nombre'], item['url'], i))
-            threads.append(thread)
-            thread.start()
-            # Opcional: Introducir un pequeño retraso para no saturar los servidores
-            time.sleep(0.1) 
-        
-        # Opcional: Esperar a que todos los hilos terminen si necesitas un mensaje final consolidado
-        # for thread in threads:
-        #     thread.join()
+        buscadores_y_dorks = buscadores_persona(query)
 
-        self._mostrar_resultado("\n" + "="*50 + "\n✅ Búsquedas iniciadas. Haz clic en los enlaces para revisar los resultados. El estado indica la conectividad.\n", "info")
+        # Todas las consultas salen a la vez por el motor compartido (que limita la
+        # concurrencia por host) y se muestran según van terminando.
+        futuros = {}
+        for item in buscadores_y_dorks:
+            self._mostrar_resultado(f"-> [{item['nombre']}] Consultando...\n", "pending", proveedor=item['nombre'])
+            futuros[self.consultor.motor.solicitar("GET", item['url'], timeout=10)] = (item['nombre'], item['url'])
 
+        for futuro in as_completed(futuros):
+            nombre_sitio, url = futuros[futuro]
+            self._realizar_busqueda_web(nombre_sitio, url, futuro)
 
-    def _realizar_busqueda_web(self, nombre_sitio, url, index):
+        self._mostrar_resultado("\n" + "="*50 + "\n✅ Búsquedas completadas. Haz clic en los enlaces para revisar los resultados. El estado indica la conectividad.\n", "info")
+
+
+    def _realizar_busqueda_web(self, nombre_sitio, url, futuro):
         """
-        Intenta acceder a la URL y reporta el estado. No intenta parsear el contenido
+        Reporta el estado de la petición ya lanzada para la URL. No intenta parsear el contenido
         para determinar si el 'query' está presente, solo si la página de búsqueda
         o el perfil existe/es accesible.
         """
-        status_text = f"[{nombre_sitio}] Consultando..."
-        # Usamos _insertar_en_ui directamente desde aquí para mostrar el estado inicial
-        # Creamos una etiqueta única para cada enlace para poder actualizar el texto
-        temp_tag = f"temp-link-{index}"
-        self._mostrar_resultado(f"-> {status_text}\n", ("pending", temp_tag))
-        
-        # Guardamos la URL en el link_map usando la misma etiqueta que será permanente
-        final_link_tag = f"link-{index}"
-        self.link_map[final_link_tag] = url
-
+        import requests  # ya cargado por el motor al lanzar la petición
+        enlace = None
         try:
-            # Intentamos obtener la página. Un HEAD es más rápido, pero un GET podría ser necesario
-            # para algunos sitios que redirigen o solo muestran contenido relevante con GET.
-            # Sin embargo, para "buscar si hay algo", GET es más apropiado aunque más lento.
-            response = requests.get(url, timeout=10) # Aumentamos el timeout un poco
+            response = futuro.result()
             
             if 200 <= response.status_code < 300: # Éxito (incluye 200 OK y 2xx success)
                 # Para Google y DuckDuckGo, un 200 OK ya significa que la búsqueda se realizó.
                 # Para redes sociales, un 200 OK significa que el URL del perfil (o la búsqueda) fue accesible.
                 # No podemos saber si "hay" el dato sin parsing avanzado.
                 message = f"✅ {nombre_sitio}: Accesible. (Haz clic para ver resultados)"
-                tags = ("success", "link", final_link_tag)
+                tags = "success"
+                enlace = url
             elif 300 <= response.status_code < 400: # Redirección
                 message = f"➡️ {nombre_sitio}: Redirección ({response.status_code}). (Haz clic)"
-                tags = ("info", "link", final_link_tag)
+                tags = "info"
+                enlace = url
             elif response.status_code == 404: # No encontrado (podría indicar "usuario no existe" en algunos perfiles directos)
                 message = f"❌ {nombre_sitio}: No encontrado (404). Posiblemente sin resultados."
                 tags = "not_found"
@@ -287,50 +401,110 @@ class WicOsintXApp:
             message = f"🚨 {nombre_sitio}: Error inesperado: {e}. (URL: {url})"
             tags = "error"
 
-        # Actualiza el texto en la UI.
-        # Primero, busca el texto temporal que insertamos.
-        # Esto es un poco más complejo porque ScrolledText no tiene un "update_by_tag_name" directo.
-        # La forma más robusta es re-insertar el texto con la nueva etiqueta, o modificarlo si es un solo elemento.
-        # Para simplificar y dado que los resultados van en orden, simplemente mostraremos el resultado final.
-        # Una alternativa más avanzada sería usar un widget Treeview o Label/Button por cada resultado.
-        
-        # Para este ejemplo, simplemente re-escribimos la línea que se acaba de imprimir,
-        # o agregamos una nueva línea con el resultado final.
-        # La forma más limpia en Tkinter con ScrolledText es eliminar y re-insertar o insertar una nueva línea final.
-        # Vamos a insertar una nueva línea final con el estado, haciendo que la primera línea "Consultando" quede como una pista.
-        self.root.after(0, lambda: self._actualizar_linea_resultado(index, f"-> {message}\n", tags))
+        # La línea "Consultando..." queda como pista y debajo se añade el resultado final
+        self._mostrar_resultado(f"-> {message}\n", tags, proveedor=nombre_sitio, url=enlace)
 
 
-    def _actualizar_linea_resultado(self, index, new_text, tags):
-        """
-        Busca la línea de "Consultando..." para un índice específico y la reemplaza/actualiza.
-        Esto es un hack para ScrolledText. Una mejor UX podría ser una tabla o listbox.
-        """
-        # Encuentra la posición inicial del texto temporal para este índice
-        # Esto asume que cada búsqueda tiene un índice único y que no hay muchos cambios en el texto
-        # Si el scrolledtext es muy largo o se actualiza mucho, esto puede ser ineficiente.
-        # Un enfoque más robusto para una UI interactiva con muchos elementos sería usar un Treeview.
-
-        # Eliminar la línea "Consultando..." y reinsertar la línea final
-        # Encuentra el inicio y fin de la línea que contiene el tag temporal
-        # Esto es más fácil si cada resultado tiene su propia línea dedicada y sabemos su inicio.
-        
-        # Una forma más sencilla para ScrolledText es simplemente añadir el resultado final
-        # justo después de la línea de "Consultando..." que se insertó inicialmente.
-        # La línea "Consultando..." quedará arriba, y debajo su resultado final.
-        self._mostrar_resultado(new_text, tags)
+    # --- FICHA DE ENTIDAD (TODOS LOS PROVEEDORES A LA VEZ) ---
+    def _ejecutar_ficha_entidad(self, tipo, valor):
+        self._fijar_contexto("ficha", valor)
+        proveedores = proveedores_configurados(tipo, self.apis)
+        if not proveedores:
+            return self._mostrar_error_api(f"ningún proveedor de {tipo}")
+        nombres = ", ".join(p["nombre"] for p in proveedores)
+        self._mostrar_resultado(f"\n[Ficha {tipo}] Consultando {valor} en paralelo: {nombres}...\n", "info")
+        ficha = consultar_entidad(self.consultor, tipo, valor, self._mostrar_avance_ficha, proveedores)
+
+        campos = ficha.campos()
+        if "latitud" in campos and "longitud" in campos:
+            gps = {"latitud": campos["latitud"][0], "longitud": campos["longitud"][0]}
+            self._mostrar_resultado("📍 Ver ubicación en el mapa (Haz clic)\n", "info", url=self._url_mapa(gps))
+        for campo, valores in ficha.discrepancias().items():
+            detalle = " / ".join(f"{self._formatear_valor(v)} ({p})" for p, v in valores.items())
+            self._mostrar_resultado(f"⚠️ Los proveedores no coinciden en {campo}: {detalle}\n", "info")
+        if ficha.omitidos:
+            self._mostrar_resultado(f"⏭️ Sin consultar (nada nuevo que aportar): {', '.join(ficha.omitidos)}\n", "info")
+        respondieron = len(ficha.orden) - len(ficha.errores) - len(ficha.omitidos)
+        self._mostrar_resultado(
+            f"✅ Ficha completa: {len(campos)} campos de {respondieron}/{len(ficha.orden)} proveedores "
+            f"en {max(ficha.duraciones.values(), default=0):.1f}s.\n", "success" if respondieron else "error")
+
+    def _mostrar_avance_ficha(self, ficha, proveedor, cambios):
+        """Se llama según contesta cada proveedor: la primera respuesta pinta la ficha, las demás la completan."""
+        ms = ficha.duraciones[proveedor] * 1000
+        if cambios is None:
+            self._mostrar_resultado(f"-> ❌ {proveedor} ({ms:.0f} ms): {ficha.errores[proveedor]}\n", "error", proveedor=proveedor)
+            return
+        primera = len(ficha.duraciones) - len(ficha.errores) == 1
+        resumen = "ficha inicial" if primera else (f"{len(cambios)} campos nuevos o corregidos" if cambios else "sin datos nuevos")
+        self._mostrar_resultado(f"-> ✅ {proveedor} ({ms:.0f} ms): {resumen}\n", "success", proveedor=proveedor)
+        for campo, (valor, fuente) in sorted(cambios.items()):
+            self._mostrar_resultado(f"   {campo}: {self._formatear_valor(valor)}   [{fuente}]\n", proveedor=fuente)
+
+    @staticmethod
+    def _formatear_valor(valor):
+        if isinstance(valor, bool):
+            return "Sí" if valor else "No"
+        if isinstance(valor, (list, tuple)):
+            return ", ".join(str(v) for v in valor)
+        return str(valor)
+
+    # --- PIVOTES: GRAFO DE INVESTIGACIÓN ---
+    def _ejecutar_pivotes(self, semilla):
+        tipo = detectar_tipo(semilla)
+        self._fijar_contexto("pivotes", semilla)
+        self._mostrar_resultado(
+            f"\n[Pivotes] Expandiendo {semilla} ({tipo}): hasta {PROFUNDIDAD_POR_DEFECTO} saltos "
+            f"y {MAX_PETICIONES_POR_DEFECTO} consultas...\n", "info")
+        inicio = time.monotonic()
+        try:
+            grafo = expandir(self.consultor, semilla, tipo, al_avanzar=self._mostrar_avance_pivotes)
+        except Exception as e:
+            self._mostrar_resultado(f"❌ Error inesperado: {e}\n", "error")
+            return
+        self._ultimo_grafo = grafo
+        resumen = ", ".join(f"{n} {tipo_n}" for tipo_n, n in grafo.resumen().items())
+        self._mostrar_resultado(
+            f"✅ Grafo: {len(grafo)} entidades ({resumen}), {grafo.num_aristas} relaciones, "
+            f"{grafo.peticiones} consultas en {time.monotonic() - inicio:.1f}s.\n", "success")
+        if grafo.sin_explorar:
+            self._mostrar_resultado(f"⏸️ {grafo.sin_explorar} entidades sin explorar por el límite de consultas.\n", "info")
+        self._mostrar_resultado("💾 Usa 'Exportar grafo' para guardarlo como GraphML o JSON.\n", "info")
 
+    def _mostrar_avance_pivotes(self, evento):
+        self._avanzar()
+        prefijo = f"-> [{evento['profundidad']}] {evento['proveedor']} {evento['valor']}"
+        if evento["error"]:
+            self._mostrar_resultado(f"{prefijo}: ❌ {evento['error']}\n", "error", proveedor=evento["proveedor"])
+            return
+        nuevas = evento["nuevas"]
+        self._mostrar_resultado(f"{prefijo}: {len(nuevas)} entidades nuevas\n", "success" if nuevas else "not_found",
+                                proveedor=evento["proveedor"])
+        for tipo, valor, relacion in nuevas[:20]:
+            self._mostrar_resultado(f"   {relacion}: {valor} ({tipo})\n", proveedor=evento["proveedor"],
+                                    url=valor if tipo == "perfil" else None)
+        if len(nuevas) > 20:
+            self._mostrar_resultado(f"   ... y {len(nuevas) - 20} más\n", proveedor=evento["proveedor"])
 
-    # --- Resto de funciones de Análisis y Menús (sin cambios, solo se pegan para completar el código) ---
+    def _exportar_grafo(self):
+        if self._ultimo_grafo is None:
+            messagebox.showinfo("Grafo", "Todavía no hay ningún grafo: usa antes 'Pivotar'.")
+            return
+        ruta = filedialog.asksaveasfilename(defaultextension=".graphml", initialfile="grafo_wicosintx.graphml",
+                                            filetypes=[("GraphML", "*.graphml"), ("JSON", "*.json")])
+        if not ruta:
+            return
+        try:
+            self._ultimo_grafo.exportar(ruta)
+        except OSError as e:
+            messagebox.showerror("Error", f"No se pudo exportar el grafo: {e}")
 
     def _ejecutar_analisis_ip_ipinfo(self, ip):
+        self._fijar_contexto("ipinfo", ip)
         self._mostrar_resultado(f"\n[ipinfo.io] Buscando información para {ip}...\n")
         try:
-            resp = requests.get(f"https://ipinfo.io/{ip}/json", timeout=10)
-            if resp.status_code != 200:
-                self._mostrar_resultado(f"❌ Error HTTP {resp.status_code}: {resp.text}\n", "error")
-                return
-            data = resp.json()
+            data = self.consultor.ipinfo(ip)
+            self._registrar(data)
             resultado = (
                 f"IP: {data.get('ip')}\nHostname: {data.get('hostname', 'N/A')}\n"
                 f"Ciudad: {data.get('city')}\nRegión: {data.get('region')}\n"
@@ -339,21 +513,18 @@ class WicOsintXApp:
                 f"ASN: {data.get('asn', {}).get('asn', 'N/A') if isinstance(data.get('asn'), dict) else 'N/A'}\n"
             )
             self._mostrar_resultado(resultado, "success")
-        except requests.exceptions.RequestException as e:
-            self._mostrar_resultado(f"❌ Error de conexión: {e}\n", "error")
+        except ErrorConsulta as e:
+            self._mostrar_resultado(f"❌ {e}\n", "error")
         except Exception as e:
             self._mostrar_resultado(f"❌ Error inesperado: {e}\n", "error")
 
     def _ejecutar_geolocalizar_ip_abstractapi(self, ip):
-        api_key = self.apis.get("abstractapi_ip")
-        if not api_key: return self._mostrar_error_api("AbstractAPI (IP)")
+        self._fijar_contexto("abstractapi_ip", ip)
+        if not self.apis.get("abstractapi_ip"): return self._mostrar_error_api("AbstractAPI (IP)")
         self._mostrar_resultado(f"\n[AbstractAPI] Geolocalizando IP: {ip}...\n")
         try:
-            resp = requests.get(f"https://ipgeolocation.abstractapi.com/v1/?api_key={api_key}&ip_address={ip}", timeout=10)
-            if resp.status_code != 200:
-                self._mostrar_resultado(f"❌ Error HTTP {resp.status_code}: {resp.text}\n", "error")
-                return
-            data = resp.json()
+            data = self.consultor.abstractapi_ip(ip)
+            self._registrar(data)
             resultado = (
                 f"IP: {data.get('ip_address')}\nPaís: {data.get('country')} ({data.get('country_code')})\n"
                 f"Región: {data.get('region')}, Ciudad: {data.get('city')}\n"
@@ -361,21 +532,18 @@ class WicOsintXApp:
                 f"ISP: {data.get('connection', {}).get('isp_name', 'N/A')}\n"
             )
             self._mostrar_resultado(resultado, "success")
-        except requests.exceptions.RequestException as e:
-            self._mostrar_resultado(f"❌ Error de conexión: {e}\n", "error")
+        except ErrorConsulta as e:
+            self._mostrar_resultado(f"❌ {e}\n", "error")
         except Exception as e:
             self._mostrar_resultado(f"❌ Error inesperado: {e}\n", "error")
 
     def _ejecutar_analisis_shodan(self, ip):
-        api_key = self.apis.get("shodan")
-        if not api_key: return self._mostrar_error_api("Shodan")
+        self._fijar_contexto("shodan", ip)
+        if not self.apis.get("shodan"): return self._mostrar_error_api("Shodan")
         self._mostrar_resultado(f"\n[Shodan] Buscando información para {ip}...\n")
         try:
-            resp = requests.get(f"https://api.shodan.io/shodan/host/{ip}?key={api_key}", timeout=15)
-            if resp.status_code != 200:
-                self._mostrar_resultado(f"❌ Error Shodan HTTP {resp.status_code}: {resp.json().get('error', resp.text)}\n", "error")
-                return
-            data = resp.json()
+            data = self.consultor.shodan(ip)
+            self._registrar(data)
             resultado = (
                 f"IP: {data.get('ip_str', 'N/A')}\nOrganización: {data.get('org', 'N/A')}\n"
                 f"ISP: {data.get('isp', 'N/A')}\nPaís: {data.get('country_name', 'N/A')}\n"
@@ -383,75 +551,219 @@ class WicOsintXApp:
                 f"Puertos abiertos: {data.get('ports', ['N/A'])}\n"
             )
             self._mostrar_resultado(resultado, "success")
-        except requests.exceptions.RequestException as e:
-            self._mostrar_resultado(f"❌ Error de conexión: {e}\n", "error")
+        except ErrorConsulta as e:
+            self._mostrar_resultado(f"❌ {e}\n", "error")
+        except Exception as e:
+            self._mostrar_resultado(f"❌ Error inesperado: {e}\n", "error")
+
+    def _ejecutar_ip_local(self, ip):
+        self._fijar_contexto("ip_local", ip)
+        self._mostrar_resultado(f"\n[Base local] Buscando {ip} sin salir a la red...\n")
+        try:
+            data = self.consultor.ip_local(ip)
+            resultado = "".join(f"{campo}: {self._formatear_valor(valor)}\n" for campo, valor in data.items() if campo != "ip")
+            self._mostrar_resultado(resultado, "success")
+            if data.get("latitud") is not None and data.get("longitud") is not None:
+                self._mostrar_resultado("📍 Ver ubicación en el mapa (Haz clic)\n", "info", url=self._url_mapa(data))
+        except ErrorConsulta as e:
+            self._mostrar_resultado(f"❌ {e}\n", "error")
+        except Exception as e:
+            self._mostrar_resultado(f"❌ Error inesperado: {e}\n", "error")
+
+    def _ejecutar_ips_rango(self, texto):
+        from lote import procesar_lote
+        from rangos_ip import contar, expandir
+        self._fijar_contexto("rango_ip", texto)
+        try:
+            total = contar(texto)
+        except ValueError as e:
+            self._mostrar_resultado(f"❌ {e}\n", "error")
+            return
+        if total > MAX_IPS_RANGO:
+            self._mostrar_resultado(f"❌ {total} direcciones: la ventana admite hasta {MAX_IPS_RANGO}; usa lote.py para más.\n", "error")
+            return
+        proveedores = ["ipinfo"] + (["ip_local"] if any(p["nombre"] == "ip_local" for p in proveedores_configurados("ip", self.apis)) else [])
+        por_lotes = [p for p in proveedores if self.consultor.tamano_lote(p)]
+        if "ipinfo" not in por_lotes and total > MAX_IPS_RANGO_SIN_LOTES:
+            self._mostrar_resultado(
+                f"❌ {total} direcciones: sin token de ipinfo se consultan de una en una y la ventana admite hasta "
+                f"{MAX_IPS_RANGO_SIN_LOTES}; configura el token para usar lotes o usa lote.py.\n", "error")
+            return
+        self._mostrar_resultado(
+            f"\n[IPs] {total} direcciones con {', '.join(proveedores)}"
+            f"{' (por lotes: ' + ', '.join(por_lotes) + ')' if por_lotes else ''}...\n", "info")
+        inicio = time.monotonic()
+        correctos = fallidos = 0
+        entradas = ((1, ip) for ip in expandir(texto))
+        try:
+            for registros in procesar_lote(entradas, self.consultor, "ip", proveedores, concurrencia=CONCURRENCIA_RANGO):
+                self._avanzar(len(registros), total * len(proveedores))
+                for registro in registros:
+                    ip, proveedor = registro["entrada"], registro["proveedor"]
+                    if registro["estado"] == "error":
+                        fallidos += 1
+                        self._mostrar_resultado(f"❌ {ip}: {registro['error']}\n", "error", proveedor=proveedor)
+                        continue
+                    correctos += 1
+                    datos = registro["datos"]
+                    pais = datos.get("country") or datos.get("codigo_pais") or "N/A"
+                    organizacion = datos.get("org") or datos.get("organizacion") or "N/A"
+                    self._mostrar_resultado(f"✅ {ip}: {pais} · {organizacion}\n", "success", proveedor=proveedor)
         except Exception as e:
             self._mostrar_resultado(f"❌ Error inesperado: {e}\n", "error")
+            return
+        self._mostrar_resultado(
+            f"✅ {correctos} respuestas ({fallidos} con error) en {time.monotonic() - inicio:.1f}s.\n",
+            "success" if correctos else "error")
+
+    def _importar_base_ip(self):
+        rutas = filedialog.askopenfilenames(title="CSV de rangos de IP (ipinfo, GeoLite2, IP2Location...)",
+                                            filetypes=[("CSV", "*.csv"), ("Todos", "*.*")])
+        if rutas:
+            self._encolar("Importar base de IPs", self._importar_base_ip_thread, list(rutas), prioridad=MASIVA)
+
+    def _importar_base_ip_thread(self, rutas):
+        self._fijar_contexto("ip_local", "importar")
+        self._mostrar_resultado(f"\n[Base local] Importando {len(rutas)} fichero(s); puede tardar unos segundos...\n", "info")
+        try:
+            metadatos = self.consultor.importar_base_ip(rutas)
+        except ErrorConsulta as e:
+            self._mostrar_resultado(f"❌ {e}\n", "error")
+            return
+        except Exception as e:
+            self._mostrar_resultado(f"❌ Error inesperado: {e}\n", "error")
+            return
+        self._mostrar_resultado(
+            f"✅ Base de IPs lista: {metadatos['prefijos']} prefijos, {metadatos['nodos']} nodos, "
+            f"campos: {', '.join(metadatos['campos'])}.\n", "success")
 
     def _ejecutar_analisis_dominio(self, dominio):
+        self._fijar_contexto("whois", dominio)
         self._mostrar_resultado(f"\n[Dominio] Consultando WHOIS para {dominio}...\n")
         try:
-            salida = subprocess.getoutput(f"whois {dominio}")
-            if salida.strip():
-                self._mostrar_resultado(salida + "\n", "success")
-            else:
+            datos = self.consultor.whois(dominio)
+            if not datos["texto"].strip():
                 self._mostrar_resultado("❌ No se encontraron resultados WHOIS.\n", "not_found")
-        except FileNotFoundError:
-            self._mostrar_resultado("❌ Error: 'whois' no encontrado. Asegúrate de tenerlo instalado.\n", "error")
+                return
+            self._registrar(datos)
+            campos = datos["campos"]
+            resultado = (
+                f"Dominio: {campos.get('dominio', datos['dominio'])}\nServidores WHOIS: {' -> '.join(datos['servidores'])}\n"
+                f"Registrador: {campos.get('registrador', 'N/A')}\nRegistrante: {campos.get('registrante', 'N/A')} ({campos.get('pais', 'N/A')})\n"
+                f"Creado: {campos.get('creado', 'N/A')}\nExpira: {campos.get('expira', 'N/A')}\n"
+                f"Servidores de nombres: {', '.join(campos['servidores_nombre']) or 'N/A'}\n"
+                f"Emails: {', '.join(campos['emails']) or 'N/A'}\n"
+            )
+            self._mostrar_resultado(resultado, "success")
+            self._mostrar_resultado(datos["texto"] + "\n")
+        except ErrorConsulta as e:
+            self._mostrar_resultado(f"❌ Error en la consulta WHOIS: {e}\n", "error")
         except Exception as e:
-            self._mostrar_resultado(f"❌ Error al ejecutar WHOIS: {e}\n", "error")
+            self._mostrar_resultado(f"❌ Error inesperado: {e}\n", "error")
 
     def _ejecutar_analisis_email_dehashed(self, email):
-        api_user = self.apis.get("dehashed_user")
-        api_pass = self.apis.get("dehashed_pass")
-        if not api_user or not api_pass: return self._mostrar_error_api("Dehashed (usuario/contraseña)")
+        self._fijar_contexto("dehashed", email)
+        if not self.apis.get("dehashed_user") or not self.apis.get("dehashed_pass"): return self._mostrar_error_api("Dehashed (usuario/contraseña)")
         self._mostrar_resultado(f"\n[Dehashed] Buscando filtraciones para {email}...\n")
         try:
-            resp = requests.get(f"https://api.dehashed.com/search?query=email:{email}", auth=(api_user, api_pass), timeout=10)
-            if resp.status_code != 200:
-                self._mostrar_resultado(f"❌ Error HTTP {resp.status_code}: {resp.text}\n", "error")
-                return
-            data = resp.json()
-            if data.get("total", 0) == 0:
-                self._mostrar_resultado("✅ No se encontraron filtraciones para este correo.\n", "not_found")
-                return
-            resultado = f"❗ Se encontraron {data.get('total')} registros en Dehashed:\n"
-            for r in data.get("entries", [])[:5]:
-                resultado += f"- Usuario: {r.get('username', 'N/A')}, Email: {r.get('email', 'N/A')}, Hash: {r.get('hashed_password', 'N/A')}\n"
-            self._mostrar_resultado(resultado, "success")
-        except requests.exceptions.RequestException as e:
-            self._mostrar_resultado(f"❌ Error de conexión: {e}\n", "error")
+            recibidas = []
+            for total, entradas in self.consultor.dehashed_paginas(email):
+                if not total:
+                    self._registrar({"total": 0, "entries": []})
+                    self._mostrar_resultado("✅ No se encontraron filtraciones para este correo.\n", "not_found")
+                    return
+                if not recibidas:
+                    self._mostrar_resultado(f"❗ Se encontraron {total} registros en Dehashed:\n", "success")
+                recibidas.extend(entradas)
+                resultado = "".join(
+                    f"- Usuario: {r.get('username') or 'N/A'}, Email: {r.get('email') or 'N/A'}, "
+                    f"Hash: {r.get('hashed_password') or 'N/A'}, Base: {r.get('database_name') or 'N/A'}\n"
+                    for r in entradas
+                )
+                self._mostrar_resultado(resultado, "success")
+            self._registrar({"total": total, "entries": recibidas})
+            self._mostrar_resultado(f"📥 {len(recibidas)} registros guardados en el almacén local de filtraciones.\n", "info")
+            self._mostrar_relacionados("email", email)
+        except ErrorConsulta as e:
+            self._mostrar_resultado(f"❌ {e}\n", "error")
         except Exception as e:
             self._mostrar_resultado(f"❌ Error inesperado: {e}\n", "error")
 
+    def _ejecutar_cruce_filtraciones(self, valor):
+        """Cruza un email, usuario o hash con las filtraciones ya guardadas, sin consultar la API."""
+        self._fijar_contexto("filtraciones", valor)
+        filtraciones = self.consultor.filtraciones
+        self._mostrar_resultado(f"\n[Filtraciones] Cruzando {valor} con el almacén local ({filtraciones.contar()} registros)...\n")
+        # El valor puede ser un email, un usuario o un hash: se usa el primer campo que coincida
+        campo = next((c for c in ("email", "username", "hashed_password", "password") if filtraciones.buscar(c, valor, limite=1)), None)
+        entradas = filtraciones.buscar(campo, valor) if campo else []
+        if not entradas:
+            self._mostrar_resultado("❌ No hay registros locales. Consulta antes el email en Dehashed.\n", "not_found")
+            return
+        self._mostrar_resultado(f"{len(entradas)} registros con {campo} = {valor}\n", "success")
+        self._mostrar_relacionados(campo, valor)
+
+    def _mostrar_relacionados(self, campo, valor):
+        nombres = {"hashed_password": "hash", "password": "contraseña", "username": "usuario", "email": "email"}
+        relacionados = self.consultor.filtraciones.relacionados(campo, valor, por=tuple(c for c in nombres if c != campo))
+        if not relacionados:
+            return
+        resultado = ""
+        for enlace, compartidos in relacionados.items():
+            for compartido, otros in compartidos.items():
+                resultado += f"🔗 Mismo {nombres[enlace]} ({compartido}): {', '.join(otros)}\n"
+        self._mostrar_resultado(resultado, "info")
+
     def _ejecutar_analisis_email_abstractapi(self, email):
-        api_key = self.apis.get("abstractapi_email")
-        if not api_key: return self._mostrar_error_api("AbstractAPI (Email)")
+        self._fijar_contexto("abstractapi_email", email)
+        if not self.apis.get("abstractapi_email"): return self._mostrar_error_api("AbstractAPI (Email)")
         self._mostrar_resultado(f"\n[AbstractAPI] Validando correo: {email}...\n")
         try:
-            resp = requests.get(f"https://emailvalidation.abstractapi.com/v1/?api_key={api_key}&email={email}", timeout=10)
-            if not resp.ok:
-                self._mostrar_resultado(f"❌ Error AbstractAPI (Email) HTTP {resp.status_code}: {resp.json().get('error', {}).get('message', 'Error')}\n", "error")
-                return
-            data = resp.json()
+            data = self.consultor.abstractapi_email(email)
+            self._registrar(data)
             resultado = (
                 f"✔️ Dirección: {data.get('email', 'N/A')}\nFormato válido: {data.get('is_valid_format', {}).get('value', 'N/A')}\n"
                 f"SMTP válido: {data.get('is_smtp_valid', {}).get('value', 'N/A')}\n"
                 f"Correo desechable: {data.get('is_disposable_email', {}).get('value', 'N/A')}\n"
             )
             self._mostrar_resultado(resultado, "success")
-        except requests.exceptions.RequestException as e:
-            self._mostrar_resultado(f"❌ Error de conexión: {e}\n", "error")
+        except ErrorConsulta as e:
+            self._mostrar_resultado(f"❌ {e}\n", "error")
+        except Exception as e:
+            self._mostrar_resultado(f"❌ Error inesperado: {e}\n", "error")
+
+    def _ejecutar_criba_correo(self, texto):
+        self._fijar_contexto("email_local", texto)
+        emails = [e.strip() for e in texto.replace(";", ",").split(",") if e.strip()]
+        self._mostrar_resultado(f"\n[Criba] Comprobando {len(emails)} correo(s): sintaxis, desechables y MX...\n")
+        pasan = 0
+        try:
+            for resultado in self.consultor.email_local_lote(emails).values():
+                self._avanzar(total=len(emails))
+                email = resultado["email"]
+                if not resultado["formato_valido"]:
+                    self._mostrar_resultado(f"❌ {email}: {resultado['motivo']}\n", "not_found")
+                elif resultado["desechable"]:
+                    self._mostrar_resultado(f"🗑️ {email}: dominio de correo desechable\n", "not_found")
+                elif resultado["valido"] is None:
+                    self._mostrar_resultado(f"❔ {email}: {resultado['motivo']}\n", "info")
+                elif resultado["valido"]:
+                    pasan += 1
+                    self._mostrar_resultado(f"✔️ {email}: MX {', '.join(resultado['mx']) or 'N/A'}\n", "success")
+                else:
+                    self._mostrar_resultado(f"❌ {email}: {resultado['motivo']}\n", "not_found")
         except Exception as e:
             self._mostrar_resultado(f"❌ Error inesperado: {e}\n", "error")
+            return
+        self._mostrar_resultado(f"✅ {pasan}/{len(emails)} pasan la criba y merecen una consulta de pago.\n", "info")
 
     def _ejecutar_analisis_telefono_veriphone(self, telefono):
-        api_key = self.apis.get("veriphone")
-        if not api_key: return self._mostrar_error_api("Veriphone")
+        self._fijar_contexto("veriphone", telefono)
+        if not self.apis.get("veriphone"): return self._mostrar_error_api("Veriphone")
         self._mostrar_resultado(f"\n[Veriphone] Validando número: {telefono}...\n")
         try:
-            resp = requests.get(f"https://api.veriphone.io/v2/verify?phone={telefono}&key={api_key}", timeout=10)
-            data = resp.json()
+            data = self.consultor.veriphone(telefono)
+            self._registrar(data)
             if not data.get("phone_valid"):
                 self._mostrar_resultado(f"❌ Número inválido. Mensaje: {data.get('error', 'N/A')}\n", "not_found")
                 return
@@ -460,18 +772,18 @@ class WicOsintXApp:
                 f"Operador: {data.get('carrier', 'N/A')}\nTipo de línea: {data.get('phone_type', 'N/A')}\n"
             )
             self._mostrar_resultado(resultado, "success")
-        except requests.exceptions.RequestException as e:
-            self._mostrar_resultado(f"❌ Error de conexión: {e}\n", "error")
+        except ErrorConsulta as e:
+            self._mostrar_resultado(f"❌ {e}\n", "error")
         except Exception as e:
             self._mostrar_resultado(f"❌ Error inesperado: {e}\n", "error")
 
     def _ejecutar_analisis_telefono_abstractapi(self, telefono):
-        api_key = self.apis.get("abstractapi")
-        if not api_key: return self._mostrar_error_api("AbstractAPI (Teléfono)")
+        self._fijar_contexto("abstractapi_telefono", telefono)
+        if not self.apis.get("abstractapi"): return self._mostrar_error_api("AbstractAPI (Teléfono)")
         self._mostrar_resultado(f"\n[AbstractAPI] Validando número: {telefono}...\n")
         try:
-            resp = requests.get(f"https://phonevalidation.abstractapi.com/v1/?api_key={api_key}&phone={telefono}", timeout=10)
-            data = resp.json()
+            data = self.consultor.abstractapi_telefono(telefono)
+            self._registrar(data)
             if not data.get("valid"):
                 self._mostrar_resultado(f"❌ Número inválido. Mensaje: {data.get('error', {}).get('message', 'N/A')}\n", "not_found")
                 return
@@ -481,82 +793,226 @@ class WicOsintXApp:
                 f"Operador: {data.get('carrier', 'N/A')}\n"
             )
             self._mostrar_resultado(resultado, "success")
-        except requests.exceptions.RequestException as e:
-            self._mostrar_resultado(f"❌ Error de conexión: {e}\n", "error")
+        except ErrorConsulta as e:
+            self._mostrar_resultado(f"❌ {e}\n", "error")
         except Exception as e:
             self._mostrar_resultado(f"❌ Error inesperado: {e}\n", "error")
         
+    def _ejecutar_telefonos_local(self, texto):
+        self._fijar_contexto("telefono_local", texto)
+        numeros = [n.strip() for n in texto.replace(";", ",").split(",") if n.strip()]
+        self._mostrar_resultado(f"\n[Local] Validando {len(numeros)} número(s) sin salir a la red...\n")
+        validos = 0
+        for resultado in self.consultor.telefono_local_lote(numeros).values():
+            self._avanzar(total=len(numeros))
+            numero = resultado["numero_internacional"] or resultado["entrada"]
+            if resultado["valido"] is None:
+                motivo = resultado["motivo"] or "sin prefijo internacional (indica +código o el país por defecto en Claves API)"
+                self._mostrar_resultado(f"❔ {numero}: {motivo}\n", "info")
+            elif resultado["valido"]:
+                validos += 1
+                self._mostrar_resultado(
+                    f"✔️ {numero}: {resultado['codigo_pais']}, {resultado['tipo_linea'] or 'tipo de línea desconocido'}\n", "success")
+            else:
+                self._mostrar_resultado(f"❌ {numero}: {resultado['motivo']}\n", "not_found")
+        self._mostrar_resultado(f"✅ {validos}/{len(numeros)} válidos. El operador solo lo dan Veriphone o AbstractAPI.\n", "info")
+
     def _ejecutar_analisis_metadatos(self):
         filepath = filedialog.askopenfilename(title="Selecciona una imagen para EXIF")
         if filepath:
-            self._ejecutar_en_hilo(self._extraer_exif_thread, filepath)
+            self._encolar(f"EXIF: {os.path.basename(filepath)}", self._extraer_exif_thread, filepath)
         
+    @property
+    def cache_metadatos(self):
+        if self._cache_metadatos is None:
+            from metadatos import CacheMetadatos
+            self._cache_metadatos = CacheMetadatos()
+        return self._cache_metadatos
+
     def _extraer_exif_thread(self, filepath):
+        from metadatos import ErrorMetadatos, leer_con_cache
+        self._fijar_contexto("exif", filepath)
         self._mostrar_resultado(f"\n[EXIF] Analizando archivo: {filepath}\n")
         try:
-            salida = subprocess.getoutput(f"exiftool \"{filepath}\"")
-            if salida.strip():
-                self._mostrar_resultado(salida + "\n", "success")
-            else:
-                self._mostrar_resultado("❌ No se pudieron extraer metadatos.\n", "not_found")
-        except FileNotFoundError:
-            self._mostrar_resultado("❌ Error: 'exiftool' no encontrado. Asegúrate de tenerlo instalado.\n", "error")
+            registro, desde_cache = leer_con_cache(filepath, self.cache_metadatos, calcular_hash=True)
+            if desde_cache:
+                self._mostrar_resultado("♻️ Fichero sin cambios: metadatos servidos desde la caché.\n", "info")
+            if not registro["etiquetas"] and not registro["textos"]:
+                self._mostrar_resultado(f"❌ El fichero ({registro['formato']}) no contiene metadatos EXIF.\n", "not_found")
+                return
+            self._mostrar_resultado(self._resumen_metadatos(registro) + "\n", "success")
+            if registro["gps"]:
+                self._mostrar_resultado("📍 Ver ubicación en el mapa (Haz clic)\n", "info", url=self._url_mapa(registro["gps"]))
+            detalle = "".join(f"{clave}: {valor}\n" for clave, valor in {**registro["etiquetas"], **registro["textos"]}.items())
+            self._mostrar_resultado(detalle + f"SHA-256: {registro['hash']}\n")
+        except (ErrorMetadatos, OSError) as e:
+            self._mostrar_resultado(f"❌ No se pudieron extraer metadatos: {e}\n", "error")
+        except Exception as e:
+            self._mostrar_resultado(f"❌ Error inesperado: {e}\n", "error")
+
+    def _ejecutar_analisis_carpeta(self):
+        carpeta = filedialog.askdirectory(title="Selecciona una carpeta de imágenes")
+        if carpeta:
+            self._encolar(f"EXIF carpeta: {carpeta}", self._extraer_exif_carpeta_thread, carpeta, prioridad=MASIVA)
+
+    def _extraer_exif_carpeta_thread(self, carpeta):
+        from metadatos import escanear_carpeta
+        self._fijar_contexto("exif", carpeta)
+        self._mostrar_resultado(f"\n[EXIF] Analizando carpeta: {carpeta}\n")
+        inicio = time.monotonic()
+        total = con_gps = cacheados = errores = 0
+        try:
+            for registro, desde_cache in escanear_carpeta(carpeta, self.cache_metadatos):
+                total += 1
+                cacheados += desde_cache
+                self._avanzar()
+                nombre = os.path.relpath(registro["ruta"], carpeta)
+                if "error" in registro:
+                    errores += 1
+                    self._mostrar_resultado(f"-> ❌ {nombre}: {registro['error']}\n", "error")
+                elif registro["gps"]:
+                    con_gps += 1
+                    self._mostrar_resultado(f"-> 📍 {nombre}: {self._resumen_metadatos(registro, linea=True)}\n", "success", url=self._url_mapa(registro["gps"]))
+                else:
+                    self._mostrar_resultado(f"-> {nombre}: {self._resumen_metadatos(registro, linea=True)}\n", "success" if registro["etiquetas"] else "pending")
+        except Exception as e:
+            self._mostrar_resultado(f"❌ Error al recorrer la carpeta: {e}\n", "error")
+        self._mostrar_resultado(
+            f"✅ {total} imágenes ({con_gps} con GPS, {errores} con error, {cacheados} desde la caché) "
+            f"en {time.monotonic() - inicio:.1f}s.\n", "info")
+
+    @property
+    def indice_imagenes(self):
+        if self._indice_imagenes is None:
+            from huellas_imagen import IndiceImagenes
+            self._indice_imagenes = IndiceImagenes()
+        return self._indice_imagenes
+
+    def _ejecutar_indexar_huellas(self):
+        carpeta = filedialog.askdirectory(title="Selecciona una carpeta de imágenes para indexar")
+        if carpeta:
+            self._encolar(f"Huellas carpeta: {carpeta}", self._indexar_huellas_thread, carpeta, prioridad=MASIVA)
+
+    def _indexar_huellas_thread(self, carpeta):
+        from huellas_imagen import ErrorHuellas, indexar_carpeta
+        self._fijar_contexto("huellas", carpeta)
+        self._mostrar_resultado(f"\n[Huellas] Indexando carpeta: {carpeta}\n")
+        inicio = time.monotonic()
+        total = previas = errores = 0
+        try:
+            for ruta, error, desde_indice in indexar_carpeta(carpeta, self.indice_imagenes):
+                total += 1
+                previas += desde_indice
+                self._avanzar()
+                if error:
+                    errores += 1
+                    self._mostrar_resultado(f"-> ❌ {os.path.relpath(ruta, carpeta)}: {error}\n", "error")
+        except ErrorHuellas as e:
+            self._mostrar_resultado(f"❌ {e}\n", "error")
+            return
         except Exception as e:
-            self._mostrar_resultado(f"❌ Error al ejecutar EXIFTool: {e}\n", "error")
+            self._mostrar_resultado(f"❌ Error al recorrer la carpeta: {e}\n", "error")
+        self._mostrar_resultado(
+            f"✅ {total} imágenes ({errores} con error, {previas} ya indexadas) en {time.monotonic() - inicio:.1f}s. "
+            f"El índice tiene {len(self.indice_imagenes)} imágenes.\n", "info")
+
+    def _ejecutar_buscar_similares(self):
+        filepath = filedialog.askopenfilename(title="Selecciona una imagen para buscar otras parecidas")
+        if filepath:
+            self._encolar(f"Similares: {os.path.basename(filepath)}", self._buscar_similares_thread, filepath)
+
+    def _buscar_similares_thread(self, filepath):
+        from huellas_imagen import ErrorHuellas, UMBRAL_POR_DEFECTO, huellas_imagen
+        from metadatos import ErrorMetadatos, leer_con_cache
+        self._fijar_contexto("huellas", filepath)
+        self._mostrar_resultado(f"\n[Huellas] Buscando imágenes parecidas a: {filepath}\n")
+        try:
+            huella = huellas_imagen(filepath)[self.indice_imagenes.tipo]
+            inicio = time.monotonic()
+            encontradas = self.indice_imagenes.buscar(huella, UMBRAL_POR_DEFECTO)
+        except ErrorHuellas as e:
+            self._mostrar_resultado(f"❌ {e}\n", "error")
+            return
+        propia = os.path.abspath(filepath)
+        encontradas = [(d, ruta) for d, ruta in encontradas if ruta != propia]
+        self._mostrar_resultado(
+            f"🔎 {len(encontradas)} imágenes parecidas entre {len(self.indice_imagenes)} indexadas "
+            f"({(time.monotonic() - inicio) * 1000:.0f} ms).\n", "info")
+        if not encontradas:
+            self._mostrar_resultado("❌ Ninguna imagen del índice se parece. ¿Has indexado la carpeta?\n", "not_found")
+        for d, ruta in encontradas:
+            self._mostrar_resultado(f"-> 🪞 {ruta} (distancia {d}/64)\n", "success", url=Path(ruta).as_uri())
+            try:
+                registro, _ = leer_con_cache(ruta, self.cache_metadatos)
+            except (ErrorMetadatos, OSError) as e:
+                self._mostrar_resultado(f"     EXIF: no disponible ({e})\n", "pending")
+                continue
+            except Exception as e:
+                # Una coincidencia con metadatos raros no debe cortar la lista
+                self._mostrar_resultado(f"     EXIF: error inesperado ({e})\n", "error")
+                continue
+            resumen = f"     EXIF: {self._resumen_metadatos(registro, linea=True)}\n"
+            if registro["gps"]:
+                self._mostrar_resultado(resumen, "info", url=self._url_mapa(registro["gps"]))
+            else:
+                self._mostrar_resultado(resumen, "info" if registro["etiquetas"] else "pending")
+
+    @staticmethod
+    def _url_mapa(gps):
+        return f"https://www.openstreetmap.org/?mlat={gps['latitud']}&mlon={gps['longitud']}#map=16/{gps['latitud']}/{gps['longitud']}"
+
+    @staticmethod
+    def _resumen_metadatos(registro, linea=False):
+        camara = " ".join(v for v in (registro["marca"], registro["modelo"]) if v) or "N/A"
+        fecha = registro["fecha_original"] or registro["fecha_modificacion"] or "N/A"
+        gps = f"{registro['gps']['latitud']}, {registro['gps']['longitud']}" if registro["gps"] else "N/A"
+        if linea:
+            return f"{camara} | {fecha} | GPS {gps}"
+        dimensiones = "x".join(str(d) for d in registro["dimensiones"]) if registro["dimensiones"] else "N/A"
+        return (
+            f"Formato: {registro['formato'].upper()} ({dimensiones})\nCámara: {camara}\n"
+            f"Objetivo: {registro['objetivo'] or 'N/A'}\nSoftware: {registro['software'] or 'N/A'}\n"
+            f"Fecha original: {fecha}\nGPS: {gps}"
+        )
 
     def _ejecutar_buscar_imagen_google(self):
         self._mostrar_resultado(f"\n[Google Reverse] Abriendo Google Imágenes para búsqueda inversa...\n")
         try:
+            import webbrowser
             webbrowser.open("https://images.google.com/")
             self._mostrar_resultado("🔍 Se ha abierto Google Imágenes. Arrastra una imagen al buscador.\n", "info")
         except Exception as e:
             self._mostrar_resultado(f"❌ Error al abrir navegador: {e}\n", "error")
 
     def _ejecutar_analisis_usuario(self, usuario):
-        self._mostrar_resultado(f"\n[Usuario] Buscando presencia online para: {usuario}\n")
-        sitios = {
-            "Twitter (X)": "https://twitter.com/{}", "GitHub": "https://github.com/{}",
-            "Reddit": "https://www.reddit.com/user/{}", "Instagram": "https://www.instagram.com/{}",
-            "Facebook": "https://www.facebook.com/{}", "TikTok": "https://www.tiktok.com/@{}",
-        }
-        for nombre, url_template in sitios.items():
-            self._ejecutar_en_hilo(self._verificar_sitio_usuario, nombre, url_template.format(usuario))
-
-    def _verificar_sitio_usuario(self, nombre_sitio, url):
-        # Para verificar si un perfil de usuario existe, un HEAD es a menudo suficiente
-        # ya que un 404 (Not Found) es un buen indicador de que el perfil no existe.
-        # Sin embargo, muchos sitios redirigen o devuelven 200 con contenido "vacío"
-        # si el usuario no existe, requiriendo un análisis más profundo del HTML,
-        # lo cual se evita aquí por la complejidad.
-        
-        status_text = f"[{nombre_sitio}] Verificando perfil..."
-        # Temporalmente, vamos a imprimir una línea que será sobrescrita o complementada
-        temp_tag = f"temp-user-{nombre_sitio}"
-        self._mostrar_resultado(f"-> {status_text}\n", ("pending", temp_tag))
+        self._fijar_contexto("usuario", usuario)
+        sitios = len(self.consultor.comprobador_usuarios.catalogo)
+        self._mostrar_resultado(f"\n[Usuario] Buscando presencia online para: {usuario} en {sitios} sitios\n")
+        inicio = time.monotonic()
+        encontrados = 0
+        resultados = []
+        for resultado in self.consultor.usuario(usuario):
+            encontrados += resultado["estado"] == ENCONTRADO
+            resultados.append(resultado)
+            self._mostrar_resultado_usuario(resultado)
+        self._registrar(resultados, "usuario", usuario)
+        self._mostrar_resultado(f"✅ {encontrados} perfiles encontrados en {sitios} sitios ({time.monotonic() - inicio:.1f}s).\n", "info")
 
-        try:
-            res = requests.head(url, timeout=7, allow_redirects=True)
-            message = ""
-            tags = ""
-            if res.status_code == 200:
-                message = f"✅ {nombre_sitio}: Perfil accesible."
-                tags = ("success", "link", url) # Añadir el tag "link" y la URL para que sea clickable
-                self.link_map[url] = url # Guardar la URL para el tag
-            elif res.status_code == 404:
-                message = f"❌ {nombre_sitio}: Perfil no encontrado (404)."
-                tags = "not_found"
-            else:
-                message = f"❗ {nombre_sitio}: Estado {res.status_code}. (Haz clic para revisar)"
-                tags = ("info", "link", url)
-                self.link_map[url] = url
-            
-            # Actualizamos el resultado
-            self.root.after(0, lambda: self._actualizar_linea_resultado(0, f"-> {message}\n", tags))
-
-        except requests.exceptions.RequestException as e:
-            message = f"🔌 {nombre_sitio}: Error de conexión o timeout: {e}"
-            tags = "error"
-            self.root.after(0, lambda: self._actualizar_linea_resultado(0, f"-> {message}\n", tags))
+    def _mostrar_resultado_usuario(self, resultado):
+        # La detección depende de la regla de cada sitio en sitios_usuario.json (código HTTP,
+        # redirección o marcadores en el HTML), así que los 200 "vacíos" ya no cuentan como perfil.
+        nombre_sitio, url, detalle = resultado["sitio"], resultado["url"], resultado["detalle"]
+        estado = resultado["estado"]
+        if estado == ENCONTRADO:
+            self._mostrar_resultado(f"-> ✅ {nombre_sitio}: Perfil encontrado ({detalle}).\n", "success", proveedor=nombre_sitio, url=url)
+        elif estado == NO_ENCONTRADO:
+            self._mostrar_resultado(f"-> ❌ {nombre_sitio}: Perfil no encontrado ({detalle}).\n", "not_found", proveedor=nombre_sitio)
+        elif estado == NO_VALIDO:
+            self._mostrar_resultado(f"-> ⏭️ {nombre_sitio}: Nombre no válido en el sitio, no se consulta.\n", "pending", proveedor=nombre_sitio)
+        elif estado == DESCONOCIDO:
+            self._mostrar_resultado(f"-> ❗ {nombre_sitio}: Resultado dudoso ({detalle}). (Haz clic para revisar)\n", "info", proveedor=nombre_sitio, url=url)
+        else:
+            self._mostrar_resultado(f"-> 🔌 {nombre_sitio}: Error de conexión o timeout: {detalle}\n", "error", proveedor=nombre_sitio)
 
     def _mostrar_menu_persona(self):
         self._crear_ventana_input("Buscar Persona por Nombre, DNI, etc.", self._ejecutar_busqueda_persona)
@@ -564,22 +1020,29 @@ class WicOsintXApp:
     def _mostrar_menu_ip(self):
         ventana_menu = tk.Toplevel(self.root)
         ventana_menu.title("Opciones de Análisis IP")
-        ventana_menu.geometry("300x180")
+        ventana_menu.geometry("300x320")
         ventana_menu.transient(self.root); ventana_menu.grab_set()
         tk.Label(ventana_menu, text="Elige una opción de análisis de IP:").pack(pady=10)
+        tk.Button(ventana_menu, text="⚡ IP con todos los proveedores", command=lambda: [self._crear_ventana_input("Ficha de IP (todos los proveedores)", lambda ip: self._ejecutar_ficha_entidad("ip", ip)), ventana_menu.destroy()]).pack(pady=3)
         tk.Button(ventana_menu, text="📂 IP con ipinfo.io", command=lambda: [self._crear_ventana_input("Análisis IP (ipinfo.io)", self._ejecutar_analisis_ip_ipinfo), ventana_menu.destroy()]).pack(pady=3)
         tk.Button(ventana_menu, text="📍 IP con AbstractAPI", command=lambda: [self._crear_ventana_input("Geolocalizar IP (AbstractAPI)", self._ejecutar_geolocalizar_ip_abstractapi), ventana_menu.destroy()]).pack(pady=3)
         tk.Button(ventana_menu, text="🛰️ IP con Shodan", command=lambda: [self._crear_ventana_input("Consulta Shodan por IP", self._ejecutar_analisis_shodan), ventana_menu.destroy()]).pack(pady=3)
+        tk.Button(ventana_menu, text="📦 Rango / CIDR / lista de IPs", command=lambda: [self._crear_ventana_input("IPs por lotes (CIDR, rango o lista)", self._ejecutar_ips_rango, MASIVA), ventana_menu.destroy()]).pack(pady=3)
+        tk.Button(ventana_menu, text="🗄️ IP en base local (sin red)", command=lambda: [self._crear_ventana_input("IP en la base local", self._ejecutar_ip_local), ventana_menu.destroy()]).pack(pady=3)
+        tk.Button(ventana_menu, text="📥 Importar base de IPs (CSV)", command=lambda: [ventana_menu.destroy(), self._importar_base_ip()]).pack(pady=3)
         ventana_menu.protocol("WM_DELETE_WINDOW", ventana_menu.destroy)
 
     def _mostrar_menu_email(self):
         ventana_menu = tk.Toplevel(self.root)
         ventana_menu.title("Opciones de Análisis de Email")
-        ventana_menu.geometry("300x150")
+        ventana_menu.geometry("300x250")
         ventana_menu.transient(self.root); ventana_menu.grab_set()
         tk.Label(ventana_menu, text="Elige una opción de análisis de Email:").pack(pady=10)
+        tk.Button(ventana_menu, text="⚡ Email con todos los proveedores", command=lambda: [self._crear_ventana_input("Ficha de Email (todos los proveedores)", lambda email: self._ejecutar_ficha_entidad("email", email)), ventana_menu.destroy()]).pack(pady=3)
         tk.Button(ventana_menu, text="📧 Email con Dehashed", command=lambda: [self._crear_ventana_input("Filtraciones de Email (Dehashed)", self._ejecutar_analisis_email_dehashed), ventana_menu.destroy()]).pack(pady=3)
         tk.Button(ventana_menu, text="📧 Email con AbstractAPI", command=lambda: [self._crear_ventana_input("Validar Email (AbstractAPI)", self._ejecutar_analisis_email_abstractapi), ventana_menu.destroy()]).pack(pady=3)
+        tk.Button(ventana_menu, text="📨 Cribar correos (sin APIs)", command=lambda: [self._crear_ventana_input("Correos a cribar (separados por comas)", self._ejecutar_criba_correo, NORMAL), ventana_menu.destroy()]).pack(pady=3)
+        tk.Button(ventana_menu, text="🔗 Cruzar filtraciones (local)", command=lambda: [self._crear_ventana_input("Email, usuario o hash a cruzar", self._ejecutar_cruce_filtraciones), ventana_menu.destroy()]).pack(pady=3)
         ventana_menu.protocol("WM_DELETE_WINDOW", ventana_menu.destroy)
         
     def _mostrar_menu_usuario(self):
@@ -588,20 +1051,25 @@ class WicOsintXApp:
     def _mostrar_menu_telefono(self):
         ventana_menu = tk.Toplevel(self.root)
         ventana_menu.title("Opciones de Análisis de Teléfono")
-        ventana_menu.geometry("300x150")
+        ventana_menu.geometry("300x220")
         ventana_menu.transient(self.root); ventana_menu.grab_set()
         tk.Label(ventana_menu, text="Elige una opción de análisis de Teléfono:").pack(pady=10)
+        tk.Button(ventana_menu, text="⚡ Teléfono con todos los proveedores", command=lambda: [self._crear_ventana_input("Ficha de Teléfono (todos los proveedores)", lambda telefono: self._ejecutar_ficha_entidad("telefono", telefono)), ventana_menu.destroy()]).pack(pady=3)
         tk.Button(ventana_menu, text="📱 Teléfono con Veriphone", command=lambda: [self._crear_ventana_input("Teléfono (Veriphone)", self._ejecutar_analisis_telefono_veriphone), ventana_menu.destroy()]).pack(pady=3)
         tk.Button(ventana_menu, text="📱 Teléfono con AbstractAPI", command=lambda: [self._crear_ventana_input("Teléfono (AbstractAPI)", self._ejecutar_analisis_telefono_abstractapi), ventana_menu.destroy()]).pack(pady=3)
+        tk.Button(ventana_menu, text="📴 Teléfonos sin red (local)", command=lambda: [self._crear_ventana_input("Teléfonos sin red (separados por comas)", self._ejecutar_telefonos_local, NORMAL), ventana_menu.destroy()]).pack(pady=3)
         ventana_menu.protocol("WM_DELETE_WINDOW", ventana_menu.destroy)
 
     def _mostrar_menu_imagen(self):
         ventana_menu = tk.Toplevel(self.root)
         ventana_menu.title("Opciones de Análisis de Imagen")
-        ventana_menu.geometry("300x150")
+        ventana_menu.geometry("300x250")
         ventana_menu.transient(self.root); ventana_menu.grab_set()
         tk.Label(ventana_menu, text="Elige una opción de análisis de Imagen:").pack(pady=10)
         tk.Button(ventana_menu, text="🖼️ Metadatos EXIF", command=lambda: [self._ejecutar_analisis_metadatos(), ventana_menu.destroy()]).pack(pady=3)
+        tk.Button(ventana_menu, text="📁 Metadatos de una carpeta", command=lambda: [self._ejecutar_analisis_carpeta(), ventana_menu.destroy()]).pack(pady=3)
+        tk.Button(ventana_menu, text="🧬 Indexar carpeta (huellas)", command=lambda: [ventana_menu.destroy(), self._ejecutar_indexar_huellas()]).pack(pady=3)
+        tk.Button(ventana_menu, text="🪞 Buscar imágenes parecidas (local)", command=lambda: [ventana_menu.destroy(), self._ejecutar_buscar_similares()]).pack(pady=3)
         tk.Button(ventana_menu, text="🔎 Búsqueda Inversa Google", command=lambda: [self._ejecutar_buscar_imagen_google(), ventana_menu.destroy()]).pack(pady=3)
         ventana_menu.protocol("WM_DELETE_WINDOW", ventana_menu.destroy)
 